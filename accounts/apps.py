@@ -15,4 +15,8 @@ class AccountsConfig(AppConfig):
         name (str): Nazwa aplikacji w projekcie Django.
     """
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'accounts'
\ No newline at end of file
+    name = 'accounts'
+
+    def ready(self):
+        """Rejestruje zapis użytkowników w cache przy logowaniu i ich usuwanie po zmianie (patrz `accounts.auth_cache`)."""
+        from . import auth_cache  # noqa: F401
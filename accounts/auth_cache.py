@@ -0,0 +1,152 @@
+# accounts/auth_cache.py
+"""
+Pamięć podręczna zalogowanego użytkownika.
+
+Standardowe `AuthenticationMiddleware` przy każdym żądaniu zalogowanego
+użytkownika odczytuje z bazy jego wiersz (`accounts.User`). Tutaj obiekt
+użytkownika jest przechowywany w cache `settings.QUIZ_AUTH_USER_CACHE` pod
+kluczem z jego identyfikatorem, razem ze skrótem uwierzytelnienia
+(`get_session_auth_hash`) i ścieżką backendu. Wpis jest używany tylko wtedy,
+gdy skrót zapisany w sesji jest zgodny - sesje unieważnione zmianą hasła
+trafiają do bazy i są kończone przez `django.contrib.auth.get_user`.
+
+Wpis powstaje przy logowaniu (sygnał `user_logged_in`) lub przy pierwszym
+odczycie z bazy i jest usuwany przy każdym zapisie i usunięciu użytkownika
+(sygnały `post_save`/`post_delete`). Zmiany wykonane przez `QuerySet.update()`
+nie wysyłają sygnałów - są widoczne najpóźniej po `QUIZ_AUTH_USER_CACHE_TTL` sekundach.
+
+Usunięcie wpisu musi dotrzeć do wszystkich procesów serwera, dlatego cache
+użytkownika i cache sesji (`cached_db`, `cache`) muszą być współdzielone
+(np. Redis, patrz `QUIZ_SHARED_CACHE_URL`) - kontrola `check_shared_caches`
+zgłasza błąd dla cache lokalnego w procesie. Bez `QUIZ_AUTH_USER_CACHE`
+użytkownik jest odczytywany z bazy, jak w `AuthenticationMiddleware`.
+"""
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.signals import user_logged_in
+from django.core import checks
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+#: Backendy cache przechowujące dane osobno w każdym procesie serwera.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+#: Silniki sesji odczytujące sesje z cache (`SESSION_CACHE_ALIAS`).
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def user_cache_key(user_id) -> str:
+    """
+    Zwraca klucz cache zalogowanego użytkownika.
+
+    Args:
+        user_id: Klucz główny użytkownika (z sesji lub modelu).
+
+    Returns:
+        str: Klucz postaci 'auth-user:<id>'.
+    """
+    return f"auth-user:{user_id}"
+
+
+def _cache():
+    alias = settings.QUIZ_AUTH_USER_CACHE
+    return caches[alias] if alias else None
+
+
+def _store(user, backend) -> None:
+    cache = _cache()
+    if cache is None:
+        return
+    cache.set(
+        user_cache_key(user.pk),
+        {'user': user, 'hash': user.get_session_auth_hash(), 'backend': backend},
+        settings.QUIZ_AUTH_USER_CACHE_TTL,
+    )
+
+
+def get_cached_user(request):
+    """
+    Zwraca użytkownika żądania z cache lub - przy braku wpisu - przez `auth.get_user`.
+
+    Args:
+        request (HttpRequest): Żądanie z sesją.
+
+    Returns:
+        User | AnonymousUser: Zalogowany użytkownik lub użytkownik anonimowy.
+    """
+    user_id = request.session.get(auth.SESSION_KEY)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    backend = request.session.get(auth.BACKEND_SESSION_KEY)
+    cache = _cache()
+    if user_id is not None and session_hash and cache is not None:
+        entry = cache.get(user_cache_key(user_id))
+        if entry is not None and entry['backend'] == backend and constant_time_compare(entry['hash'], session_hash):
+            return entry['user']
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        _store(user, backend)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    `AuthenticationMiddleware` odczytujące użytkownika przez `get_cached_user`.
+
+    Widoki asynchroniczne (`request.auser`) korzystają ze standardowego odczytu z bazy.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+
+
+@receiver(user_logged_in)
+def cache_logged_in_user(sender, request, user, **kwargs):
+    """Zapisuje w cache użytkownika tuż po zalogowaniu (po zapisie `last_login`)."""
+    _store(user, request.session.get(auth.BACKEND_SESSION_KEY))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Usuwa z cache zapisanego lub usuniętego użytkownika."""
+    cache = _cache()
+    if cache is not None:
+        cache.delete(user_cache_key(instance.pk))
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_caches(app_configs=None, **kwargs):
+    """
+    Sprawdza, czy cache użytkownika i sesji są współdzielone przez procesy serwera.
+
+    Returns:
+        list[checks.Error]: Błędy 'accounts.E001' dla aliasów wskazujących cache lokalny w procesie.
+    """
+    aliases = {}
+    if settings.QUIZ_AUTH_USER_CACHE:
+        aliases['QUIZ_AUTH_USER_CACHE'] = settings.QUIZ_AUTH_USER_CACHE
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        aliases['SESSION_CACHE_ALIAS'] = settings.SESSION_CACHE_ALIAS
+    return [
+        checks.Error(
+            f"{name} wskazuje cache '{alias}' przechowywany osobno w każdym procesie.",
+            hint="Użyj współdzielonego cache (QUIZ_SHARED_CACHE_URL) albo sesji w bazie bez cache użytkownika.",
+            id='accounts.E001',
+        )
+        for name, alias in aliases.items()
+        if settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.db import models
+from django.db.models.functions import Lower
 
 class User(AbstractUser):
     """
@@ -40,4 +41,12 @@ class User(AbstractUser):
         help_text='Specyficzne uprawnienia dla tego użytkownika.',
         related_name="%(app_label)s_%(class)s_user_permissions",
         related_query_name="user",
-    )
\ No newline at end of file
+    )
+
+    class Meta(AbstractUser.Meta):
+        # Indeksy wyszukiwania prefiksowego bez rozróżniania wielkości liter
+        # (podpowiedzi użytkowników w formularzu uprawnień quizu).
+        indexes = [
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
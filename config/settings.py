@@ -2,10 +2,14 @@
 
 from pathlib import Path
 import os # Import os for BASE_DIR if not already done via Path
+from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Zmienne środowiskowe z pliku .env (np. HF_TOKEN)
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -39,7 +43,8 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.auth_cache.CachedAuthenticationMiddleware',
+    'quizzes.routers.PrimaryStickinessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,13 +76,107 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Połączenia są utrzymywane między żądaniami (CONN_MAX_AGE), więc ustawienia
+# z QUIZ_SQLITE_PRAGMAS (patrz `quizzes.db`) są stosowane raz na połączenie.
+# Tryb IMMEDIATE zajmuje blokadę zapisu na początku transakcji - czekanie
+# obejmuje wtedy `busy_timeout`, zamiast kończyć się błędem "database is locked"
+# przy próbie podniesienia blokady odczytu do zapisu.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Repliki tylko do odczytu (patrz `quizzes.routers`): odczyty treści quizów w żądaniach
+# GET trafiają do replik, zapisy do 'default'. QUIZ_DB_REPLICAS_PATHS to lista ścieżek
+# plików SQLite rozdzielona przecinkami (lokalne zastępstwo replik); przy Postgresie
+# repliki dodaje się jako kolejne wpisy DATABASES i ich aliasy w QUIZ_DB_REPLICAS.
+QUIZ_DB_REPLICAS = []
+for _number, _path in enumerate(filter(None, os.getenv('QUIZ_DB_REPLICAS_PATHS', '').split(',')), start=1):
+    DATABASES[f'replica{_number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _path,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    QUIZ_DB_REPLICAS.append(f'replica{_number}')
+
+# Podejścia (QuizAttempt) są dzielone według klucza quizu między bazy z QUIZ_ATTEMPT_SHARDS
+# (patrz `quizzes.sharding`). QUIZ_ATTEMPT_SHARD_PATHS to lista ścieżek plików SQLite
+# rozdzielona przecinkami; po zmianie listy baz należy uruchomić `rebalance_attempts`.
+QUIZ_ATTEMPT_SHARDS = ['default']
+_shard_paths = list(filter(None, os.getenv('QUIZ_ATTEMPT_SHARD_PATHS', '').split(',')))
+if _shard_paths:
+    QUIZ_ATTEMPT_SHARDS = []
+    for _number, _path in enumerate(_shard_paths, start=1):
+        DATABASES[f'attempts{_number}'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': _path,
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+            'TEST': {'MIRROR': 'default'},
+        }
+        QUIZ_ATTEMPT_SHARDS.append(f'attempts{_number}')
+
+# Podejścia starsze niż QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS (pełne miesiące) polecenie
+# `archive_attempts` przenosi do skompresowanych plików w QUIZ_ATTEMPT_ARCHIVE_ROOT
+# (patrz `quizzes.archive`).
+QUIZ_ATTEMPT_ARCHIVE_ROOT = Path(os.getenv('QUIZ_ATTEMPT_ARCHIVE_ROOT', BASE_DIR / 'archive' / 'attempts'))
+QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS = 365   # mniej więcej rok szkolny
+
+# Pytania quizów nierozwiązywanych od QUIZ_ARCHIVE_INACTIVE_DAYS dni polecenie `archive_quizzes`
+# przenosi do skompresowanego archiwum; otwarcie quizu je przywraca (patrz `quizzes.quiz_archive`).
+QUIZ_ARCHIVE_INACTIVE_DAYS = 2 * 365
+
+DATABASE_ROUTERS = ['quizzes.routers.AttemptShardRouter', 'quizzes.routers.ReplicaRouter']
+QUIZ_DB_STICKY_SECONDS = 5   # po zapisie użytkownik czyta z bazy głównej przez tyle sekund
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Pamięć podręczna generatora AI jest plikowa, aby była wspólna dla serwera WWW i `run_worker`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'generation': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'generation',
+    },
+}
+
+# Komunikaty `messages` są przechowywane w ciasteczku - anonimowi użytkownicy
+# rozwiązujący publiczne quizy nie tworzą sesji w bazie.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Sesje i zalogowany użytkownik (patrz `accounts.auth_cache`) są buforowane tylko we
+# współdzielonym cache Redis, widocznym dla wszystkich procesów serwera - wylogowanie lub
+# zmiana użytkownika w jednym procesie od razu obowiązuje w pozostałych. QUIZ_SHARED_CACHE_URL
+# to adres serwera (np. redis://localhost:6379/1); bez niego sesje są przechowywane w bazie,
+# a użytkownik jest odczytywany z bazy przy każdym żądaniu.
+QUIZ_SHARED_CACHE_URL = os.getenv('QUIZ_SHARED_CACHE_URL')
+QUIZ_AUTH_USER_CACHE_TTL = 5 * 60   # maksymalny czas widoczności zmian spoza `User.save()` (s)
+if QUIZ_SHARED_CACHE_URL:
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': QUIZ_SHARED_CACHE_URL,
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    SESSION_CACHE_ALIAS = 'shared'
+    QUIZ_AUTH_USER_CACHE = 'shared'
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    QUIZ_AUTH_USER_CACHE = None
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -106,6 +205,10 @@ STATIC_URL = 'static/'
 # Tell Django where to find your project-wide static files (optional but good practice)
 STATICFILES_DIRS = [BASE_DIR / "static"]
 
+# Pliki przesyłane przez użytkowników (np. pliki importu przetwarzane w tle)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -119,4 +222,56 @@ LOGIN_URL = 'login' # Name of the login URL pattern
 
 # For testing password reset emails in the console
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
-# -----------------------------
\ No newline at end of file
+# -----------------------------
+
+# --- QUIZZES SETTINGS ---
+# Pliki importu większe niż ten próg (w bajtach) są importowane w tle przez `run_worker`
+QUIZ_IMPORT_INLINE_MAX_BYTES = 256 * 1024
+# Zlecenia w tle wykonywane dłużej (w sekundach) są uznawane za porzucone przez workera
+QUIZ_JOB_STALE_AFTER = 2 * 60 * 60
+
+# Generator AI - klient API zgodnego z OpenAI chat-completions (quizzes/llm.py)
+QUIZ_LLM_API_URL = os.getenv('HF_API_URL', "https://router.huggingface.co/v1/chat/completions")
+QUIZ_LLM_API_TOKEN = os.getenv('HF_TOKEN')
+QUIZ_LLM_CONNECT_TIMEOUT = 5     # sekundy na nawiązanie połączenia
+QUIZ_LLM_READ_TIMEOUT = 90       # sekundy na odpowiedź modelu
+QUIZ_LLM_MAX_RETRIES = 3         # ponowienia przy 429/5xx i błędach sieci
+QUIZ_LLM_BACKOFF = 1.0           # bazowe opóźnienie backoffu (s)
+QUIZ_LLM_MAX_BACKOFF = 30.0      # maksymalne opóźnienie, także dla Retry-After (s)
+QUIZ_LLM_POOL_SIZE = 10          # rozmiar puli połączeń keep-alive
+
+# Backendy modelu językowego: 'openai' (endpoint zgodny z OpenAI; brakujące URL/TOKEN
+# i limity czasu są brane z ustawień QUIZ_LLM_* powyżej) lub 'fake' (deterministyczny,
+# lokalny - do pracy offline). Każdy backend ma własny limit równoczesnych zapytań.
+QUIZ_LLM_BACKENDS = {
+    'default': {
+        'BACKEND': os.getenv('QUIZ_LLM_BACKEND', 'openai'),
+        'MODEL': os.getenv('QUIZ_LLM_MODEL', 'meta-llama/Meta-Llama-3-8B-Instruct'),
+        'MAX_CONCURRENCY': 4,
+    },
+}
+QUIZ_LLM_ROUTING = 'fastest'     # 'fastest' (najmniejsze opóźnienie) lub 'ordered'
+QUIZ_GENERATION_CACHE = 'generation'            # alias z CACHES dla wygenerowanych pytań
+QUIZ_GENERATION_CACHE_TTL = 7 * 24 * 60 * 60   # czas przechowywania (s)
+QUIZ_GENERATION_STREAMING = True               # zapisuj pytania w miarę napływania odpowiedzi (SSE)
+QUIZ_GENERATION_CHUNK_SIZE = 10                 # maks. liczba pytań w jednym zapytaniu do modelu
+QUIZ_GENERATION_MAX_PARALLEL = 4                # równoległe zapytania przy większej liczbie pytań
+
+# Wykrywanie niemal identycznych pytań (quizzes/duplicates.py): 'flag', 'drop' lub 'keep'
+QUIZ_DUPLICATE_THRESHOLD = 0.7                  # minimalne szacowane podobieństwo Jaccarda
+QUIZ_IMPORT_DUPLICATES = 'flag'                 # domyślny tryb przy imporcie plików
+QUIZ_GENERATION_DUPLICATES = 'drop'             # tryb przy generowaniu przez AI
+
+# Dane wyliczane z treści quizu (np. eksport JSON) są przechowywane w cache 'default'
+# pod kluczem z `Quiz.content_version`, więc zmiana quizu unieważnia je automatycznie.
+QUIZ_CONTENT_CACHE_TTL = 24 * 60 * 60           # czas przechowywania (s)
+
+# Ustawienia każdego połączenia SQLite (PRAGMA, patrz `quizzes.db`)
+QUIZ_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # odczyty nie czekają na zapis
+    'synchronous': 'NORMAL',        # w trybie WAL bezpieczne przy awarii procesu
+    'busy_timeout': 5000,           # czekanie na blokadę zapisu (ms)
+    'cache_size': -32000,           # pamięć podręczna stron (ujemna wartość: KiB)
+    'mmap_size': 256 * 1024 * 1024, # odczyt pliku bazy przez mmap (bajty)
+    'temp_store': 'MEMORY',         # tabele tymczasowe (sortowania, indeksy) w pamięci
+}
@@ -2,12 +2,44 @@
 """
 Moduł konfiguracji panelu administracyjnego dla aplikacji quizzes.
 
-Rejestruje modele Quiz, Question, Answer, QuizGroup oraz powiązane
-tabele uprawnień, umożliwiając zarządzanie nimi z poziomu panelu Django Admin.
+Rejestruje modele Quiz, Question, Answer, QuizGroup, QuestionBank oraz powiązane
+tabele uprawnień i dołączeń z banku pytań, umożliwiając zarządzanie nimi z poziomu panelu Django Admin.
+Strona quizu w panelu udostępnia też import pytań z pliku (wspólny zapis
+z `quizzes.persistence`).
 """
 
-from django.contrib import admin
-from .models import Quiz, Question, Answer, QuizAttempt, QuizGroup, QuizUserPermission, QuizGroupPermission
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .forms import QuestionImportForm
+from .importers import get_importer_for_filename
+from .cloning import clone_quiz
+from .views import _run_import
+from .models import (
+    Quiz, Question, Answer, QuizAttempt, QuizGroup, QuizUserPermission, QuizGroupPermission,
+    ImportJob, GenerationJob, QuestionBank, QuizBankItem, AttemptArchive,
+)
+
+class SoftDeleteAdminMixin:
+    """
+    Usuwanie w panelu admina przez `soft_delete` zamiast kaskadowego `delete()`.
+
+    Strona potwierdzenia nie zbiera obiektów zależnych (mogą ich być miliony) -
+    dane zależne usuwa później partiami polecenie `purge_deleted`.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return [str(obj) for obj in objs], {self.model._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            obj.soft_delete()
 
 class AnswerInline(admin.TabularInline):
     """
@@ -28,6 +60,14 @@ class QuestionInline(admin.TabularInline):
     extra = 1
     show_change_link = True
 
+class QuizBankItemInline(admin.TabularInline):
+    """
+    Widok inline dla pytań dołączonych z banku wewnątrz formularza quizu.
+    """
+    model = QuizBankItem
+    extra = 0
+    raw_id_fields = ['question']
+
 class QuizUserPermissionInline(admin.TabularInline):
     """
     Widok inline dla uprawnień użytkowników wewnątrz formularza quizu.
@@ -48,7 +88,7 @@ class QuizGroupPermissionInline(admin.TabularInline):
     extra = 1
 
 @admin.register(Quiz)
-class QuizAdmin(admin.ModelAdmin):
+class QuizAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """
     Konfiguracja panelu admina dla modelu Quiz.
 
@@ -60,11 +100,77 @@ class QuizAdmin(admin.ModelAdmin):
         list_filter (tuple): Filtry boczne (widoczność, autor).
         search_fields (tuple): Pola przeszukiwane (tytuł, nazwa autora).
         inlines (list): Lista klas inline dołączonych do widoku edycji.
+        actions (list): Akcje zbiorcze (kopiowanie quizów).
     """
     list_display = ('title', 'author', 'visibility', 'time_limit')
     list_filter = ('visibility', 'author')
     search_fields = ('title', 'author__username')
-    inlines = [QuizUserPermissionInline, QuizGroupPermissionInline, QuestionInline]
+    inlines = [QuizUserPermissionInline, QuizGroupPermissionInline, QuestionInline, QuizBankItemInline]
+    actions = ['duplicate_quizzes']
+
+    @admin.action(description="Duplikuj zaznaczone quizy (z uprawnieniami)")
+    def duplicate_quizzes(self, request, queryset):
+        """Kopiuje zaznaczone quizy wraz z pytaniami, odpowiedziami i uprawnieniami."""
+        for quiz in queryset:
+            clone_quiz(quiz, include_permissions=True)
+        self.message_user(request, f"Utworzono kopie quizów: {len(queryset)}.", messages.SUCCESS)
+
+    def save_related(self, request, form, formsets, change):
+        """Po zapisie ustawień i formularzy inline zwiększa wersję treści quizu."""
+        super().save_related(request, form, formsets, change)
+        if change:
+            Quiz.bump_content_version(form.instance.pk)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                '<path:object_id>/import/',
+                self.admin_site.admin_view(self.import_questions_view),
+                name='quizzes_quiz_import',
+            ),
+        ]
+        return custom_urls + urls
+
+    def import_questions_view(self, request, object_id):
+        """
+        Importuje pytania z pliku do quizu.
+
+        Import przechodzi tą samą ścieżką co w widoku edycji quizu
+        (`quizzes.views._run_import`): wykrywanie duplikatów (`DuplicateFilter`),
+        zapis przez `persist_questions` w jednej transakcji, a dla dużych plików -
+        zlecenie w tle.
+
+        Args:
+            request (HttpRequest): Obiekt żądania HTTP.
+            object_id (str): Klucz główny quizu.
+
+        Returns:
+            HttpResponse: Formularz importu lub przekierowanie do strony quizu.
+        """
+        quiz = self.get_object(request, object_id)
+        if quiz is None:
+            return self._get_obj_does_not_exist_redirect(request, self.model._meta, object_id)
+        if not self.has_change_permission(request, quiz):
+            raise PermissionDenied
+
+        form = QuestionImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            file = form.cleaned_data['import_file']
+            importer = get_importer_for_filename(file.name)
+            if importer is None:
+                form.add_error('import_file', "Nieobsługiwany format pliku.")
+            elif _run_import(request, quiz, importer, file):
+                return redirect('admin:quizzes_quiz_change', quiz.pk)
+
+        context = {
+            **self.admin_site.each_context(request),
+            'title': f"Import pytań: {quiz.title}",
+            'opts': self.model._meta,
+            'original': quiz,
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/quizzes/quiz/import_questions.html', context)
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
@@ -75,13 +181,33 @@ class QuestionAdmin(admin.ModelAdmin):
 
     Attributes:
         list_display (tuple): Kolumny widoczne na liście pytań.
+        list_filter (tuple): Filtry możliwych duplikatów i banku pytań.
         inlines (list): Lista klas inline (odpowiedzi).
     """
-    list_display = ('text', 'quiz', 'question_type')
+    list_display = ('text', 'quiz', 'bank', 'question_type', 'possible_duplicate')
+    list_filter = ('possible_duplicate', 'bank')
     inlines = [AnswerInline]
 
+    def save_related(self, request, form, formsets, change):
+        """Po zapisie pytania i odpowiedzi zwiększa wersję treści quizów, w których występuje."""
+        super().save_related(request, form, formsets, change)
+        form.instance.bump_quiz_versions()
+
+@admin.register(QuestionBank)
+class QuestionBankAdmin(admin.ModelAdmin):
+    """
+    Konfiguracja panelu admina dla modelu QuestionBank.
+
+    Attributes:
+        list_display (tuple): Kolumny widoczne na liście banków.
+        inlines (list): Lista klas inline (pytania banku).
+    """
+    list_display = ('name', 'owner', 'is_shared')
+    list_filter = ('is_shared',)
+    inlines = [QuestionInline]
+
 @admin.register(QuizGroup)
-class QuizGroupAdmin(admin.ModelAdmin):
+class QuizGroupAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     """
     Konfiguracja panelu admina dla modelu QuizGroup.
 
@@ -90,4 +216,46 @@ class QuizGroupAdmin(admin.ModelAdmin):
     """
     filter_horizontal = ('members',)
 
-admin.site.register(QuizAttempt)
\ No newline at end of file
+admin.site.register(QuizAttempt)
+
+@admin.register(AttemptArchive)
+class AttemptArchiveAdmin(admin.ModelAdmin):
+    """
+    Konfiguracja panelu admina dla manifestu archiwum podejść (tylko podgląd).
+
+    Attributes:
+        list_display (tuple): Kolumny widoczne na liście plików archiwum.
+        list_filter (tuple): Filtr według bazy źródłowej.
+    """
+    list_display = ('quiz', 'month', 'database', 'row_count', 'path', 'created_at')
+    list_filter = ('database',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    """
+    Konfiguracja panelu admina dla zleceń importu wykonywanych w tle.
+
+    Attributes:
+        list_display (tuple): Kolumny widoczne na liście zleceń.
+        list_filter (tuple): Filtr według statusu.
+    """
+    list_display = ('pk', 'quiz', 'format_name', 'status', 'processed_count', 'progress', 'created_at')
+    list_filter = ('status',)
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    """
+    Konfiguracja panelu admina dla zleceń generowania quizów przez AI.
+
+    Attributes:
+        list_display (tuple): Kolumny widoczne na liście zleceń.
+        list_filter (tuple): Filtr według statusu.
+    """
+    list_display = ('pk', 'topic', 'count', 'created_by', 'status', 'quiz', 'created_at')
+    list_filter = ('status',)
@@ -15,4 +15,11 @@ class QuizzesConfig(AppConfig):
         name (str): Nazwa aplikacji.
     """
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'quizzes'
\ No newline at end of file
+    name = 'quizzes'
+
+    def ready(self):
+        """
+        Rejestruje konfigurację połączeń SQLite (sygnał `connection_created`, patrz `quizzes.db`)
+        i usuwanie plików archiwum podejść razem z wpisami manifestu (patrz `quizzes.archive`).
+        """
+        from . import archive, db  # noqa: F401
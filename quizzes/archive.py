@@ -0,0 +1,367 @@
+# quizzes/archive.py
+"""
+Archiwizacja starych podejść (`QuizAttempt`) do skompresowanych plików.
+
+Podejścia starsze niż `settings.QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS` prawie nigdy
+nie są odczytywane, a powiększają tabelę, jej indeksy i każdą kopię zapasową.
+Polecenie `archive_attempts` przepisuje je strumieniowo do plików JSON Lines
+skompresowanych gzipem - jeden plik na quiz, miesiąc i bazę podziału - w katalogu
+`settings.QUIZ_ATTEMPT_ARCHIVE_ROOT`, zapisuje wpis manifestu (`AttemptArchive`)
+z podsumowaniem wyników, a dopiero potem usuwa wiersze z bazy partiami.
+
+Przerwanie archiwizacji nie gubi ani nie dubluje podejść: plik jest zapisywany
+pod tymczasową nazwą i przemianowywany po zakończeniu, a wiersze o kluczach
+nie większych niż `AttemptArchive.max_pk` są usuwane przy kolejnym uruchomieniu.
+
+Historia i statystyki quizu (`quiz_history`, `quiz_attempt_stats`) domyślnie
+obejmują tylko bazę; z `include_archived=True` dołączają miesiące z archiwum.
+Historia jest stronicowana w bazie, a z archiwum odczytuje tylko pliki
+miesięcy potrzebnych do bieżącej strony.
+"""
+
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .models import AttemptArchive, QuizAttempt
+
+#: Liczba podejść odczytywanych lub usuwanych naraz.
+ARCHIVE_BATCH_SIZE = 2000
+
+#: Pola podejścia zapisywane w archiwum (quiz i miesiąc wynikają z wpisu manifestu).
+ARCHIVED_FIELDS = ('user_id', 'score', 'correct_count', 'total_questions', 'time_over', 'timestamp')
+
+
+def archive_root() -> Path:
+    """Katalog archiwum podejść (`settings.QUIZ_ATTEMPT_ARCHIVE_ROOT`)."""
+    return Path(settings.QUIZ_ATTEMPT_ARCHIVE_ROOT)
+
+
+def archive_cutoff(days: int | None = None) -> datetime:
+    """
+    Wyznacza granicę archiwizacji - archiwizowane są tylko pełne miesiące sprzed niej.
+
+    Args:
+        days (int, optional): Wiek podejść w dniach (domyślnie `QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS`).
+
+    Returns:
+        datetime: Początek miesiąca, w którym wypada data sprzed `days` dni (czas lokalny).
+    """
+    if days is None:
+        days = settings.QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS
+    moment = timezone.localtime(timezone.now() - timedelta(days=days))
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def month_bounds(month: date) -> tuple:
+    """
+    Zwraca granice miesiąca w czasie lokalnym.
+
+    Args:
+        month (date): Dowolny dzień miesiąca.
+
+    Returns:
+        tuple[datetime, datetime]: Początek miesiąca i początek następnego miesiąca.
+    """
+    start = timezone.make_aware(datetime(month.year, month.month, 1))
+    following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return start, timezone.make_aware(datetime(following.year, following.month, 1))
+
+
+def _month_attempts(quiz_id: int, month: date, using: str):
+    start, end = month_bounds(month)
+    return QuizAttempt.objects.using(using).filter(quiz_id=quiz_id, timestamp__gte=start, timestamp__lt=end)
+
+
+def archivable_months(cutoff: datetime, using: str = 'default') -> list:
+    """
+    Zwraca pary (quiz, miesiąc) z podejściami sprzed granicy archiwizacji.
+
+    Args:
+        cutoff (datetime): Granica z `archive_cutoff`.
+        using (str): Alias bazy podejść.
+
+    Returns:
+        list[tuple[int, date]]: Klucze quizów i pierwsze dni miesięcy, od najstarszych.
+    """
+    rows = (
+        QuizAttempt.objects.using(using).filter(timestamp__lt=cutoff)
+        .annotate(month=TruncMonth('timestamp')).values_list('quiz_id', 'month')
+        .distinct().order_by('month', 'quiz_id')
+    )
+    return [(quiz_id, timezone.localtime(month).date()) for quiz_id, month in rows]
+
+
+def _delete_archived(queryset, max_pk: int, batch_size: int, pause: float) -> int:
+    deleted = 0
+    while True:
+        ids = list(queryset.filter(pk__lte=max_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.filter(pk__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+
+def _write_rows(target: Path, rows) -> dict:
+    summary = {'row_count': 0, 'score_sum': 0, 'score_min': None, 'score_max': None}
+    temporary = target.with_name(target.name + '.tmp')
+    with gzip.open(temporary, 'wt', encoding='utf-8') as handle:
+        for row in rows:
+            row['timestamp'] = row['timestamp'].isoformat()
+            handle.write(json.dumps(row, ensure_ascii=False) + '\n')
+            score = row['score']
+            summary['row_count'] += 1
+            summary['score_sum'] += score
+            summary['score_min'] = score if summary['score_min'] is None else min(summary['score_min'], score)
+            summary['score_max'] = score if summary['score_max'] is None else max(summary['score_max'], score)
+    with open(temporary, 'rb') as handle:
+        os.fsync(handle.fileno())
+    os.replace(temporary, target)
+    return summary
+
+
+def archive_month(quiz_id: int, month: date, using: str = 'default',
+                  batch_size: int = ARCHIVE_BATCH_SIZE, pause: float = 0.0):
+    """
+    Przenosi podejścia quizu z jednego miesiąca do pliku archiwum i usuwa je z bazy.
+
+    Najpierw dokańcza usuwanie po przerwanej archiwizacji (wiersze objęte
+    wcześniejszym wpisem manifestu), potem archiwizuje pozostałe podejścia.
+
+    Args:
+        quiz_id (int): Klucz quizu.
+        month (date): Pierwszy dzień miesiąca.
+        using (str): Alias bazy podejść.
+        batch_size (int): Liczba wierszy odczytywanych i usuwanych naraz.
+        pause (float): Przerwa między partiami usuwania (s).
+
+    Returns:
+        AttemptArchive | None: Nowy wpis manifestu lub None, jeśli nie było czego archiwizować.
+    """
+    attempts = _month_attempts(quiz_id, month, using)
+    previous = AttemptArchive.objects.filter(quiz_id=quiz_id, month=month, database=using).aggregate(max_pk=Max('max_pk'))
+    if previous['max_pk'] is not None:
+        _delete_archived(attempts, previous['max_pk'], batch_size, pause)
+
+    max_pk = attempts.aggregate(max_pk=Max('pk'))['max_pk']
+    if max_pk is None:
+        return None
+    path = Path(f"quiz_{quiz_id}") / f"{month:%Y-%m}.{using}.{max_pk}.jsonl.gz"
+    target = archive_root() / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    rows = attempts.filter(pk__lte=max_pk).order_by('pk').values(*ARCHIVED_FIELDS).iterator(chunk_size=batch_size)
+    summary = _write_rows(target, rows)
+
+    part = AttemptArchive.objects.create(
+        quiz_id=quiz_id, month=month, database=using, path=path.as_posix(), max_pk=max_pk, **summary,
+    )
+    _delete_archived(attempts, max_pk, batch_size, pause)
+    return part
+
+
+def read_archive(part: AttemptArchive):
+    """
+    Odczytuje podejścia z pliku archiwum.
+
+    Args:
+        part (AttemptArchive): Wpis manifestu.
+
+    Yields:
+        QuizAttempt: Niezapisane obiekty podejść (bez klucza głównego).
+    """
+    with gzip.open(archive_root() / part.path, 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            row = json.loads(line)
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            yield QuizAttempt(quiz_id=part.quiz_id, **row)
+
+
+def archived_attempts(quiz, since: date | None = None):
+    """
+    Zwraca podejścia quizu z archiwum.
+
+    Args:
+        quiz (Quiz | int): Quiz lub jego klucz.
+        since (date, optional): Pomija miesiące przed tą datą.
+
+    Yields:
+        QuizAttempt: Zarchiwizowane podejścia, miesiąc po miesiącu.
+    """
+    parts = AttemptArchive.objects.filter(quiz_id=getattr(quiz, 'pk', quiz))
+    if since is not None:
+        parts = parts.filter(month__gte=since.replace(day=1))
+    for part in parts:
+        yield from read_archive(part)
+
+
+class AttemptHistory:
+    """
+    Historia podejść quizu od najnowszych, odczytywana leniwie fragmentami.
+
+    Obiekt zachowuje się jak sekwencja (`len`, indeksy, wycinki, iteracja),
+    więc można go przekazać bezpośrednio do `Paginator`. Wycinek podejść z bazy
+    to jedno zapytanie z `LIMIT`/`OFFSET` w bazie podziału quizu; przy
+    `include_archived=True` historia jest dzielona na miesiące według manifestu
+    i odczytywane są tylko pliki miesięcy objętych wycinkiem.
+
+    Args:
+        quiz (Quiz | int): Quiz lub jego klucz.
+        include_archived (bool): Czy dołączyć podejścia z archiwum.
+        since (datetime, optional): Tylko podejścia od tej chwili.
+    """
+
+    def __init__(self, quiz, include_archived: bool = False, since: datetime | None = None):
+        self.quiz_id = getattr(quiz, 'pk', quiz)
+        self.since = since
+        live = QuizAttempt.objects.for_quiz(self.quiz_id)
+        if since is not None:
+            live = live.filter(timestamp__gte=since)
+        self.live = live.order_by('-timestamp', '-pk')
+        self.parts = defaultdict(list)
+        if include_archived:
+            parts = AttemptArchive.objects.filter(quiz_id=self.quiz_id)
+            if since is not None:
+                parts = parts.filter(month__gte=timezone.localtime(since).date().replace(day=1))
+            for part in parts:
+                self.parts[part.month].append(part)
+
+    @cached_property
+    def _segments(self) -> list:
+        """Pary (miesiąc lub None dla całej bazy, liczba podejść), od najnowszych."""
+        if not self.parts:
+            return [(None, self.live.count())]
+        live_counts = {
+            timezone.localtime(month).date(): count
+            for month, count in self.live.annotate(month=TruncMonth('timestamp'))
+            .order_by().values_list('month').annotate(count=Count('pk'))
+        }
+        since_month = timezone.localtime(self.since).date().replace(day=1) if self.since else None
+        segments = []
+        for month in sorted(set(live_counts) | set(self.parts), reverse=True):
+            if month == since_month and month in self.parts:
+                count = len(self._month(month))
+            else:
+                count = live_counts.get(month, 0) + sum(part.row_count for part in self.parts.get(month, ()))
+            segments.append((month, count))
+        return segments
+
+    def _month(self, month: date) -> list:
+        """Podejścia z bazy i z archiwum z jednego miesiąca, od najnowszych."""
+        start, end = month_bounds(month)
+        attempts = list(self.live.filter(timestamp__gte=start, timestamp__lt=end))
+        for part in self.parts.get(month, ()):
+            attempts.extend(a for a in read_archive(part) if self.since is None or a.timestamp >= self.since)
+        attempts.sort(key=lambda attempt: attempt.timestamp, reverse=True)
+        return attempts
+
+    def _fetch(self, month, start: int, stop: int) -> list:
+        if month is None:
+            return list(self.live[start:stop])
+        if month in self.parts:
+            return self._month(month)[start:stop]
+        first, following = month_bounds(month)
+        return list(self.live.filter(timestamp__gte=first, timestamp__lt=following)[start:stop])
+
+    def count(self) -> int:
+        return sum(count for _, count in self._segments)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            if index < 0:
+                index += self.count()
+            items = self[index:index + 1] if index >= 0 else []
+            if not items:
+                raise IndexError(index)
+            return items[0]
+        start, stop, _ = index.indices(self.count())
+        items, offset = [], 0
+        for month, count in self._segments:
+            if offset >= stop:
+                break
+            if offset + count > start:
+                items.extend(self._fetch(month, max(start - offset, 0), min(stop - offset, count)))
+            offset += count
+        return items
+
+    def __iter__(self):
+        for month, count in self._segments:
+            if month is None:
+                yield from self.live.iterator(chunk_size=ARCHIVE_BATCH_SIZE)
+            elif count:
+                yield from self._fetch(month, 0, count)
+
+
+def quiz_history(quiz, include_archived: bool = False, since: datetime | None = None) -> AttemptHistory:
+    """
+    Zwraca podejścia quizu od najnowszych, opcjonalnie razem z zarchiwizowanymi.
+
+    Podejścia nie są wczytywane od razu - wynik można stronicować (`Paginator`),
+    a każda strona odczytuje z bazy i archiwum tylko potrzebne wiersze.
+
+    Args:
+        quiz (Quiz | int): Quiz lub jego klucz.
+        include_archived (bool): Czy dołączyć podejścia z archiwum (odczyt plików).
+        since (datetime, optional): Tylko podejścia od tej chwili.
+
+    Returns:
+        AttemptHistory: Leniwa sekwencja podejść posortowanych malejąco po dacie.
+    """
+    return AttemptHistory(quiz, include_archived=include_archived, since=since)
+
+
+def quiz_attempt_stats(quiz, include_archived: bool = False) -> dict:
+    """
+    Liczy statystyki wyników quizu, opcjonalnie razem z archiwum.
+
+    Zarchiwizowane miesiące są uwzględniane na podstawie podsumowań z manifestu,
+    bez odczytu plików.
+
+    Args:
+        quiz (Quiz | int): Quiz lub jego klucz.
+        include_archived (bool): Czy uwzględnić podejścia z archiwum.
+
+    Returns:
+        dict: Klucze 'count', 'avg_score', 'min_score', 'max_score' (None bez podejść).
+    """
+    live = QuizAttempt.objects.for_quiz(quiz).aggregate(
+        count=Count('pk'), score_sum=Sum('score'), min_score=Min('score'), max_score=Max('score'),
+    )
+    parts = [live]
+    if include_archived:
+        parts.append(AttemptArchive.objects.filter(quiz_id=getattr(quiz, 'pk', quiz)).aggregate(
+            count=Sum('row_count'), score_sum=Sum('score_sum'), min_score=Min('score_min'), max_score=Max('score_max'),
+        ))
+
+    def values(key):
+        return [part[key] for part in parts if part[key] is not None]
+
+    count = sum(values('count'))
+    return {
+        'count': count,
+        'avg_score': sum(values('score_sum')) / count if count else None,
+        'min_score': min(values('min_score'), default=None),
+        'max_score': max(values('max_score'), default=None),
+    }
+
+
+@receiver(post_delete, sender=AttemptArchive)
+def _delete_archive_file(sender, instance, **kwargs):
+    """Usuwa plik archiwum razem z wpisem manifestu (także przy kaskadowym usunięciu quizu)."""
+    (archive_root() / instance.path).unlink(missing_ok=True)
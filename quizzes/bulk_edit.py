@@ -0,0 +1,238 @@
+# quizzes/bulk_edit.py
+"""
+Zbiorcza edycja pytań quizu (API edytora arkuszowego).
+
+Przyjmuje jedną paczkę zmian w postaci:
+
+    {'questions': [
+         {'id': 12, 'text': '...', 'answers': [{'id': 5, 'text': '...', 'is_correct': true},
+                                                {'text': 'nowa odpowiedź', 'is_correct': false}]},
+         {'text': 'nowe pytanie', 'question_type': 'MULTIPLE', 'answers': [...]},
+     ],
+     'delete': [13, 14],
+     'content_version': 7}
+
+Pytanie z kluczem 'id' jest aktualizowane (pominięte pola zachowują obecne
+wartości), pytanie bez 'id' jest tworzone. Jeśli podano listę 'answers',
+zastępuje ona odpowiedzi pytania: odpowiedzi z 'id' są aktualizowane, bez 'id'
+tworzone, a nieobecne na liście (lub z pustą treścią) usuwane.
+
+Cała paczka jest najpierw walidowana (te same reguły co przy imporcie, patrz
+`validate_question_record`), a następnie zapisywana w jednej transakcji stałą
+liczbą zapytań: `bulk_update` pytań i odpowiedzi, `bulk_create` nowych
+odpowiedzi i pytań oraz jedno `DELETE` na model.
+
+Opcjonalny klucz 'content_version' to wersja quizu wczytana przez edytor
+(`Quiz.content_version`) - jeśli quiz zmienił się w międzyczasie, paczka jest
+odrzucana w całości (blokada optymistyczna).
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .duplicates import record_signature
+from .importers import validate_question_record
+from .models import Answer, Question, Quiz
+from .persistence import insert_question_batch
+
+#: Komunikat błędu przy zapisie paczki przygotowanej dla nieaktualnej wersji quizu.
+STALE_VERSION_ERROR = "Quiz został w międzyczasie zmieniony przez innego edytora. Odśwież stronę i wprowadź zmiany ponownie."
+
+#: Pola pytania, które można zmienić w paczce.
+QUESTION_FIELDS = ('text', 'explanation', 'question_type')
+
+
+def serialize_question(question) -> dict:
+    """
+    Zwraca pytanie (z odpowiedziami) w formacie API edytora.
+
+    Args:
+        question (Question): Pytanie z pobranymi odpowiedziami (`prefetch_related('answers')`).
+
+    Returns:
+        dict: Słownik z kluczami 'id', 'text', 'explanation', 'question_type',
+            'possible_duplicate', 'bank' (klucz banku pytania dołączonego z banku
+            lub None) i 'answers'.
+    """
+    return {
+        'id': question.pk,
+        'bank': question.bank_id,
+        'text': question.text,
+        'explanation': question.explanation,
+        'question_type': question.question_type,
+        'possible_duplicate': question.possible_duplicate,
+        'answers': [
+            {'id': answer.pk, 'text': answer.text, 'is_correct': answer.is_correct}
+            for answer in question.answers.all()
+        ],
+    }
+
+
+def _parse_id(value, label: str) -> int:
+    if isinstance(value, bool):
+        raise ValidationError(f"{label}: Niepoprawny identyfikator.")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{label}: Niepoprawny identyfikator.")
+
+
+def _validate_item(item, number: int, existing: dict):
+    """
+    Waliduje jedną pozycję paczki.
+
+    Returns:
+        tuple: (pytanie lub None dla nowego, zwalidowany rekord, identyfikatory odpowiedzi).
+
+    Raises:
+        ValidationError: Jeśli pozycja jest niepoprawna.
+    """
+    if not isinstance(item, dict):
+        raise ValidationError(f"Pytanie {number}: Nie jest poprawnym obiektem JSON.")
+
+    question = None
+    data = item
+    if item.get('id') is not None:
+        question = existing[_parse_id(item['id'], f"Pytanie {number}")]
+        data = {
+            'text': question.text,
+            'explanation': question.explanation,
+            'question_type': question.question_type,
+            'answers': [
+                {'id': a.pk, 'text': a.text, 'is_correct': a.is_correct}
+                for a in question.answers.all()
+            ],
+        }
+        data.update({key: item[key] for key in QUESTION_FIELDS + ('answers',) if key in item})
+
+    answers = data.get('answers')
+    if isinstance(answers, list):
+        # Odpowiedź z pustą treścią oznacza jej usunięcie.
+        answers = [a for a in answers if not isinstance(a, dict) or a.get('text')]
+    record = validate_question_record(dict(data, answers=answers), number)
+
+    allowed = {a.pk for a in question.answers.all()} if question is not None else set()
+    answer_ids = []
+    for answer_number, answer in enumerate(answers, start=1):
+        answer_id = answer.get('id')
+        if answer_id is not None:
+            answer_id = _parse_id(answer_id, f"Pytanie {number}, Odpowiedź {answer_number}")
+            if answer_id not in allowed:
+                raise ValidationError(
+                    f"Pytanie {number}, Odpowiedź {answer_number}: Odpowiedź nie należy do tego pytania."
+                )
+            allowed.discard(answer_id)
+        answer_ids.append(answer_id)
+    return question, record, answer_ids
+
+
+def apply_bulk_edit(quiz, payload) -> dict:
+    """
+    Waliduje i zapisuje paczkę zmian pytań quizu w jednej transakcji.
+
+    Uprawnienia do edycji quizu sprawdza wywołujący (raz dla całej paczki).
+
+    Args:
+        quiz (Quiz): Edytowany quiz.
+        payload (dict): Paczka zmian z kluczami 'questions' i 'delete' (patrz opis modułu).
+
+    Returns:
+        dict: Liczniki 'updated', 'created', 'deleted', nowa wersja quizu 'content_version'
+            oraz lista 'questions' ze zmienionymi i utworzonymi pytaniami (`serialize_question`).
+
+    Raises:
+        ValidationError: Lista wszystkich błędów paczki; w takim przypadku nic nie jest zapisywane.
+    """
+    if not isinstance(payload, dict):
+        raise ValidationError("Niepoprawny format danych - oczekiwano obiektu JSON.")
+    items = payload.get('questions') or []
+    delete_ids = payload.get('delete') or []
+    if not isinstance(items, list) or not isinstance(delete_ids, list):
+        raise ValidationError("Klucze 'questions' i 'delete' muszą być listami.")
+
+    expected = payload.get('content_version')
+    if expected is not None:
+        expected = _parse_id(expected, "Wersja quizu")
+
+    errors = []
+    delete_ids = {_parse_id(pk, "Usuwane pytanie") for pk in delete_ids}
+    update_ids = set()
+    for number, item in enumerate(items, start=1):
+        if isinstance(item, dict) and item.get('id') is not None:
+            try:
+                pk = _parse_id(item['id'], f"Pytanie {number}")
+            except ValidationError as e:
+                errors.extend(e.messages)
+                continue
+            if pk in update_ids:
+                errors.append(f"Pytanie {number}: Pytanie #{pk} występuje w paczce więcej niż raz.")
+            update_ids.add(pk)
+
+    existing = {
+        q.pk: q for q in quiz.questions.filter(pk__in=update_ids | delete_ids).prefetch_related('answers')
+    }
+    missing = (update_ids | delete_ids) - existing.keys()
+    if missing:
+        errors.append(f"Pytania nie należą do tego quizu: {', '.join(map(str, sorted(missing)))}.")
+    if update_ids & delete_ids:
+        errors.append(f"Pytania jednocześnie edytowane i usuwane: {', '.join(map(str, sorted(update_ids & delete_ids)))}.")
+    if errors:
+        raise ValidationError(errors)
+
+    updates, creates = [], []
+    for number, item in enumerate(items, start=1):
+        try:
+            question, record, answer_ids = _validate_item(item, number, existing)
+        except ValidationError as e:
+            errors.extend(e.messages)
+            continue
+        if question is None:
+            creates.append(record)
+        else:
+            updates.append((question, record, answer_ids))
+    if errors:
+        raise ValidationError(errors)
+
+    changed_answers, new_answers, removed_answers = [], [], []
+    for question, record, answer_ids in updates:
+        for field in QUESTION_FIELDS:
+            setattr(question, field, record[field])
+        question.minhash = record_signature(record)
+        current = {a.pk: a for a in question.answers.all()}
+        for answer_id, data in zip(answer_ids, record['answers']):
+            if answer_id is None:
+                new_answers.append(Answer(question=question, **data))
+            else:
+                answer = current.pop(answer_id)
+                answer.text, answer.is_correct = data['text'], data['is_correct']
+                changed_answers.append(answer)
+        removed_answers.extend(current)
+
+    with transaction.atomic():
+        # Zwiększenie wersji jako pierwszy zapis transakcji - nieaktualna paczka nic nie zmienia.
+        if not Quiz.bump_content_version(quiz.pk, expected=expected):
+            raise ValidationError(STALE_VERSION_ERROR)
+        if delete_ids:
+            Question.objects.filter(pk__in=delete_ids).delete()
+        if removed_answers:
+            Answer.objects.filter(pk__in=removed_answers).delete()
+        if updates:
+            Question.objects.bulk_update(
+                [question for question, _, _ in updates], QUESTION_FIELDS + ('minhash',)
+            )
+        if changed_answers:
+            Answer.objects.bulk_update(changed_answers, ['text', 'is_correct'])
+        if new_answers:
+            Answer.objects.bulk_create(new_answers)
+        created = insert_question_batch(quiz, creates) if creates else []
+        content_version = Quiz.objects.values_list('content_version', flat=True).get(pk=quiz.pk)
+
+    touched = [question.pk for question, _, _ in updates] + [question.pk for question in created]
+    questions = quiz.questions.filter(pk__in=touched).prefetch_related('answers').order_by('pk')
+    return {
+        'updated': len(updates),
+        'created': len(created),
+        'deleted': len(delete_ids),
+        'content_version': content_version,
+        'questions': [serialize_question(q) for q in questions],
+    }
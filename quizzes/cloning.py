@@ -0,0 +1,107 @@
+# quizzes/cloning.py
+"""
+Kopiowanie quizów po stronie bazy danych.
+
+Pytania, odpowiedzi i (opcjonalnie) uprawnienia są kopiowane instrukcjami
+`INSERT ... SELECT`, więc kopia quizu wymaga stałej liczby zapytań
+niezależnie od liczby pytań - dane nie przechodzą przez Pythona.
+
+Odpowiedzi są łączone z nowymi pytaniami przez numer porządkowy pytania
+(`ROW_NUMBER() OVER (ORDER BY id)`) w quizie źródłowym i docelowym: pytania
+są wstawiane w kolejności kluczy, więc n-te pytanie kopii odpowiada n-temu
+pytaniu oryginału niezależnie od wartości nadanych kluczy. Pary pytań są
+wyznaczane jednym sortowaniem (`LEAD`), bez złączenia dwóch podzapytań,
+dla którego SQLite nie buduje indeksu.
+"""
+
+from django.db import connection, transaction
+
+from .models import Answer, Question, Quiz, QuizBankItem, QuizGroupPermission, QuizUserPermission
+from .quiz_archive import rehydrate_quiz
+
+#: Pola quizu przepisywane do kopii.
+QUIZ_FIELDS = ('visibility', 'time_limit', 'questions_count_limit', 'instant_feedback', 'fixed_order')
+
+
+def _table(model) -> str:
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _columns(model, *names) -> list:
+    return [connection.ops.quote_name(model._meta.get_field(name).column) for name in names]
+
+
+def _copy_rows(cursor, model, fields, source_quiz, target_quiz) -> int:
+    """Kopiuje wiersze modelu powiązanego z quizem (`quiz_id`) jednym `INSERT ... SELECT`."""
+    quiz_column, *columns = _columns(model, 'quiz', *fields)
+    column_list = ', '.join(columns)
+    cursor.execute(
+        f"INSERT INTO {_table(model)} ({quiz_column}, {column_list}) "
+        f"SELECT %s, {column_list} FROM {_table(model)} WHERE {quiz_column} = %s ORDER BY id",
+        [target_quiz.pk, source_quiz.pk],
+    )
+    return cursor.rowcount
+
+
+def _copy_answers(cursor, source_quiz, target_quiz) -> int:
+    """Kopiuje odpowiedzi, łącząc pytania oryginału i kopii po numerze porządkowym."""
+    question_column, text, is_correct = _columns(Answer, 'question', 'text', 'is_correct')
+    quiz_column, = _columns(Question, 'quiz')
+    # Pytania obu quizów numerowane osobno, a następnie sortowane po (numer, czy kopia):
+    # bezpośrednio po pytaniu oryginału stoi jego odpowiednik w kopii, więc LEAD(id)
+    # daje parę (pytanie źródłowe, pytanie docelowe) w jednym przebiegu sortowania.
+    mapping = (
+        f"SELECT id AS source_id, {quiz_column} AS quiz_id, "
+        f"LEAD(id) OVER (ORDER BY position, {quiz_column} = %s) AS target_id "
+        f"FROM (SELECT id, {quiz_column}, ROW_NUMBER() OVER (PARTITION BY {quiz_column} ORDER BY id) AS position "
+        f"FROM {_table(Question)} WHERE {quiz_column} IN (%s, %s)) numbered"
+    )
+    cursor.execute(
+        f"INSERT INTO {_table(Answer)} ({question_column}, {text}, {is_correct}) "
+        f"SELECT pairs.target_id, a.{text}, a.{is_correct} FROM ({mapping}) pairs "
+        f"JOIN {_table(Answer)} a ON a.{question_column} = pairs.source_id "
+        f"WHERE pairs.quiz_id = %s ORDER BY a.id",
+        [target_quiz.pk, source_quiz.pk, target_quiz.pk, source_quiz.pk],
+    )
+    return cursor.rowcount
+
+
+def clone_quiz(quiz: Quiz, author=None, title: str = None, include_permissions: bool = False) -> Quiz:
+    """
+    Tworzy kopię quizu wraz z pytaniami i odpowiedziami w jednej transakcji.
+
+    Kopia zachowuje ustawienia quizu, kolejność (rangi), sygnatury MinHash
+    i oznaczenia duplikatów. Pytania z banku pytań nie są kopiowane - kopia
+    dostaje nowe dołączenia do tych samych pytań. Liczba zapytań jest stała:
+    utworzenie quizu, skopiowanie pytań, odpowiedzi, dołączeń z banku
+    i - opcjonalnie - obu tabel uprawnień. Zarchiwizowany quiz jest najpierw
+    przywracany (`quizzes.quiz_archive.rehydrate_quiz`).
+
+    Args:
+        quiz (Quiz): Quiz źródłowy.
+        author (User, optional): Autor kopii (domyślnie autor oryginału).
+        title (str, optional): Tytuł kopii (domyślnie "Kopia: <tytuł>").
+        include_permissions (bool): Czy skopiować uprawnienia użytkowników i grup.
+
+    Returns:
+        Quiz: Utworzona kopia.
+    """
+    rehydrate_quiz(quiz)
+    with transaction.atomic():
+        copy = Quiz.objects.create(
+            title=(title or f"Kopia: {quiz.title}")[:Quiz._meta.get_field('title').max_length],
+            author=author or quiz.author,
+            **{field: getattr(quiz, field) for field in QUIZ_FIELDS},
+        )
+        with connection.cursor() as cursor:
+            _copy_rows(
+                cursor, Question,
+                ('text', 'explanation', 'question_type', 'minhash', 'possible_duplicate', 'rank'),
+                quiz, copy,
+            )
+            _copy_answers(cursor, quiz, copy)
+            _copy_rows(cursor, QuizBankItem, ('question', 'rank'), quiz, copy)
+            if include_permissions:
+                _copy_rows(cursor, QuizUserPermission, ('user', 'role'), quiz, copy)
+                _copy_rows(cursor, QuizGroupPermission, ('group', 'role'), quiz, copy)
+    return copy
@@ -0,0 +1,59 @@
+# quizzes/db.py
+"""
+Konfiguracja połączeń z bazą SQLite.
+
+Domyślny tryb dziennika SQLite (rollback journal) blokuje odczyty na czas
+zapisu, więc przy wielu równoczesnych zapisach wyników quizów żądania
+kończą się błędem "database is locked". Każde nowe połączenie dostaje
+ustawienia z `settings.QUIZ_SQLITE_PRAGMAS` (sygnał `connection_created`):
+tryb WAL, w którym czytelnicy nie czekają na piszącego, `busy_timeout`,
+dzięki któremu piszący czekają na blokadę zamiast od razu zgłaszać błąd,
+oraz rozmiary pamięci podręcznej stron i mapowania pliku.
+
+Ustawienia działają razem z trwałymi połączeniami (`CONN_MAX_AGE`) -
+instrukcje PRAGMA są wykonywane raz na połączenie, a nie na żądanie.
+"""
+
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+_PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(cursor, pragmas: dict) -> dict:
+    """
+    Wykonuje instrukcje `PRAGMA nazwa = wartość` na połączeniu SQLite.
+
+    Args:
+        cursor: Kursor połączenia SQLite (Django lub `sqlite3`).
+        pragmas (dict): Nazwy i wartości ustawień (np. {'journal_mode': 'WAL'}).
+
+    Returns:
+        dict: Wartości ustawień odczytane po zmianie.
+
+    Raises:
+        ValueError: Jeśli nazwa lub wartość ustawienia nie jest prostym identyfikatorem lub liczbą.
+    """
+    applied = {}
+    for name, value in pragmas.items():
+        if not _PRAGMA_NAME.match(name) or not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Niepoprawne ustawienie SQLite: {name} = {value!r}")
+        cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.execute(f"PRAGMA {name}")
+        row = cursor.fetchone()
+        applied[name] = row[0] if row else None
+    return applied
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Stosuje `QUIZ_SQLITE_PRAGMAS` do każdego nowego połączenia SQLite."""
+    pragmas = getattr(settings, 'QUIZ_SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, pragmas)
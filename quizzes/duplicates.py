@@ -0,0 +1,297 @@
+# quizzes/duplicates.py
+"""
+Wykrywanie niemal identycznych pytań (MinHash + LSH).
+
+Dla każdego pytania liczona jest sygnatura MinHash ze zbioru 5-znakowych
+fragmentów (shingli) znormalizowanej treści pytania i odpowiedzi. Zamiast
+`NUM_PERM` niezależnych funkcji haszujących używany jest wariant z jedną
+permutacją (skróty dzielone na `NUM_PERM` przedziałów, puste przedziały
+uzupełniane z sąsiednich), dzięki czemu sygnatura wymaga jednego przejścia
+po shinglach. Sygnatura (`NUM_PERM` liczb 32-bitowych) jest zapisywana
+w `Question.minhash`, więc wyszukiwanie duplikatów nie wymaga ponownego
+przetwarzania tekstu.
+
+`LSHIndex` dzieli sygnatury na `BANDS` pasm po `ROWS` wartości; pytania
+trafiające do tego samego kubełka w którymkolwiek paśmie są kandydatami
+na duplikaty, a ostateczną decyzję podejmuje oszacowane podobieństwo
+Jaccarda (odsetek zgodnych pozycji sygnatur) porównane z progiem
+`QUIZ_DUPLICATE_THRESHOLD`.
+"""
+
+import re
+import unicodedata
+import zlib
+from array import array
+
+from django.conf import settings
+
+#: Liczba funkcji haszujących (długość sygnatury).
+NUM_PERM = 64
+#: Liczba pasm LSH (BANDS * ROWS == NUM_PERM); próg kandydatów ~ (1/BANDS) ** (1/ROWS) = 0.5.
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+#: Długość fragmentu tekstu (w znakach) używanego jako shingle.
+SHINGLE_SIZE = 5
+
+#: Tryby obsługi duplikatów przy imporcie i generowaniu.
+KEEP = 'keep'
+FLAG = 'flag'
+DROP = 'drop'
+MODES = (
+    (FLAG, 'Oznacz'),
+    (DROP, 'Pomiń'),
+    (KEEP, 'Zachowaj'),
+)
+
+_BAND_BYTES = ROWS * 4
+_EMPTY = 0xFFFFFFFF
+# Wartość w przedziale zajmuje 26 bitów; 6 wyższych bitów koduje odległość przy zagęszczaniu.
+_VALUE_BITS = 32 - (NUM_PERM - 1).bit_length()
+_VALUE_LIMIT = 1 << _VALUE_BITS
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKC', text).casefold()
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', '', text)).strip()
+
+
+def shingle_hashes(parts) -> set:
+    """
+    Zamienia teksty na zbiór skrótów CRC32 ich 5-znakowych fragmentów.
+
+    Args:
+        parts (Iterable[str]): Treść pytania i odpowiedzi.
+
+    Returns:
+        set[int]: Skróty shingli (krótkie teksty dają jeden shingle z całości).
+    """
+    hashes = set()
+    for part in parts:
+        data = _normalize(part).encode('utf-8')
+        if len(data) <= SHINGLE_SIZE:
+            if data:
+                hashes.add(zlib.crc32(data))
+            continue
+        for i in range(len(data) - SHINGLE_SIZE + 1):
+            hashes.add(zlib.crc32(data[i:i + SHINGLE_SIZE]))
+    return hashes
+
+
+def minhash(parts) -> bytes:
+    """
+    Liczy sygnaturę MinHash dla podanych tekstów.
+
+    Args:
+        parts (Iterable[str]): Treść pytania i odpowiedzi.
+
+    Returns:
+        bytes: `NUM_PERM` liczb 32-bitowych (4 * NUM_PERM bajtów).
+    """
+    bins = [_EMPTY] * NUM_PERM
+    for h in shingle_hashes(parts) or {0}:
+        h = (h * 0x9E3779B1) & 0xFFFFFFFF  # wymieszanie bitów CRC32
+        position, value = h % NUM_PERM, h >> (32 - _VALUE_BITS)
+        if value < bins[position]:
+            bins[position] = value
+
+    # Zagęszczanie: pusty przedział przejmuje wartość najbliższego niepustego po prawej
+    # (z przesunięciem zależnym od odległości), tak samo dla wszystkich sygnatur.
+    if _EMPTY in bins:
+        for i in range(NUM_PERM):
+            if bins[i] == _EMPTY:
+                for distance in range(1, NUM_PERM):
+                    source = bins[(i + distance) % NUM_PERM]
+                    if source < _VALUE_LIMIT:
+                        bins[i] = source | (distance << _VALUE_BITS)
+                        break
+    return array('I', bins).tobytes()
+
+
+def record_signature(record: dict) -> bytes:
+    """Zwraca sygnaturę rekordu pytania (treść + odpowiedzi), np. z `validate_question_record`."""
+    return minhash([record['text']] + [answer['text'] for answer in record['answers']])
+
+
+def question_signature(question) -> bytes:
+    """Zwraca sygnaturę zapisanego pytania (treść + odpowiedzi z bazy)."""
+    return minhash([question.text] + [answer.text for answer in question.answers.all()])
+
+
+def similarity(signature_a: bytes, signature_b: bytes) -> float:
+    """
+    Szacuje podobieństwo Jaccarda dwóch pytań na podstawie ich sygnatur.
+
+    Returns:
+        float: Odsetek zgodnych pozycji sygnatur (0.0 - 1.0).
+    """
+    a, b = array('I', signature_a), array('I', signature_b)
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class LSHIndex:
+    """
+    Indeks LSH sygnatur MinHash (w pamięci).
+
+    Wyszukanie kandydatów wymaga `BANDS` odczytów słownika, niezależnie
+    od liczby pytań w indeksie.
+
+    Attributes:
+        threshold (float): Minimalne podobieństwo uznawane za duplikat.
+    """
+
+    #: Limit porównań jednej sygnatury w obrębie kubełka przy grupowaniu w klastry.
+    MAX_COMPARISONS = 50
+
+    def __init__(self, threshold: float = None):
+        self.threshold = settings.QUIZ_DUPLICATE_THRESHOLD if threshold is None else threshold
+        self._buckets = [{} for _ in range(BANDS)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _bands(self, signature: bytes):
+        for band in range(BANDS):
+            yield band, signature[band * _BAND_BYTES:(band + 1) * _BAND_BYTES]
+
+    def add(self, key, signature: bytes) -> None:
+        """Dodaje sygnaturę do indeksu pod podanym kluczem (np. pk pytania)."""
+        self._signatures[key] = signature
+        for band, bucket_key in self._bands(signature):
+            self._buckets[band].setdefault(bucket_key, []).append(key)
+
+    def candidates(self, signature: bytes) -> set:
+        """Zwraca klucze dzielące z sygnaturą kubełek w co najmniej jednym paśmie."""
+        found = set()
+        for band, bucket_key in self._bands(signature):
+            found.update(self._buckets[band].get(bucket_key, ()))
+        return found
+
+    def query(self, signature: bytes) -> list:
+        """
+        Znajduje pytania podobne do podanej sygnatury.
+
+        Returns:
+            list[tuple]: Pary (klucz, podobieństwo) nie mniejsze niż próg, od najbardziej podobnych.
+        """
+        matches = []
+        for key in self.candidates(signature):
+            score = similarity(signature, self._signatures[key])
+            if score >= self.threshold:
+                matches.append((key, score))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def find_match(self, signature: bytes):
+        """
+        Zwraca klucz pierwszego pytania podobnego do sygnatury (bez liczenia wszystkich podobieństw).
+
+        Returns:
+            Hashable | None: Klucz podobnego pytania lub None.
+        """
+        for key in self.candidates(signature):
+            if similarity(signature, self._signatures[key]) >= self.threshold:
+                return key
+        return None
+
+    def clusters(self) -> list:
+        """
+        Grupuje wszystkie sygnatury indeksu w klastry duplikatów (union-find).
+
+        W każdym kubełku sygnatura jest porównywana z najwyżej `MAX_COMPARISONS`
+        wcześniejszymi, więc bardzo duże kubełki (np. pytania z jednego szablonu)
+        nie powodują kwadratowej liczby porównań.
+
+        Returns:
+            list[list]: Klastry (co najmniej dwa klucze), od największych.
+        """
+        parent = {}
+
+        def find(key):
+            root = key
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while key != root:
+                parent[key], key = root, parent.get(key, key)
+            return root
+
+        for buckets in self._buckets:
+            for keys in buckets.values():
+                if len(keys) < 2:
+                    continue
+                for i in range(1, len(keys)):
+                    key = keys[i]
+                    for other in keys[max(0, i - self.MAX_COMPARISONS):i]:
+                        a, b = find(other), find(key)
+                        if a == b:
+                            break
+                        if similarity(self._signatures[other], self._signatures[key]) >= self.threshold:
+                            parent[b] = a
+                            break
+
+        groups = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        for root, members in groups.items():
+            if root not in members:
+                members.append(root)
+        return sorted((sorted(members) for members in groups.values()), key=len, reverse=True)
+
+
+class DuplicateFilter:
+    """
+    Filtr strumienia rekordów pytań wykrywający duplikaty w quizie i w samym strumieniu.
+
+    Indeks jest budowany z sygnatur wszystkich pytań quizu, także dołączonych
+    z banków pytań (`Quiz.question_pool`, jedno zapytanie), a następnie uzupełniany
+    przepuszczanymi rekordami - tylko tymi, które nie są duplikatami, więc kubełki
+    nie rosną przy wielu kopiach tego samego pytania. Każdy rekord dostaje klucz
+    'minhash'; w trybie `FLAG` duplikaty dostają 'possible_duplicate': True,
+    a w trybie `DROP` są pomijane.
+
+    Attributes:
+        mode (str): `KEEP`, `FLAG` lub `DROP`.
+        flagged (int): Liczba oznaczonych duplikatów.
+        dropped (int): Liczba pominiętych duplikatów.
+    """
+
+    def __init__(self, quiz, mode: str = FLAG, threshold: float = None):
+        self.mode = mode
+        self.flagged = 0
+        self.dropped = 0
+        self.index = LSHIndex(threshold)
+        if mode != KEEP and quiz is not None and quiz.pk:
+            existing = quiz.question_pool().exclude(minhash=None).order_by().values_list('pk', 'minhash')
+            for pk, signature in existing.iterator(chunk_size=2000):
+                self.index.add(('q', pk), bytes(signature))
+
+    def summary(self) -> str:
+        """Zwraca komunikat o wykrytych duplikatach (pusty, jeśli ich nie było)."""
+        if self.dropped:
+            return f"Pominięto możliwe duplikaty: {self.dropped}."
+        if self.flagged:
+            return f"Oznaczono możliwe duplikaty: {self.flagged}."
+        return ""
+
+    def __call__(self, records):
+        """
+        Przetwarza strumień rekordów.
+
+        Args:
+            records (Iterable[dict]): Zwalidowane rekordy pytań.
+
+        Yields:
+            dict: Rekordy z sygnaturą (bez pominiętych duplikatów).
+        """
+        for position, record in enumerate(records):
+            signature = record.get('minhash') or record_signature(record)
+            record = dict(record, minhash=signature)
+            if self.mode != KEEP:
+                if self.index.find_match(signature) is not None:
+                    if self.mode == DROP:
+                        self.dropped += 1
+                        continue
+                    self.flagged += 1
+                    record['possible_duplicate'] = True
+                else:
+                    self.index.add(('new', position), signature)
+            yield record
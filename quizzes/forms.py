@@ -1,34 +1,42 @@
 # quizzes/forms.py
 from django import forms
-from .models import Quiz, Question, Answer, QuizGroup, QuizUserPermission, QuizGroupPermission
+from .models import Quiz, Question, Answer, QuizGroup, QuizUserPermission, QuizGroupPermission, QuestionBank
 from django.forms import inlineformset_factory
+from django.urls import reverse_lazy
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 class QuizGroupForm(forms.ModelForm):
     """
-    Formularz do tworzenia i edycji grup użytkowników.
+    Formularz do tworzenia i edycji nazwy grupy użytkowników.
 
-    Pozwala wybrać nazwę grupy oraz jej członków spośród zarejestrowanych użytkowników.
-
-    Attributes:
-        members (ModelMultipleChoiceField): Pole wyboru wielokrotnego (checkboxy) z listą użytkowników.
+    Członkowie grupy są zarządzani osobno (`quizzes.membership`) - dodawanie
+    i usuwanie zmienia tylko wskazane członkostwa, bez przepisywania całej listy.
     """
-    members = forms.ModelMultipleChoiceField(
-        queryset=User.objects.none(), 
-        widget=forms.CheckboxSelectMultiple,
-        required=False,
-        label="Wybierz członków grupy"
-    )
-
     class Meta:
         model = QuizGroup
-        fields = ['name', 'members']
+        fields = ['name']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'np. Klasa 3B'}),
         }
 
+class QuestionBankForm(forms.ModelForm):
+    """
+    Formularz tworzenia banku pytań.
+
+    Pola formularza:
+        - name: Nazwa banku.
+        - is_shared: Czy inni autorzy mogą dołączać pytania banku do swoich quizów.
+    """
+    class Meta:
+        model = QuestionBank
+        fields = ['name', 'is_shared']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'np. Matematyka - ułamki'}),
+            'is_shared': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        }
+
 class QuizForm(forms.ModelForm):
     """
     Główny formularz konfiguracji Quizu.
@@ -42,10 +50,11 @@ class QuizForm(forms.ModelForm):
         - time_limit: Czas w minutach.
         - questions_count_limit: Limit pytań w jednym podejściu.
         - instant_feedback: Checkbox trybu natychmiastowego.
+        - fixed_order: Checkbox stałej kolejności pytań.
     """
     class Meta:
         model = Quiz
-        fields = ['title', 'visibility', 'time_limit', 'questions_count_limit', 'instant_feedback']
+        fields = ['title', 'visibility', 'time_limit', 'questions_count_limit', 'instant_feedback', 'fixed_order']
         
         labels = {
             'title': 'Tytuł Quizu',
@@ -59,6 +68,39 @@ class QuizForm(forms.ModelForm):
 
 # --- FORMSETY DLA UPRAWNIEŃ ---
 
+class AutocompleteSelect(forms.Select):
+    """
+    Lista wyboru obiektu z podpowiedziami pobieranymi z endpointu JSON.
+
+    W przeciwieństwie do `forms.Select` renderuje tylko pustą opcję i aktualnie
+    wybrane wartości (jedno zapytanie po kluczu głównym), a nie wszystkie
+    obiekty z `queryset` pola - pozostałe opcje skrypt strony pobiera
+    z adresu w atrybucie `data-autocomplete-url`.
+
+    Args:
+        url (str): Adres endpointu podpowiedzi (np. `reverse_lazy('user-autocomplete')`).
+        attrs (dict, optional): Dodatkowe atrybuty HTML.
+    """
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete-url'] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        selected = [v for v in value if str(v).isdigit()]
+        self.choices = [('', choices.field.empty_label or '')]
+        if selected:
+            self.choices += [choices.choice(obj) for obj in choices.queryset.filter(pk__in=selected)]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
 _QuizUserPermissionFormSet = inlineformset_factory(
     Quiz,
     QuizUserPermission,
@@ -66,7 +108,7 @@ _QuizUserPermissionFormSet = inlineformset_factory(
     extra=1,
     can_delete=True,
     widgets={
-        'user': forms.Select(attrs={'class': 'form-select'}),
+        'user': AutocompleteSelect(reverse_lazy('user-autocomplete'), attrs={'class': 'form-select'}),
         'role': forms.Select(attrs={'class': 'form-select'}),
     }
 )
@@ -82,7 +124,7 @@ class QuizUserPermissionFormSet(_QuizUserPermissionFormSet):
 
     * Umożliwia dodawanie, edycję i usuwanie wielu uprawnień w jednym żądaniu POST.
     * Zawiera pola:
-        * `user`: Wybór użytkownika z listy.
+        * `user`: Wybór użytkownika z podpowiedziami (`AutocompleteSelect`).
         * `role`: Przypisanie roli (np. 'VIEWER' lub 'EDITOR').
     * Obsługuje flagę `DELETE` do usuwania istniejących uprawnień.
     """
@@ -95,7 +137,7 @@ _QuizGroupPermissionFormSet = inlineformset_factory(
     extra=1,
     can_delete=True,
     widgets={
-        'group': forms.Select(attrs={'class': 'form-select'}),
+        'group': AutocompleteSelect(reverse_lazy('group-autocomplete'), attrs={'class': 'form-select'}),
         'role': forms.Select(attrs={'class': 'form-select'}),
     }
 )
@@ -163,7 +205,9 @@ class QuizGenerationForm(forms.Form):
 
     Attributes:
         topic (CharField): Temat quizu wprowadzany przez użytkownika.
-        count (IntegerField): Oczekiwana liczba pytań (1-10).
+        count (IntegerField): Oczekiwana liczba pytań (1-200); powyżej `QUIZ_GENERATION_CHUNK_SIZE`
+            generowanie jest dzielone na równoległe zapytania.
+        force_fresh (BooleanField): Pomija pamięć podręczną i wymusza nowe zapytanie do modelu.
     """
     topic = forms.CharField(
         label="Temat quizu", 
@@ -173,7 +217,25 @@ class QuizGenerationForm(forms.Form):
     count = forms.IntegerField(
         label="Liczba pytań", 
         min_value=1, 
-        max_value=10, 
+        max_value=200, 
         initial=5,
         widget=forms.NumberInput(attrs={'class': 'form-control'})
-    )
\ No newline at end of file
+    )
+    force_fresh = forms.BooleanField(
+        label="Wygeneruj od nowa",
+        required=False,
+        help_text="Nie używaj wcześniej wygenerowanych pytań na ten sam temat.",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+class QuestionImportForm(forms.Form):
+    """
+    Formularz przesłania pliku z pytaniami (używany w panelu admina).
+
+    Attributes:
+        import_file (FileField): Plik w jednym z obsługiwanych formatów (JSON, CSV, GIFT, Moodle XML).
+    """
+    import_file = forms.FileField(
+        label="Plik z pytaniami",
+        help_text="Obsługiwane formaty: JSON, CSV, GIFT, Moodle XML."
+    )
@@ -0,0 +1,456 @@
+# quizzes/generation.py
+"""
+Generowanie pytań quizowych przez model językowy (API chat-completions).
+
+Moduł buduje prompt, wysyła zapytanie do API, parsuje zwrócony JSON
+i zamienia go na rekordy pytań w formacie wspólnym z importerami
+(patrz `quizzes.importers`). Wyniki są przechowywane w pamięci podręcznej
+(`QUIZ_GENERATION_CACHE`), więc ponowne generowanie tego samego tematu
+nie wymaga zapytania do modelu.
+
+W trybie strumieniowym (`stream_question_records`) odpowiedź jest czytana
+fragmentami, a `IncrementalQuestionParser` zwraca każde pytanie, gdy tylko
+jego obiekt JSON zostanie zamknięty - bez czekania na całą odpowiedź.
+
+Większe quizy (powyżej `QUIZ_GENERATION_CHUNK_SIZE` pytań) są dzielone na
+kilka zapytań wykonywanych równolegle (najwyżej `QUIZ_GENERATION_MAX_PARALLEL`
+naraz), a wyniki są łączone z pominięciem niemal identycznych pytań.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+from .duplicates import DuplicateFilter
+from .persistence import persist_questions
+from .llm import get_client
+from .models import Question, Quiz
+
+logger = logging.getLogger(__name__)
+
+#: Wersja promptu - zmiana treści promptu powinna zwiększać tę wartość,
+#: aby nie zwracać z pamięci podręcznej pytań wygenerowanych starym promptem.
+PROMPT_VERSION = 1
+
+SYSTEM_MESSAGE = (
+    "Jesteś ekspertem tworzącym quizy edukacyjne. "
+    "Twoim zadaniem jest generowanie pytań w formacie czystego JSON. "
+    "Nie dodawaj żadnych wstępów, wyjaśnień ani formatowania Markdown (np. ```json). "
+    "Zwróć TYLKO obiekt JSON."
+)
+
+
+def build_user_prompt(topic: str, count: int, part: int = 1, parts: int = 1) -> str:
+    """
+    Buduje treść polecenia dla modelu.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań do wygenerowania.
+        part (int): Numer części przy generowaniu dzielonym na kilka zapytań.
+        parts (int): Łączna liczba części.
+
+    Returns:
+        str: Prompt użytkownika opisujący wymaganą strukturę JSON.
+    """
+    prompt = f"""
+    Stwórz quiz w języku polskim na temat: "{topic}".
+    Liczba pytań: {count}.
+
+    Wymagana struktura JSON:
+    {{
+        "questions": [
+            {{
+                "question": "Treść pytania?",
+                "answers": ["Odp A", "Odp B", "Odp C", "Odp D"],
+                "correct_index": 0
+            }}
+        ]
+    }}
+    Ważne:
+    1. "correct_index" to numer poprawnej odpowiedzi (0-3).
+    2. Wygeneruj dokładnie {count} pytań.
+    """
+    if parts > 1:
+        prompt += f"""3. To część {part} z {parts} większego quizu - skup się na innym
+       zagadnieniu tematu niż pozostałe części, aby pytania się nie powtarzały.
+    """
+    return prompt
+
+
+def parse_generated_text(generated_text: str) -> list:
+    """
+    Wyciąga listę pytań z tekstu zwróconego przez model.
+
+    Usuwa ewentualne bloki Markdown i próbuje naprawić JSON ucięty
+    przez limit tokenów.
+
+    Args:
+        generated_text (str): Surowa treść odpowiedzi modelu.
+
+    Returns:
+        list[dict]: Lista surowych pytań (klucze 'question', 'answers', 'correct_index').
+
+    Raises:
+        ValueError: Jeśli odpowiedź nie zawiera poprawnego JSON lub lista pytań jest pusta.
+    """
+    generated_text = generated_text.strip()
+    if "```json" in generated_text:
+        generated_text = generated_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in generated_text:
+        generated_text = generated_text.split("```")[1].strip()
+
+    try:
+        data = json.loads(generated_text)
+    except json.JSONDecodeError:
+        if generated_text.rfind('}') == -1:
+            raise ValueError("Otrzymano niepoprawny JSON od AI.")
+        fixed_text = generated_text[:generated_text.rfind('}') + 1] + "]}"
+        try:
+            data = json.loads(fixed_text)
+        except json.JSONDecodeError:
+            raise ValueError("Otrzymano niepoprawny JSON od AI.")
+
+    questions_list = data.get('questions', []) if isinstance(data, dict) else []
+    if not questions_list:
+        raise ValueError("Lista pytań jest pusta.")
+    return questions_list
+
+
+def to_question_records(items) -> list:
+    """
+    Zamienia pytania wygenerowane przez model na rekordy pytań (jak w importerach).
+
+    Pytania bez treści lub z mniej niż dwiema odpowiedziami są pomijane,
+    a niepoprawny `correct_index` jest zastępowany zerem.
+
+    Args:
+        items (list[dict]): Surowe pytania z `parse_generated_text`.
+
+    Returns:
+        list[dict]: Rekordy pytań typu SINGLE gotowe do zapisu.
+    """
+    records = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        q_text = item.get('question')
+        answers = item.get('answers', [])
+        correct_idx = item.get('correct_index', 0)
+
+        if q_text and isinstance(answers, list) and len(answers) >= 2:
+            if not isinstance(correct_idx, int) or correct_idx < 0 or correct_idx >= len(answers):
+                correct_idx = 0
+            records.append({
+                'text': str(q_text),
+                'explanation': '',
+                'question_type': Question.QuestionType.SINGLE,
+                'answers': [
+                    {'text': str(ans_text), 'is_correct': i == correct_idx}
+                    for i, ans_text in enumerate(answers)
+                ],
+            })
+    return records
+
+
+class IncrementalQuestionParser:
+    """
+    Przyrostowy parser odpowiedzi modelu w postaci `{"questions": [{...}, ...]}`.
+
+    Przyjmuje kolejne fragmenty tekstu i zwraca obiekty z tablicy najwyższego
+    poziomu, gdy tylko zostaną zamknięte. Tekst przed pierwszym `{` (np. wstęp
+    lub blok Markdown) jest ignorowany, a niedokończony obiekt na końcu
+    uciętej odpowiedzi po prostu nie jest zwracany.
+    """
+
+    def __init__(self):
+        self._stack = []
+        self._buffer = []
+        self._capturing = False
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Przetwarza kolejny fragment odpowiedzi.
+
+        Args:
+            chunk (str): Fragment treści odpowiedzi.
+
+        Returns:
+            list[dict]: Pytania zamknięte w tym fragmencie (może być pusta).
+        """
+        completed = []
+        for ch in chunk:
+            if self._capturing:
+                self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if not self._stack:
+                if ch == '{':
+                    self._stack.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if ch == '{' and self._stack == ['{', '[']:
+                    self._capturing = True
+                    self._buffer = [ch]
+                self._stack.append(ch)
+            elif ch in '}]':
+                self._stack.pop()
+                if self._capturing and self._stack == ['{', '[']:
+                    self._capturing = False
+                    try:
+                        completed.append(json.loads(''.join(self._buffer)))
+                    except json.JSONDecodeError:
+                        pass
+        return completed
+
+
+def build_payload(topic: str, count: int, stream: bool = False, part: int = 1, parts: int = 1) -> dict:
+    """
+    Buduje treść zapytania chat-completions.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań do wygenerowania.
+        stream (bool): Czy odpowiedź ma być przesyłana strumieniowo.
+        part (int): Numer części (patrz `build_user_prompt`).
+        parts (int): Łączna liczba części.
+
+    Returns:
+        dict: Treść zapytania; pole 'model' uzupełnia wybrany backend (`quizzes.llm`).
+    """
+    return {
+        "messages": [
+            {"role": "system", "content": SYSTEM_MESSAGE},
+            {"role": "user", "content": build_user_prompt(topic, count, part, parts)}
+        ],
+        "max_tokens": 2048,
+        "stream": stream,
+        "temperature": 0.7
+    }
+
+
+def stream_question_records(topic: str, count: int):
+    """
+    Generuje pytania w trybie strumieniowym, zwracając każde zaraz po jego zamknięciu.
+
+    Strumień jest odczytywany tylko do otrzymania `count` pytań - nadmiarowe
+    pytania zwrócone przez model są pomijane.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań do wygenerowania.
+
+    Yields:
+        dict: Kolejne rekordy pytań (patrz `to_question_records`), co najwyżej `count`.
+
+    Raises:
+        LLMError: Przy błędzie HTTP lub zerwaniu strumienia.
+    """
+    parser = IncrementalQuestionParser()
+    chunks = get_client().stream_chat_completion(build_payload(topic, count, stream=True))
+    records = (record for chunk in chunks for item in parser.feed(chunk) for record in to_question_records([item]))
+    yield from islice(records, count)
+
+
+def _generate_chunk(topic: str, count: int, part: int = 1, parts: int = 1) -> list:
+    """Wykonuje jedno zapytanie do modelu i zwraca rekordy pytań."""
+    result = get_client().chat_completion(build_payload(topic, count, part=part, parts=parts))
+    if 'choices' in result and len(result['choices']) > 0:
+        generated_text = result['choices'][0]['message']['content']
+    else:
+        raise ValueError(f"Pusta odpowiedź od modelu: {result}")
+
+    return to_question_records(parse_generated_text(generated_text))
+
+
+def split_count(count: int, chunk_size: int) -> list:
+    """
+    Dzieli liczbę pytań na możliwie równe części nieprzekraczające `chunk_size`.
+
+    Args:
+        count (int): Łączna liczba pytań.
+        chunk_size (int): Maksymalna liczba pytań w jednym zapytaniu.
+
+    Returns:
+        list[int]: Liczby pytań dla kolejnych zapytań, np. 25 przy 10 -> [9, 8, 8].
+    """
+    parts = max(1, -(-count // chunk_size))
+    base, extra = divmod(count, parts)
+    return [base + 1 if i < extra else base for i in range(parts)]
+
+
+def generate_question_records(topic: str, count: int, cache: bool = False) -> list:
+    """
+    Wysyła zapytanie (lub kilka równoległych) do API modelu i zwraca gotowe rekordy pytań.
+
+    Gdy `count` przekracza `QUIZ_GENERATION_CHUNK_SIZE`, generowanie jest dzielone
+    na części wykonywane w puli wątków (najwyżej `QUIZ_GENERATION_MAX_PARALLEL`
+    naraz), więc czas oczekiwania zbliżony jest do pojedynczego zapytania.
+    Niepowodzenie części zapytań jest tolerowane, jeśli choć jedno się powiodło.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań do wygenerowania.
+        cache (bool): Czy zapisać wynik w pamięci podręcznej - tylko gdy wszystkie
+            części się powiodły i zwrócono pełne `count` pytań.
+
+    Returns:
+        list[dict]: Rekordy pytań (patrz `to_question_records`) z sygnaturą 'minhash',
+            przefiltrowane przez `DuplicateFilter` w trybie `QUIZ_GENERATION_DUPLICATES`; najwyżej `count`.
+
+    Raises:
+        LLMError: Przy braku klucza API lub błędzie HTTP (po wyczerpaniu ponowień).
+        ValueError: Przy pustej lub niepoprawnej odpowiedzi modelu.
+    """
+    chunks = split_count(count, settings.QUIZ_GENERATION_CHUNK_SIZE)
+    errors = []
+    if len(chunks) == 1:
+        records = _generate_chunk(topic, count)
+    else:
+        workers = min(settings.QUIZ_GENERATION_MAX_PARALLEL, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quiz-generation') as pool:
+            futures = [
+                pool.submit(_generate_chunk, topic, chunk, part, len(chunks))
+                for part, chunk in enumerate(chunks, start=1)
+            ]
+        records = []
+        for future in futures:
+            try:
+                records.extend(future.result())
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            if not records:
+                raise errors[0]
+            logger.warning("Nie powiodło się %d z %d części generowania: %s", len(errors), len(chunks), errors[0])
+
+    records = list(DuplicateFilter(None, settings.QUIZ_GENERATION_DUPLICATES)(records))[:count]
+    if not records:
+        raise ValueError("Lista pytań jest pusta.")
+    if cache and not errors:
+        cache_records(topic, count, records)
+    return records
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Normalizuje temat na potrzeby klucza pamięci podręcznej.
+
+    Ujednolica zapis Unicode, wielkość liter i białe znaki, więc
+    "Historia  Polski " i "historia polski" dają ten sam klucz.
+
+    Args:
+        topic (str): Temat wpisany przez użytkownika.
+
+    Returns:
+        str: Znormalizowany temat.
+    """
+    topic = unicodedata.normalize('NFKC', topic)
+    return re.sub(r'\s+', ' ', topic).strip().casefold()
+
+
+def generation_cache_key(topic: str, count: int, models=None) -> str:
+    """
+    Buduje klucz pamięci podręcznej dla zestawu wygenerowanych pytań.
+
+    Router może obsłużyć zapytanie dowolnym backendem, dlatego klucz obejmuje
+    modele wszystkich skonfigurowanych backendów, a nie model tego, który
+    akurat odpowiedział - ten sam temat trafia pod ten sam klucz niezależnie
+    od wyboru routera, a zmiana listy modeli unieważnia zapamiętane pytania.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań.
+        models (Iterable[str], optional): Nazwy modeli (domyślnie `get_client().models`).
+
+    Returns:
+        str: Klucz zależny od znormalizowanego tematu, liczby pytań, zbioru modeli i wersji promptu.
+    """
+    models = ','.join(sorted(set(models or get_client().models)))
+    raw = f"{normalize_topic(topic)}|{count}|{models}|v{PROMPT_VERSION}"
+    return 'quiz-generation:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get_cached_records(topic: str, count: int):
+    """
+    Zwraca rekordy pytań z pamięci podręcznej i rejestruje trafienie lub chybienie.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań.
+
+    Returns:
+        list[dict] | None: Rekordy pytań lub None, jeśli nie ma ich w pamięci podręcznej.
+    """
+    records = caches[settings.QUIZ_GENERATION_CACHE].get(generation_cache_key(topic, count))
+    metrics.incr('generation.cache_hits' if records else 'generation.cache_misses')
+    return records
+
+
+def cache_records(topic: str, count: int, records: list) -> bool:
+    """
+    Zapisuje rekordy pytań w pamięci podręcznej na czas `QUIZ_GENERATION_CACHE_TTL`.
+
+    Niepełne zestawy (mniej niż `count` pytań) nie są zapisywane, aby kolejne
+    zlecenia z tym samym tematem nie dostawały ich zamiast pełnego quizu,
+    a z większych zapisywane jest tylko pierwsze `count` pytań.
+
+    Args:
+        topic (str): Temat quizu.
+        count (int): Liczba pytań.
+        records (list[dict]): Rekordy pytań do zapamiętania.
+
+    Returns:
+        bool: Czy rekordy zapisano.
+    """
+    if len(records) < count:
+        return False
+    caches[settings.QUIZ_GENERATION_CACHE].set(
+        generation_cache_key(topic, count),
+        records[:count],
+        settings.QUIZ_GENERATION_CACHE_TTL,
+    )
+    return True
+
+
+def create_generated_quiz(author, topic: str, records=()) -> Quiz:
+    """
+    Tworzy prywatny quiz "AI Quiz: ..." z podanymi pytaniami w jednej transakcji.
+
+    Args:
+        author (User): Autor quizu.
+        topic (str): Temat quizu (trafia do tytułu).
+        records (list[dict]): Rekordy pytań (w trybie strumieniowym pusta -
+            pytania są dopisywane w miarę generowania).
+
+    Returns:
+        Quiz: Utworzony quiz.
+    """
+    with transaction.atomic():
+        quiz = Quiz.objects.create(
+            title=f"AI Quiz: {topic}",
+            author=author,
+            visibility='PRIVATE'
+        )
+        persist_questions(quiz, DuplicateFilter(None, settings.QUIZ_GENERATION_DUPLICATES)(records))
+    return quiz
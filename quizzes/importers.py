@@ -0,0 +1,524 @@
+# quizzes/importers.py
+"""
+Rejestr importerów pytań z plików zewnętrznych (JSON, CSV, GIFT, Moodle XML).
+
+Każdy format posiada parser strumieniowy, który zwraca kolejne rekordy pytań
+w tej samej postaci, jakiej oczekuje import JSON:
+
+    {'text': str, 'explanation': str, 'question_type': 'SINGLE' | 'MULTIPLE',
+     'answers': [{'text': str, 'is_correct': bool}, ...]}
+
+Rekordy przechodzą przez wspólną walidację (`validate_question_record`), a następnie
+trafiają do wspólnego etapu zapisu (`quizzes.persistence.persist_questions`), który
+wstawia je partiami przy użyciu dwóch wywołań `bulk_create` na partię.
+"""
+
+import csv
+import json
+import re
+import xml.etree.ElementTree as ET
+from html import unescape
+from itertools import chain
+
+from django.core.exceptions import ValidationError
+from django.utils.html import strip_tags
+
+from .models import Question, Answer
+
+ANSWER_MAX_LENGTH = Answer._meta.get_field('text').max_length
+
+ENCODING_ERROR = "Plik ma niepoprawne kodowanie. Wymagane jest UTF-8."
+
+_REGISTRY = {}
+
+
+def register_importer(cls):
+    """
+    Dekorator rejestrujący klasę importera pod nazwą jego formatu.
+
+    Args:
+        cls (type[BaseImporter]): Klasa importera z ustawionym `format_name`.
+
+    Returns:
+        type[BaseImporter]: Niezmieniona klasa (pozwala użyć funkcji jako dekoratora).
+    """
+    _REGISTRY[cls.format_name] = cls
+    return cls
+
+
+def get_importer(format_name: str):
+    """
+    Zwraca instancję importera dla podanej nazwy formatu.
+
+    Args:
+        format_name (str): Nazwa formatu, np. 'json', 'csv', 'gift', 'moodle_xml'.
+
+    Returns:
+        BaseImporter | None: Importer lub None, jeśli format nie jest obsługiwany.
+    """
+    cls = _REGISTRY.get(format_name)
+    return cls() if cls else None
+
+
+def get_importer_for_filename(filename: str):
+    """
+    Dobiera importer na podstawie rozszerzenia pliku.
+
+    Args:
+        filename (str): Nazwa przesłanego pliku.
+
+    Returns:
+        BaseImporter | None: Importer lub None, jeśli rozszerzenie nie jest obsługiwane.
+    """
+    name = filename.lower()
+    for cls in _REGISTRY.values():
+        if any(name.endswith(ext) for ext in cls.extensions):
+            return cls()
+    return None
+
+
+def supported_extensions() -> list:
+    """Zwraca listę wszystkich obsługiwanych rozszerzeń plików (np. do atrybutu `accept`)."""
+    return [ext for cls in _REGISTRY.values() for ext in cls.extensions]
+
+
+def validate_question_record(q_data, q_num: int) -> dict:
+    """
+    Waliduje pojedynczy rekord pytania i zwraca jego znormalizowaną postać.
+
+    Jest to wspólna walidacja dla wszystkich formatów importu. Sprawdza obecność treści,
+    listy odpowiedzi oraz reguły liczby poprawnych odpowiedzi dla typów SINGLE/MULTIPLE.
+
+    Args:
+        q_data (dict): Surowy rekord pytania zwrócony przez parser.
+        q_num (int): Numer pytania w pliku (używany w komunikatach błędów).
+
+    Returns:
+        dict: Rekord z kluczami 'text', 'explanation', 'question_type' i 'answers'
+            oraz opcjonalnie 'bank_question' (klucz pytania z banku, np. z eksportu JSON).
+
+    Raises:
+        ValidationError: Jeśli rekord jest niekompletny lub logicznie niepoprawny.
+    """
+    if not isinstance(q_data, dict):
+        raise ValidationError(f"Pytanie {q_num}: Nie jest poprawnym obiektem JSON.")
+
+    text = q_data.get('text')
+    if not text or not isinstance(text, str):
+        raise ValidationError(f"Pytanie {q_num}: Brak lub niepoprawny klucz 'text'.")
+
+    question_type = q_data.get('question_type') or Question.QuestionType.SINGLE
+    if question_type not in Question.QuestionType.values:
+        raise ValidationError(f"Pytanie {q_num}: Nieznany typ pytania '{question_type}'.")
+
+    explanation = q_data.get('explanation') or ''
+    answers_data = q_data.get('answers')
+
+    if not answers_data or not isinstance(answers_data, list) or len(answers_data) < 2:
+        raise ValidationError(f"Pytanie {q_num}: Musi zawierać listę 'answers' z co najmniej 2 odpowiedziami.")
+
+    validated_answers = []
+    correct_count = 0
+
+    for j, ans_data in enumerate(answers_data):
+        ans_num = j + 1
+        if not isinstance(ans_data, dict):
+            raise ValidationError(f"Pytanie {q_num}, Odpowiedź {ans_num}: Błędny format.")
+
+        ans_text = ans_data.get('text')
+        is_correct = bool(ans_data.get('is_correct', False))
+
+        if not ans_text:
+            continue
+
+        ans_text = str(ans_text)
+        if len(ans_text) > ANSWER_MAX_LENGTH:
+            raise ValidationError(f"Pytanie {q_num}, Odpowiedź {ans_num}: Treść odpowiedzi jest za długa.")
+
+        if is_correct:
+            correct_count += 1
+
+        validated_answers.append({'text': ans_text, 'is_correct': is_correct})
+
+    if question_type == Question.QuestionType.SINGLE:
+        if correct_count != 1:
+            raise ValidationError(
+                f"Pytanie {q_num} ('{text[:30]}...'): Typ 'Jednokrotny wybór' musi mieć dokładnie 1 poprawną odpowiedź (znaleziono {correct_count})."
+            )
+    elif correct_count < 1:
+        raise ValidationError(
+            f"Pytanie {q_num} ('{text[:30]}...'): Typ 'Wielokrotny wybór' musi mieć przynajmniej 1 poprawną odpowiedź."
+        )
+
+    record = {
+        'text': text,
+        'explanation': explanation,
+        'question_type': question_type,
+        'answers': validated_answers,
+    }
+    bank_question = q_data.get('bank_question')
+    if bank_question is not None:
+        if not isinstance(bank_question, int) or isinstance(bank_question, bool):
+            raise ValidationError(f"Pytanie {q_num}: Niepoprawny klucz 'bank_question'.")
+        record['bank_question'] = bank_question
+    return record
+
+
+def _iter_text_lines(file):
+    """
+    Dekoduje plik binarny linia po linii (UTF-8, z pominięciem BOM) bez wczytywania go w całości.
+
+    Raises:
+        ValidationError: Jeśli plik nie jest poprawnym UTF-8.
+    """
+    first = True
+    for line in file:
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError:
+                raise ValidationError(ENCODING_ERROR)
+        if first:
+            line = line.lstrip('\ufeff')
+            first = False
+        yield line
+
+
+def _clean_markup(text) -> str:
+    """Usuwa znaczniki HTML i encje z tekstu pochodzącego z plików Moodle."""
+    text = text or ''
+    if '<' in text:
+        text = strip_tags(text)
+    if '&' in text:
+        text = unescape(text)
+    return text.strip()
+
+
+class BaseImporter:
+    """
+    Klasa bazowa importera pytań.
+
+    Podklasy implementują metodę `parse`, która strumieniowo zwraca surowe rekordy
+    pytań. Walidacja i numeracja pytań odbywa się wspólnie w `records`.
+
+    Attributes:
+        format_name (str): Klucz formatu w rejestrze.
+        label (str): Nazwa formatu wyświetlana użytkownikowi.
+        extensions (tuple): Obsługiwane rozszerzenia plików (małe litery, z kropką).
+    """
+    format_name = ''
+    label = ''
+    extensions = ()
+
+    def parse(self, file):
+        """
+        Zwraca kolejne surowe rekordy pytań z pliku.
+
+        Args:
+            file (File): Plik binarny (np. `UploadedFile`).
+
+        Yields:
+            dict: Surowy rekord pytania.
+        """
+        raise NotImplementedError
+
+    def records(self, file):
+        """
+        Zwraca kolejne zwalidowane rekordy pytań z pliku.
+
+        Args:
+            file (File): Plik binarny (np. `UploadedFile`).
+
+        Yields:
+            dict: Rekord pytania po walidacji `validate_question_record`.
+
+        Raises:
+            ValidationError: Przy pierwszym niepoprawnym pytaniu.
+        """
+        for q_num, raw in enumerate(self.parse(file), start=1):
+            yield validate_question_record(raw, q_num)
+
+
+@register_importer
+class JsonImporter(BaseImporter):
+    """
+    Importer natywnego formatu JSON (zgodnego z eksportem `quiz_export_json_view`).
+    """
+    format_name = 'json'
+    label = 'JSON'
+    extensions = ('.json',)
+
+    def parse(self, file):
+        try:
+            data = json.loads(file.read().decode('utf-8'))
+        except UnicodeDecodeError:
+            raise ValidationError(ENCODING_ERROR)
+        except json.JSONDecodeError:
+            raise ValidationError("Błąd parsowania pliku JSON. Upewnij się, że plik jest poprawny.")
+
+        if not isinstance(data, dict) or not isinstance(data.get('questions'), list):
+            raise ValidationError("Plik JSON musi zawierać klucz 'questions' z listą pytań.")
+
+        yield from data['questions']
+
+
+@register_importer
+class CsvImporter(BaseImporter):
+    """
+    Importer plików CSV z wierszem nagłówka.
+
+    Obsługiwane kolumny:
+
+    * `text` (wymagana) - treść pytania,
+    * `answer_1`, `answer_2`, ... (lub dowolne kolumny zaczynające się od `answer`) - odpowiedzi,
+    * `correct` - numery poprawnych odpowiedzi liczone od 1, oddzielone `|` lub spacją,
+    * `question_type` (opcjonalna) - SINGLE/MULTIPLE; domyślnie ustalany na podstawie `correct`,
+    * `explanation` (opcjonalna) - wyjaśnienie.
+
+    Separator (`,`, `;` lub tabulator) jest wykrywany automatycznie.
+    """
+    format_name = 'csv'
+    label = 'CSV'
+    extensions = ('.csv',)
+
+    def parse(self, file):
+        lines = _iter_text_lines(file)
+        header_line = next(lines, '')
+        try:
+            dialect = csv.Sniffer().sniff(header_line, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.reader(chain([header_line], lines), dialect)
+        header = [col.strip().lower() for col in next(reader, [])]
+        if 'text' not in header:
+            raise ValidationError("Plik CSV musi zawierać nagłówek z kolumną 'text'.")
+
+        text_idx = header.index('text')
+        type_idx = header.index('question_type') if 'question_type' in header else None
+        expl_idx = header.index('explanation') if 'explanation' in header else None
+        correct_idx = header.index('correct') if 'correct' in header else None
+        answer_idxs = [i for i, col in enumerate(header) if col.startswith('answer')]
+
+        for row_num, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            row += [''] * (len(header) - len(row))
+
+            try:
+                correct = {int(n) for n in re.split(r'[|,\s]+', row[correct_idx].strip()) if n} if correct_idx is not None else set()
+            except ValueError:
+                raise ValidationError(f"Wiersz {row_num}: Kolumna 'correct' musi zawierać numery odpowiedzi (np. 1 lub 1|3).")
+
+            answers = [
+                {'text': row[i].strip(), 'is_correct': n in correct}
+                for n, i in enumerate(answer_idxs, start=1)
+            ]
+            question_type = row[type_idx].strip().upper() if type_idx is not None else ''
+            if not question_type:
+                question_type = Question.QuestionType.MULTIPLE if len(correct) > 1 else Question.QuestionType.SINGLE
+
+            yield {
+                'text': row[text_idx].strip(),
+                'explanation': row[expl_idx].strip() if expl_idx is not None else '',
+                'question_type': question_type,
+                'answers': answers,
+            }
+
+
+@register_importer
+class GiftImporter(BaseImporter):
+    """
+    Importer formatu GIFT (Moodle).
+
+    Obsługiwane są pytania wielokrotnego wyboru (`{=dobra ~zła}`, także z wagami
+    `~%50%`) oraz prawda/fałsz (`{T}`, `{FALSE}`). Tytuły `::...::`, komentarze `//`,
+    znaczniki formatu (`[html]`) i informacja zwrotna `#...` są pomijane, a ogólna
+    informacja zwrotna `####...` trafia do wyjaśnienia pytania.
+    """
+    format_name = 'gift'
+    label = 'GIFT'
+    extensions = ('.gift', '.txt')
+
+    _FORMAT_TAG = re.compile(r'^\[(html|moodle|plain|markdown)\]')
+    _TITLE = re.compile(r'^::(.*?)::', re.S)
+    _WEIGHT = re.compile(r'^%(-?\d+(?:\.\d+)?)%')
+
+    def parse(self, file):
+        block = []
+        block_start = 1
+        for line_num, line in enumerate(_iter_text_lines(file), start=1):
+            stripped = line.strip()
+            if stripped.startswith('//') or stripped.startswith('$CATEGORY:'):
+                continue
+            if stripped:
+                if not block:
+                    block_start = line_num
+                block.append(line)
+            elif block:
+                yield self._parse_block(''.join(block), block_start)
+                block = []
+        if block:
+            yield self._parse_block(''.join(block), block_start)
+
+    @staticmethod
+    def _find_unescaped(text, char, start=0):
+        """Zwraca indeks pierwszego nieescapowanego znaku `char` lub -1."""
+        i = start
+        while i < len(text):
+            if text[i] == '\\':
+                i += 2
+                continue
+            if text[i] == char:
+                return i
+            i += 1
+        return -1
+
+    @staticmethod
+    def _unescape(text):
+        return re.sub(r'\\([~=#{}:\\])', r'\1', text).replace('\\n', '\n').strip()
+
+    def _split_answers(self, body):
+        """Dzieli zawartość bloku `{...}` na znaczniki (`=`/`~`) i surowe treści odpowiedzi."""
+        tokens = []
+        i = 0
+        current = None
+        while i < len(body):
+            ch = body[i]
+            if ch == '\\':
+                if current is not None:
+                    current[1] += body[i:i + 2]
+                i += 2
+                continue
+            if ch in '=~':
+                current = [ch, '']
+                tokens.append(current)
+            elif current is not None:
+                current[1] += ch
+            i += 1
+        return tokens
+
+    def _parse_block(self, block, line_num):
+        text = block.strip()
+        title = self._TITLE.match(text)
+        if title:
+            text = text[title.end():].strip()
+        text = self._FORMAT_TAG.sub('', text).strip()
+
+        open_idx = self._find_unescaped(text, '{')
+        close_idx = self._find_unescaped(text, '}', open_idx + 1) if open_idx != -1 else -1
+        if open_idx == -1 or close_idx == -1:
+            raise ValidationError(f"GIFT (linia {line_num}): Brak bloku odpowiedzi {{...}}.")
+
+        question_text = self._unescape(text[:open_idx] + ' ' + text[close_idx + 1:])
+        question_text = self._FORMAT_TAG.sub('', question_text).strip()
+        body = text[open_idx + 1:close_idx]
+
+        explanation = ''
+        feedback_idx = body.find('####')
+        if feedback_idx != -1:
+            explanation = self._unescape(self._FORMAT_TAG.sub('', body[feedback_idx + 4:].strip()))
+            body = body[:feedback_idx]
+
+        tf = body.strip().split('#', 1)[0].strip().upper()
+        if tf in ('T', 'TRUE', 'F', 'FALSE'):
+            is_true = tf in ('T', 'TRUE')
+            return {
+                'text': question_text,
+                'explanation': explanation,
+                'question_type': Question.QuestionType.SINGLE,
+                'answers': [
+                    {'text': 'Prawda', 'is_correct': is_true},
+                    {'text': 'Fałsz', 'is_correct': not is_true},
+                ],
+            }
+
+        tokens = self._split_answers(body)
+        if not tokens or any('->' in raw for _, raw in tokens) or not any(mark == '~' for mark, _ in tokens):
+            raise ValidationError(
+                f"GIFT (linia {line_num}): Obsługiwane są tylko pytania wyboru i prawda/fałsz."
+            )
+
+        answers = []
+        for mark, raw in tokens:
+            raw = raw.strip()
+            hash_idx = self._find_unescaped(raw, '#')
+            if hash_idx != -1:
+                raw = raw[:hash_idx]
+            weight = self._WEIGHT.match(raw.strip())
+            if weight:
+                is_correct = float(weight.group(1)) > 0
+                raw = raw.strip()[weight.end():]
+            else:
+                is_correct = mark == '='
+            answers.append({'text': self._unescape(raw), 'is_correct': is_correct})
+
+        correct = sum(1 for a in answers if a['is_correct'])
+        return {
+            'text': question_text,
+            'explanation': explanation,
+            'question_type': Question.QuestionType.MULTIPLE if correct > 1 else Question.QuestionType.SINGLE,
+            'answers': answers,
+        }
+
+
+@register_importer
+class MoodleXmlImporter(BaseImporter):
+    """
+    Importer formatu Moodle XML.
+
+    Plik jest przetwarzany przyrostowo (`iterparse`), a przetworzone elementy
+    są zwalniane na bieżąco, więc pamięć nie rośnie wraz z rozmiarem banku.
+    Obsługiwane są pytania `multichoice` i `truefalse`; wpisy `category`
+    i `description` są pomijane.
+    """
+    format_name = 'moodle_xml'
+    label = 'Moodle XML'
+    extensions = ('.xml',)
+
+    _SKIPPED_TYPES = ('category', 'description')
+
+    def parse(self, file):
+        root = None
+        q_num = 0
+        try:
+            for event, elem in ET.iterparse(file, events=('start', 'end')):
+                if root is None:
+                    root = elem
+                if event != 'end' or elem.tag != 'question':
+                    continue
+
+                q_type = elem.get('type', '')
+                if q_type not in self._SKIPPED_TYPES:
+                    q_num += 1
+                    yield self._parse_question(elem, q_type, q_num)
+                root.clear()
+        except ET.ParseError as e:
+            raise ValidationError(f"Błąd parsowania pliku XML: {e}")
+
+    def _parse_question(self, elem, q_type, q_num):
+        if q_type not in ('multichoice', 'truefalse'):
+            raise ValidationError(f"Pytanie {q_num}: Nieobsługiwany typ pytania Moodle '{q_type}'.")
+
+        answers = []
+        for ans in elem.findall('answer'):
+            try:
+                fraction = float(ans.get('fraction', '0'))
+            except ValueError:
+                fraction = 0
+            answers.append({'text': _clean_markup(ans.findtext('text')), 'is_correct': fraction > 0})
+
+        if q_type == 'truefalse':
+            for ans in answers:
+                ans['text'] = {'true': 'Prawda', 'false': 'Fałsz'}.get(ans['text'].lower(), ans['text'])
+            question_type = Question.QuestionType.SINGLE
+        else:
+            single = (elem.findtext('single') or 'true').strip().lower() in ('true', '1')
+            question_type = Question.QuestionType.SINGLE if single else Question.QuestionType.MULTIPLE
+
+        return {
+            'text': _clean_markup(elem.findtext('questiontext/text')),
+            'explanation': _clean_markup(elem.findtext('generalfeedback/text')),
+            'question_type': question_type,
+            'answers': answers,
+        }
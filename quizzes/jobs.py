@@ -0,0 +1,252 @@
+# quizzes/jobs.py
+"""
+Obsługa zleceń wykonywanych w tle (kolejka oparta na bazie danych).
+
+Zlecenia są zapisywane w bazie przez widoki, a następnie pobierane i wykonywane
+przez polecenie `python manage.py run_worker`. Dzięki temu długie operacje
+(import dużych plików, generowanie quizów przez AI) nie blokują workerów WSGI.
+"""
+
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .generation import (
+    cache_records,
+    create_generated_quiz,
+    generate_question_records,
+    get_cached_records,
+    stream_question_records,
+)
+from .duplicates import DuplicateFilter
+from .importers import get_importer
+from .persistence import insert_question_batch, iter_batches
+from .models import GenerationJob, ImportJob, Question, QuizBankItem
+
+
+class JobCancelled(Exception):
+    """Zgłaszany, gdy użytkownik anulował zlecenie w trakcie wykonywania."""
+
+
+def fail_stale_jobs(model, timeout: int = None) -> int:
+    """
+    Kończy statusem FAILED zlecenia wykonywane dłużej niż `timeout` sekund.
+
+    Worker przerwany w trakcie zlecenia (np. zabity proces) zostawiłby je w stanie
+    RUNNING na zawsze - blokując m.in. usunięcie quizu przez `purge_deleted`.
+    Pytania zapisane przed przerwaniem pozostają w quizie, a przesłany plik
+    importu jest usuwany.
+
+    Args:
+        model (type[Model]): Model zlecenia (np. `ImportJob`).
+        timeout (int, optional): Maksymalny czas wykonywania w sekundach
+            (domyślnie `QUIZ_JOB_STALE_AFTER`).
+
+    Returns:
+        int: Liczba zakończonych zleceń.
+    """
+    if timeout is None:
+        timeout = settings.QUIZ_JOB_STALE_AFTER
+    running = model.Status.RUNNING
+    now = timezone.now()
+    failed = 0
+    for job in model.objects.filter(status=running, started_at__lt=now - timedelta(seconds=timeout)):
+        updated = model.objects.filter(pk=job.pk, status=running).update(
+            status=model.Status.FAILED,
+            error=f"Zlecenie przerwane - worker nie zakończył go w ciągu {timeout} s.",
+            finished_at=now,
+        )
+        if updated:
+            failed += 1
+            if isinstance(job, ImportJob):
+                job.file.delete(save=False)
+    return failed
+
+
+def claim_next_job(model):
+    """
+    Pobiera najstarsze oczekujące zlecenie i oznacza je jako wykonywane.
+
+    Zmiana statusu jest warunkowym `UPDATE`, więc przy kilku równoległych
+    workerach każde zlecenie zostanie przejęte tylko przez jeden z nich.
+    Wcześniej zlecenia porzucone przez przerwanych workerów są kończone
+    przez `fail_stale_jobs`.
+
+    Args:
+        model (type[Model]): Model zlecenia z polami `status` i `started_at` (np. `ImportJob`).
+
+    Returns:
+        Model | None: Przejęte zlecenie lub None, jeśli kolejka jest pusta.
+    """
+    fail_stale_jobs(model)
+    pending = model.Status.PENDING
+    while True:
+        job = model.objects.filter(status=pending).order_by('created_at', 'pk').first()
+        if job is None:
+            return None
+        claimed = model.objects.filter(pk=job.pk, status=pending).update(
+            status=model.Status.RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def _delete_in_chunks(model, pks, chunk_size=500):
+    """Usuwa obiekty o podanych kluczach w małych partiach (krótkie blokady zapisu)."""
+    for i in range(0, len(pks), chunk_size):
+        with transaction.atomic():
+            model.objects.filter(pk__in=pks[i:i + chunk_size]).delete()
+
+
+def run_import_job(job: ImportJob) -> ImportJob:
+    """
+    Wykonuje zlecenie importu pytań partiami.
+
+    Każda partia jest zapisywana w osobnej transakcji razem z aktualizacją postępu,
+    więc blokada zapisu SQLite trwa tylko przez czas jednej partii. Przed każdą partią
+    sprawdzane jest żądanie anulowania. W trybie `atomic` błąd lub anulowanie
+    powoduje usunięcie wszystkich pytań i dołączeń z banku zapisanych przez to zlecenie.
+
+    Args:
+        job (ImportJob): Zlecenie w stanie RUNNING (np. z `claim_next_job`).
+
+    Returns:
+        ImportJob: Zlecenie z końcowym statusem.
+    """
+    importer = get_importer(job.format_name)
+    created_pks, created_link_pks = [], []
+
+    try:
+        if importer is None:
+            raise ValueError(f"Nieobsługiwany format '{job.format_name}'.")
+
+        total_bytes = job.file.size or 1
+        duplicate_filter = DuplicateFilter(job.quiz, job.duplicates)
+        with job.file.open('rb') as f:
+            for batch in iter_batches(duplicate_filter(importer.records(f))):
+                if ImportJob.objects.filter(pk=job.pk, cancel_requested=True).exists():
+                    raise JobCancelled()
+
+                with transaction.atomic():
+                    # Dołączenia z banku dostają rangi po ostatniej randze quizu sprzed partii.
+                    links_after = None
+                    if job.atomic and any(rec.get('bank_question') for rec in batch):
+                        links_after = Question.last_rank(job.quiz.pk)
+                    questions = insert_question_batch(job.quiz, batch)
+                    if links_after is not None:
+                        created_link_pks.extend(
+                            QuizBankItem.objects.filter(quiz=job.quiz, rank__gt=links_after)
+                            .values_list('pk', flat=True)
+                        )
+                    job.processed_count += len(batch)
+                    job.progress = min(99, int(f.tell() * 100 / total_bytes))
+                    ImportJob.objects.filter(pk=job.pk).update(
+                        processed_count=job.processed_count,
+                        progress=job.progress,
+                    )
+                if job.atomic:
+                    created_pks.extend(q.pk for q in questions)
+
+        job.status = ImportJob.Status.DONE
+        job.progress = 100
+    except JobCancelled:
+        job.status = ImportJob.Status.CANCELLED
+    except Exception as e:
+        job.status = ImportJob.Status.FAILED
+        job.error = getattr(e, 'message', None) or str(e)
+
+    if job.status != ImportJob.Status.DONE and job.atomic and (created_pks or created_link_pks):
+        _delete_in_chunks(Question, created_pks)
+        _delete_in_chunks(QuizBankItem, created_link_pks)
+        job.processed_count = 0
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'processed_count', 'error', 'finished_at'])
+    job.file.delete(save=False)
+    return job
+
+
+def _stream_generation(job: GenerationJob) -> None:
+    """
+    Generuje pytania strumieniowo, zapisując każde zaraz po jego otrzymaniu.
+
+    Quiz jest tworzony przed wysłaniem zapytania, a każde pytanie trafia do bazy
+    w osobnej, krótkiej transakcji razem z licznikiem zlecenia. Przerwanie strumienia
+    po zapisaniu części pytań nie usuwa ich - zlecenie kończy się z adnotacją
+    w polu `error`. Jeśli nie zapisano żadnego pytania, pusty quiz jest usuwany.
+    Zapisywanych jest co najwyżej `job.count` pytań.
+    """
+    quiz = create_generated_quiz(job.created_by, job.topic)
+    job.quiz = quiz
+    GenerationJob.objects.filter(pk=job.pk).update(quiz=quiz)
+
+    records = []
+    duplicate_filter = DuplicateFilter(None, settings.QUIZ_GENERATION_DUPLICATES)
+    try:
+        for record in islice(duplicate_filter(stream_question_records(job.topic, job.count)), job.count):
+            with transaction.atomic():
+                insert_question_batch(quiz, [record])
+                records.append(record)
+                job.questions_done = len(records)
+                if job.first_question_at is None:
+                    job.first_question_at = timezone.now()
+                GenerationJob.objects.filter(pk=job.pk).update(
+                    questions_done=job.questions_done,
+                    first_question_at=job.first_question_at,
+                )
+    except Exception as e:
+        if not records:
+            quiz.delete()
+            job.quiz = None
+            raise
+        job.error = f"Generowanie przerwane po {len(records)} pytaniach: {e}"
+        return
+
+    if not records:
+        quiz.delete()
+        job.quiz = None
+        raise ValueError("Lista pytań jest pusta.")
+    if len(records) >= job.count:
+        cache_records(job.topic, job.count, records)
+
+
+def run_generation_job(job: GenerationJob) -> GenerationJob:
+    """
+    Wykonuje zlecenie wygenerowania quizu przez model językowy.
+
+    Zapytanie do API odbywa się poza transakcją (o ile wyniku nie ma w pamięci
+    podręcznej i zlecenie nie wymusza świeżego generowania). W trybie strumieniowym
+    (`QUIZ_GENERATION_STREAMING`) pytania są zapisywane pojedynczo w miarę
+    napływania odpowiedzi. Większe quizy (powyżej `QUIZ_GENERATION_CHUNK_SIZE`
+    pytań) oraz tryb bez strumieniowania zapisują quiz wraz ze wszystkimi
+    pytaniami po otrzymaniu odpowiedzi, w jednej transakcji.
+
+    Args:
+        job (GenerationJob): Zlecenie w stanie RUNNING (np. z `claim_next_job`).
+
+    Returns:
+        GenerationJob: Zlecenie z końcowym statusem i przypisanym quizem.
+    """
+    try:
+        records = None if job.force_fresh else get_cached_records(job.topic, job.count)
+        streaming = settings.QUIZ_GENERATION_STREAMING and job.count <= settings.QUIZ_GENERATION_CHUNK_SIZE
+        if not records and streaming:
+            _stream_generation(job)
+        else:
+            if not records:
+                records = generate_question_records(job.topic, job.count, cache=True)
+            job.quiz = create_generated_quiz(job.created_by, job.topic, records)
+            job.questions_done = len(records)
+        job.status = GenerationJob.Status.DONE
+    except Exception as e:
+        job.status = GenerationJob.Status.FAILED
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'quiz', 'questions_done', 'error', 'finished_at'])
+    return job
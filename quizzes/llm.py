@@ -0,0 +1,629 @@
+# quizzes/llm.py
+"""
+Klient HTTP dla API chat-completions (Hugging Face Router lub inne zgodne z OpenAI).
+
+Zapewnia:
+
+* współdzieloną sesję `requests` z pulą połączeń keep-alive (bez nowego
+  połączenia TCP+TLS przy każdym generowaniu),
+* osobne limity czasu na nawiązanie połączenia i odczyt odpowiedzi,
+* ograniczoną liczbę ponowień z losowym opóźnieniem (jitter) dla błędów
+  429/5xx i błędów sieci, z poszanowaniem nagłówka `Retry-After`,
+* metryki opóźnień i zużycia tokenów (`quizzes.metrics`),
+* tryb strumieniowy (server-sent events) zwracający kolejne fragmenty treści,
+* rejestr backendów (`QUIZ_LLM_BACKENDS`): endpoint zgodny z OpenAI oraz
+  deterministyczny backend lokalny, z limitami równoczesnych zapytań,
+  statystykami opóźnień i błędów oraz wyborem najszybszego backendu.
+
+Konfiguracja jest czytana z ustawień `QUIZ_LLM_*` w chwili wywołania,
+a nie przy imporcie modułu.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+#: Model używany, gdy backend nie określa własnego (`MODEL` w `QUIZ_LLM_BACKENDS`).
+DEFAULT_MODEL = "meta-llama/Meta-Llama-3-8B-Instruct"
+
+#: Kody HTTP, przy których zapytanie jest ponawiane.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class LLMError(Exception):
+    """
+    Błąd zapytania do API modelu językowego.
+
+    Attributes:
+        status_code (int | None): Kod HTTP odpowiedzi (None przy błędzie sieci).
+    """
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_session() -> requests.Session:
+    """
+    Zwraca współdzieloną sesję HTTP z pulą połączeń keep-alive.
+
+    Sesja jest tworzona leniwie przy pierwszym użyciu i współdzielona przez
+    wszystkie wątki procesu.
+
+    Returns:
+        requests.Session: Sesja z zamontowanym `HTTPAdapter` o rozmiarze puli `QUIZ_LLM_POOL_SIZE`.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.QUIZ_LLM_POOL_SIZE,
+                    pool_maxsize=settings.QUIZ_LLM_POOL_SIZE,
+                    max_retries=0,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def _retry_after_seconds(response) -> float | None:
+    """Odczytuje nagłówek `Retry-After` (liczba sekund lub data HTTP)."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _error_message(response) -> str:
+    try:
+        data = response.json()
+    except ValueError:
+        return response.text
+    return data.get('error', response.text) if isinstance(data, dict) else response.text
+
+
+class LLMClient:
+    """
+    Klient API chat-completions z limitami czasu, ponowieniami i metrykami.
+
+    Parametry niepodane w konstruktorze są pobierane z ustawień w chwili
+    wywołania (dzięki temu `override_settings` działa w testach).
+
+    Attributes:
+        name (str): Nazwa klienta używana jako prefiks metryk.
+    """
+
+    def __init__(self, url=None, token=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff=None, name='llm', session=None):
+        self._url = url
+        self._token = token
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._session = session
+        self.name = name
+        self.sleep = time.sleep
+
+    @property
+    def url(self) -> str:
+        return self._url or settings.QUIZ_LLM_API_URL
+
+    @property
+    def token(self):
+        return self._token if self._token is not None else settings.QUIZ_LLM_API_TOKEN
+
+    @property
+    def timeout(self) -> tuple:
+        """Para (connect, read) przekazywana do `requests`."""
+        return (
+            self._connect_timeout if self._connect_timeout is not None else settings.QUIZ_LLM_CONNECT_TIMEOUT,
+            self._read_timeout if self._read_timeout is not None else settings.QUIZ_LLM_READ_TIMEOUT,
+        )
+
+    @property
+    def max_retries(self) -> int:
+        return self._max_retries if self._max_retries is not None else settings.QUIZ_LLM_MAX_RETRIES
+
+    def _backoff_delay(self, attempt: int, retry_after=None) -> float:
+        """Opóźnienie przed kolejną próbą: `Retry-After` lub wykładniczy backoff z pełnym jitterem."""
+        cap = settings.QUIZ_LLM_MAX_BACKOFF
+        if retry_after is not None:
+            return min(retry_after, cap)
+        base = self._backoff if self._backoff is not None else settings.QUIZ_LLM_BACKOFF
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    def post(self, payload: dict, stream: bool = False) -> requests.Response:
+        """
+        Wysyła zapytanie POST z ponowieniami i zwraca udaną odpowiedź (HTTP 200).
+
+        Args:
+            payload (dict): Treść zapytania chat-completions.
+            stream (bool): Czy odpowiedź ma być czytana strumieniowo.
+
+        Returns:
+            requests.Response: Odpowiedź z kodem 200.
+
+        Raises:
+            LLMError: Przy braku klucza API, błędzie HTTP lub po wyczerpaniu ponowień.
+        """
+        if not self.token:
+            raise LLMError("Brak klucza API (HF_TOKEN) w pliku .env")
+
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        session = self._session or get_session()
+
+        attempt = 0
+        while True:
+            metrics.incr(f'{self.name}.requests')
+            start = time.perf_counter()
+            try:
+                response = session.post(self.url, headers=headers, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe(f'{self.name}.latency', time.perf_counter() - start)
+                metrics.incr(f'{self.name}.errors')
+                if attempt >= self.max_retries:
+                    raise LLMError(f"Błąd połączenia z API: {e}")
+                delay = self._backoff_delay(attempt)
+            else:
+                metrics.observe(f'{self.name}.latency', time.perf_counter() - start)
+                if response.status_code == 200:
+                    return response
+                metrics.incr(f'{self.name}.errors')
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    raise LLMError(
+                        f"Błąd API ({response.status_code}): {_error_message(response)}",
+                        status_code=response.status_code,
+                    )
+                delay = self._backoff_delay(attempt, _retry_after_seconds(response))
+                response.close()
+
+            attempt += 1
+            metrics.incr(f'{self.name}.retries')
+            logger.warning("Ponawianie zapytania do %s (próba %d) za %.2f s", self.url, attempt + 1, delay)
+            self.sleep(delay)
+
+    def chat_completion(self, payload: dict) -> dict:
+        """
+        Wykonuje zapytanie chat-completions i zwraca zdekodowaną odpowiedź JSON.
+
+        Rejestruje zużycie tokenów z pola `usage` odpowiedzi.
+
+        Args:
+            payload (dict): Treść zapytania (model, messages, max_tokens...).
+
+        Returns:
+            dict: Odpowiedź API.
+
+        Raises:
+            LLMError: Przy błędzie HTTP lub niepoprawnym JSON w odpowiedzi.
+        """
+        response = self.post(payload)
+        try:
+            result = response.json()
+        except ValueError:
+            raise LLMError("Odpowiedź API nie jest poprawnym JSON.")
+
+        self._record_usage(result)
+        return result
+
+    def _record_usage(self, event: dict) -> None:
+        usage = event.get('usage') or {}
+        for key in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+            if isinstance(usage.get(key), int):
+                metrics.incr(f'{self.name}.{key}', usage[key])
+
+    def stream_chat_completion(self, payload: dict):
+        """
+        Wykonuje zapytanie chat-completions w trybie strumieniowym (server-sent events).
+
+        Ponowienia dotyczą tylko nawiązania połączenia i statusu odpowiedzi - po
+        rozpoczęciu strumienia błąd sieci kończy generator wyjątkiem `LLMError`,
+        a już zwrócone fragmenty pozostają ważne.
+
+        Args:
+            payload (dict): Treść zapytania (pole 'stream' jest ustawiane na True).
+
+        Yields:
+            str: Kolejne fragmenty treści odpowiedzi (`choices[0].delta.content`).
+
+        Raises:
+            LLMError: Przy błędzie HTTP lub zerwaniu strumienia.
+        """
+        start = time.perf_counter()
+        response = self.post(dict(payload, stream=True), stream=True)
+        response.encoding = 'utf-8'
+        first_chunk = True
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                try:
+                    event = json.loads(data)
+                except ValueError:
+                    continue
+                self._record_usage(event)
+                for choice in event.get('choices') or []:
+                    content = (choice.get('delta') or {}).get('content')
+                    if content:
+                        if first_chunk:
+                            metrics.observe(f'{self.name}.time_to_first_token', time.perf_counter() - start)
+                            first_chunk = False
+                        yield content
+        except requests.RequestException as e:
+            metrics.incr(f'{self.name}.errors')
+            raise LLMError(f"Przerwany strumień odpowiedzi API: {e}")
+        finally:
+            response.close()
+
+
+_BACKEND_CLASSES = {}
+
+
+def register_backend(cls):
+    """
+    Dekorator rejestrujący klasę backendu pod nazwą używaną w `QUIZ_LLM_BACKENDS`.
+
+    Args:
+        cls (type[BaseBackend]): Klasa backendu z ustawionym `backend_name`.
+
+    Returns:
+        type[BaseBackend]: Niezmieniona klasa.
+    """
+    _BACKEND_CLASSES[cls.backend_name] = cls
+    return cls
+
+
+class BaseBackend:
+    """
+    Wspólna część backendów modelu językowego.
+
+    Ogranicza liczbę równoczesnych zapytań (`MAX_CONCURRENCY`) i zbiera
+    statystyki używane przy wyborze najszybszego backendu: liczbę zapytań
+    i błędów oraz wykładniczo ważoną średnią opóźnienia.
+
+    Attributes:
+        alias (str): Nazwa backendu z `QUIZ_LLM_BACKENDS`.
+        name (str): Prefiks metryk ('llm.<alias>').
+        model (str): Nazwa modelu wstawiana do zapytań.
+        max_concurrency (int): Maksymalna liczba równoczesnych zapytań.
+    """
+    backend_name = None
+
+    #: Waga nowego pomiaru w średniej opóźnienia.
+    LATENCY_SMOOTHING = 0.3
+
+    def __init__(self, alias: str, options: dict):
+        self.alias = alias
+        self.name = f'llm.{alias}'
+        self.model = options.get('MODEL') or DEFAULT_MODEL
+        self.max_concurrency = options.get('MAX_CONCURRENCY', 4)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency = None
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def is_busy(self) -> bool:
+        return self.in_flight >= self.max_concurrency
+
+    def _begin(self):
+        self._slots.acquire()
+        with self._stats_lock:
+            self.in_flight += 1
+        return time.perf_counter()
+
+    def _end(self, start: float, ok: bool) -> None:
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if ok:
+                self.latency = elapsed if self.latency is None else (
+                    self.LATENCY_SMOOTHING * elapsed + (1 - self.LATENCY_SMOOTHING) * self.latency
+                )
+            else:
+                self.errors += 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        """Zwraca statystyki backendu (do podglądu metryk)."""
+        with self._stats_lock:
+            return {
+                'backend': self.backend_name,
+                'model': self.model,
+                'requests': self.requests,
+                'errors': self.errors,
+                'latency': self.latency,
+                'in_flight': self.in_flight,
+            }
+
+    def chat_completion(self, payload: dict) -> dict:
+        """
+        Wykonuje zapytanie chat-completions (z limitem równoczesnych zapytań).
+
+        Args:
+            payload (dict): Treść zapytania; pole 'model' jest ustawiane przez backend.
+
+        Returns:
+            dict: Odpowiedź w formacie chat-completions.
+
+        Raises:
+            LLMError: Przy błędzie zapytania.
+        """
+        start = self._begin()
+        ok = False
+        try:
+            result = self._chat_completion(dict(payload, model=self.model))
+            ok = True
+            return result
+        finally:
+            self._end(start, ok)
+
+    def stream_chat_completion(self, payload: dict):
+        """
+        Wykonuje zapytanie w trybie strumieniowym; miejsce w limicie jest zajęte do końca strumienia.
+
+        Yields:
+            str: Kolejne fragmenty treści odpowiedzi.
+        """
+        start = self._begin()
+        ok = False
+        try:
+            yield from self._stream_chat_completion(dict(payload, model=self.model))
+            ok = True
+        finally:
+            self._end(start, ok)
+
+    def _chat_completion(self, payload):
+        raise NotImplementedError
+
+    def _stream_chat_completion(self, payload):
+        raise NotImplementedError
+
+
+@register_backend
+class OpenAICompatibleBackend(BaseBackend):
+    """
+    Backend dla endpointów chat-completions zgodnych z OpenAI (Hugging Face Router,
+    vLLM, własny serwer inferencji).
+
+    Opcje `URL`, `TOKEN`, `CONNECT_TIMEOUT`, `READ_TIMEOUT`, `MAX_RETRIES` i `BACKOFF`
+    są przekazywane do `LLMClient`; pominięte są czytane z ustawień `QUIZ_LLM_*`.
+    """
+    backend_name = 'openai'
+
+    def __init__(self, alias: str, options: dict):
+        super().__init__(alias, options)
+        self.client = LLMClient(
+            url=options.get('URL'),
+            token=options.get('TOKEN'),
+            connect_timeout=options.get('CONNECT_TIMEOUT'),
+            read_timeout=options.get('READ_TIMEOUT'),
+            max_retries=options.get('MAX_RETRIES'),
+            backoff=options.get('BACKOFF'),
+            name=self.name,
+        )
+
+    def _chat_completion(self, payload):
+        return self.client.chat_completion(payload)
+
+    def _stream_chat_completion(self, payload):
+        return self.client.stream_chat_completion(payload)
+
+
+@register_backend
+class FakeBackend(BaseBackend):
+    """
+    Deterministyczny backend lokalny - do testów, pracy offline i benchmarków.
+
+    Odczytuje temat i liczbę pytań z promptu (`quizzes.generation.build_user_prompt`)
+    i zwraca zawsze te same pytania dla tych samych danych. Opcja `LATENCY`
+    (sekundy) pozwala symulować czas odpowiedzi modelu.
+    """
+    backend_name = 'fake'
+
+    def __init__(self, alias: str, options: dict):
+        super().__init__(alias, options)
+        self.model = options.get('MODEL') or 'fake'
+        self.latency_seconds = options.get('LATENCY', 0.0)
+
+    def _content(self, payload) -> str:
+        prompt = payload['messages'][-1]['content']
+        topic_match = re.search(r'na temat: "(.*)"', prompt)
+        count_match = re.search(r'Liczba pytań: (\d+)', prompt)
+        part_match = re.search(r'To część (\d+) z', prompt)
+        topic = topic_match.group(1) if topic_match else "Quiz"
+        count = int(count_match.group(1)) if count_match else 5
+        part = int(part_match.group(1)) if part_match else 1
+
+        questions = []
+        for i in range(count):
+            number = f"{part}.{i + 1}" if part_match else str(i + 1)
+            digest = hashlib.sha256(f"{topic}|{number}".encode('utf-8')).digest()
+            questions.append({
+                'question': f"{topic} - pytanie {number} ({digest.hex()[:8]})?",
+                'answers': [f"Odpowiedź {letter}: {digest.hex()[8 + 6 * k:14 + 6 * k]}" for k, letter in enumerate("ABCD")],
+                'correct_index': digest[0] % 4,
+            })
+        return json.dumps({'questions': questions}, ensure_ascii=False)
+
+    def _chat_completion(self, payload):
+        time.sleep(self.latency_seconds)
+        return {
+            'model': self.model,
+            'choices': [{'message': {'role': 'assistant', 'content': self._content(payload)}}],
+        }
+
+    def _stream_chat_completion(self, payload):
+        content = self._content(payload)
+        chunk_size = 32
+        chunks = max(1, -(-len(content) // chunk_size))
+        for i in range(0, len(content), chunk_size):
+            time.sleep(self.latency_seconds / chunks)
+            yield content[i:i + chunk_size]
+
+
+class LLMRouter:
+    """
+    Wybiera backend dla każdego zapytania spośród skonfigurowanych w `QUIZ_LLM_BACKENDS`.
+
+    Strategia 'fastest' (domyślna) wybiera wolny backend o najmniejszej średniej
+    opóźnienia, pomijając backendy z dużym odsetkiem błędów; backendy bez pomiarów
+    są próbowane w pierwszej kolejności. Strategia 'ordered' zachowuje kolejność
+    z ustawień. Przy błędzie sieci lub 429/5xx zapytanie trafia do następnego backendu.
+
+    Attributes:
+        backends (list[BaseBackend]): Skonfigurowane backendy.
+        strategy (str): 'fastest' lub 'ordered'.
+    """
+
+    #: Odsetek błędów, powyżej którego backend jest uznawany za niesprawny.
+    MAX_ERROR_RATE = 0.5
+    #: Minimalna liczba zapytań, po której odsetek błędów jest brany pod uwagę.
+    MIN_REQUESTS = 5
+
+    def __init__(self, backends: list, strategy: str = 'fastest'):
+        if not backends:
+            raise ImproperlyConfigured("QUIZ_LLM_BACKENDS nie zawiera żadnego backendu.")
+        self.backends = backends
+        self.strategy = strategy
+
+    @property
+    def models(self) -> tuple:
+        """
+        Modele wszystkich backendów (posortowane, bez powtórzeń) - używane w kluczu pamięci podręcznej.
+
+        Wynik nie zależy od kolejności ani od backendu wybranego dla danego zapytania.
+        """
+        return tuple(sorted({backend.model for backend in self.backends}))
+
+    def _is_unhealthy(self, backend) -> bool:
+        return backend.requests >= self.MIN_REQUESTS and backend.error_rate > self.MAX_ERROR_RATE
+
+    def candidates(self) -> list:
+        """
+        Zwraca backendy w kolejności, w jakiej należy je próbować.
+
+        Returns:
+            list[BaseBackend]: Backendy posortowane według strategii.
+        """
+        if self.strategy == 'ordered':
+            return list(self.backends)
+        return sorted(
+            self.backends,
+            key=lambda b: (b.is_busy, self._is_unhealthy(b), b.latency or 0.0),
+        )
+
+    def chat_completion(self, payload: dict) -> dict:
+        """
+        Wykonuje zapytanie na najlepszym backendzie, z przejściem do kolejnego przy błędzie przejściowym.
+
+        Raises:
+            LLMError: Gdy zapytanie nie powiodło się na żadnym backendzie.
+        """
+        candidates = self.candidates()
+        for i, backend in enumerate(candidates):
+            try:
+                return backend.chat_completion(payload)
+            except LLMError as e:
+                transient = e.status_code is None or e.status_code in RETRY_STATUSES
+                if not transient or i == len(candidates) - 1:
+                    raise
+                logger.warning("Backend %s niedostępny (%s), próba kolejnego", backend.alias, e)
+
+    def stream_chat_completion(self, payload: dict):
+        """Wykonuje zapytanie strumieniowe na najlepszym backendzie (bez przełączania w trakcie strumienia)."""
+        return self.candidates()[0].stream_chat_completion(payload)
+
+    def stats(self) -> dict:
+        """Zwraca statystyki wszystkich backendów (alias -> słownik z `BaseBackend.stats`)."""
+        return {backend.alias: backend.stats() for backend in self.backends}
+
+
+def build_router() -> LLMRouter:
+    """
+    Tworzy router na podstawie ustawień `QUIZ_LLM_BACKENDS` i `QUIZ_LLM_ROUTING`.
+
+    Returns:
+        LLMRouter: Router z instancjami wszystkich skonfigurowanych backendów.
+
+    Raises:
+        ImproperlyConfigured: Przy nieznanym typie backendu lub pustej konfiguracji.
+    """
+    backends = []
+    for alias, options in settings.QUIZ_LLM_BACKENDS.items():
+        cls = _BACKEND_CLASSES.get(options.get('BACKEND', 'openai'))
+        if cls is None:
+            raise ImproperlyConfigured(f"Nieznany backend modelu językowego: {options.get('BACKEND')!r}.")
+        backends.append(cls(alias, options))
+    return LLMRouter(backends, settings.QUIZ_LLM_ROUTING)
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_client() -> LLMRouter:
+    """
+    Zwraca współdzielony router backendów (tworzony leniwie z ustawień).
+
+    Returns:
+        LLMRouter: Obiekt z metodami `chat_completion` i `stream_chat_completion`.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = build_router()
+    return _router
+
+
+@receiver(setting_changed)
+def _reset_router(setting, **kwargs):
+    """Odtwarza router po zmianie konfiguracji backendów (np. `override_settings` w testach)."""
+    global _router
+    if setting in ('QUIZ_LLM_BACKENDS', 'QUIZ_LLM_ROUTING'):
+        _router = None
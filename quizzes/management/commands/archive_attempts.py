@@ -0,0 +1,62 @@
+# quizzes/management/commands/archive_attempts.py
+"""
+Polecenie przenoszące stare podejścia do skompresowanego archiwum plików.
+
+Archiwizowane są pełne miesiące starsze niż `QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS`
+dni, osobno dla każdego quizu i każdej bazy podziału (patrz `quizzes.archive`).
+Polecenie można uruchamiać okresowo (np. z crona); przerwane - dokończy pracę
+przy następnym uruchomieniu.
+
+Użycie:
+    python manage.py archive_attempts                      # podejścia starsze niż rok
+    python manage.py archive_attempts --older-than-days 180
+    python manage.py archive_attempts --batch-size 500     # mniejsze partie usuwania
+    python manage.py archive_attempts --limit 50           # najwyżej 50 miesięcy quizów
+    python manage.py archive_attempts --dry-run            # tylko wypisz miesiące do archiwizacji
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quizzes.archive import ARCHIVE_BATCH_SIZE, archivable_months, archive_cutoff, archive_month
+from quizzes.sharding import attempt_databases
+
+
+class Command(BaseCommand):
+    """
+    Archiwizuje podejścia miesiąc po miesiącu, od najstarszych, raportując każdy zapisany plik.
+    """
+    help = "Przenosi stare podejścia (QuizAttempt) do skompresowanych plików archiwum."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS,
+                            help=f"Wiek archiwizowanych podejść w dniach (domyślnie {settings.QUIZ_ATTEMPT_ARCHIVE_AFTER_DAYS}).")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+                            help=f"Liczba wierszy odczytywanych i usuwanych naraz (domyślnie {ARCHIVE_BATCH_SIZE}).")
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa między partiami usuwania w sekundach.")
+        parser.add_argument('--limit', type=int, help="Maksymalna liczba miesięcy quizów archiwizowanych w jednym uruchomieniu.")
+        parser.add_argument('--dry-run', action='store_true', help="Tylko wypisz miesiące do archiwizacji.")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['older_than_days'])
+        limit = options['limit']
+        files = rows = 0
+        for alias in attempt_databases():
+            for quiz_id, month in archivable_months(cutoff, using=alias):
+                if limit is not None and files >= limit:
+                    break
+                label = f"Quiz #{quiz_id} {month:%Y-%m} ({alias})"
+                if options['dry_run']:
+                    self.stdout.write(f"{label}: do archiwizacji")
+                    files += 1
+                    continue
+                part = archive_month(quiz_id, month, using=alias, batch_size=options['batch_size'], pause=options['pause'])
+                if part is not None:
+                    self.stdout.write(f"{label}: zarchiwizowano {part.row_count} -> {part.path}")
+                    files += 1
+                    rows += part.row_count
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Miesiące do archiwizacji: {files} (przed {cutoff:%Y-%m-%d})."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Zarchiwizowane podejścia: {rows} w {files} plikach."))
@@ -0,0 +1,52 @@
+# quizzes/management/commands/archive_quizzes.py
+"""
+Polecenie archiwizujące pytania quizów, których nikt dawno nie rozwiązywał.
+
+Kandydaci są wybierani według daty ostatniego podejścia (patrz
+`quizzes.quiz_archive.archive_candidates`); pytania zarchiwizowanego quizu
+wracają do bazy przy jego pierwszym otwarciu.
+
+Użycie:
+    python manage.py archive_quizzes                        # quizy nierozwiązywane od 2 lat
+    python manage.py archive_quizzes --inactive-days 365
+    python manage.py archive_quizzes --include-never-taken  # także quizy bez żadnego podejścia
+    python manage.py archive_quizzes --limit 100            # najwyżej 100 quizów
+    python manage.py archive_quizzes --dry-run              # tylko wypisz kandydatów
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from quizzes.models import Quiz
+from quizzes.quiz_archive import archive_candidates, archive_quiz
+
+
+class Command(BaseCommand):
+    """
+    Archiwizuje quizy od najdawniej rozwiązywanych, każdy w osobnej transakcji.
+    """
+    help = "Przenosi pytania nieużywanych quizów do skompresowanego archiwum."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inactive-days', type=int, default=settings.QUIZ_ARCHIVE_INACTIVE_DAYS,
+                            help=f"Minimalny czas od ostatniego podejścia w dniach (domyślnie {settings.QUIZ_ARCHIVE_INACTIVE_DAYS}).")
+        parser.add_argument('--include-never-taken', action='store_true', help="Archiwizuj także quizy bez żadnego podejścia.")
+        parser.add_argument('--limit', type=int, help="Maksymalna liczba quizów archiwizowanych w jednym uruchomieniu.")
+        parser.add_argument('--dry-run', action='store_true', help="Tylko wypisz kandydatów do archiwizacji.")
+
+    def handle(self, *args, **options):
+        candidates = archive_candidates(options['inactive_days'], options['include_never_taken'])[:options['limit']]
+        if options['dry_run']:
+            for pk in candidates:
+                self.stdout.write(f"Quiz #{pk}: do archiwizacji")
+            self.stdout.write(self.style.SUCCESS(f"Kandydaci do archiwizacji: {len(candidates)}."))
+            return
+
+        archived = questions = 0
+        for quiz in Quiz.objects.filter(pk__in=candidates).order_by('pk'):
+            count = archive_quiz(quiz)
+            if count:
+                self.stdout.write(f"Quiz #{quiz.pk}: zarchiwizowano pytań: {count}")
+                archived += 1
+                questions += count
+        self.stdout.write(self.style.SUCCESS(f"Zarchiwizowane quizy: {archived} (pytania: {questions})."))
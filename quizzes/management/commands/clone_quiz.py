@@ -0,0 +1,51 @@
+# quizzes/management/commands/clone_quiz.py
+"""
+Polecenie kopiujące quiz (pytania, odpowiedzi i opcjonalnie uprawnienia).
+
+Użycie:
+    python manage.py clone_quiz 12
+    python manage.py clone_quiz 12 --author nauczyciel --title "Klasa 2B"
+    python manage.py clone_quiz 12 --with-permissions
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from quizzes.cloning import clone_quiz
+from quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    """
+    Kopiuje quiz instrukcjami `INSERT ... SELECT` (patrz `quizzes.cloning`)
+    i wypisuje klucz kopii oraz czas operacji.
+    """
+    help = "Tworzy kopię quizu wraz z pytaniami i odpowiedziami."
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int, help="Klucz kopiowanego quizu.")
+        parser.add_argument('--author', help="Nazwa użytkownika - autora kopii (domyślnie autor oryginału).")
+        parser.add_argument('--title', help="Tytuł kopii (domyślnie 'Kopia: <tytuł>').")
+        parser.add_argument('--with-permissions', action='store_true', help="Skopiuj też uprawnienia użytkowników i grup.")
+
+    def handle(self, *args, **options):
+        try:
+            quiz = Quiz.objects.get(pk=options['quiz_id'])
+        except Quiz.DoesNotExist:
+            raise CommandError(f"Quiz #{options['quiz_id']} nie istnieje.")
+
+        author = None
+        if options['author']:
+            try:
+                author = get_user_model().objects.get(username=options['author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"Użytkownik '{options['author']}' nie istnieje.")
+
+        start = time.perf_counter()
+        copy = clone_quiz(quiz, author=author, title=options['title'], include_permissions=options['with_permissions'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Utworzono quiz #{copy.pk} \"{copy.title}\" ({copy.questions.count()} pytań) w {elapsed:.2f} s."
+        ))
@@ -0,0 +1,97 @@
+# quizzes/management/commands/find_duplicates.py
+"""
+Polecenie raportujące klastry niemal identycznych pytań w banku pytań.
+
+Użycie:
+    python manage.py find_duplicates                 # cały bank pytań
+    python manage.py find_duplicates --quiz 12       # tylko jeden quiz
+    python manage.py find_duplicates --backfill      # najpierw uzupełnij brakujące sygnatury
+    python manage.py find_duplicates --flag          # oznacz duplikaty (poza najstarszym w klastrze)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quizzes.duplicates import LSHIndex, question_signature
+from quizzes.models import Question
+
+#: Liczba pytań przetwarzanych w jednej partii przy odczycie i zapisie.
+CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    """
+    Buduje indeks LSH z zapisanych sygnatur MinHash i wypisuje klastry duplikatów.
+
+    Odczytywane są wyłącznie klucze i sygnatury (bez treści pytań), a treść jest
+    pobierana tylko dla wypisywanych klastrów, dzięki czemu raport dla banku
+    miliona pytań zajmuje kilka minut.
+    """
+    help = "Raportuje klastry niemal identycznych pytań (MinHash LSH)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, help="Ogranicz wyszukiwanie do jednego quizu.")
+        parser.add_argument('--threshold', type=float, help="Próg podobieństwa (domyślnie QUIZ_DUPLICATE_THRESHOLD).")
+        parser.add_argument('--show', type=int, default=20, help="Liczba wypisywanych klastrów.")
+        parser.add_argument('--backfill', action='store_true', help="Uzupełnij brakujące sygnatury przed wyszukiwaniem.")
+        parser.add_argument('--flag', action='store_true', help="Oznacz pytania w klastrach jako możliwe duplikaty.")
+
+    def handle(self, *args, **options):
+        questions = Question.objects.all()
+        if options['quiz']:
+            questions = questions.filter(quiz_id=options['quiz'])
+
+        if options['backfill']:
+            self._backfill(questions)
+
+        start = time.perf_counter()
+        index = LSHIndex(options['threshold'])
+        rows = questions.exclude(minhash=None).values_list('pk', 'minhash').order_by()
+        for pk, signature in rows.iterator(chunk_size=CHUNK_SIZE):
+            index.add(pk, bytes(signature))
+        clusters = index.clusters()
+        elapsed = time.perf_counter() - start
+
+        duplicates = sum(len(cluster) - 1 for cluster in clusters)
+        self.stdout.write(
+            f"Przeanalizowano pytań: {len(index)} w {elapsed:.1f} s. "
+            f"Klastry: {len(clusters)}, nadmiarowe pytania: {duplicates}."
+        )
+
+        shown = clusters[:options['show']]
+        texts = dict(
+            Question.objects.filter(pk__in=[pk for cluster in shown for pk in cluster]).values_list('pk', 'text')
+        )
+        for number, cluster in enumerate(shown, start=1):
+            self.stdout.write(f"\nKlaster {number} ({len(cluster)} pytań):")
+            for pk in cluster:
+                self.stdout.write(f"  #{pk}: {texts.get(pk, '')[:100]}")
+
+        if options['flag']:
+            flagged = self._flag(clusters)
+            self.stdout.write(self.style.SUCCESS(f"\nOznaczono jako możliwe duplikaty: {flagged}."))
+
+    def _backfill(self, questions):
+        """Liczy sygnatury pytań, które ich nie mają (np. sprzed wprowadzenia wykrywania duplikatów)."""
+        missing = questions.filter(minhash=None).prefetch_related('answers').order_by('pk')
+        total = 0
+        while True:
+            batch = list(missing[:CHUNK_SIZE])
+            if not batch:
+                break
+            for question in batch:
+                question.minhash = question_signature(question)
+            with transaction.atomic():
+                Question.objects.bulk_update(batch, ['minhash'])
+            total += len(batch)
+            self.stdout.write(f"Uzupełniono sygnatury: {total}")
+
+    def _flag(self, clusters) -> int:
+        """Oznacza wszystkie pytania klastra poza najstarszym (najmniejszy klucz)."""
+        pks = [pk for cluster in clusters for pk in cluster[1:]]
+        for i in range(0, len(pks), CHUNK_SIZE):
+            with transaction.atomic():
+                Question.objects.filter(pk__in=pks[i:i + CHUNK_SIZE]).update(possible_duplicate=True)
+        return len(pks)
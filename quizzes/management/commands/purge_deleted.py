@@ -0,0 +1,53 @@
+# quizzes/management/commands/purge_deleted.py
+"""
+Polecenie fizycznie usuwające quizy i grupy oznaczone jako usunięte.
+
+Usunięcie quizu lub grupy w aplikacji tylko je ukrywa (`soft_delete`);
+polecenie usuwa wiersze zależne partiami (patrz `quizzes.purge`), więc
+można je uruchamiać okresowo (np. z crona) bez wstrzymywania serwisu.
+
+Użycie:
+    python manage.py purge_deleted                    # wszystkie usunięte quizy i grupy
+    python manage.py purge_deleted --batch-size 500   # mniejsze partie (krótsze blokady)
+    python manage.py purge_deleted --pause 0.1        # przerwa między partiami (s)
+    python manage.py purge_deleted --limit 10         # najwyżej 10 quizów i 10 grup
+"""
+
+from django.core.management.base import BaseCommand
+
+from quizzes.models import QuizGroup
+from quizzes.purge import PURGE_BATCH_SIZE, purge_group, purge_quiz, purgeable_quizzes
+
+
+class Command(BaseCommand):
+    """
+    Usuwa z bazy quizy i grupy usunięte przez użytkowników, raportując postęp po każdej partii.
+    """
+    help = "Usuwa partiami quizy i grupy oznaczone jako usunięte wraz z danymi zależnymi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE,
+                            help=f"Liczba wierszy usuwanych w jednej transakcji (domyślnie {PURGE_BATCH_SIZE}).")
+        parser.add_argument('--pause', type=float, default=0.0, help="Przerwa między partiami w sekundach.")
+        parser.add_argument('--limit', type=int, help="Maksymalna liczba quizów i grup usuwanych w jednym uruchomieniu.")
+
+    def _progress(self, label):
+        def report(table, deleted):
+            self.stdout.write(f"{label}: {table} - usunięto {deleted}")
+        return report
+
+    def handle(self, *args, **options):
+        batch = {'batch_size': options['batch_size'], 'pause': options['pause']}
+        limit = options['limit']
+
+        quizzes = list(purgeable_quizzes().values_list('pk', flat=True)[:limit])
+        for pk in quizzes:
+            counts = purge_quiz(pk, progress=self._progress(f"Quiz #{pk}"), **batch)
+            self.stdout.write(f"Quiz #{pk}: usunięto (wiersze zależne: {sum(counts.values())})")
+
+        groups = list(QuizGroup.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at', 'pk').values_list('pk', flat=True)[:limit])
+        for pk in groups:
+            counts = purge_group(pk, progress=self._progress(f"Grupa #{pk}"), **batch)
+            self.stdout.write(f"Grupa #{pk}: usunięto (wiersze zależne: {sum(counts.values())})")
+
+        self.stdout.write(self.style.SUCCESS(f"Usunięte quizy: {len(quizzes)}, grupy: {len(groups)}."))
@@ -0,0 +1,76 @@
+# quizzes/management/commands/rebalance_attempts.py
+"""
+Polecenie przenoszące podejścia do baz wskazanych przez bieżący podział.
+
+Po dodaniu lub usunięciu bazy z `QUIZ_ATTEMPT_SHARDS` (oraz przy pierwszym
+włączeniu podziału, gdy podejścia leżą w bazie 'default') część podejść
+leży w niewłaściwej bazie; polecenie przenosi je partiami.
+
+Użycie:
+    python manage.py rebalance_attempts                   # przenieś wszystkie podejścia
+    python manage.py rebalance_attempts --batch-size 500  # mniejsze partie
+    python manage.py rebalance_attempts --dry-run         # tylko policz podejścia do przeniesienia
+"""
+
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quizzes.models import QuizAttempt
+from quizzes.sharding import attempt_databases, shard_for_quiz
+
+#: Pola podejścia kopiowane do bazy docelowej (bez klucza - klucze są nadawane w każdej bazie osobno).
+COPIED_FIELDS = ('quiz_id', 'user_id', 'score', 'correct_count', 'total_questions', 'time_over', 'timestamp')
+
+
+class Command(BaseCommand):
+    """
+    Przenosi podejścia partiami: w każdej partii wstawia kopie do baz docelowych,
+    a po ich zatwierdzeniu usuwa oryginały. Przerwanie polecenia może najwyżej
+    zdublować ostatnią partię, ale nie zgubi podejść.
+    """
+    help = "Przenosi podejścia (QuizAttempt) do baz wskazanych przez QUIZ_ATTEMPT_SHARDS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Liczba podejść odczytywanych naraz (domyślnie 2000).")
+        parser.add_argument('--dry-run', action='store_true', help="Tylko policz podejścia do przeniesienia.")
+
+    def handle(self, *args, **options):
+        total = 0
+        for source in attempt_databases():
+            moved, last_pk = 0, 0
+            while True:
+                batch = list(
+                    QuizAttempt.objects.using(source).filter(pk__gt=last_pk).order_by('pk')
+                    .values('pk', *COPIED_FIELDS)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                last_pk = batch[-1]['pk']
+                by_target = defaultdict(list)
+                for row in batch:
+                    target = shard_for_quiz(row['quiz_id'])
+                    if target != source:
+                        by_target[target].append(row)
+                if not by_target:
+                    continue
+
+                misplaced = [row['pk'] for rows in by_target.values() for row in rows]
+                moved += len(misplaced)
+                if options['dry_run']:
+                    continue
+                with transaction.atomic(using=source):
+                    for target, rows in by_target.items():
+                        # Kopie są zatwierdzane przed usunięciem oryginałów.
+                        with transaction.atomic(using=target):
+                            QuizAttempt.objects.using(target).bulk_create(
+                                [QuizAttempt(**{field: row[field] for field in COPIED_FIELDS}) for row in rows]
+                            )
+                    QuizAttempt.objects.using(source).filter(pk__in=misplaced).delete()
+                self.stdout.write(f"{source}: przeniesiono {moved}")
+            if moved:
+                self.stdout.write(f"Baza {source}: podejścia w niewłaściwej bazie: {moved}")
+            total += moved
+        verb = "Do przeniesienia" if options['dry_run'] else "Przeniesiono"
+        self.stdout.write(self.style.SUCCESS(f"{verb} podejść: {total}."))
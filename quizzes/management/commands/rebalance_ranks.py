@@ -0,0 +1,55 @@
+# quizzes/management/commands/rebalance_ranks.py
+"""
+Polecenie przywracające pytaniom rangi o stałej długości.
+
+Częste przenoszenie pytań w to samo miejsce wydłuża ich rangi; polecenie
+warto uruchamiać okresowo (np. z crona).
+
+Użycie:
+    python manage.py rebalance_ranks                  # quizy z rangami dłuższymi niż 16 znaków
+    python manage.py rebalance_ranks --max-length 32  # własny próg długości rangi
+    python manage.py rebalance_ranks --quiz 12        # wymuś przenumerowanie jednego quizu
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Length
+
+from quizzes.models import Question, Quiz, QuizBankItem
+
+
+class Command(BaseCommand):
+    """
+    Przenumerowuje pytania quizów, w których najdłuższa ranga przekracza próg
+    (lub któreś pytanie nie ma rangi). Każdy quiz jest zapisywany w osobnej transakcji.
+    """
+    help = "Przywraca pytaniom rangi o stałej długości, zachowując ich kolejność."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, help="Przenumeruj tylko ten quiz (bez sprawdzania progu).")
+        parser.add_argument('--max-length', type=int, default=16, help="Próg długości rangi (domyślnie 16).")
+
+    def handle(self, *args, **options):
+        if options['quiz']:
+            quiz_ids = {options['quiz']}
+        else:
+            quiz_ids = set()
+            # Rangi pytań własnych i dołączonych z banku należą do tej samej przestrzeni quizu.
+            for model in (Question, QuizBankItem):
+                too_long = (
+                    model.objects.filter(quiz__isnull=False).order_by().values('quiz_id')
+                    .annotate(longest=Max(Length('rank')))
+                    .filter(longest__gt=options['max_length'])
+                    .values_list('quiz_id', flat=True)
+                )
+                missing = model.objects.filter(quiz__isnull=False, rank='').order_by().values_list('quiz_id', flat=True).distinct()
+                quiz_ids |= set(too_long) | set(missing)
+
+        total = 0
+        for quiz in Quiz.objects.filter(pk__in=quiz_ids).order_by('pk'):
+            with transaction.atomic():
+                count = quiz.rebalance_ranks()
+            total += count
+            self.stdout.write(f"Quiz #{quiz.pk}: przenumerowano pytań: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Przenumerowane quizy: {len(quiz_ids)}, pytania: {total}."))
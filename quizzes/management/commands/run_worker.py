@@ -0,0 +1,50 @@
+# quizzes/management/commands/run_worker.py
+"""
+Polecenie uruchamiające workera zleceń wykonywanych w tle.
+
+Użycie:
+    python manage.py run_worker          # praca ciągła
+    python manage.py run_worker --once   # wykonaj oczekujące zlecenia i zakończ
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from quizzes.jobs import claim_next_job, run_generation_job, run_import_job
+from quizzes.models import GenerationJob, ImportJob
+
+
+class Command(BaseCommand):
+    """
+    Worker pobierający zlecenia z bazy danych i wykonujący je po kolei.
+
+    Można uruchomić kilka workerów równolegle - przejmowanie zleceń jest
+    zabezpieczone warunkowym `UPDATE` (patrz `quizzes.jobs.claim_next_job`).
+    """
+    help = "Wykonuje zlecenia w tle (import pytań, generowanie quizów przez AI)."
+
+    #: Pary (model zlecenia, funkcja wykonująca) obsługiwane przez workera.
+    HANDLERS = [
+        (ImportJob, run_import_job),
+        (GenerationJob, run_generation_job),
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Zakończ, gdy kolejka będzie pusta.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Przerwa (w sekundach) przy pustej kolejce.")
+
+    def handle(self, *args, **options):
+        while True:
+            worked = False
+            for model, handler in self.HANDLERS:
+                job = claim_next_job(model)
+                if job is not None:
+                    worked = True
+                    job = handler(job)
+                    self.stdout.write(f"{job}: {job.get_status_display()}")
+
+            if not worked:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
@@ -0,0 +1,106 @@
+# quizzes/membership.py
+"""
+Zarządzanie członkami grup użytkowników (`QuizGroup.members`).
+
+Zmiany są zapisywane jako różnica: dodanie wstawia tylko nowe wiersze tabeli
+pośredniej (`bulk_create(ignore_conflicts=True)`), a usunięcie kasuje tylko
+wskazane wiersze - pozostali członkowie grupy nie są odczytywani ani
+zapisywani ponownie, niezależnie od liczebności grupy.
+
+Zapis z pliku CSV przyjmuje nazwy użytkowników (pierwsza kolumna, opcjonalny
+nagłówek 'username'); nazwy są zamieniane na klucze jednym zapytaniem `IN`
+na partię `ENROLMENT_BATCH_SIZE` nazw.
+"""
+
+import csv
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+
+from .importers import _iter_text_lines
+
+User = get_user_model()
+
+#: Liczba nazw użytkowników rozwiązywanych jednym zapytaniem przy zapisie z pliku.
+ENROLMENT_BATCH_SIZE = 5000
+
+
+def _membership_model(group):
+    return group.members.through
+
+
+def add_members(group, user_ids) -> int:
+    """
+    Dodaje użytkowników do grupy, pomijając już należących i właściciela grupy.
+
+    Args:
+        group (QuizGroup): Grupa docelowa.
+        user_ids (Iterable[int]): Klucze dodawanych użytkowników (muszą istnieć).
+
+    Returns:
+        int: Liczba nowych członków grupy.
+    """
+    membership = _membership_model(group)
+    user_ids = set(user_ids) - {group.owner_id}
+    if not user_ids:
+        return 0
+    existing = membership.objects.filter(quizgroup_id=group.pk, user_id__in=user_ids).count()
+    membership.objects.bulk_create(
+        [membership(quizgroup_id=group.pk, user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    return len(user_ids) - existing
+
+
+def remove_members(group, user_ids) -> int:
+    """
+    Usuwa użytkowników z grupy jednym zapytaniem `DELETE`.
+
+    Args:
+        group (QuizGroup): Grupa.
+        user_ids (Iterable[int]): Klucze usuwanych użytkowników.
+
+    Returns:
+        int: Liczba usuniętych członkostw.
+    """
+    deleted, _ = _membership_model(group).objects.filter(quizgroup_id=group.pk, user_id__in=list(user_ids)).delete()
+    return deleted
+
+
+def _iter_usernames(file):
+    reader = csv.reader(_iter_text_lines(file))
+    for number, row in enumerate(reader):
+        username = row[0].strip() if row else ''
+        if not username or (number == 0 and username.lower() == 'username'):
+            continue
+        yield username
+
+
+def enrol_from_csv(group, file) -> dict:
+    """
+    Dodaje do grupy użytkowników wymienionych w pliku CSV.
+
+    Plik jest czytany strumieniowo; każda partia nazw wymaga jednego zapytania
+    `IN` (rozwiązanie kluczy) oraz policzenia i wstawienia członkostw (`add_members`).
+
+    Args:
+        group (QuizGroup): Grupa docelowa.
+        file: Plik CSV (binarny, UTF-8) z nazwami użytkowników w pierwszej kolumnie.
+
+    Returns:
+        dict: 'added' - liczba nowych członków, 'unknown' - lista nieznanych nazw.
+
+    Raises:
+        ValidationError: Jeśli plik nie jest poprawnym UTF-8.
+    """
+    usernames = _iter_usernames(file)
+    added, unknown = 0, []
+    try:
+        while batch := set(islice(usernames, ENROLMENT_BATCH_SIZE)):
+            found = dict(User.objects.filter(username__in=batch).values_list('username', 'pk'))
+            unknown.extend(sorted(batch - found.keys()))
+            added += add_members(group, found.values())
+    except csv.Error as e:
+        raise ValidationError(f"Niepoprawny plik CSV: {e}")
+    return {'added': added, 'unknown': unknown}
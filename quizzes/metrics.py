@@ -0,0 +1,65 @@
+# quizzes/metrics.py
+"""
+Proste metryki przechowywane w pamięci procesu.
+
+Udostępnia liczniki (`incr`) oraz pomiary czasu (`observe`), bezpieczne
+wątkowo. Metryki są lokalne dla procesu (workera WSGI lub `run_worker`)
+i zerują się po jego restarcie; podgląd bieżących wartości zwraca `snapshot`.
+"""
+
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_timings = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """
+    Zwiększa licznik o podaną wartość.
+
+    Args:
+        name (str): Nazwa metryki, np. 'llm.requests'.
+        value (float): Wartość, o którą zwiększany jest licznik.
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, seconds: float) -> None:
+    """
+    Rejestruje pomiar czasu (liczba, suma, maksimum).
+
+    Args:
+        name (str): Nazwa metryki, np. 'llm.latency'.
+        seconds (float): Zmierzony czas w sekundach.
+    """
+    with _lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += seconds
+        timing['max'] = max(timing['max'], seconds)
+
+
+def snapshot() -> dict:
+    """
+    Zwraca kopię bieżących metryk.
+
+    Returns:
+        dict: Słownik z kluczami 'counters' (nazwa -> wartość) oraz 'timings'
+            (nazwa -> {'count', 'total', 'max', 'avg'}).
+    """
+    with _lock:
+        timings = {
+            name: dict(t, avg=t['total'] / t['count'] if t['count'] else 0.0)
+            for name, t in _timings.items()
+        }
+        return {'counters': dict(_counters), 'timings': timings}
+
+
+def reset() -> None:
+    """Zeruje wszystkie metryki (używane w testach)."""
+    with _lock:
+        _counters.clear()
+        _timings.clear()
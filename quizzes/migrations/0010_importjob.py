@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0009_quiz_questions_count_limit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/%Y/%m/', verbose_name='Plik')),
+                ('format_name', models.CharField(max_length=20, verbose_name='Format')),
+                ('atomic', models.BooleanField(default=False, verbose_name='Wszystko albo nic')),
+                ('status', models.CharField(choices=[('PENDING', 'Oczekuje'), ('RUNNING', 'W trakcie'), ('DONE', 'Zakończony'), ('FAILED', 'Błąd'), ('CANCELLED', 'Anulowany')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('processed_count', models.IntegerField(default=0, verbose_name='Zaimportowane pytania')),
+                ('progress', models.IntegerField(default=0, verbose_name='Postęp (%)')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='Żądanie anulowania')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Błąd')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Utworzono')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Rozpoczęto')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Zakończono')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Zlecający')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to='quizzes.quiz', verbose_name='Quiz')),
+            ],
+            options={
+                'verbose_name': 'Zlecenie importu',
+                'verbose_name_plural': 'Zlecenia importu',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quizzes_imp_status_541e31_idx')],
+            },
+        ),
+    ]
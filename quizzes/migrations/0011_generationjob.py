@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0010_importjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Oczekuje'), ('RUNNING', 'W trakcie'), ('DONE', 'Zakończony'), ('FAILED', 'Błąd'), ('CANCELLED', 'Anulowany')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Błąd')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Utworzono')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Rozpoczęto')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Zakończono')),
+                ('topic', models.CharField(max_length=100, verbose_name='Temat')),
+                ('count', models.IntegerField(verbose_name='Liczba pytań')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Zlecający')),
+                ('quiz', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='generation_jobs', to='quizzes.quiz', verbose_name='Wygenerowany quiz')),
+            ],
+            options={
+                'verbose_name': 'Zlecenie generowania',
+                'verbose_name_plural': 'Zlecenia generowania',
+                'ordering': ['-created_at'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['status', 'created_at'], name='quizzes_gen_status_bd5ba5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0011_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='force_fresh',
+            field=models.BooleanField(default=False, verbose_name='Wymuś nowe generowanie'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0012_generationjob_force_fresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='first_question_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Pierwsze pytanie'),
+        ),
+        migrations.AddField(
+            model_name='generationjob',
+            name='questions_done',
+            field=models.IntegerField(default=0, verbose_name='Zapisane pytania'),
+        ),
+    ]
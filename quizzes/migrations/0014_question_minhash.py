@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0013_generationjob_streaming'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='duplicates',
+            field=models.CharField(default='flag', max_length=10, verbose_name='Duplikaty'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='minhash',
+            field=models.BinaryField(blank=True, null=True, verbose_name='Sygnatura MinHash'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='possible_duplicate',
+            field=models.BooleanField(default=False, verbose_name='Możliwy duplikat'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+from quizzes.ranking import ranks_after
+
+
+def assign_ranks(apps, schema_editor):
+    """Nadaje istniejącym pytaniom rangi zgodne z dotychczasową kolejnością (po kluczu)."""
+    Question = apps.get_model('quizzes', 'Question')
+    quiz_ids = Question.objects.values_list('quiz_id', flat=True).distinct().order_by()
+    for quiz_id in quiz_ids:
+        questions = list(Question.objects.filter(quiz_id=quiz_id).only('pk').order_by('pk'))
+        for question, rank in zip(questions, ranks_after('', len(questions))):
+            question.rank = rank
+        Question.objects.bulk_update(questions, ['rank'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0014_question_minhash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='question',
+            options={'ordering': ['rank', 'pk']},
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='rank',
+            field=models.CharField(default='', editable=False, max_length=255, verbose_name='Pozycja'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='fixed_order',
+            field=models.BooleanField(default=False, help_text='Jeśli zaznaczone, pytania są wyświetlane w kolejności z edytora, bez losowania.', verbose_name='Stała kolejność pytań'),
+        ),
+        migrations.RunPython(assign_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quiz', 'rank'], name='question_quiz_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0015_question_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizBankItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.CharField(default='', editable=False, max_length=255, verbose_name='Pozycja')),
+            ],
+            options={
+                'verbose_name': 'Pytanie z banku',
+                'verbose_name_plural': 'Pytania z banku',
+                'ordering': ['rank', 'pk'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='quiz',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='quizzes.quiz'),
+        ),
+        migrations.CreateModel(
+            name='QuestionBank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nazwa banku')),
+                ('is_shared', models.BooleanField(default=False, verbose_name='Udostępniony innym autorom')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_banks', to=settings.AUTH_USER_MODEL, verbose_name='Właściciel')),
+            ],
+            options={
+                'verbose_name': 'Bank pytań',
+                'verbose_name_plural': 'Banki pytań',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='bank',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='quizzes.questionbank', verbose_name='Bank pytań'),
+        ),
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('bank__isnull', True), ('quiz__isnull', False)), models.Q(('bank__isnull', False), ('quiz__isnull', True)), _connector='OR'), name='question_in_quiz_or_bank'),
+        ),
+        migrations.AddField(
+            model_name='quizbankitem',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_links', to='quizzes.question', verbose_name='Pytanie'),
+        ),
+        migrations.AddField(
+            model_name='quizbankitem',
+            name='quiz',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_links', to='quizzes.quiz', verbose_name='Quiz'),
+        ),
+        migrations.AddIndex(
+            model_name='quizbankitem',
+            index=models.Index(fields=['quiz', 'rank'], name='bank_item_quiz_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizbankitem',
+            constraint=models.UniqueConstraint(fields=('quiz', 'question'), name='unique_quiz_bank_item'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0020_attempt_sharding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Miesiąc')),
+                ('database', models.CharField(default='default', max_length=100, verbose_name='Baza źródłowa')),
+                ('path', models.CharField(max_length=255, unique=True, verbose_name='Plik')),
+                ('max_pk', models.BigIntegerField(verbose_name='Największy klucz')),
+                ('row_count', models.PositiveIntegerField(verbose_name='Liczba podejść')),
+                ('score_sum', models.BigIntegerField(verbose_name='Suma wyników')),
+                ('score_min', models.IntegerField(verbose_name='Najniższy wynik')),
+                ('score_max', models.IntegerField(verbose_name='Najwyższy wynik')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data archiwizacji')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_archives', to='quizzes.quiz', verbose_name='Quiz')),
+            ],
+            options={
+                'verbose_name': 'Archiwum podejść',
+                'verbose_name_plural': 'Archiwa podejść',
+                'ordering': ['quiz', 'month', 'pk'],
+                'indexes': [models.Index(fields=['quiz', 'month'], name='attempt_archive_quiz_month_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quizzes', '0021_attempt_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Zarchiwizowano'),
+        ),
+        migrations.CreateModel(
+            name='QuizArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.BinaryField(verbose_name='Treść (zlib)')),
+                ('question_count', models.PositiveIntegerField(verbose_name='Liczba pytań')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Data archiwizacji')),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content_archive', to='quizzes.quiz', verbose_name='Quiz')),
+            ],
+            options={
+                'verbose_name': 'Archiwum quizu',
+                'verbose_name_plural': 'Archiwa quizów',
+            },
+        ),
+    ]
@@ -1,7 +1,25 @@
 # quizzes/models.py
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+
+from .duplicates import question_signature
+from .ranking import MAX_RANK_LENGTH, rank_between, ranks_after
+from .sharding import AttemptManager
+
+class ActiveManager(models.Manager):
+    """
+    Domyślny menedżer modeli z miękkim usuwaniem - pomija obiekty oznaczone jako usunięte.
+
+    Usunięte obiekty są dostępne przez menedżer `all_objects` (np. dla polecenia
+    `purge_deleted`, które fizycznie usuwa je z bazy).
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class QuizGroup(models.Model):
     """
@@ -11,6 +29,8 @@ class QuizGroup(models.Model):
         name (str): Nazwa grupy (maks. 100 znaków).
         owner (User): Użytkownik, który jest właścicielem i zarządcą grupy.
         members (QuerySet[User]): Zbiór użytkowników należących do grupy.
+        deleted_at (datetime): Chwila usunięcia grupy (NULL dla aktywnych grup);
+            usunięte grupy usuwa z bazy polecenie `purge_deleted`.
     """
     name = models.CharField(max_length=100, verbose_name="Nazwa grupy")
     owner = models.ForeignKey(
@@ -24,14 +44,82 @@ class QuizGroup(models.Model):
         related_name='group_memberships',
         verbose_name="Członkowie grupy"
     )
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True, verbose_name="Usunięto")
+
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
     def __str__(self):
         return self.name
 
+    def soft_delete(self):
+        """
+        Oznacza grupę jako usuniętą i odbiera jej uprawnienia do quizów.
+
+        Członkostwa (potencjalnie bardzo wiele wierszy) zostają w bazie do czasu
+        uruchomienia `purge_deleted`; grupa znika z list, a jej członkowie tracą
+        dostęp od razu, bo `user.group_memberships` pomija usunięte grupy.
+        """
+        self.deleted_at = timezone.now()
+        type(self).all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        permissions = QuizGroupPermission.objects.filter(group_id=self.pk)
+        quiz_ids = list(permissions.values_list('quiz_id', flat=True))
+        permissions.delete()
+        Quiz.bump_content_version(*quiz_ids)
+
     class Meta:
         verbose_name = "Grupa użytkowników"
         verbose_name_plural = "Grupy użytkowników"
         ordering = ['name']
+        indexes = [models.Index(Lower('name'), name='quizgroup_name_lower_idx')]
+
+class QuestionBank(models.Model):
+    """
+    Bank pytań współdzielonych przez wiele quizów.
+
+    Pytania banku nie należą do żadnego quizu (`Question.quiz` jest puste);
+    quizy odwołują się do nich przez tabelę łączącą `QuizBankItem`, więc
+    pytanie użyte w wielu quizach jest zapisane raz, a jego poprawka od razu
+    obowiązuje we wszystkich quizach.
+
+    Attributes:
+        name (str): Nazwa banku.
+        owner (User): Właściciel banku (jedyny użytkownik, który może edytować jego pytania).
+        is_shared (bool): Czy pytania banku mogą dołączać do swoich quizów inni użytkownicy.
+    """
+    name = models.CharField(max_length=100, verbose_name="Nazwa banku")
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='question_banks',
+        verbose_name="Właściciel"
+    )
+    is_shared = models.BooleanField(default=False, verbose_name="Udostępniony innym autorom")
+
+    class Meta:
+        verbose_name = "Bank pytań"
+        verbose_name_plural = "Banki pytań"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def can_edit(self, user) -> bool:
+        """Sprawdza, czy użytkownik może edytować pytania banku (tylko właściciel)."""
+        return user.is_authenticated and user.pk == self.owner_id
+
+    @classmethod
+    def available_to(cls, user):
+        """
+        Zwraca banki, z których użytkownik może dołączać pytania do swoich quizów.
+
+        Args:
+            user (User): Autor quizu.
+
+        Returns:
+            QuerySet[QuestionBank]: Banki użytkownika i banki udostępnione.
+        """
+        return cls.objects.filter(models.Q(owner=user) | models.Q(is_shared=True))
 
 class Quiz(models.Model):
     """
@@ -44,6 +132,13 @@ class Quiz(models.Model):
         time_limit (int): Limit czasu na rozwiązanie quizu w minutach (0 oznacza brak limitu).
         questions_count_limit (int): Liczba pytań losowanych do jednego podejścia (domyślnie 10, zakres 1-30).
         instant_feedback (bool): Czy pokazywać poprawne odpowiedzi natychmiast po zaznaczeniu.
+        fixed_order (bool): Czy pytania i odpowiedzi są wyświetlane w ustalonej kolejności (bez mieszania).
+        content_version (int): Licznik zmian treści quizu (pytań, odpowiedzi, ustawień i uprawnień);
+            rośnie monotonicznie i zmienia się wyłącznie przez `bump_content_version`.
+        deleted_at (datetime): Chwila usunięcia quizu (NULL dla aktywnych quizów); usunięty quiz
+            znika od razu, a pytania, odpowiedzi i podejścia usuwa partiami polecenie `purge_deleted`.
+        archived_at (datetime): Chwila przeniesienia pytań nieużywanego quizu do archiwum
+            (`QuizArchive`, NULL dla quizów z pytaniami w bazie); patrz `quizzes.quiz_archive`.
         users_permissions (QuerySet[User]): Użytkownicy z przypisanymi uprawnieniami (przez model pośredni).
         groups_permissions (QuerySet[QuizGroup]): Grupy z przypisanymi uprawnieniami (przez model pośredni).
     """
@@ -80,6 +175,16 @@ class Quiz(models.Model):
         verbose_name="Natychmiastowe odpowiedzi",
         help_text="Jeśli zaznaczone, użytkownik zobaczy poprawne odpowiedzi po każdym pytaniu."
     )
+
+    fixed_order = models.BooleanField(
+        default=False,
+        verbose_name="Stała kolejność pytań",
+        help_text="Jeśli zaznaczone, pytania są wyświetlane w kolejności z edytora, bez losowania."
+    )
+
+    content_version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Wersja treści")
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True, verbose_name="Usunięto")
+    archived_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Zarchiwizowano")
     
     users_permissions = models.ManyToManyField(
         settings.AUTH_USER_MODEL,
@@ -97,8 +202,121 @@ class Quiz(models.Model):
         verbose_name="Uprawnienia grup"
     )
 
+    objects = ActiveManager()
+    all_objects = models.Manager()
+
     def __str__(self): return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Zapisuje quiz, nie nadpisując kolumn `content_version`, `deleted_at` i `archived_at` istniejącego wiersza.
+
+        Wartości w pamięci mogą być nieaktualne (inny edytor zdążył zwiększyć licznik,
+        usunąć quiz albo przywrócić go z archiwum), więc zwykły zapis pomija te kolumny -
+        zmieniają je `bump_content_version`, `soft_delete` i moduł `quizzes.quiz_archive`.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('content_version', 'deleted_at', 'archived_at')
+            ]
+        super().save(*args, **kwargs)
+
+    def soft_delete(self):
+        """
+        Oznacza quiz jako usunięty i anuluje jego zlecenia importu (usuwając pliki oczekujących).
+
+        Quiz znika z list i przestaje być dostępny od razu (jednym `UPDATE`),
+        a jego pytania, odpowiedzi, podejścia i uprawnienia usuwa partiami
+        polecenie `purge_deleted` - bez długiej blokady zapisu przy dużych quizach.
+        """
+        self.deleted_at = timezone.now()
+        type(self).all_objects.filter(pk=self.pk).update(deleted_at=self.deleted_at)
+        for job in self.import_jobs.filter(status=ImportJob.Status.PENDING):
+            cancelled = ImportJob.objects.filter(pk=job.pk, status=ImportJob.Status.PENDING).update(
+                status=ImportJob.Status.CANCELLED, cancel_requested=True,
+            )
+            if cancelled:
+                job.file.delete(save=False)
+        self.import_jobs.filter(status=ImportJob.Status.RUNNING).update(cancel_requested=True)
+
+    @classmethod
+    def bump_content_version(cls, *quiz_ids, expected: int = None) -> int:
+        """
+        Atomowo zwiększa licznik `content_version` quizów (`UPDATE ... SET v = v + 1`).
+
+        Args:
+            *quiz_ids (int): Klucze quizów, których treść się zmieniła.
+            expected (int, optional): Wersja wczytana przez edytor (blokada optymistyczna) -
+                licznik zmienia się tylko, jeśli nadal ma tę wartość.
+
+        Returns:
+            int: Liczba zmienionych quizów (0 oznacza nieaktualną wersję przy `expected`).
+        """
+        queryset = cls.objects.filter(pk__in=quiz_ids)
+        if expected is not None:
+            queryset = queryset.filter(content_version=expected)
+        return queryset.update(content_version=models.F('content_version') + 1)
+
+    def cache_key(self, name: str) -> str:
+        """
+        Zwraca klucz cache dla danych wyliczanych z treści quizu.
+
+        Klucz zawiera `content_version`, więc każda zmiana quizu unieważnia
+        wpisy bez ich jawnego usuwania.
+
+        Args:
+            name (str): Nazwa danych (np. 'export-json').
+
+        Returns:
+            str: Klucz postaci 'quiz:<pk>:v<wersja>:<name>'.
+        """
+        return f"quiz:{self.pk}:v{self.content_version}:{name}"
+
+    @property
+    def etag(self) -> str:
+        """Nagłówek ETag odpowiedzi wyliczanych z treści quizu (zmienia się razem z `content_version`)."""
+        return f'"quiz-{self.pk}-v{self.content_version}"'
+
+    def question_pool(self):
+        """
+        Zwraca wszystkie pytania quizu: własne i dołączone z banków pytań.
+
+        Pytania są uporządkowane według wspólnej przestrzeni rang - własne według
+        `Question.rank`, dołączone według `QuizBankItem.rank`.
+
+        Returns:
+            QuerySet[Question]: Pytania z adnotacją `position` (ranga w tym quizie).
+        """
+        return (
+            Question.objects
+            .filter(models.Q(quiz=self) | models.Q(quiz_links__quiz=self))
+            .annotate(position=Coalesce('quiz_links__rank', 'rank'))
+            .order_by('position', 'pk')
+        )
+
+    def rebalance_ranks(self, batch_size: int = 1000) -> int:
+        """
+        Nadaje pytaniom quizu (własnym i dołączonym z banków) rangi o stałej długości,
+        zachowując ich kolejność.
+
+        Args:
+            batch_size (int): Liczba wierszy aktualizowanych jednym `bulk_update`.
+
+        Returns:
+            int: Liczba przenumerowanych pytań.
+        """
+        rows = list(self.question_pool().annotate(link=models.F('quiz_links__pk')).values_list('pk', 'link'))
+        own, linked = [], []
+        for (pk, link), rank in zip(rows, ranks_after('', len(rows))):
+            if link is None:
+                own.append(Question(pk=pk, rank=rank))
+            else:
+                linked.append(QuizBankItem(pk=link, rank=rank))
+        Question.objects.bulk_update(own, ['rank'], batch_size=batch_size)
+        QuizBankItem.objects.bulk_update(linked, ['rank'], batch_size=batch_size)
+        return len(rows)
+
     def can_edit(self, user) -> bool:
         """
         Sprawdza, czy dany użytkownik ma uprawnienia do edycji tego quizu.
@@ -110,7 +328,7 @@ class Quiz(models.Model):
             bool: True, jeśli użytkownik jest autorem lub posiada rolę 'EDITOR' (bezpośrednio),
                   w przeciwnym razie False.
         """
-        if not user.is_authenticated:
+        if not user.is_authenticated or self.deleted_at is not None:
             return False
         if user == self.author:
             return True
@@ -134,6 +352,7 @@ class Quiz(models.Model):
         Returns:
             bool: True, jeśli użytkownik może oglądać quiz, False w przeciwnym razie.
         """
+        if self.deleted_at is not None: return False
         if self.visibility == 'PUBLIC': return True
         if not user.is_authenticated: return False
         if self.can_edit(user): return True
@@ -199,20 +418,27 @@ class QuizGroupPermission(models.Model):
 
 class Question(models.Model):
     """
-    Pojedyncze pytanie w quizie.
+    Pojedyncze pytanie w quizie lub w banku pytań.
 
     Attributes:
-        quiz (Quiz): Quiz, do którego należy pytanie.
+        quiz (Quiz): Quiz, do którego należy pytanie (puste dla pytań z banku).
+        bank (QuestionBank): Bank, do którego należy pytanie (puste dla pytań quizu).
         text (str): Treść pytania.
         explanation (str): Opcjonalne wyjaśnienie wyświetlane po rozwiązaniu.
         question_type (str): Typ pytania ('SINGLE' lub 'MULTIPLE').
+        minhash (bytes): Sygnatura MinHash treści i odpowiedzi (patrz `quizzes.duplicates`).
+        possible_duplicate (bool): Czy pytanie oznaczono jako możliwy duplikat innego pytania.
+        rank (str): Klucz kolejności pytania w quizie (patrz `quizzes.ranking`).
     """
     class QuestionType(models.TextChoices):
         """Dostępne typy pytań."""
         SINGLE = 'SINGLE', 'Jednokrotny wybór'
         MULTIPLE = 'MULTIPLE', 'Wielokrotny wybór'
 
-    quiz = models.ForeignKey(Quiz, related_name='questions', on_delete=models.CASCADE)
+    quiz = models.ForeignKey(Quiz, related_name='questions', on_delete=models.CASCADE, null=True, blank=True)
+    bank = models.ForeignKey(
+        QuestionBank, related_name='questions', on_delete=models.CASCADE, null=True, blank=True, verbose_name="Bank pytań"
+    )
     text = models.TextField(verbose_name="Treść pytania")
     explanation = models.TextField(blank=True, default="", verbose_name="Wyjaśnienie")
     
@@ -222,9 +448,103 @@ class Question(models.Model):
         default=QuestionType.SINGLE,
         verbose_name="Typ pytania"
     )
+    minhash = models.BinaryField(null=True, blank=True, editable=False, verbose_name="Sygnatura MinHash")
+    possible_duplicate = models.BooleanField(default=False, verbose_name="Możliwy duplikat")
+    rank = models.CharField(max_length=255, default='', editable=False, verbose_name="Pozycja")
+
+    class Meta:
+        ordering = ['rank', 'pk']
+        indexes = [models.Index(fields=['quiz', 'rank'], name='question_quiz_rank_idx')]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(quiz__isnull=False, bank__isnull=True) | models.Q(quiz__isnull=True, bank__isnull=False),
+                name='question_in_quiz_or_bank',
+            ),
+        ]
 
     def __str__(self): return self.text
 
+    def save(self, *args, **kwargs):
+        """Nowe pytanie bez rangi jest dopisywane na końcu quizu."""
+        if not self.rank:
+            self.rank = ranks_after(Question.last_rank(self.quiz_id), 1)[0]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def last_rank(cls, quiz_id) -> str:
+        """
+        Zwraca największą rangę w quizie ('' dla quizu bez pytań).
+
+        Uwzględnia pytania własne i dołączone z banków (jedno zapytanie `UNION ALL`
+        dwóch odczytów maksimum z indeksów `(quiz, rank)`).
+        """
+        if quiz_id is None:
+            return ''
+        own = cls.objects.filter(quiz_id=quiz_id).order_by().values('quiz_id').annotate(last=models.Max('rank'))
+        linked = QuizBankItem.objects.filter(quiz_id=quiz_id).order_by().values('quiz_id').annotate(last=models.Max('rank'))
+        return max(own.values_list('last', flat=True).union(linked.values_list('last', flat=True), all=True), default='')
+
+    def move_after(self, previous=None) -> str:
+        """
+        Przenosi pytanie bezpośrednio za inne pytanie quizu (także dołączone z banku),
+        zmieniając tylko własną rangę.
+
+        Jeśli nowa ranga byłaby dłuższa niż `MAX_RANK_LENGTH` (wiele przeniesień
+        w to samo miejsce) lub sąsiedzi mają równe rangi, quiz jest najpierw
+        przenumerowywany (`Quiz.rebalance_ranks`).
+
+        Odczyt sąsiadów, ewentualne przenumerowanie i zapis rangi wykonuje jedna
+        transakcja z blokadą wiersza quizu, więc równoczesne przeniesienia w tym
+        samym quizie nie nadają pytaniom tej samej rangi.
+
+        Args:
+            previous (Question | None): Pytanie z puli quizu (`Quiz.question_pool`), za którym
+                ma się znaleźć to pytanie (None - początek quizu).
+
+        Returns:
+            str: Nowa ranga pytania.
+
+        Raises:
+            ValueError: Jeśli nawet po przenumerowaniu nie da się wyznaczyć poprawnej rangi.
+        """
+        with transaction.atomic():
+            quiz = Quiz.objects.select_for_update().get(pk=self.quiz_id)
+            for attempt in range(2):
+                pool = quiz.question_pool().exclude(pk=self.pk)
+                before = '' if previous is None else pool.values_list('position', flat=True).get(pk=previous.pk)
+                after = pool.filter(position__gt=before).values_list('position', flat=True).first()
+                try:
+                    rank = ranks_after(before, 1)[0] if after is None else rank_between(before, after)
+                except ValueError:
+                    rank = None
+                if rank is not None and len(rank) <= MAX_RANK_LENGTH:
+                    break
+                if attempt:
+                    raise ValueError(f"Nie można wyznaczyć rangi pytania {self.pk} po przenumerowaniu quizu {quiz.pk}.")
+                quiz.rebalance_ranks()
+            Question.objects.filter(pk=self.pk).update(rank=rank)
+            Quiz.bump_content_version(quiz.pk)
+        self.rank = rank
+        return rank
+
+    def bump_quiz_versions(self) -> int:
+        """
+        Zwiększa `content_version` quizów, w których występuje pytanie.
+
+        Dla pytania z banku są to wszystkie quizy, do których jest dołączone.
+
+        Returns:
+            int: Liczba zmienionych quizów.
+        """
+        if self.quiz_id is not None:
+            return Quiz.bump_content_version(self.quiz_id)
+        return Quiz.objects.filter(bank_links__question=self).update(content_version=models.F('content_version') + 1)
+
+    def update_minhash(self) -> None:
+        """Przelicza i zapisuje sygnaturę MinHash (po zmianie treści lub odpowiedzi)."""
+        self.minhash = question_signature(self)
+        self.save(update_fields=['minhash'])
+
 class Answer(models.Model):
     """
     Odpowiedź do pytania.
@@ -239,10 +559,60 @@ class Answer(models.Model):
     is_correct = models.BooleanField(default=False, verbose_name="Czy poprawna")
     def __str__(self): return self.text
 
+class QuizBankItem(models.Model):
+    """
+    Dołączenie pytania z banku do quizu.
+
+    Attributes:
+        quiz (Quiz): Quiz korzystający z pytania.
+        question (Question): Pytanie z banku pytań.
+        rank (str): Pozycja pytania w quizie (ta sama przestrzeń rang co `Question.rank`).
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='bank_links', verbose_name="Quiz")
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='quiz_links', verbose_name="Pytanie")
+    rank = models.CharField(max_length=255, default='', editable=False, verbose_name="Pozycja")
+
+    class Meta:
+        verbose_name = "Pytanie z banku"
+        verbose_name_plural = "Pytania z banku"
+        ordering = ['rank', 'pk']
+        constraints = [models.UniqueConstraint(fields=['quiz', 'question'], name='unique_quiz_bank_item')]
+        indexes = [models.Index(fields=['quiz', 'rank'], name='bank_item_quiz_rank_idx')]
+
+    def __str__(self):
+        return f"{self.quiz} - {self.question}"
+
+    @classmethod
+    def link(cls, quiz, questions) -> int:
+        """
+        Dołącza pytania z banku na końcu quizu (pomija już dołączone).
+
+        Args:
+            quiz (Quiz): Quiz docelowy.
+            questions (list[Question]): Pytania z banku pytań.
+
+        Returns:
+            int: Liczba nowych powiązań.
+        """
+        existing = set(cls.objects.filter(quiz=quiz, question__in=questions).values_list('question_id', flat=True))
+        new = [q for q in questions if q.pk not in existing]
+        ranks = ranks_after(Question.last_rank(quiz.pk), len(new))
+        cls.objects.bulk_create(
+            [cls(quiz=quiz, question=q, rank=rank) for q, rank in zip(new, ranks)],
+            ignore_conflicts=True,
+        )
+        if new:
+            Quiz.bump_content_version(quiz.pk)
+        return len(new)
+
 class QuizAttempt(models.Model):
     """
     Zapis pojedynczego podejścia użytkownika do quizu.
 
+    Podejścia są dzielone między bazy danych według klucza quizu (`quizzes.sharding`),
+    dlatego klucze obce nie mają ograniczeń w bazie (`db_constraint=False`) -
+    quiz i użytkownik mogą leżeć w innej bazie niż podejście.
+
     Attributes:
         quiz (Quiz): Quiz, który był rozwiązywany.
         user (User): Użytkownik, który rozwiązywał quiz (może być NULL dla anonimowych/usuniętych).
@@ -252,10 +622,13 @@ class QuizAttempt(models.Model):
         time_over (bool): Czy czas upłynął przed zakończeniem.
         timestamp (datetime): Data i czas podejścia.
     """
-    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="attempts", verbose_name="Quiz")
+    quiz = models.ForeignKey(
+        Quiz, on_delete=models.CASCADE, db_constraint=False, related_name="attempts", verbose_name="Quiz"
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.SET_NULL, 
+        db_constraint=False,
         null=True, 
         blank=True, 
         related_name="attempts",
@@ -265,9 +638,219 @@ class QuizAttempt(models.Model):
     correct_count = models.IntegerField(verbose_name="Poprawne odpowiedzi")
     total_questions = models.IntegerField(verbose_name="Liczba pytań")
     time_over = models.BooleanField(default=False, verbose_name="Przekroczono czas")
-    timestamp = models.DateTimeField(auto_now_add=True, verbose_name="Data podejścia")
+    # Nie `auto_now_add` - przeniesienie podejścia do innej bazy zachowuje jego datę.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Data podejścia")
+
+    objects = AttemptManager()
 
     class Meta:
         verbose_name = "Próba (Attempt)"
         verbose_name_plural = "Próby (Attempts)"
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+
+
+class QuizArchive(models.Model):
+    """
+    Zarchiwizowana treść nieużywanego quizu: własne pytania i odpowiedzi jako skompresowany JSON.
+
+    Treść ma format eksportu JSON (`quiz_export_json_view`) uzupełniony o rangi
+    i sygnatury MinHash pytań; zapisuje ją i odtwarza moduł `quizzes.quiz_archive`.
+    Pytania dołączone z banków pytań nie są archiwizowane (pozostają w bazie).
+
+    Attributes:
+        quiz (Quiz): Zarchiwizowany quiz.
+        content (bytes): Treść skompresowana algorytmem zlib.
+        question_count (int): Liczba zarchiwizowanych pytań.
+        created_at (datetime): Data archiwizacji.
+    """
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name='content_archive', verbose_name="Quiz")
+    content = models.BinaryField(verbose_name="Treść (zlib)")
+    question_count = models.PositiveIntegerField(verbose_name="Liczba pytań")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data archiwizacji")
+
+    class Meta:
+        verbose_name = "Archiwum quizu"
+        verbose_name_plural = "Archiwa quizów"
+
+    def __str__(self):
+        return f"{self.quiz_id} ({self.question_count})"
+
+
+class AttemptArchive(models.Model):
+    """
+    Wpis manifestu archiwum podejść: jeden skompresowany plik z podejściami quizu z jednego miesiąca.
+
+    Pliki zapisuje polecenie `archive_attempts` (patrz `quizzes.archive`); podsumowanie
+    wyników jest przechowywane w manifeście, więc statystyki quizu nie muszą czytać plików.
+    Miesiąc może mieć kilka plików (np. z kilku baz podziału).
+
+    Attributes:
+        quiz (Quiz): Quiz, którego podejścia zarchiwizowano.
+        month (date): Pierwszy dzień miesiąca podejść.
+        database (str): Alias bazy, z której pochodzą podejścia.
+        path (str): Ścieżka pliku względem `QUIZ_ATTEMPT_ARCHIVE_ROOT`.
+        max_pk (int): Największy klucz zarchiwizowanego podejścia w bazie źródłowej.
+        row_count (int): Liczba podejść w pliku.
+        score_sum (int): Suma wyników (do średniej).
+        score_min (int): Najniższy wynik.
+        score_max (int): Najwyższy wynik.
+        created_at (datetime): Data archiwizacji.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempt_archives', verbose_name="Quiz")
+    month = models.DateField(verbose_name="Miesiąc")
+    database = models.CharField(max_length=100, default='default', verbose_name="Baza źródłowa")
+    path = models.CharField(max_length=255, unique=True, verbose_name="Plik")
+    max_pk = models.BigIntegerField(verbose_name="Największy klucz")
+    row_count = models.PositiveIntegerField(verbose_name="Liczba podejść")
+    score_sum = models.BigIntegerField(verbose_name="Suma wyników")
+    score_min = models.IntegerField(verbose_name="Najniższy wynik")
+    score_max = models.IntegerField(verbose_name="Najwyższy wynik")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data archiwizacji")
+
+    class Meta:
+        verbose_name = "Archiwum podejść"
+        verbose_name_plural = "Archiwa podejść"
+        ordering = ['quiz', 'month', 'pk']
+        indexes = [models.Index(fields=['quiz', 'month'], name='attempt_archive_quiz_month_idx')]
+
+    def __str__(self):
+        return f"{self.quiz_id} {self.month:%Y-%m} ({self.row_count})"
+
+
+class BackgroundJob(models.Model):
+    """
+    Abstrakcyjna baza zleceń wykonywanych w tle przez polecenie `run_worker`.
+
+    Attributes:
+        status (str): Stan zlecenia (PENDING, RUNNING, DONE, FAILED, CANCELLED).
+        error (str): Komunikat błędu (dla statusu FAILED).
+        created_at (datetime): Data utworzenia zlecenia.
+        started_at (datetime): Data przejęcia zlecenia przez workera.
+        finished_at (datetime): Data zakończenia zlecenia.
+    """
+    class Status(models.TextChoices):
+        """Stany zlecenia."""
+        PENDING = 'PENDING', 'Oczekuje'
+        RUNNING = 'RUNNING', 'W trakcie'
+        DONE = 'DONE', 'Zakończony'
+        FAILED = 'FAILED', 'Błąd'
+        CANCELLED = 'CANCELLED', 'Anulowany'
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Status")
+    error = models.TextField(blank=True, default="", verbose_name="Błąd")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Utworzono")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Rozpoczęto")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Zakończono")
+
+    ACTIVE_STATUSES = (Status.PENDING, Status.RUNNING)
+
+    class Meta:
+        abstract = True
+        ordering = ['-created_at']
+
+    @property
+    def is_active(self) -> bool:
+        """Czy zlecenie czeka na wykonanie lub jest w trakcie."""
+        return self.status in self.ACTIVE_STATUSES
+
+
+class ImportJob(BackgroundJob):
+    """
+    Zlecenie importu pytań wykonywane w tle przez polecenie `run_worker`.
+
+    Duże pliki nie są importowane w trakcie żądania HTTP - widok zapisuje plik
+    i tworzy zlecenie, a worker importuje pytania partiami, każdą w osobnej
+    krótkiej transakcji, raportując postęp.
+
+    Attributes:
+        quiz (Quiz): Quiz docelowy.
+        created_by (User): Użytkownik, który zlecił import.
+        file (File): Przesłany plik z pytaniami.
+        format_name (str): Nazwa formatu z rejestru `quizzes.importers`.
+        atomic (bool): Tryb "wszystko albo nic" - przy błędzie lub anulowaniu usuwane są pytania zapisane przez zlecenie.
+        processed_count (int): Liczba zapisanych pytań.
+        progress (int): Postęp w procentach (na podstawie przeczytanej części pliku).
+        cancel_requested (bool): Czy użytkownik poprosił o anulowanie.
+        duplicates (str): Obsługa niemal identycznych pytań ('flag', 'drop' lub 'keep').
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='import_jobs', verbose_name="Quiz")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='import_jobs',
+        verbose_name="Zlecający"
+    )
+    file = models.FileField(upload_to='imports/%Y/%m/', verbose_name="Plik")
+    format_name = models.CharField(max_length=20, verbose_name="Format")
+    atomic = models.BooleanField(default=False, verbose_name="Wszystko albo nic")
+    processed_count = models.IntegerField(default=0, verbose_name="Zaimportowane pytania")
+    progress = models.IntegerField(default=0, verbose_name="Postęp (%)")
+    cancel_requested = models.BooleanField(default=False, verbose_name="Żądanie anulowania")
+    duplicates = models.CharField(max_length=10, default='flag', verbose_name="Duplikaty")
+
+    class Meta(BackgroundJob.Meta):
+        verbose_name = "Zlecenie importu"
+        verbose_name_plural = "Zlecenia importu"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Import #{self.pk} ({self.get_status_display()})"
+
+
+class GenerationJob(BackgroundJob):
+    """
+    Zlecenie wygenerowania quizu przez model językowy, wykonywane w tle.
+
+    Widok generatora tylko zapisuje zlecenie i od razu zwraca stronę, która
+    odpytuje o jego stan; zapytanie do API modelu wykonuje worker.
+
+    Attributes:
+        created_by (User): Użytkownik, który zlecił generowanie (autor quizu).
+        topic (str): Temat quizu.
+        count (int): Oczekiwana liczba pytań.
+        force_fresh (bool): Czy pominąć pamięć podręczną wygenerowanych pytań.
+        quiz (Quiz): Wygenerowany quiz (w trybie strumieniowym przypisywany
+            od razu i uzupełniany pytaniami w miarę generowania).
+        questions_done (int): Liczba zapisanych pytań.
+        first_question_at (datetime): Chwila zapisania pierwszego pytania.
+    """
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='generation_jobs',
+        verbose_name="Zlecający"
+    )
+    topic = models.CharField(max_length=100, verbose_name="Temat")
+    count = models.IntegerField(verbose_name="Liczba pytań")
+    force_fresh = models.BooleanField(default=False, verbose_name="Wymuś nowe generowanie")
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='generation_jobs',
+        verbose_name="Wygenerowany quiz"
+    )
+    questions_done = models.IntegerField(default=0, verbose_name="Zapisane pytania")
+    first_question_at = models.DateTimeField(null=True, blank=True, verbose_name="Pierwsze pytanie")
+
+    class Meta(BackgroundJob.Meta):
+        verbose_name = "Zlecenie generowania"
+        verbose_name_plural = "Zlecenia generowania"
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f"Generowanie #{self.pk}: {self.topic} ({self.get_status_display()})"
+
+    @property
+    def time_to_first_question(self):
+        """
+        Czas od rozpoczęcia zlecenia do zapisania pierwszego pytania.
+
+        Returns:
+            float | None: Liczba sekund lub None, jeśli żadne pytanie nie zostało jeszcze zapisane.
+        """
+        if self.started_at is None or self.first_question_at is None:
+            return None
+        return (self.first_question_at - self.started_at).total_seconds()
@@ -0,0 +1,142 @@
+# quizzes/persistence.py
+"""
+Wspólny zapis pytań i odpowiedzi do bazy danych.
+
+Przyjmuje zwalidowane rekordy pytań w postaci:
+
+    {'text': str, 'explanation': str, 'question_type': 'SINGLE' | 'MULTIPLE',
+     'answers': [{'text': str, 'is_correct': bool}, ...]}
+
+i zapisuje je dwoma zapytaniami `bulk_create` na partię (pytania, a następnie
+odpowiedzi), niezależnie od liczby pytań i odpowiedzi. Z tego etapu korzystają
+importery plików, generator AI, zlecenia w tle oraz import w panelu admina.
+
+Każde pytanie jest zapisywane razem z sygnaturą MinHash (`quizzes.duplicates`);
+rekordy mogą ją już zawierać (klucz 'minhash', np. po `DuplicateFilter`).
+Pytania dostają rangi (`quizzes.ranking`) kolejno po ostatnim pytaniu quizu.
+
+Rekord z kluczem 'bank_question' (np. z eksportu quizu korzystającego z banku
+pytań) jest zapisywany jako dołączenie pytania z banku (`QuizBankItem`), o ile
+autor quizu ma dostęp do tego banku - w przeciwnym razie powstaje zwykła kopia.
+"""
+
+from itertools import islice
+
+from .duplicates import record_signature
+from .models import Answer, Question, QuestionBank, Quiz, QuizBankItem
+from .ranking import ranks_after
+
+#: Liczba pytań zapisywanych w jednej partii przez `persist_questions`.
+BATCH_SIZE = 1000
+
+
+def insert_question_batch(quiz, batch) -> list:
+    """
+    Zapisuje jedną partię rekordów pytań dwoma zapytaniami `bulk_create`.
+
+    Przed zapisem odczytywana jest największa ranga w quizie (jedno zapytanie
+    korzystające z indeksu `(quiz, rank)`), a nowe pytania są dopisywane po niej.
+    Partia z odwołaniami do banku pytań wymaga dwóch dodatkowych zapytań
+    (sprawdzenie dostępu i `bulk_create` dołączeń). Na koniec zwiększany jest
+    licznik `Quiz.content_version`.
+
+    Args:
+        quiz (Quiz): Quiz docelowy.
+        batch (list[dict]): Zwalidowane rekordy pytań.
+
+    Returns:
+        list[Question]: Utworzone pytania (z nadanymi kluczami głównymi), bez dołączonych z banku.
+    """
+    ranks = ranks_after(Question.last_rank(quiz.pk), len(batch))
+
+    references = {rec['bank_question'] for rec in batch if rec.get('bank_question')}
+    linked = set()
+    if references:
+        linked = set(
+            Question.objects.filter(pk__in=references, bank__in=QuestionBank.available_to(quiz.author))
+            .values_list('pk', flat=True)
+        )
+        QuizBankItem.objects.bulk_create([
+            QuizBankItem(quiz=quiz, question_id=rec['bank_question'], rank=rank)
+            for rec, rank in zip(batch, ranks)
+            if rec.get('bank_question') in linked
+        ], ignore_conflicts=True)
+
+    own = [(rec, rank) for rec, rank in zip(batch, ranks) if rec.get('bank_question') not in linked]
+    questions = Question.objects.bulk_create([
+        Question(
+            quiz=quiz,
+            text=rec['text'],
+            explanation=rec['explanation'],
+            question_type=rec['question_type'],
+            minhash=rec.get('minhash') or record_signature(rec),
+            possible_duplicate=rec.get('possible_duplicate', False),
+            rank=rank,
+        )
+        for rec, rank in own
+    ])
+    Answer.objects.bulk_create([
+        Answer(question=question, text=ans['text'], is_correct=ans['is_correct'])
+        for question, (rec, rank) in zip(questions, own)
+        for ans in rec['answers']
+    ])
+    Quiz.bump_content_version(quiz.pk)
+    return questions
+
+
+def question_record(question) -> dict:
+    """
+    Zwraca rekord pytania w formacie eksportu JSON (odwrotność zapisu przez `persist_questions`).
+
+    Args:
+        question (Question): Pytanie z wczytanymi odpowiedziami (`prefetch_related('answers')`).
+
+    Returns:
+        dict: Rekord z kluczami 'text', 'explanation', 'question_type' i 'answers'.
+    """
+    return {
+        'text': question.text,
+        'explanation': question.explanation,
+        'question_type': question.question_type,
+        'answers': [{'text': ans.text, 'is_correct': ans.is_correct} for ans in question.answers.all()],
+    }
+
+
+def iter_batches(records, batch_size: int = BATCH_SIZE):
+    """
+    Dzieli strumień rekordów na listy o długości co najwyżej `batch_size`.
+
+    Yields:
+        list[dict]: Kolejna partia rekordów.
+    """
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def persist_questions(quiz, records, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Wspólny etap zapisu: wstawia rekordy pytań do quizu partiami.
+
+    Każda partia to odczyt ostatniej rangi i dwa zapytania `bulk_create` (pytania, a potem odpowiedzi),
+    niezależnie od liczby odpowiedzi. Funkcja nie otwiera własnej transakcji -
+    wywołujący powinien opakować ją w `transaction.atomic()`, aby błąd walidacji
+    w dalszej części pliku wycofał wcześniej zapisane partie.
+
+    Args:
+        quiz (Quiz): Quiz docelowy.
+        records (Iterable[dict]): Zwalidowane rekordy pytań (np. z `BaseImporter.records`
+            lub `quizzes.generation.to_question_records`).
+        batch_size (int): Liczba pytań w jednej partii.
+
+    Returns:
+        int: Liczba zapisanych pytań.
+    """
+    total = 0
+    for batch in iter_batches(records, batch_size):
+        insert_question_batch(quiz, batch)
+        total += len(batch)
+    return total
@@ -0,0 +1,157 @@
+# quizzes/purge.py
+"""
+Fizyczne usuwanie quizów i grup oznaczonych jako usunięte (`soft_delete`).
+
+`Model.delete()` najpierw wczytuje do pamięci wszystkie obiekty zależne
+(pytania, odpowiedzi, podejścia), a następnie usuwa je w jednej transakcji,
+blokując zapis do bazy SQLite na cały czas operacji. Tutaj wiersze zależne
+są usuwane surowymi instrukcjami `DELETE ... WHERE id IN (...)` partiami
+po `PURGE_BATCH_SIZE` kluczy, każda partia w osobnej krótkiej transakcji,
+więc pomiędzy partiami mogą zapisywać inne żądania. Kolejność tabel
+zachowuje spójność kluczy obcych po każdej partii (najpierw odpowiedzi,
+potem pytania, na końcu sam quiz).
+"""
+
+import time
+
+from django.db import connection, connections, transaction
+
+from .models import (
+    Answer, AttemptArchive, GenerationJob, ImportJob, Question, Quiz, QuizArchive, QuizAttempt, QuizBankItem,
+    QuizGroup, QuizGroupPermission, QuizUserPermission,
+)
+from .sharding import attempt_databases
+
+#: Liczba wierszy usuwanych jednym `DELETE` (jedna krótka transakcja).
+PURGE_BATCH_SIZE = 2000
+
+
+def _table(model) -> str:
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _column(model, name) -> str:
+    return connection.ops.quote_name(model._meta.get_field(name).column)
+
+
+def _delete_batches(model, where, params, batch_size, pause=0.0, progress=None, using='default') -> int:
+    """
+    Usuwa partiami wiersze tabeli modelu wybrane warunkiem `where`.
+
+    Args:
+        model (type[Model]): Model, którego wiersze są usuwane (alias tabeli: `t`).
+        where (str): Złączenia i warunek SQL wybierający wiersze (np. "WHERE t.quiz_id = %s").
+        params (list): Parametry warunku.
+        batch_size (int): Liczba wierszy w partii.
+        pause (float): Przerwa między partiami (s), oddająca bazę innym zapisom.
+        progress (callable, optional): Wywoływana po każdej partii z (nazwa tabeli, liczba usuniętych dotąd).
+        using (str): Alias bazy danych (podejścia mogą leżeć w innej bazie niż quiz).
+
+    Returns:
+        int: Liczba usuniętych wierszy.
+    """
+    table = _table(model)
+    total = 0
+    while True:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute(f"SELECT t.id FROM {table} t {where} LIMIT %s", [*params, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return total
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(f"DELETE FROM {table} WHERE id IN ({placeholders})", ids)
+        total += len(ids)
+        if progress is not None:
+            progress(model._meta.db_table, total)
+        if pause:
+            time.sleep(pause)
+
+
+def _delete_row(model, pk) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {_table(model)} WHERE id = %s AND {_column(model, 'deleted_at')} IS NOT NULL", [pk])
+
+
+def purge_quiz(quiz_id: int, batch_size: int = PURGE_BATCH_SIZE, pause: float = 0.0, progress=None) -> dict:
+    """
+    Usuwa z bazy usunięty quiz wraz z pytaniami, odpowiedziami, podejściami (także z archiwum) i uprawnieniami.
+
+    Zlecenia generowania tracą jedynie powiązanie z quizem (tak jak przy `SET_NULL`).
+
+    Args:
+        quiz_id (int): Klucz quizu oznaczonego jako usunięty.
+        batch_size (int): Liczba wierszy usuwanych w jednej transakcji.
+        pause (float): Przerwa między partiami (s).
+        progress (callable, optional): Patrz `_delete_batches`.
+
+    Returns:
+        dict: Liczba usuniętych wierszy dla każdej tabeli.
+    """
+    question_quiz = _column(Question, 'quiz')
+    answer_question = _column(Answer, 'question')
+    counts = {
+        Answer._meta.db_table: _delete_batches(
+            Answer, f"JOIN {_table(Question)} q ON q.id = t.{answer_question} WHERE q.{question_quiz} = %s",
+            [quiz_id], batch_size, pause, progress,
+        ),
+    }
+    for model in (Question, QuizBankItem, QuizUserPermission, QuizGroupPermission, ImportJob, QuizArchive):
+        counts[model._meta.db_table] = _delete_batches(
+            model, f"WHERE t.{_column(model, 'quiz')} = %s", [quiz_id], batch_size, pause, progress,
+        )
+    counts[QuizAttempt._meta.db_table] = sum(
+        _delete_batches(
+            QuizAttempt, f"WHERE t.{_column(QuizAttempt, 'quiz')} = %s", [quiz_id], batch_size, pause, progress,
+            using=alias,
+        )
+        for alias in attempt_databases()
+    )
+    # Wpisów archiwum jest niewiele; usunięcie przez ORM usuwa też ich pliki.
+    counts[AttemptArchive._meta.db_table] = AttemptArchive.objects.filter(quiz_id=quiz_id).delete()[0]
+    with transaction.atomic():
+        GenerationJob.objects.filter(quiz_id=quiz_id).update(quiz=None)
+        _delete_row(Quiz, quiz_id)
+    return counts
+
+
+def purge_group(group_id: int, batch_size: int = PURGE_BATCH_SIZE, pause: float = 0.0, progress=None) -> dict:
+    """
+    Usuwa z bazy usuniętą grupę wraz z członkostwami i uprawnieniami.
+
+    Args:
+        group_id (int): Klucz grupy oznaczonej jako usunięta.
+        batch_size (int): Liczba wierszy usuwanych w jednej transakcji.
+        pause (float): Przerwa między partiami (s).
+        progress (callable, optional): Patrz `_delete_batches`.
+
+    Returns:
+        dict: Liczba usuniętych wierszy dla każdej tabeli.
+    """
+    membership = QuizGroup.members.through
+    counts = {}
+    for model, field in ((membership, 'quizgroup'), (QuizGroupPermission, 'group')):
+        counts[model._meta.db_table] = _delete_batches(
+            model, f"WHERE t.{_column(model, field)} = %s", [group_id], batch_size, pause, progress,
+        )
+    with transaction.atomic():
+        _delete_row(QuizGroup, group_id)
+    return counts
+
+
+def purgeable_quizzes():
+    """
+    Zwraca usunięte quizy, które można już fizycznie usunąć.
+
+    Pomijane są quizy, do których worker właśnie zapisuje pytania (wykonywany
+    import lub generowanie) - zostaną usunięte przy kolejnym uruchomieniu.
+
+    Returns:
+        QuerySet[Quiz]: Usunięte quizy w kolejności usunięcia.
+    """
+    running = ImportJob.Status.RUNNING
+    return (
+        Quiz.all_objects.filter(deleted_at__isnull=False)
+        .exclude(import_jobs__status=running)
+        .exclude(generation_jobs__status=running)
+        .order_by('deleted_at', 'pk')
+    )
@@ -0,0 +1,153 @@
+# quizzes/quiz_archive.py
+"""
+Archiwizacja nieużywanych quizów z przywracaniem na żądanie.
+
+Pytania i odpowiedzi quizów, których nikt nie rozwiązywał od lat, stanowią
+większość bazy. `archive_quiz` zapisuje własne pytania quizu w formacie
+eksportu JSON (`persistence.question_record`, uzupełnionym o rangi i sygnatury
+MinHash) jako blob skompresowany zlib (`QuizArchive`), usuwa wiersze `Question`
+i `Answer` oraz ustawia `Quiz.archived_at`. Quiz pozostaje widoczny na listach.
+
+Otwarcie zarchiwizowanego quizu (strona szczegółów, edytor, rozwiązywanie,
+eksport, kopiowanie) wywołuje `rehydrate_quiz`, które odtwarza pytania
+partiami przez `persistence.insert_question_batch` (dwa `bulk_create` na
+partię) w jednej transakcji. Pytania dostają nowe klucze, ale zachowują
+rangi, więc kolejność względem pytań z banków się nie zmienia.
+
+Kandydatów do archiwizacji wybiera `archive_candidates` według daty
+ostatniego podejścia (także zarchiwizowanego, patrz `quizzes.archive`).
+"""
+
+import base64
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .archive import month_bounds
+from .models import Answer, AttemptArchive, GenerationJob, ImportJob, Question, Quiz, QuizArchive, QuizAttempt
+from .persistence import insert_question_batch, iter_batches, question_record
+from .sharding import attempt_databases
+
+
+def _archive_record(question) -> dict:
+    record = question_record(question)
+    record['rank'] = question.rank
+    record['possible_duplicate'] = question.possible_duplicate
+    if question.minhash:
+        record['minhash'] = base64.b64encode(bytes(question.minhash)).decode('ascii')
+    return record
+
+
+def archive_quiz(quiz: Quiz) -> int:
+    """
+    Przenosi własne pytania quizu do skompresowanego archiwum i usuwa je z bazy.
+
+    Quizy już zarchiwizowane, usunięte, bez własnych pytań oraz z aktywnym
+    zleceniem importu lub generowania są pomijane.
+
+    Args:
+        quiz (Quiz): Archiwizowany quiz.
+
+    Returns:
+        int: Liczba zarchiwizowanych pytań (0, jeśli quiz pominięto).
+    """
+    with transaction.atomic():
+        if (
+            not Quiz.objects.filter(pk=quiz.pk, archived_at__isnull=True).exists()
+            or quiz.import_jobs.filter(status__in=ImportJob.ACTIVE_STATUSES).exists()
+            or quiz.generation_jobs.filter(status__in=GenerationJob.ACTIVE_STATUSES).exists()
+        ):
+            return 0
+        questions = Question.objects.filter(quiz=quiz).prefetch_related('answers').order_by('rank', 'pk')
+        records = [_archive_record(question) for question in questions]
+        if not records:
+            return 0
+
+        content = json.dumps({'title': quiz.title, 'questions': records}, ensure_ascii=False)
+        QuizArchive.objects.create(quiz=quiz, content=zlib.compress(content.encode('utf-8'), 9), question_count=len(records))
+        Answer.objects.filter(question__quiz=quiz).delete()
+        Question.objects.filter(quiz=quiz).delete()
+        quiz.archived_at = timezone.now()
+        Quiz.objects.filter(pk=quiz.pk).update(archived_at=quiz.archived_at)
+    return len(records)
+
+
+def rehydrate_quiz(quiz: Quiz) -> int:
+    """
+    Odtwarza pytania zarchiwizowanego quizu (bez zapytań, jeśli quiz nie jest zarchiwizowany).
+
+    Przy równoczesnym otwarciu quizu przez kilku użytkowników pytania odtwarza
+    tylko pierwsze żądanie (warunkowy `UPDATE` kolumny `archived_at`).
+
+    Args:
+        quiz (Quiz): Quiz wczytany z bazy.
+
+    Returns:
+        int: Liczba odtworzonych pytań.
+    """
+    if quiz.archived_at is None:
+        return 0
+    restored = 0
+    with transaction.atomic():
+        if Quiz.objects.filter(pk=quiz.pk, archived_at__isnull=False).update(archived_at=None):
+            archive = QuizArchive.objects.get(quiz=quiz)
+            records = json.loads(zlib.decompress(archive.content).decode('utf-8'))['questions']
+            for record in records:
+                if 'minhash' in record:
+                    record['minhash'] = base64.b64decode(record['minhash'])
+            for batch in iter_batches(records):
+                questions = insert_question_batch(quiz, batch)
+                for question, record in zip(questions, batch):
+                    question.rank = record['rank']
+                Question.objects.bulk_update(questions, ['rank'])
+                restored += len(questions)
+            archive.delete()
+    quiz.archived_at = None
+    quiz.refresh_from_db(fields=['content_version'])
+    return restored
+
+
+def archive_candidates(inactive_days: int | None = None, include_never_taken: bool = False) -> list:
+    """
+    Wybiera quizy do archiwizacji według daty ostatniego podejścia.
+
+    Ostatnie podejście jest wyznaczane we wszystkich bazach podziału oraz
+    w archiwum podejść (koniec najnowszego zarchiwizowanego miesiąca).
+
+    Args:
+        inactive_days (int, optional): Minimalny czas od ostatniego podejścia
+            (domyślnie `QUIZ_ARCHIVE_INACTIVE_DAYS`).
+        include_never_taken (bool): Czy dołączyć quizy, do których nikt nie podszedł.
+
+    Returns:
+        list[int]: Klucze quizów, od najdawniej rozwiązywanych (nigdy nierozwiązywane na początku).
+    """
+    if inactive_days is None:
+        inactive_days = settings.QUIZ_ARCHIVE_INACTIVE_DAYS
+    cutoff = timezone.now() - timedelta(days=inactive_days)
+
+    last_attempt = {}
+    for alias in attempt_databases():
+        rows = QuizAttempt.objects.using(alias).values('quiz_id').annotate(last=Max('timestamp')).order_by()
+        for row in rows:
+            last_attempt[row['quiz_id']] = max(row['last'], last_attempt.get(row['quiz_id'], row['last']))
+    for row in AttemptArchive.objects.values('quiz_id').annotate(month=Max('month')).order_by():
+        month_end = month_bounds(row['month'])[1]
+        last_attempt[row['quiz_id']] = max(month_end, last_attempt.get(row['quiz_id'], month_end))
+
+    quizzes = (
+        Quiz.objects.filter(archived_at__isnull=True, questions__isnull=False)
+        .exclude(import_jobs__status__in=ImportJob.ACTIVE_STATUSES)
+        .exclude(generation_jobs__status__in=GenerationJob.ACTIVE_STATUSES)
+        .values_list('pk', flat=True).distinct()
+    )
+    candidates = [
+        pk for pk in quizzes
+        if (pk in last_attempt and last_attempt[pk] < cutoff) or (pk not in last_attempt and include_never_taken)
+    ]
+    return sorted(candidates, key=lambda pk: (pk in last_attempt, last_attempt.get(pk), pk))
@@ -0,0 +1,105 @@
+# quizzes/ranking.py
+"""
+Klucze kolejności pytań (rangi leksykograficzne).
+
+Ranga to napis z cyfr systemu o podstawie 62 (`0-9A-Za-z`, czyli w kolejności
+ASCII), porównywany leksykograficznie - tak samo w Pythonie i w bazie danych.
+Pytania dopisywane na końcu quizu dostają rangi o stałej długości
+(`RANK_WIDTH` cyfr kolejnego numeru i znak 'V'), a przeniesienie pytania
+wyznacza rangę leżącą między rangami nowych sąsiadów (`rank_between`), więc
+zmienia się tylko przenoszony wiersz.
+
+Każde przeniesienie w tę samą lukę wydłuża rangę średnio o jeden znak na kilka
+przeniesień; polecenie `rebalance_ranks` przywraca rangi o stałej długości.
+Rangi nigdy nie kończą się cyfrą '0' (inaczej między 'a' i 'a0' nie dałoby się
+niczego wstawić).
+"""
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+BASE = len(ALPHABET)
+#: Liczba cyfr numeru porządkowego w randze pytania dopisanego na końcu.
+RANK_WIDTH = 8
+#: Maksymalna długość rangi - dłuższa ranga powoduje przenumerowanie quizu.
+MAX_RANK_LENGTH = 64
+#: Znak kończący rangi o stałej długości (środek alfabetu).
+_SUFFIX = ALPHABET[BASE // 2]
+_DIGITS = {char: value for value, char in enumerate(ALPHABET)}
+
+
+def rank_for_position(position: int) -> str:
+    """
+    Zwraca rangę o stałej długości dla numeru porządkowego (od 1).
+
+    Args:
+        position (int): Numer pozycji; większy numer daje większą rangę.
+
+    Returns:
+        str: Ranga długości `RANK_WIDTH + 1`.
+    """
+    digits = []
+    for _ in range(RANK_WIDTH):
+        position, digit = divmod(position, BASE)
+        digits.append(ALPHABET[digit])
+    if position:
+        raise ValueError("Przekroczono zakres numerów pozycji rangi.")
+    return ''.join(reversed(digits)) + _SUFFIX
+
+
+def _position(rank: str) -> int:
+    """Odczytuje numer porządkowy z początku rangi (0 dla pustej)."""
+    value = 0
+    for char in rank[:RANK_WIDTH].ljust(RANK_WIDTH, '0'):
+        value = value * BASE + _DIGITS[char]
+    return value
+
+
+def ranks_after(last: str, count: int) -> list:
+    """
+    Zwraca `count` kolejnych rang o stałej długości większych od `last`.
+
+    Args:
+        last (str): Największa dotychczasowa ranga w quizie ('' dla pustego quizu).
+        count (int): Liczba potrzebnych rang.
+
+    Returns:
+        list[str]: Rosnące rangi.
+    """
+    start = _position(last) + 1 if last else 1
+    return [rank_for_position(start + i) for i in range(count)]
+
+
+def _midpoint(a: str, b) -> str:
+    # Wersja algorytmu "fractional indexing": a < b (b=None oznacza koniec przestrzeni),
+    # brakujące cyfry `a` traktujemy jak '0'.
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    digit_a = _DIGITS[a[0]] if a else 0
+    digit_b = _DIGITS[b[0]] if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return ALPHABET[(digit_a + digit_b) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return ALPHABET[digit_a] + _midpoint(a[1:], None)
+
+
+def rank_between(before: str, after) -> str:
+    """
+    Zwraca rangę leżącą między dwiema rangami.
+
+    Args:
+        before (str): Ranga poprzedniego pytania ('' - początek quizu).
+        after (str | None): Ranga następnego pytania (None - koniec quizu).
+
+    Returns:
+        str: Ranga r spełniająca before < r < after.
+
+    Raises:
+        ValueError: Jeśli `before` nie jest mniejsze od `after`.
+    """
+    if after is not None and not before < after:
+        raise ValueError(f"Niepoprawny przedział rang: '{before}' >= '{after}'.")
+    return _midpoint(before, after)
@@ -0,0 +1,156 @@
+# quizzes/routers.py
+"""
+Routery baz danych: odczyty treści quizów z replik (`ReplicaRouter`)
+oraz podział podejść między bazy (`AttemptShardRouter`, patrz `quizzes.sharding`).
+
+Zapytania odczytujące quizy, pytania, odpowiedzi, grupy i uprawnienia
+w bezpiecznych żądaniach HTTP (GET, HEAD, OPTIONS) trafiają do jednej
+z replik wymienionych w `settings.QUIZ_DB_REPLICAS`; wszystkie zapisy
+i pozostałe modele (użytkownicy, sesje, podejścia, zlecenia) obsługuje
+baza główna 'default'. Dodanie kolejnej repliki (np. serwera Postgres
+z replikacją strumieniową) zwiększa przepustowość odczytów bez zmian w kodzie.
+
+Replika może być opóźniona względem bazy głównej, dlatego:
+
+* żądania zmieniające dane (POST itd.) czytają wyłącznie z bazy głównej,
+  podobnie jak reszta żądania po pierwszym zapisie;
+* po zapisie odpowiedź ustawia ciasteczko `STICKY_COOKIE`, więc przez
+  `QUIZ_DB_STICKY_SECONDS` sekund ten użytkownik czyta z bazy głównej
+  i widzi własne zmiany;
+* kod poza żądaniami HTTP (worker, polecenia zarządzania) zawsze używa
+  bazy głównej, bo często odczytuje dane tuż po ich zapisaniu.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .sharding import attempt_shards, shard_for_quiz
+
+#: Ciasteczko wymuszające odczyty z bazy głównej po zapisie wykonanym przez użytkownika.
+STICKY_COOKIE = 'quiz_primary'
+
+#: Modele (app_label.model_name), których odczyty mogą trafiać do replik.
+REPLICATED_MODELS = frozenset({
+    'quizzes.quiz',
+    'quizzes.question',
+    'quizzes.answer',
+    'quizzes.quizgroup',
+    'quizzes.quizgroup_members',
+    'quizzes.quizuserpermission',
+    'quizzes.quizgrouppermission',
+    'quizzes.questionbank',
+    'quizzes.quizbankitem',
+})
+
+# Stan bieżącego żądania: None poza żądaniem HTTP (odczyty z bazy głównej).
+_request_state = ContextVar('quiz_db_request_state', default=None)
+
+
+class ReplicaRouter:
+    """
+    Router bazy danych: odczyty treści quizów z replik, zapisy do bazy głównej.
+
+    Bez skonfigurowanych replik (`QUIZ_DB_REPLICAS` puste) wszystkie zapytania
+    trafiają do bazy 'default'.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state['pinned'] or model._meta.label_lower not in REPLICATED_MODELS:
+            # Jawne 'default' - inaczej Django wybrałby bazę obiektu z podpowiedzi
+            # (np. podejścia quizu wczytanego z repliki).
+            return 'default'
+        if state['replica'] is None:
+            replicas = getattr(settings, 'QUIZ_DB_REPLICAS', ())
+            # Jedna replika na całe żądanie - spójny obraz danych między zapytaniami.
+            state['replica'] = random.choice(replicas) if replicas else 'default'
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['pinned'] = state['written'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *getattr(settings, 'QUIZ_DB_REPLICAS', ())}
+        return obj1._state.db in databases and obj2._state.db in databases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Repliki otrzymują schemat przez replikację bazy głównej.
+        return db not in getattr(settings, 'QUIZ_DB_REPLICAS', ())
+
+
+class AttemptShardRouter:
+    """
+    Router podejść (`QuizAttempt`) podzielonych między bazy według klucza quizu.
+
+    Baza jest wyznaczana z podpowiedzi `instance`: dla podejść quizu
+    (`quiz.attempts`) z klucza quizu, dla zapisywanego podejścia - z bazy,
+    z której je wczytano, albo z jego quizu. Zapytania bez podpowiedzi
+    obsługują kolejne routery (baza 'default'); zapytania o wiele quizów
+    wykonują `AttemptQuerySet.aggregate_shards` i `iter_shards`.
+    Pozostałe modele nie są obsługiwane przez ten router.
+    """
+
+    def _shard(self, model, hints):
+        if model._meta.label_lower != 'quizzes.quizattempt':
+            return None
+        instance = hints.get('instance')
+        if instance is None:
+            return None
+        label = instance._meta.label_lower
+        if label == 'quizzes.quiz':
+            return shard_for_quiz(instance.pk)
+        if label == 'quizzes.quizattempt' and instance.quiz_id is not None:
+            return instance._state.db or shard_for_quiz(instance.quiz_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._shard(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._shard(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if 'quizzes.quizattempt' in (obj1._meta.label_lower, obj2._meta.label_lower):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Bazy podziału (poza 'default') przechowują wyłącznie tabelę podejść.
+        if db != 'default' and db in attempt_shards():
+            return app_label == 'quizzes' and model_name == 'quizattempt'
+        return None
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Ustala dla każdego żądania, czy odczyty mogą trafiać do replik (`ReplicaRouter`).
+
+    Odczyty z replik są dozwolone tylko w bezpiecznych żądaniach bez ciasteczka
+    `STICKY_COOKIE`. Żądanie, które zapisało dane, ustawia to ciasteczko na
+    `QUIZ_DB_STICKY_SECONDS` sekund.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {
+            'pinned': request.method not in self.SAFE_METHODS or STICKY_COOKIE in request.COOKIES,
+            'written': False,
+            'replica': None,
+        }
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        if state['written'] and getattr(settings, 'QUIZ_DB_REPLICAS', ()):
+            response.set_cookie(STICKY_COOKIE, '1', max_age=settings.QUIZ_DB_STICKY_SECONDS, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,191 @@
+# quizzes/sharding.py
+"""
+Podział podejść (`QuizAttempt`) między bazy danych według klucza quizu.
+
+Podejścia quizu trafiają do bazy wskazanej przez `shard_for_quiz` - skrót
+CRC32 klucza quizu modulo liczba baz z `settings.QUIZ_ATTEMPT_SHARDS`.
+Wszystkie podejścia jednego quizu leżą więc w jednej bazie: wyniki quizu
+odczytuje jedno zapytanie (`for_quiz`, `quiz.attempts`), a dane z wielu
+quizów zbierają metody `aggregate_shards` i `iter_shards`, które odpytują
+kolejno każdą bazę i łączą wyniki.
+
+Zapisy są kierowane do właściwej bazy przez `create`, `bulk_create`
+(osobny `INSERT` dla każdej bazy) i `quizzes.routers.AttemptShardRouter`.
+Po zmianie listy baz polecenie `rebalance_attempts` przenosi podejścia
+tam, gdzie wskazuje nowy podział. Bez konfiguracji jedyną bazą jest 'default'.
+"""
+
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+def attempt_shards() -> list:
+    """
+    Zwraca aliasy baz przechowujących podejścia.
+
+    Returns:
+        list[str]: Aliasy z `settings.QUIZ_ATTEMPT_SHARDS` (domyślnie ['default']).
+    """
+    return list(getattr(settings, 'QUIZ_ATTEMPT_SHARDS', None) or ['default'])
+
+
+def shard_for_quiz(quiz_id: int) -> str:
+    """
+    Wyznacza bazę, w której są zapisywane podejścia quizu.
+
+    Args:
+        quiz_id (int): Klucz quizu.
+
+    Returns:
+        str: Alias bazy danych.
+    """
+    shards = attempt_shards()
+    return shards[zlib.crc32(str(quiz_id).encode()) % len(shards)]
+
+
+def attempt_databases() -> list:
+    """Bazy, w których mogą leżeć podejścia: bazy podziału i 'default' (podejścia sprzed podziału)."""
+    return list(dict.fromkeys(['default', *attempt_shards()]))
+
+
+class AttemptQuerySet(models.QuerySet):
+    """
+    QuerySet podejść świadomy podziału na bazy.
+
+    Zapytanie bez wskazanej bazy (`using`) dotyczy bazy wybranej przez router;
+    zapytania o wiele quizów należy wykonywać przez `aggregate_shards`
+    lub `iter_shards`.
+    """
+
+    def for_quiz(self, quiz):
+        """
+        Zwraca podejścia quizu z bazy, w której są zapisane.
+
+        Args:
+            quiz (Quiz | int): Quiz lub jego klucz.
+
+        Returns:
+            AttemptQuerySet: Podejścia quizu.
+        """
+        quiz_id = getattr(quiz, 'pk', quiz)
+        return self.using(shard_for_quiz(quiz_id)).filter(quiz_id=quiz_id)
+
+    def create(self, **kwargs):
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True, using=self._db or shard_for_quiz(obj.quiz_id))
+        return obj
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Zapisuje podejścia jednym `INSERT` na bazę (grupując je według `shard_for_quiz`).
+
+        Returns:
+            list[QuizAttempt]: Zapisane obiekty.
+        """
+        if self._db is not None:
+            return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        by_shard = defaultdict(list)
+        for obj in objs:
+            by_shard[shard_for_quiz(obj.quiz_id)].append(obj)
+        for alias, group in by_shard.items():
+            self.using(alias).bulk_create(group, *args, **kwargs)
+        return objs
+
+    def shards(self):
+        """
+        Zwraca to samo zapytanie wykonywane w każdej bazie podziału.
+
+        Returns:
+            list[tuple[str, AttemptQuerySet]]: Pary (alias bazy, zapytanie w tej bazie).
+        """
+        return [(alias, self.using(alias)) for alias in attempt_shards()]
+
+    def iter_shards(self, chunk_size: int = 2000):
+        """
+        Iteruje po podejściach ze wszystkich baz (baza po bazie, bez wczytywania całości).
+
+        Kolejność obowiązuje w obrębie jednej bazy; między bazami wyniki nie są scalane.
+
+        Args:
+            chunk_size (int): Liczba wierszy pobieranych naraz.
+
+        Yields:
+            QuizAttempt: Kolejne podejścia.
+        """
+        for _, queryset in self.shards():
+            yield from queryset.iterator(chunk_size=chunk_size)
+
+    def aggregate_shards(self, **aggregates) -> dict:
+        """
+        Liczy agregaty we wszystkich bazach i łączy wyniki (scatter-gather).
+
+        Obsługiwane są `Count`, `Sum`, `Min`, `Max` i `Avg` (liczona jako suma
+        i liczba wartości z każdej bazy). `Count(distinct=True)` nie jest
+        obsługiwane - ta sama wartość może wystąpić w kilku bazach.
+
+        Args:
+            **aggregates: Nazwy wyników i wyrażenia agregujące, jak w `aggregate()`.
+
+        Returns:
+            dict: Połączone wartości agregatów.
+
+        Raises:
+            ValueError: Dla nieobsługiwanego agregatu.
+        """
+        partial = {}
+        for name, aggregate in aggregates.items():
+            if not isinstance(aggregate, (Count, Sum, Min, Max, Avg)) or getattr(aggregate, 'distinct', False):
+                raise ValueError(f"Agregatu '{name}' nie da się połączyć z wielu baz.")
+            if isinstance(aggregate, Avg):
+                expression = aggregate.get_source_expressions()[0]
+                partial[f'{name}__sum'] = Sum(expression, filter=aggregate.filter)
+                partial[f'{name}__count'] = Count(expression, filter=aggregate.filter)
+            else:
+                partial[name] = aggregate
+
+        rows = [queryset.aggregate(**partial) for _, queryset in self.shards()]
+
+        def combine(key, function):
+            values = [row[key] for row in rows if row[key] is not None]
+            return function(values) if values else None
+
+        result = {}
+        for name, aggregate in aggregates.items():
+            if isinstance(aggregate, Avg):
+                total, count = combine(f'{name}__sum', sum), combine(f'{name}__count', sum)
+                result[name] = total / count if count else None
+            elif isinstance(aggregate, Count):
+                result[name] = sum(row[name] for row in rows)
+            else:
+                result[name] = combine(name, {Sum: sum, Min: min, Max: max}[type(aggregate)])
+        return result
+
+
+AttemptManager = models.Manager.from_queryset(AttemptQuerySet)
+
+
+@receiver(post_delete, sender='quizzes.Quiz')
+def _delete_sharded_attempts(sender, instance, using, **kwargs):
+    """Usuwa podejścia usuniętego quizu z jego bazy (kaskada Django obejmuje tylko bazę quizu)."""
+    from .models import QuizAttempt
+
+    shard = shard_for_quiz(instance.pk)
+    if shard != using:
+        QuizAttempt.objects.using(shard).filter(quiz_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _detach_sharded_attempts(sender, instance, using, **kwargs):
+    """Odłącza podejścia usuniętego użytkownika we wszystkich bazach (jak `SET_NULL`)."""
+    from .models import QuizAttempt
+
+    for alias in attempt_databases():
+        if alias != using:
+            QuizAttempt.objects.using(alias).filter(user_id=instance.pk).update(user=None)
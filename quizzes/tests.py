@@ -6,12 +6,67 @@ Zawiera testy sprawdzające logikę importu JSON, procesu rozwiązywania quizów
 tworzenia pytań oraz podstawowe funkcje kont użytkowników.
 """
 
+import hashlib
 import json
-from django.test import TestCase
+import os
+import random
+import requests
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+import copy
+from django.db import connection, connections
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
 from django.core.files.uploadedfile import SimpleUploadedFile
-from .models import Quiz, Question, Answer, QuizUserPermission
+from accounts.auth_cache import check_shared_caches
+from .models import (
+    Quiz, Question, Answer, QuizAttempt, QuizGroup, QuizGroupPermission, QuizUserPermission,
+    ImportJob, GenerationJob, QuestionBank, QuizBankItem, AttemptArchive, QuizArchive,
+)
+from .jobs import claim_next_job, fail_stale_jobs, run_generation_job, run_import_job
+from .llm import DEFAULT_MODEL, LLMClient, LLMError, get_client
+from .generation import (
+    IncrementalQuestionParser,
+    build_payload,
+    create_generated_quiz,
+    generation_cache_key,
+    split_count,
+    to_question_records,
+)
+from . import metrics, persistence
+from .importers import get_importer, get_importer_for_filename, validate_question_record
+from .persistence import persist_questions
+from .duplicates import DuplicateFilter, LSHIndex, minhash, record_signature, similarity
+from .ranking import rank_between, ranks_after
+from .cloning import clone_quiz
+from .membership import enrol_from_csv
+from .db import apply_pragmas
+from .routers import STICKY_COOKIE, ReplicaRouter
+from .sharding import shard_for_quiz
+from .archive import archive_cutoff, archive_root, quiz_attempt_stats, quiz_history, read_archive
+from .quiz_archive import archive_candidates, archive_quiz, rehydrate_quiz
+
+TESTDATA_DIR = Path(__file__).resolve().parent / 'testdata'
+
+# Benchmarki (np. import 100 tys. pytań) są pomijane, dopóki nie ustawimy QUIZ_BENCHMARKS=1
+RUN_BENCHMARKS = os.environ.get('QUIZ_BENCHMARKS') == '1'
 
 # Pobieramy model użytkownika zdefiniowany w settings.py
 User = get_user_model()
@@ -154,6 +209,906 @@ class QuizImportTests(TestCase):
         self.assertRedirects(response, f'{self.login_url}?next={self.import_url}')
 
 
+class QuestionImporterTests(TestCase):
+    """
+    Testy importerów CSV, GIFT i Moodle XML na plikach z katalogu `testdata`.
+
+    Każdy plik zawiera te same pytania, więc wszystkie formaty powinny dać
+    identyczny wynik w bazie danych.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='importer', password='testpassword123')
+        self.quiz = Quiz.objects.create(title="Import formatów", author=self.user)
+
+    def _upload(self, filename):
+        return SimpleUploadedFile(filename, (TESTDATA_DIR / filename).read_bytes())
+
+    def _assert_sample_imported(self, expected_count):
+        self.assertEqual(self.quiz.questions.count(), expected_count)
+
+        sky = self.quiz.questions.get(text="Jakiego koloru jest niebo?")
+        self.assertEqual(sky.question_type, 'SINGLE')
+        self.assertEqual(sky.explanation, "Zazwyczaj niebieskie.")
+        self.assertEqual(list(sky.answers.filter(is_correct=True).values_list('text', flat=True)), ["Niebieskie"])
+        self.assertEqual(sky.answers.count(), 3)
+
+        mammals = self.quiz.questions.get(text="Które z nich są ssakami?")
+        self.assertEqual(mammals.question_type, 'MULTIPLE')
+        self.assertEqual(set(mammals.answers.filter(is_correct=True).values_list('text', flat=True)), {"Pies", "Kot"})
+
+    def test_csv_fixture(self):
+        """Plik CSV z separatorem ';' i typem pytania wywnioskowanym z kolumny 'correct'."""
+        importer = get_importer_for_filename('sample.csv')
+        persist_questions(self.quiz, importer.records(self._upload('sample.csv')))
+        self._assert_sample_imported(2)
+
+    def test_gift_fixture(self):
+        """Plik GIFT z tytułami, wagami procentowymi, feedbackiem i pytaniem prawda/fałsz."""
+        importer = get_importer_for_filename('sample.gift')
+        persist_questions(self.quiz, importer.records(self._upload('sample.gift')))
+        self._assert_sample_imported(3)
+
+        tf = self.quiz.questions.get(text="Ziemia krąży wokół Słońca.")
+        self.assertTrue(tf.answers.get(text="Prawda").is_correct)
+
+    def test_moodle_xml_fixture(self):
+        """Plik Moodle XML - kategoria jest pomijana, a HTML usuwany z treści."""
+        importer = get_importer_for_filename('sample.xml')
+        persist_questions(self.quiz, importer.records(self._upload('sample.xml')))
+        self._assert_sample_imported(3)
+
+        tf = self.quiz.questions.get(text="Ziemia krąży wokół Słońca.")
+        self.assertFalse(tf.answers.get(text="Fałsz").is_correct)
+
+    def test_generic_import_view_rolls_back_on_error(self):
+        """Błąd w dalszej części pliku wycofuje wszystkie wcześniej zapisane partie."""
+        self.client.login(username='importer', password='testpassword123')
+        csv_data = "text,correct,answer_1,answer_2\nDobre pytanie,1,A,B\nZłe pytanie,,A,B\n"
+        upload = SimpleUploadedFile("bank.csv", csv_data.encode('utf-8'))
+
+        response = self.client.post(reverse('quiz-import', kwargs={'pk': self.quiz.pk}), {'import_file': upload}, follow=True)
+
+        self.assertContains(response, "Błąd walidacji")
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_persist_questions_uses_constant_queries_per_batch(self):
+        """Wspólny etap zapisu: odczyt ostatniej rangi, dwa `bulk_create` na partię i podbicie wersji quizu."""
+        records = get_importer('gift').records(self._upload('sample.gift'))
+        with self.assertNumQueries(4):
+            persist_questions(self.quiz, records)
+
+
+class BulkPersistenceTests(TestCase):
+    """
+    Testy wspólnego zapisu pytań: liczba zapytań nie zależy od liczby pytań
+    (generator AI, import JSON, import w panelu admina).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='bulk_admin', password='testpassword123')
+        self.client.login(username='bulk_admin', password='testpassword123')
+
+    def _json_upload(self, count):
+        questions = [
+            {'text': f"Pytanie {i}?", 'question_type': 'MULTIPLE',
+             'answers': [{'text': "A", 'is_correct': True}, {'text': "B", 'is_correct': True}, {'text': "C"}]}
+            for i in range(count)
+        ]
+        return SimpleUploadedFile("bank.json", json.dumps({'questions': questions}).encode('utf-8'))
+
+    def _count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def test_generated_quiz_query_count_is_constant(self):
+        small = to_question_records(sample_generated_questions(3))
+        large = to_question_records(sample_generated_questions(60))
+
+        queries_small = self._count_queries(lambda: create_generated_quiz(self.user, "Mały", small))
+        queries_large = self._count_queries(lambda: create_generated_quiz(self.user, "Duży", large))
+
+        self.assertEqual(queries_small, queries_large)
+        self.assertEqual(Answer.objects.filter(question__quiz__title="AI Quiz: Duży").count(), 240)
+
+    def test_json_import_query_count_is_constant(self):
+        quiz = Quiz.objects.create(title="Import", author=self.user)
+        url = reverse('quiz-import-json', kwargs={'pk': quiz.pk})
+
+        queries_small = self._count_queries(lambda: self.client.post(url, {'json_file': self._json_upload(2)}))
+        queries_large = self._count_queries(lambda: self.client.post(url, {'json_file': self._json_upload(50)}))
+
+        self.assertEqual(queries_small, queries_large)
+        self.assertEqual(quiz.questions.count(), 52)
+
+    def test_admin_import_uses_bulk_persistence(self):
+        quiz = Quiz.objects.create(title="Admin", author=self.user)
+        url = reverse('admin:quizzes_quiz_import', args=[quiz.pk])
+        self.assertContains(self.client.get(reverse('admin:quizzes_quiz_change', args=[quiz.pk])), url)
+
+        queries_small = self._count_queries(lambda: self.client.post(url, {'import_file': self._json_upload(2)}))
+        queries_large = self._count_queries(lambda: self.client.post(url, {'import_file': self._json_upload(40)}))
+
+        self.assertEqual(queries_small, queries_large)
+        self.assertEqual(quiz.questions.count(), 42)
+
+        bad = SimpleUploadedFile("bank.json", b'{"questions": [{"text": "Bez odpowiedzi"}]}')
+        response = self.client.post(url, {'import_file': bad})
+        self.assertContains(response, "Błąd walidacji")
+        self.assertEqual(quiz.questions.count(), 42)
+
+        # ponowny import tych samych pytań przechodzi przez wykrywanie duplikatów
+        response = self.client.post(url, {'import_file': self._json_upload(2), 'duplicates': 'drop'}, follow=True)
+        self.assertContains(response, "Pominięto możliwe duplikaty: 2.")
+        self.assertEqual(quiz.questions.count(), 42)
+
+
+class DuplicateDetectionTests(TestCase):
+    """
+    Testy wykrywania niemal identycznych pytań (MinHash LSH) przy imporcie i w poleceniu `find_duplicates`.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='dup_user', password='testpassword123')
+        self.client.login(username='dup_user', password='testpassword123')
+        self.quiz = Quiz.objects.create(title="Geografia", author=self.user)
+        persist_questions(self.quiz, [{
+            'text': "Jaka jest stolica Francji?", 'explanation': '', 'question_type': 'SINGLE',
+            'answers': [{'text': "Paryż", 'is_correct': True}, {'text': "Lyon", 'is_correct': False}],
+        }])
+
+    def _import(self, duplicates):
+        csv_data = (
+            "text,correct,answer_1,answer_2\n"
+            "Jaka jest STOLICA Francji,1,Paryż,Lyon\n"
+            "Ile nóg ma pająk?,2,Sześć,Osiem\n"
+            "Ile nóg ma pająk,2,Sześć,Osiem\n"
+            "Kto napisał Pana Tadeusza?,1,Adam Mickiewicz,Juliusz Słowacki\n"
+        )
+        upload = SimpleUploadedFile("bank.csv", csv_data.encode('utf-8'))
+        return self.client.post(
+            reverse('quiz-import', kwargs={'pk': self.quiz.pk}),
+            {'import_file': upload, 'duplicates': duplicates},
+            follow=True,
+        )
+
+    def test_signature_similarity(self):
+        """Przeformułowane pytanie jest podobne, inne pytanie nie."""
+        original = minhash(["Jaka jest stolica Francji?", "Paryż", "Lyon", "Marsylia"])
+        rephrased = minhash(["jaka jest stolica francji", "Paryż", "Lyon", "Nicea"])
+        other = minhash(["Ile nóg ma pająk?", "Sześć", "Osiem"])
+        self.assertGreaterEqual(similarity(original, rephrased), 0.7)
+        self.assertLess(similarity(original, other), 0.2)
+        self.assertIsNotNone(self.quiz.questions.get().minhash)
+
+    def test_import_drops_duplicates(self):
+        """Tryb 'drop' pomija duplikaty istniejących pytań i duplikaty w samym pliku."""
+        response = self._import('drop')
+
+        self.assertContains(response, "Pomiń")
+        self.assertContains(response, "Pominięto możliwe duplikaty: 2.")
+        self.assertEqual(
+            sorted(self.quiz.questions.values_list('text', flat=True)),
+            ["Ile nóg ma pająk?", "Jaka jest stolica Francji?", "Kto napisał Pana Tadeusza?"],
+        )
+
+    def test_import_flags_duplicates(self):
+        """Tryb 'flag' zapisuje wszystkie pytania, oznaczając duplikaty."""
+        response = self._import('flag')
+
+        self.assertContains(response, "Oznaczono możliwe duplikaty: 2.")
+        fragment = self.client.get(reverse('quiz-questions-fragment', kwargs={'pk': self.quiz.pk}))
+        self.assertContains(fragment, "Możliwy duplikat")
+        flagged = self.quiz.questions.filter(possible_duplicate=True).values_list('text', flat=True)
+        self.assertEqual(sorted(flagged), ["Ile nóg ma pająk", "Jaka jest STOLICA Francji"])
+
+    def test_filter_checks_questions_linked_from_banks(self):
+        """Pytania dołączone z banku pytań też są brane pod uwagę przy wykrywaniu duplikatów."""
+        bank = QuestionBank.objects.create(name="Biologia", owner=self.user)
+        record = {'text': "Ile nóg ma pająk?", 'answers': [{'text': "Osiem"}, {'text': "Sześć"}]}
+        question = Question.objects.create(bank=bank, text=record['text'], minhash=record_signature(record))
+        QuizBankItem.objects.create(quiz=self.quiz, question=question)
+
+        duplicate_filter = DuplicateFilter(self.quiz, 'drop')
+        self.assertEqual(list(duplicate_filter([record])), [])
+        self.assertEqual(duplicate_filter.dropped, 1)
+
+    def test_find_duplicates_command_reports_clusters(self):
+        """Polecenie uzupełnia brakujące sygnatury i wypisuje klastry z różnych quizów."""
+        other_quiz = Quiz.objects.create(title="Kopia", author=self.user)
+        question = Question.objects.create(quiz=other_quiz, text="Jaka jest stolica Francji")
+        Answer.objects.create(question=question, text="Paryż", is_correct=True)
+        Answer.objects.create(question=question, text="Lyon")
+        Question.objects.create(quiz=other_quiz, text="Zupełnie inne pytanie o chemię organiczną")
+
+        out = StringIO()
+        call_command('find_duplicates', '--backfill', '--flag', stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Klastry: 1, nadmiarowe pytania: 1.", output)
+        self.assertIn(f"#{question.pk}: Jaka jest stolica Francji", output)
+        question.refresh_from_db()
+        self.assertTrue(question.possible_duplicate)
+        self.assertFalse(self.quiz.questions.get().possible_duplicate)
+
+    def test_question_edit_updates_signature(self):
+        question = self.quiz.questions.get()
+        old_signature = bytes(question.minhash)
+        answers = list(question.answers.all())
+        data = {
+            'text': "Ile wynosi pierwiastek z 81?", 'question_type': 'SINGLE', 'explanation': '',
+            'answers-TOTAL_FORMS': '2', 'answers-INITIAL_FORMS': '2',
+            'answers-MIN_NUM_FORMS': '2', 'answers-MAX_NUM_FORMS': '10',
+            'answers-0-id': answers[0].pk, 'answers-0-text': "9", 'answers-0-is_correct': 'on',
+            'answers-1-id': answers[1].pk, 'answers-1-text': "7",
+        }
+        self.client.post(reverse('question-edit', kwargs={'pk': question.pk}), data)
+
+        question.refresh_from_db()
+        self.assertEqual(question.text, "Ile wynosi pierwiastek z 81?")
+        self.assertLess(similarity(old_signature, bytes(question.minhash)), 0.2)
+
+
+class ImportJobTests(TestCase):
+    """
+    Testy importu w tle: zlecanie, worker, postęp, anulowanie i tryb "wszystko albo nic".
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, QUIZ_IMPORT_INLINE_MAX_BYTES=0)
+        self.settings_override.enable()
+
+        self.user = User.objects.create_user(username='bgimport', password='testpassword123')
+        self.quiz = Quiz.objects.create(title="Import w tle", author=self.user)
+        self.import_url = reverse('quiz-import', kwargs={'pk': self.quiz.pk})
+        self.client.login(username='bgimport', password='testpassword123')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _queue(self, rows, atomic=False):
+        csv_data = "text,correct,answer_1,answer_2\n" + "\n".join(rows) + "\n"
+        data = {'import_file': SimpleUploadedFile("bank.csv", csv_data.encode('utf-8'))}
+        if atomic:
+            data['atomic'] = 'on'
+        self.client.post(self.import_url, data)
+        return ImportJob.objects.get()
+
+    def test_large_upload_is_queued_and_processed_by_worker(self):
+        """Widok tylko zleca import; pytania zapisuje dopiero worker."""
+        job = self._queue([f"Pytanie {i},1,A,B" for i in range(5)])
+
+        self.assertEqual(job.status, ImportJob.Status.PENDING)
+        self.assertEqual(Question.objects.count(), 0)
+
+        call_command('run_worker', '--once', stdout=open(os.devnull, 'w'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.DONE)
+        self.assertEqual(job.processed_count, 5)
+        self.assertEqual(self.quiz.questions.count(), 5)
+
+        status = self.client.get(reverse('import-job-status', kwargs={'pk': job.pk})).json()
+        self.assertEqual(status['status'], 'DONE')
+        self.assertEqual(status['progress'], 100)
+        self.assertFalse(status['active'])
+
+    def test_cancel_pending_job(self):
+        """Anulowanie oczekującego zlecenia sprawia, że worker go nie wykona, a plik jest usuwany."""
+        job = self._queue(["Pytanie,1,A,B"])
+        path = job.file.path
+        self.client.post(reverse('import-job-cancel', kwargs={'pk': job.pk}))
+
+        self.assertIsNone(claim_next_job(ImportJob))
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.CANCELLED)
+        self.assertFalse(os.path.exists(path))
+
+    def test_finished_job_deletes_uploaded_file(self):
+        """Po zakończeniu importu przesłany plik jest usuwany."""
+        job = self._queue(["Pytanie,1,A,B"])
+        path = job.file.path
+        self.assertTrue(os.path.exists(path))
+
+        run_import_job(claim_next_job(ImportJob))
+        self.assertFalse(os.path.exists(path))
+
+    def test_stale_running_job_is_failed(self):
+        """Zlecenie porzucone przez przerwanego workera kończy się błędem przy kolejnym przejęciu."""
+        job = self._queue(["Pytanie,1,A,B"])
+        path = job.file.path
+        ImportJob.objects.filter(pk=job.pk).update(
+            status=ImportJob.Status.RUNNING, started_at=timezone.now() - timedelta(hours=3),
+        )
+
+        with override_settings(QUIZ_JOB_STALE_AFTER=2 * 60 * 60):
+            self.assertIsNone(claim_next_job(ImportJob))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn("worker", job.error)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(os.path.exists(path))
+
+        # zlecenie wykonywane krócej niż limit nie jest ruszane
+        fresh = ImportJob.objects.create(quiz=self.quiz, created_by=self.user, status=ImportJob.Status.RUNNING,
+                                         started_at=timezone.now(), format_name='csv')
+        self.assertEqual(fail_stale_jobs(ImportJob), 0)
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ImportJob.Status.RUNNING)
+
+    def test_atomic_job_rolls_back_committed_batches(self):
+        """W trybie 'wszystko albo nic' błąd w późniejszej partii usuwa wcześniejsze partie."""
+        rows = [f"Pytanie {i},1,A,B" for i in range(1500)] + ["Złe pytanie,,A,B"]
+        self._queue(rows, atomic=True)
+        job = run_import_job(claim_next_job(ImportJob))
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIn("Złe pytanie", job.error)
+        self.assertEqual(Question.objects.count(), 0)
+
+    def test_atomic_job_rolls_back_bank_links(self):
+        """Wycofanie importu usuwa także dołączenia z banku zapisane we wcześniejszej partii."""
+        bank = QuestionBank.objects.create(name="Bank importu", owner=self.user)
+        shared = Question.objects.create(bank=bank, text="Pytanie z banku")
+        answers = [{'text': 'A', 'is_correct': True}, {'text': 'B', 'is_correct': False}]
+        questions = (
+            [{'text': shared.text, 'bank_question': shared.pk, 'answers': answers}]
+            + [{'text': f"Pytanie {i}", 'answers': answers} for i in range(999)]
+            + [{'text': "Złe pytanie", 'answers': []}]
+        )
+        upload = SimpleUploadedFile("bank.json", json.dumps({'questions': questions}).encode('utf-8'))
+        self.client.post(self.import_url, {'import_file': upload, 'atomic': 'on'})
+        job = run_import_job(claim_next_job(ImportJob))
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertFalse(self.quiz.bank_links.exists())
+        self.assertFalse(self.quiz.questions.exists())
+        self.assertTrue(Question.objects.filter(pk=shared.pk).exists())
+
+    def test_non_atomic_job_keeps_committed_batches(self):
+        """Bez trybu atomowego zatwierdzone partie pozostają w bazie."""
+        self._queue([f"Pytanie {i},1,A,B" for i in range(1500)] + ["Złe pytanie,,A,B"])
+        job = run_import_job(claim_next_job(ImportJob))
+
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertEqual(Question.objects.count(), 1000)
+
+    def test_status_requires_edit_permission(self):
+        """Stan zlecenia widzi tylko osoba z prawem edycji quizu."""
+        job = self._queue(["Pytanie,1,A,B"])
+        User.objects.create_user(username='obcy', password='testpassword123')
+        self.client.login(username='obcy', password='testpassword123')
+
+        response = self.client.get(reverse('import-job-status', kwargs={'pk': job.pk}))
+        self.assertEqual(response.status_code, 403)
+
+
+def chat_completion_body(questions) -> dict:
+    """Buduje odpowiedź w formacie chat-completions zawierającą podane pytania jako JSON."""
+    return {
+        'choices': [{'message': {'role': 'assistant', 'content': json.dumps({'questions': questions})}}],
+        'usage': {'prompt_tokens': 100, 'completion_tokens': 200, 'total_tokens': 300},
+    }
+
+
+def sample_generated_questions(count, offset=0):
+    """
+    Zwraca `count` różnych pytań (numerowanych od `offset`) w formacie, w jakim zwraca je model językowy.
+
+    Treść i odpowiedzi zawierają skrót numeru pytania, aby pytania nie były
+    wykrywane jako niemal identyczne (`quizzes.duplicates`).
+    """
+    questions = []
+    for i in range(offset, offset + count):
+        digest = hashlib.sha256(str(i).encode()).hexdigest()
+        questions.append({
+            'question': f"Pytanie AI {i}: {digest[:24]}?",
+            'answers': [digest[24 + 8 * j:32 + 8 * j] for j in range(4)],
+            'correct_index': i % 4,
+        })
+    return questions
+
+
+class StubChatCompletionsServer:
+    """
+    Lokalny serwer HTTP udający endpoint chat-completions (do testów bez sieci).
+
+    Obsługuje połączenia keep-alive (HTTP/1.1), dzięki czemu można sprawdzić
+    ponowne użycie połączeń przez klienta. Zapytania z `"stream": true` dostają
+    udaną odpowiedź jako server-sent events: treść wiadomości jest dzielona na
+    fragmenty po `chunk_size` znaków wysyłane co `chunk_delay` sekund (zwykła
+    odpowiedź jest wtedy opóźniana o łączny czas wysyłania wszystkich fragmentów).
+
+    Attributes:
+        responses (list[tuple]): Kolejne odpowiedzi (status, body, headers); ostatnia jest powtarzana.
+        latency (float): Sztuczne opóźnienie odpowiedzi w sekundach.
+        chunk_size (int): Długość fragmentu treści w trybie strumieniowym.
+        chunk_delay (float): Opóźnienie między fragmentami w trybie strumieniowym.
+        requests (list[dict]): Odebrane zapytania (zdekodowany JSON).
+        client_ports (list[int]): Porty klienta dla kolejnych zapytań (ten sam port = to samo połączenie).
+    """
+
+    def __init__(self, body=None, status=200, latency=0.0, responses=None, chunk_size=32, chunk_delay=0.0):
+        if responses is None:
+            body = body if body is not None else chat_completion_body(sample_generated_questions(3))
+            responses = [(status, body, {})]
+        self.responses = list(responses)
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = []
+        self.client_ports = []
+
+    def _next_response(self):
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request_body = json.loads(self.rfile.read(length) or b'{}')
+                stub.requests.append(request_body)
+                stub.client_ports.append(self.client_address[1])
+                status, body, headers = stub._next_response()
+                time.sleep(stub.latency)
+                if status == 200 and request_body.get('stream'):
+                    return self.send_event_stream(body)
+                if status == 200 and stub.chunk_delay:
+                    # bez strumienia klient czeka, aż "model" wygeneruje całą treść
+                    content = body['choices'][0]['message']['content']
+                    time.sleep(stub.chunk_delay * -(-len(content) // stub.chunk_size))
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # klient zerwał połączenie (np. przekroczony limit czasu)
+
+            def send_event_stream(self, body):
+                content = body['choices'][0]['message']['content']
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                events = [
+                    {'choices': [{'delta': {'content': content[i:i + stub.chunk_size]}}]}
+                    for i in range(0, len(content), stub.chunk_size)
+                ]
+                events.append({'choices': [], 'usage': body.get('usage')})
+                try:
+                    for event in events:
+                        self.wfile.write(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+                        self.wfile.flush()
+                        time.sleep(stub.chunk_delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(QUIZ_LLM_API_TOKEN='test-token')
+class LLMClientTests(TestCase):
+    """
+    Testy klienta chat-completions: ponowienia, Retry-After, limity czasu, pula połączeń i metryki.
+    """
+
+    def setUp(self):
+        metrics.reset()
+
+    def _client(self, stub, **kwargs):
+        client = LLMClient(url=stub.url, session=requests.Session(), **kwargs)
+        client.sleep = mock.Mock()
+        return client
+
+    def test_retries_honour_retry_after(self):
+        """Odpowiedź 429 z Retry-After jest ponawiana po wskazanym czasie."""
+        ok = chat_completion_body(sample_generated_questions(1))
+        with StubChatCompletionsServer(responses=[
+            (429, {'error': 'Rate limit'}, {'Retry-After': '2'}),
+            (503, {'error': 'Przeciążenie'}, {}),
+            (200, ok, {}),
+        ]) as stub:
+            client = self._client(stub, backoff=0.5)
+            with self.assertLogs('quizzes.llm', 'WARNING'):
+                result = client.chat_completion({'messages': []})
+
+        self.assertEqual(result, ok)
+        self.assertEqual(len(stub.requests), 3)
+        delays = [c.args[0] for c in client.sleep.call_args_list]
+        self.assertEqual(delays[0], 2.0)
+        self.assertTrue(0 <= delays[1] <= 1.0)
+
+        snap = metrics.snapshot()
+        self.assertEqual(snap['counters']['llm.retries'], 2)
+        self.assertEqual(snap['counters']['llm.total_tokens'], 300)
+        self.assertEqual(snap['timings']['llm.latency']['count'], 3)
+
+    def test_client_error_is_not_retried(self):
+        """Błąd 400 nie jest ponawiany i zawiera komunikat z API."""
+        with StubChatCompletionsServer(body={'error': 'Zły model'}, status=400) as stub:
+            client = self._client(stub)
+            with self.assertRaisesMessage(LLMError, "Błąd API (400): Zły model"):
+                client.chat_completion({'messages': []})
+        self.assertEqual(len(stub.requests), 1)
+
+    def test_non_object_error_body_is_reported_as_text(self):
+        """Treść błędu będąca poprawnym JSON-em, ale nie obiektem, trafia do komunikatu jako tekst."""
+        with StubChatCompletionsServer(body=["Bad model"], status=400) as stub:
+            client = self._client(stub)
+            with self.assertRaisesMessage(LLMError, 'Błąd API (400): ["Bad model"]'):
+                client.chat_completion({'messages': []})
+        self.assertEqual(len(stub.requests), 1)
+
+    def test_read_timeout_is_bounded(self):
+        """Wolna odpowiedź przerywana jest po limicie odczytu, a liczba prób jest ograniczona."""
+        with StubChatCompletionsServer(latency=0.5) as stub:
+            client = self._client(stub, read_timeout=0.1, max_retries=1)
+            with self.assertRaises(LLMError), self.assertLogs('quizzes.llm', 'WARNING'):
+                client.chat_completion({'messages': []})
+        self.assertEqual(len(stub.requests), 2)
+
+    def test_keep_alive_connection_is_reused(self):
+        """Kolejne zapytania korzystają z tego samego połączenia TCP."""
+        with StubChatCompletionsServer() as stub:
+            client = self._client(stub)
+            client.chat_completion({'messages': []})
+            client.chat_completion({'messages': []})
+        self.assertEqual(len(set(stub.client_ports)), 1)
+
+
+class LLMBackendTests(TestCase):
+    """
+    Testy rejestru backendów modelu: backend lokalny, wybór najszybszego, przełączanie i limity.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='backend_user', password='testpassword123')
+        cache_override = override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                    'generation': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'backend-tests'}},
+        )
+        cache_override.enable()
+        self.addCleanup(cache_override.disable)
+        self.addCleanup(caches['generation'].clear)
+
+    @override_settings(QUIZ_LLM_BACKENDS={'local': {'BACKEND': 'fake'}})
+    def test_fake_backend_generates_deterministic_quiz_offline(self):
+        """Backend 'fake' działa bez sieci i dla tych samych danych zwraca te same pytania."""
+        texts = []
+        for streaming in (True, False):
+            with override_settings(QUIZ_GENERATION_STREAMING=streaming):
+                GenerationJob.objects.create(created_by=self.user, topic="Astronomia", count=4, force_fresh=True)
+                job = run_generation_job(claim_next_job(GenerationJob))
+            self.assertEqual(job.status, GenerationJob.Status.DONE)
+            texts.append(list(job.quiz.questions.order_by('pk').values_list('text', flat=True)))
+
+        self.assertEqual(len(texts[0]), 4)
+        self.assertEqual(texts[0], texts[1])
+        self.assertTrue(texts[0][0].startswith("Astronomia - pytanie 1"))
+        self.assertEqual(get_client().stats()['local']['requests'], 2)
+
+    @override_settings(QUIZ_LLM_BACKENDS={
+        'slow': {'BACKEND': 'fake', 'LATENCY': 0.05},
+        'fast': {'BACKEND': 'fake'},
+    })
+    def test_router_prefers_fastest_backend(self):
+        """Po zmierzeniu opóźnień router kieruje zapytania do szybszego backendu."""
+        payload = build_payload("Temat", 2)
+        for _ in range(5):
+            get_client().chat_completion(payload)
+
+        stats = get_client().stats()
+        self.assertEqual(stats['slow']['requests'], 1)
+        self.assertEqual(stats['fast']['requests'], 4)
+
+    def test_router_fails_over_on_server_error(self):
+        """Błąd 503 na pierwszym backendzie przenosi zapytanie na kolejny."""
+        with StubChatCompletionsServer(body={'error': 'Przeciążenie'}, status=503) as stub, override_settings(
+            QUIZ_LLM_BACKENDS={
+                'remote': {'BACKEND': 'openai', 'URL': stub.url, 'TOKEN': 'x', 'MAX_RETRIES': 0},
+                'local': {'BACKEND': 'fake'},
+            },
+            QUIZ_LLM_ROUTING='ordered',
+        ):
+            with self.assertLogs('quizzes.llm', 'WARNING'):
+                result = get_client().chat_completion(build_payload("Temat", 1))
+            stats = get_client().stats()
+
+        self.assertEqual(result['model'], 'fake')
+        self.assertEqual(stub.requests[0]['model'], DEFAULT_MODEL)
+        self.assertEqual(stats['remote']['errors'], 1)
+        self.assertEqual(stats['local']['requests'], 1)
+
+    @override_settings(QUIZ_LLM_BACKENDS={'local': {'BACKEND': 'fake', 'LATENCY': 0.2, 'MAX_CONCURRENCY': 2}})
+    def test_backend_concurrency_limit(self):
+        """Przy limicie 2 cztery równoczesne zapytania wykonują się w dwóch turach."""
+        client = get_client()
+        threads = [threading.Thread(target=client.chat_completion, args=(build_payload("Temat", 1),)) for _ in range(4)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.4)
+
+    @override_settings(QUIZ_LLM_BACKENDS={'x': {'BACKEND': 'nieznany'}})
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_client()
+
+
+class GenerationJobTests(TestCase):
+    """
+    Testy generowania quizów w tle na lokalnym serwerze udającym API modelu.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ai_user', password='testpassword123')
+        self.client.login(username='ai_user', password='testpassword123')
+        token_override = override_settings(
+            QUIZ_LLM_API_TOKEN='test-token',
+            QUIZ_LLM_MAX_RETRIES=0,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                    'generation': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'generation-tests'}},
+        )
+        token_override.enable()
+        self.addCleanup(token_override.disable)
+        self.addCleanup(caches['generation'].clear)
+        metrics.reset()
+
+    def test_view_returns_immediately_and_worker_creates_quiz(self):
+        """Widok nie czeka na model (opóźnienie 2 s); quiz tworzy dopiero worker."""
+        with StubChatCompletionsServer(latency=2.0) as stub, override_settings(QUIZ_LLM_API_URL=stub.url):
+            start = time.perf_counter()
+            response = self.client.post(reverse('quiz-generate'), {'topic': 'Historia Polski', 'count': 3})
+            elapsed = time.perf_counter() - start
+
+            job = GenerationJob.objects.get()
+            self.assertRedirects(response, reverse('generation-job', kwargs={'pk': job.pk}), fetch_redirect_response=False)
+            self.assertLess(elapsed, 1.0)
+            self.assertEqual(stub.requests, [])
+
+            page = self.client.get(reverse('generation-job', kwargs={'pk': job.pk}))
+            self.assertContains(page, 'Oczekuje')
+
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.quiz.title, "AI Quiz: Historia Polski")
+        self.assertEqual(job.quiz.questions.count(), 3)
+        self.assertEqual(Answer.objects.filter(question__quiz=job.quiz, is_correct=True).count(), 3)
+
+        status = self.client.get(reverse('generation-job-status', kwargs={'pk': job.pk})).json()
+        self.assertEqual(status['status'], 'DONE')
+        response = self.client.get(reverse('generation-job', kwargs={'pk': job.pk}))
+        self.assertRedirects(response, reverse('quiz-edit', kwargs={'pk': job.quiz.pk}))
+
+    def test_cache_hit_creates_quiz_without_outbound_call(self):
+        """Drugie generowanie tego samego tematu korzysta z pamięci podręcznej."""
+        with StubChatCompletionsServer() as stub, override_settings(QUIZ_LLM_API_URL=stub.url):
+            self.client.post(reverse('quiz-generate'), {'topic': 'Historia Polski', 'count': 3})
+            run_generation_job(claim_next_job(GenerationJob))
+            self.assertEqual(len(stub.requests), 1)
+
+            response = self.client.post(reverse('quiz-generate'), {'topic': '  historia   POLSKI ', 'count': 3})
+
+            self.assertEqual(len(stub.requests), 1)
+            self.assertEqual(GenerationJob.objects.count(), 1)
+            quiz = Quiz.objects.latest('pk')
+            self.assertRedirects(response, reverse('quiz-edit', kwargs={'pk': quiz.pk}))
+            self.assertEqual(quiz.questions.count(), 3)
+            self.assertEqual(metrics.snapshot()['counters']['generation.cache_hits'], 1)
+
+            # "Wygeneruj od nowa" omija pamięć podręczną
+            self.client.post(reverse('quiz-generate'), {'topic': 'Historia Polski', 'count': 3, 'force_fresh': 'on'})
+            run_generation_job(claim_next_job(GenerationJob))
+            self.assertEqual(len(stub.requests), 2)
+
+    def test_cache_key_depends_on_count_and_prompt_version(self):
+        """Inna liczba pytań, wersja promptu lub zbiór modeli daje inny klucz; kolejność backendów - nie."""
+        key = generation_cache_key("Historia Polski", 5)
+        self.assertEqual(key, generation_cache_key("historia polski", 5))
+        self.assertNotEqual(key, generation_cache_key("Historia Polski", 6))
+        with mock.patch('quizzes.generation.PROMPT_VERSION', 2):
+            self.assertNotEqual(key, generation_cache_key("Historia Polski", 5))
+
+        backends = {'a': {'BACKEND': 'fake', 'MODEL': 'model-a'}, 'b': {'BACKEND': 'fake', 'MODEL': 'model-b'}}
+        with override_settings(QUIZ_LLM_BACKENDS=backends):
+            routed = generation_cache_key("Historia Polski", 5)
+        with override_settings(QUIZ_LLM_BACKENDS=dict(reversed(backends.items()))):
+            self.assertEqual(routed, generation_cache_key("Historia Polski", 5))
+        self.assertNotEqual(key, routed)
+        self.assertEqual(routed, generation_cache_key("Historia Polski", 5, models=['model-b', 'model-a']))
+
+    @override_settings(QUIZ_GENERATION_CHUNK_SIZE=10, QUIZ_GENERATION_MAX_PARALLEL=3)
+    def test_large_quiz_is_generated_in_parallel_chunks(self):
+        """30 pytań to 3 równoległe zapytania: czas bliski jednemu, duplikaty między częściami usunięte."""
+        chunks = [sample_generated_questions(10, offset=0), sample_generated_questions(10, offset=10),
+                  sample_generated_questions(9, offset=20) + sample_generated_questions(1, offset=5)]
+        chunks[2][-1]['question'] = chunks[2][-1]['question'].upper().rstrip('?')
+        responses = [(200, chat_completion_body(chunk), {}) for chunk in chunks]
+        job = GenerationJob.objects.create(created_by=self.user, topic="Geografia", count=30)
+
+        with StubChatCompletionsServer(responses=responses, latency=1.0) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url):
+            start = time.perf_counter()
+            job = run_generation_job(claim_next_job(GenerationJob))
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual(len(stub.requests), 3)
+        self.assertTrue(all("część" in r['messages'][1]['content'] for r in stub.requests))
+        self.assertEqual(job.quiz.questions.count(), 29)
+        self.assertEqual(job.questions_done, 29)
+        self.assertIsNone(caches['generation'].get(generation_cache_key("Geografia", 30)))
+
+    @override_settings(QUIZ_GENERATION_CHUNK_SIZE=10, QUIZ_GENERATION_MAX_PARALLEL=2)
+    def test_failed_chunk_is_not_cached(self):
+        """Quiz z częściowo nieudanego generowania powstaje, ale nie trafia do pamięci podręcznej."""
+        responses = [(200, chat_completion_body(sample_generated_questions(10)), {}),
+                     (400, {'error': 'Model przeciążony'}, {})]
+        job = GenerationJob.objects.create(created_by=self.user, topic="Biologia", count=20)
+
+        with StubChatCompletionsServer(responses=responses) as stub, override_settings(QUIZ_LLM_API_URL=stub.url), \
+                self.assertLogs('quizzes.generation', level='WARNING'):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.questions_done, 10)
+        self.assertIsNone(caches['generation'].get(generation_cache_key("Biologia", 20)))
+
+    def test_split_count(self):
+        """Podział liczby pytań na możliwie równe części."""
+        self.assertEqual(split_count(25, 10), [9, 8, 8])
+        self.assertEqual(split_count(7, 10), [7])
+        self.assertEqual(split_count(200, 10), [10] * 20)
+
+    def test_api_error_marks_job_failed(self):
+        """Błąd HTTP z API kończy zlecenie statusem FAILED bez tworzenia quizu."""
+        job = GenerationJob.objects.create(created_by=self.user, topic="Temat", count=3)
+        with StubChatCompletionsServer(body={'error': 'Model przeciążony'}, status=400) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertIn("Model przeciążony", job.error)
+        self.assertEqual(Quiz.objects.count(), 0)
+
+
+class StreamingGenerationTests(TestCase):
+    """
+    Testy strumieniowego generowania: parser przyrostowy i zapisywanie pytań w miarę napływania.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='stream_user', password='testpassword123')
+        self.client.login(username='stream_user', password='testpassword123')
+        settings_override = override_settings(
+            QUIZ_LLM_API_TOKEN='test-token',
+            QUIZ_LLM_MAX_RETRIES=0,
+            QUIZ_GENERATION_STREAMING=True,
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                    'generation': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stream-tests'}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(caches['generation'].clear)
+
+    def test_parser_returns_questions_as_soon_as_they_close(self):
+        """Parser pomija wstęp Markdown, nawiasy w napisach i niedokończony obiekt."""
+        questions = [
+            {'question': 'Co znaczy "{"?', 'answers': ["Klamra [", 'Cudzysłów \\"'], 'correct_index': 0},
+            {'question': 'Drugie?', 'answers': ["A", "B"], 'correct_index': 1},
+        ]
+        text = "```json\n" + json.dumps({'questions': questions + [{'question': 'Ucięte'}]})[:-10]
+        parser = IncrementalQuestionParser()
+
+        completed = []
+        for i, ch in enumerate(text):
+            for item in parser.feed(ch):
+                completed.append((i, item))
+
+        self.assertEqual([item for _, item in completed], questions)
+        first_close = json.dumps({'questions': questions}).index('}, {"question": "Drugie') + len("```json\n")
+        self.assertEqual(completed[0][0], first_close)
+
+    def test_job_saves_questions_while_streaming(self):
+        """Pytania trafiają do bazy przed końcem strumienia; status podaje czas do pierwszego pytania."""
+        job = GenerationJob.objects.create(created_by=self.user, topic="Fizyka", count=4)
+        saved_counts = []
+        original_insert = persistence.insert_question_batch
+
+        def spy(quiz, batch):
+            saved_counts.append(quiz.questions.count())
+            return original_insert(quiz, batch)
+
+        with StubChatCompletionsServer(body=chat_completion_body(sample_generated_questions(4)), chunk_size=20) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url), \
+                mock.patch('quizzes.jobs.insert_question_batch', side_effect=spy):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertTrue(stub.requests[0]['stream'])
+        self.assertEqual(saved_counts, [0, 1, 2, 3])
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.quiz.questions.count(), 4)
+
+        status = self.client.get(reverse('generation-job-status', kwargs={'pk': job.pk})).json()
+        self.assertEqual(status['questions_done'], 4)
+        self.assertGreaterEqual(status['time_to_first_question'], 0)
+
+    def test_short_stream_is_not_cached(self):
+        """Strumień z mniejszą liczbą pytań niż zamówiona nie trafia do pamięci podręcznej."""
+        job = GenerationJob.objects.create(created_by=self.user, topic="Optyka", count=5)
+        with StubChatCompletionsServer(body=chat_completion_body(sample_generated_questions(3))) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.questions_done, 3)
+        self.assertIsNone(caches['generation'].get(generation_cache_key("Optyka", 5)))
+
+    def test_oversized_stream_is_capped_at_count(self):
+        """Nadmiarowe pytania ze strumienia nie są zapisywane ani przechowywane w pamięci podręcznej."""
+        job = GenerationJob.objects.create(created_by=self.user, topic="Akustyka", count=3)
+        with StubChatCompletionsServer(body=chat_completion_body(sample_generated_questions(6))) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.questions_done, 3)
+        self.assertEqual(job.quiz.questions.count(), 3)
+        self.assertEqual(len(caches['generation'].get(generation_cache_key("Akustyka", 3))), 3)
+
+    def test_interrupted_stream_keeps_partial_quiz(self):
+        """Zerwanie strumienia po dwóch pytaniach zachowuje je i oznacza zlecenie adnotacją."""
+        records = to_question_records(sample_generated_questions(2))
+
+        def broken_stream(topic, count):
+            yield from records
+            raise LLMError("Przerwany strumień odpowiedzi API: reset")
+
+        job = GenerationJob.objects.create(created_by=self.user, topic="Chemia", count=5)
+        with mock.patch('quizzes.jobs.stream_question_records', side_effect=broken_stream):
+            job = run_generation_job(claim_next_job(GenerationJob))
+
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(job.questions_done, 2)
+        self.assertIn("przerwane po 2 pytaniach", job.error)
+        self.assertEqual(job.quiz.questions.count(), 2)
+        self.assertIsNone(caches['generation'].get(generation_cache_key("Chemia", 5)))
+
+        response = self.client.get(reverse('generation-job', kwargs={'pk': job.pk}), follow=True)
+        self.assertContains(response, "Zachowano już wygenerowane pytania")
+
+
 class QuizTakingTests(TestCase):
     """
     Testy procesu rozwiązywania quizu i naliczania punktów.
@@ -327,6 +1282,1248 @@ class QuestionCreationTests(TestCase):
         self.assertEqual(Question.objects.count(), 0)
         self.assertContains(response, "Pytanie jednokrotnego wyboru musi mieć dokładnie jedną poprawną odpowiedź")
 
+class BulkQuestionEditTests(TestCase):
+    """
+    Testy API zbiorczej edycji pytań (edytor arkuszowy).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk_editor', password='password123')
+        self.quiz = Quiz.objects.create(title="Arkusz", author=self.user)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(6)))
+        self.url = reverse('quiz-bulk-edit-api', kwargs={'pk': self.quiz.pk})
+        self.client.login(username='bulk_editor', password='password123')
+
+    def _post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def _edit_payload(self, questions):
+        """Zmienia treść pytań, odpowiedź i dodaje po jednej nowej odpowiedzi."""
+        items = []
+        for q in questions:
+            answers = [{'id': a.pk, 'text': a.text, 'is_correct': a.is_correct} for a in q.answers.all()]
+            answers[-1]['text'] += " (poprawione)"
+            answers.append({'text': "Nowa odpowiedź", 'is_correct': False})
+            items.append({'id': q.pk, 'text': q.text + " [edycja]", 'answers': answers})
+        return {'questions': items}
+
+    def test_get_and_apply_changes(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(len(data['questions']), 6)
+        first, second, third = self.quiz.questions.order_by('pk')[:3]
+        kept = first.answers.order_by('pk')[0]
+
+        response = self._post({
+            'questions': [
+                {'id': first.pk, 'question_type': 'MULTIPLE', 'answers': [
+                    {'id': kept.pk, 'text': kept.text, 'is_correct': True},
+                    {'text': "Druga poprawna", 'is_correct': True},
+                ]},
+                {'id': second.pk, 'explanation': "Nowe wyjaśnienie"},
+                {'text': "Zupełnie nowe pytanie?", 'answers': [
+                    {'text': "Tak", 'is_correct': True}, {'text': "Nie"},
+                ]},
+            ],
+            'delete': [third.pk],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['updated'], result['created'], result['deleted']), (2, 1, 1))
+        self.assertEqual(self.quiz.questions.count(), 6)
+        self.assertFalse(Question.objects.filter(pk=third.pk).exists())
+
+        first.refresh_from_db()
+        self.assertEqual(first.question_type, 'MULTIPLE')
+        self.assertEqual(list(first.answers.values_list('text', flat=True).order_by('pk')), [kept.text, "Druga poprawna"])
+        self.assertIsNotNone(first.minhash)
+        self.assertEqual(Question.objects.get(pk=second.pk).explanation, "Nowe wyjaśnienie")
+        created = self.quiz.questions.get(text="Zupełnie nowe pytanie?")
+        self.assertEqual(created.answers.count(), 2)
+        self.assertIn(created.pk, [q['id'] for q in result['questions']])
+
+    def test_invalid_batch_is_rejected_without_changes(self):
+        first, second = self.quiz.questions.order_by('pk')[:2]
+        other_quiz = Quiz.objects.create(title="Cudzy", author=self.user)
+        persist_questions(other_quiz, to_question_records(sample_generated_questions(1)))
+
+        response = self._post({
+            'questions': [
+                {'id': first.pk, 'text': "Zmienione"},
+                {'id': second.pk, 'answers': [{'text': "A", 'is_correct': True}, {'text': "B", 'is_correct': True}]},
+                {'text': "Nowe", 'question_type': 'MULTIPLE', 'answers': [{'text': "A"}, {'text': "B"}]},
+            ],
+        })
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['errors']
+        self.assertEqual(len(errors), 2)
+        self.assertIn("Pytanie 2", errors[0])
+        self.assertIn("Pytanie 3", errors[1])
+        first.refresh_from_db()
+        self.assertNotEqual(first.text, "Zmienione")
+
+        foreign_pk = other_quiz.questions.get().pk
+        response = self._post({'delete': [foreign_pk]})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Question.objects.filter(pk=foreign_pk).exists())
+
+        response = self.client.post(self.url, "nie json", content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_permission_is_required(self):
+        User.objects.create_user(username='intruz', password='password123')
+        self.client.login(username='intruz', password='password123')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self._post({'delete': [self.quiz.questions.first().pk]}).status_code, 403)
+        self.assertEqual(self.quiz.questions.count(), 6)
+
+    def test_query_count_is_constant(self):
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(44, offset=6)))
+        questions = list(self.quiz.questions.prefetch_related('answers').order_by('pk'))
+
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self._post(self._edit_payload(questions[:2])).status_code, 200)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self._post(self._edit_payload(questions[2:])).status_code, 200)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(self.quiz.questions.filter(text__endswith="[edycja]").count(), 50)
+        self.assertEqual(Answer.objects.filter(question__quiz=self.quiz, text="Nowa odpowiedź").count(), 50)
+
+    def test_editor_page_links_api(self):
+        response = self.client.get(reverse('quiz-bulk-editor', kwargs={'pk': self.quiz.pk}))
+        self.assertContains(response, self.url)
+        self.assertContains(self.client.get(reverse('quiz-edit', kwargs={'pk': self.quiz.pk})),
+                            reverse('quiz-bulk-editor', kwargs={'pk': self.quiz.pk}))
+
+
+class QuestionOrderingTests(TestCase):
+    """
+    Testy kolejności pytań (rangi): przenoszenie, tryb stałej kolejności, eksport i przenumerowanie.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ranker', password='password123')
+        self.quiz = Quiz.objects.create(title="Kolejność", author=self.user, fixed_order=True, questions_count_limit=3)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(5)))
+        self.client.login(username='ranker', password='password123')
+        # Eksport jest buforowany pod kluczem (pk, wersja), a klucze wracają po wycofaniu transakcji testu.
+        self.addCleanup(caches['default'].clear)
+
+    def _order(self):
+        return list(self.quiz.questions.values_list('pk', flat=True))
+
+    def _move(self, question, after):
+        url = reverse('question-move', kwargs={'pk': question})
+        return self.client.post(url, {'after': '' if after is None else after})
+
+    def test_ranks_follow_insertion_order(self):
+        pks = list(self.quiz.questions.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(self._order(), pks)
+        question = Question.objects.create(quiz=self.quiz, text="Dodane ręcznie")
+        self.assertEqual(self._order(), pks + [question.pk])
+
+    def test_rank_between(self):
+        ranks = ranks_after('', 3)
+        self.assertEqual(ranks, sorted(ranks))
+        middle = rank_between(ranks[0], ranks[1])
+        self.assertTrue(ranks[0] < middle < ranks[1])
+        self.assertTrue(rank_between('', ranks[0]) < ranks[0])
+        with self.assertRaises(ValueError):
+            rank_between(ranks[1], ranks[0])
+
+    def test_move_updates_only_moved_row(self):
+        a, b, c, d, e = self._order()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self._move(e, a)
+        self.assertEqual(response.status_code, 200)
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "quizzes_question"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(self._order(), [a, e, b, c, d])
+
+        self._move(c, None)
+        self.assertEqual(self._order(), [c, a, e, b, d])
+        self._move(c, d)
+        self.assertEqual(self._order(), [a, e, b, d, c])
+
+        other = Quiz.objects.create(title="Inny", author=self.user)
+        foreign = Question.objects.create(quiz=other, text="Obce")
+        self.assertEqual(self._move(a, foreign.pk).status_code, 400)
+
+        User.objects.create_user(username='obcy', password='password123')
+        self.client.login(username='obcy', password='password123')
+        self.assertEqual(self._move(a, None).status_code, 403)
+
+    def test_fixed_order_and_export_use_ranks(self):
+        a, b, c, d, e = self._order()
+        self._move(a, c)
+        expected = [b, c, a, d, e]
+
+        response = self.client.get(reverse('quiz-start', kwargs={'pk': self.quiz.pk}))
+        taken = [q['id'] for q in json.loads(response.context['questions_json'])]
+        self.assertEqual(taken, expected[:3])
+
+        exported = json.loads(self.client.get(reverse('quiz-export-json', kwargs={'pk': self.quiz.pk})).content)
+        texts = dict(self.quiz.questions.values_list('pk', 'text'))
+        self.assertEqual([q['text'] for q in exported['questions']], [texts[pk] for pk in expected])
+
+    def test_long_ranks_are_rebalanced(self):
+        a = self._order()[0]
+        moving = self._order()[2:]
+        with mock.patch('quizzes.models.MAX_RANK_LENGTH', 12):
+            for i in range(60):
+                self._move(moving[i % 3], a)
+            self.assertLessEqual(max(len(r) for r in self.quiz.questions.values_list('rank', flat=True)), 12)
+        self.assertEqual(self._order()[:2], [a, moving[59 % 3]])
+
+        order = self._order()
+        out = StringIO()
+        call_command('rebalance_ranks', '--max-length', '9', stdout=out)
+        self.assertIn("Przenumerowane quizy: 1", out.getvalue())
+        self.assertEqual(self._order(), order)
+        self.assertEqual({len(r) for r in self.quiz.questions.values_list('rank', flat=True)}, {9})
+
+    def test_move_without_valid_rank_raises_and_keeps_rank(self):
+        a, b, c, d, e = self._order()
+        question = Question.objects.get(pk=e)
+        rank = question.rank
+        with mock.patch('quizzes.models.MAX_RANK_LENGTH', 0):
+            with self.assertRaises(ValueError):
+                question.move_after(Question.objects.get(pk=a))
+        question.refresh_from_db()
+        self.assertEqual(question.rank, rank)
+        self.assertEqual(self._order(), [a, b, c, d, e])
+
+
+class QuizEditorQuestionListTests(TestCase):
+    """
+    Testy listy pytań edytora quizu doładowywanej stronami (fragment HTML).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='password123')
+        self.quiz = Quiz.objects.create(title="Duży quiz", author=self.user)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(120)))
+        self.url = reverse('quiz-questions-fragment', kwargs={'pk': self.quiz.pk})
+        self.client.login(username='lister', password='password123')
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_editor_page_does_not_render_questions(self):
+        small = Quiz.objects.create(title="Mały quiz", author=self.user)
+        persist_questions(small, to_question_records(sample_generated_questions(1)))
+
+        response = self.client.get(reverse('quiz-edit', kwargs={'pk': self.quiz.pk}))
+        self.assertContains(response, self.url)
+        self.assertContains(response, "Pytania (120)")
+        self.assertNotContains(response, self.quiz.questions.first().text)
+        self.assertEqual(
+            self._count_queries(reverse('quiz-edit', kwargs={'pk': small.pk})),
+            self._count_queries(reverse('quiz-edit', kwargs={'pk': self.quiz.pk})),
+        )
+
+    def test_fragment_pages_with_constant_queries(self):
+        first = self.client.get(self.url)
+        self.assertEqual(len(first.context['page_obj']), 50)
+        self.assertContains(first, 'data-next-url="?page=2"')
+
+        last = self.client.get(self.url, {'page': 3})
+        self.assertEqual(len(last.context['page_obj']), 20)
+        self.assertNotContains(last, 'data-next-url')
+        self.assertContains(last, '<span class="badge bg-light text-dark border">120</span>', html=True)
+        self.assertEqual(self._count_queries(self.url), self._count_queries(self.url + '?page=3'))
+
+    def test_fragment_filter_and_permissions(self):
+        response = self.client.get(self.url, {'q': 'pytanie ai 7'})
+        texts = [q.text for q in response.context['page_obj']]
+        self.assertEqual(len(texts), 11)  # 7 oraz 70-79
+        self.assertTrue(all(text.startswith("Pytanie AI 7") for text in texts))
+
+        response = self.client.get(self.url, {'q': 'nie ma takiego pytania'})
+        self.assertContains(response, "Brak pytań pasujących do filtra.")
+
+        User.objects.create_user(username='stranger', password='password123')
+        self.client.login(username='stranger', password='password123')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class PermissionAutocompleteTests(TestCase):
+    """
+    Testy podpowiedzi użytkowników i grup w formularzu uprawnień quizu.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='password123')
+        self.quiz = Quiz.objects.create(title="Uprawnienia", author=self.user)
+        User.objects.bulk_create([User(username=f'student{i:03d}', email=f'uczen{i}@szkola.pl') for i in range(60)])
+        self.anna = User.objects.create_user(username='Anna', email='anna.kowalska@example.com', password='x')
+        QuizGroup.objects.create(name="Klasa 3B", owner=self.user)
+        QuizGroup.objects.create(name="Kółko szachowe", owner=self.user)
+        self.client.login(username='owner', password='password123')
+
+    def _results(self, name, term):
+        response = self.client.get(reverse(name), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['text'] for item in response.json()['results']]
+
+    def test_user_prefix_search_is_limited_and_case_insensitive(self):
+        self.assertEqual(len(self._results('user-autocomplete', 'stud')), 20)
+        self.assertEqual(self._results('user-autocomplete', 'STUDENT01'), [f'student{i:03d}' for i in range(10, 20)])
+        self.assertEqual(self._results('user-autocomplete', 'an'), ['Anna'])
+        self.assertNotIn('email', self.client.get(reverse('user-autocomplete'), {'q': 'anna'}).content.decode())
+
+    def test_email_search_is_limited_to_shared_groups(self):
+        """Po e-mailu podpowiadani są tylko członkowie wspólnych grup (personel widzi wszystkich)."""
+        self.assertEqual(self._results('user-autocomplete', 'anna.k'), [])
+        self.assertEqual(self._results('user-autocomplete', 'uczen1'), [])
+
+        QuizGroup.objects.get(name="Klasa 3B").members.add(self.anna)
+        self.assertEqual(self._results('user-autocomplete', 'anna.k'), ['Anna'])
+
+        User.objects.filter(username='student001').update(is_staff=True)
+        self.client.force_login(User.objects.get(username='student001'))
+        self.assertEqual(self._results('user-autocomplete', 'uczen1'),
+                         ['student001'] + [f'student{i:03d}' for i in range(10, 20)])
+
+    def test_group_prefix_search(self):
+        self.assertEqual(self._results('group-autocomplete', 'k'), ["Klasa 3B", "Kółko szachowe"])
+        self.assertEqual(self._results('group-autocomplete', 'KÓ'), ["Kółko szachowe"])
+        self.assertEqual(self._results('group-autocomplete', 'x'), [])
+
+    def test_prefix_search_uses_expression_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._results('user-autocomplete', 'stud')
+        sql = ctx.captured_queries[-1]['sql']
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('user_username_lower_idx', plan)
+        self.assertIn('user_email_lower_idx', plan)
+
+    def test_edit_page_renders_only_selected_users(self):
+        QuizUserPermission.objects.create(quiz=self.quiz, user=self.anna, role='VIEWER')
+        response = self.client.get(reverse('quiz-edit', kwargs={'pk': self.quiz.pk}))
+        self.assertContains(response, f'<option value="{self.anna.pk}" selected>Anna</option>', html=True)
+        self.assertNotContains(response, 'student000')
+        self.assertContains(response, reverse('user-autocomplete'))
+
+        response = self.client.post(reverse('quiz-edit', kwargs={'pk': self.quiz.pk}), {
+            'title': self.quiz.title, 'visibility': 'PRIVATE', 'time_limit': 0, 'questions_count_limit': 10,
+            'users-TOTAL_FORMS': '2', 'users-INITIAL_FORMS': '1', 'users-MIN_NUM_FORMS': '0', 'users-MAX_NUM_FORMS': '1000',
+            'users-0-id': self.quiz.quizuserpermission_set.get().pk, 'users-0-user': self.anna.pk, 'users-0-role': 'VIEWER',
+            'users-1-user': User.objects.get(username='student042').pk, 'users-1-role': 'EDITOR',
+            'groups-TOTAL_FORMS': '0', 'groups-INITIAL_FORMS': '0', 'groups-MIN_NUM_FORMS': '0', 'groups-MAX_NUM_FORMS': '1000',
+        })
+        self.assertRedirects(response, reverse('quiz-edit', kwargs={'pk': self.quiz.pk}))
+        self.assertTrue(self.quiz.quizuserpermission_set.filter(user__username='student042', role='EDITOR').exists())
+
+    def test_tampered_user_id_shows_form_error(self):
+        response = self.client.post(reverse('quiz-edit', kwargs={'pk': self.quiz.pk}), {
+            'title': self.quiz.title, 'visibility': 'PRIVATE', 'time_limit': 0, 'questions_count_limit': 10,
+            'users-TOTAL_FORMS': '1', 'users-INITIAL_FORMS': '0', 'users-MIN_NUM_FORMS': '0', 'users-MAX_NUM_FORMS': '1000',
+            'users-0-user': 'abc', 'users-0-role': 'VIEWER',
+            'groups-TOTAL_FORMS': '0', 'groups-INITIAL_FORMS': '0', 'groups-MIN_NUM_FORMS': '0', 'groups-MAX_NUM_FORMS': '1000',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.quiz.quizuserpermission_set.exists())
+
+
+class GroupMembershipTests(TestCase):
+    """
+    Testy zarządzania członkami grup: zmiany różnicowe, stronicowanie i zapis z pliku CSV.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='teacher', password='password123')
+        User.objects.bulk_create([User(username=f'uczen{i:04d}') for i in range(1200)])
+        self.group = QuizGroup.objects.create(name="Rocznik 2025", owner=self.owner)
+        self.client.login(username='teacher', password='password123')
+
+    def _ids(self, *names):
+        return list(User.objects.filter(username__in=names).values_list('pk', flat=True))
+
+    def test_create_then_add_and_remove_touch_only_changed_rows(self):
+        response = self.client.post(reverse('group-create'), {'name': "Klasa 1A"})
+        group = QuizGroup.objects.get(name="Klasa 1A")
+        self.assertRedirects(response, reverse('group-edit', kwargs={'pk': group.pk}))
+
+        add_url = reverse('group-members-add', kwargs={'pk': group.pk})
+        self.client.post(add_url, {'users': self._ids('uczen0001', 'uczen0002', 'uczen0003')})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                add_url, {'users': self._ids('uczen0003', 'uczen0004') + [self.owner.pk]},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+            )
+        self.assertEqual(response.json(), {'added': 1, 'count': 4})
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'DELETE', 'UPDATE'))]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('INSERT OR IGNORE'))
+
+        self.client.post(reverse('group-members-remove', kwargs={'pk': group.pk}), {'users': self._ids('uczen0001')})
+        self.assertEqual(
+            sorted(group.members.values_list('username', flat=True)), ['uczen0002', 'uczen0003', 'uczen0004'],
+        )
+
+        other = User.objects.create_user(username='intruder', password='password123')
+        self.client.login(username='intruder', password='password123')
+        self.assertEqual(self.client.post(add_url, {'users': [other.pk]}).status_code, 404)
+
+    def test_member_list_is_paginated_and_searchable(self):
+        self.group.members.add(*User.objects.filter(username__startswith='uczen'))
+        url = reverse('group-edit', kwargs={'pk': self.group.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 50)
+        self.assertContains(response, "Członkowie grupy (1200)")
+        self.assertNotContains(response, 'uczen1199')
+
+        response = self.client.get(url, {'q': 'UCZEN011'})
+        self.assertEqual([u.username for u in response.context['page_obj']], [f'uczen{i:04d}' for i in range(110, 120)])
+
+    def test_csv_enrolment_resolves_usernames_in_bulk(self):
+        names = [f'uczen{i:04d}' for i in range(1000)] + ['nieznany1', 'uczen0005']
+        upload = SimpleUploadedFile("klasa.csv", ("username\n" + "\n".join(names)).encode('utf-8'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('group-members-import', kwargs={'pk': self.group.pk}), {'members_file': upload})
+        self.assertRedirects(response, reverse('group-edit', kwargs={'pk': self.group.pk}))
+        self.assertEqual(self.group.members.count(), 1000)
+        self.assertLess(len(ctx.captured_queries), 15)
+
+        messages_text = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn("Dodano członków z pliku: 1000.", messages_text)
+        self.assertIn("Nieznani użytkownicy: nieznany1.", messages_text)
+
+        with mock.patch('quizzes.membership.ENROLMENT_BATCH_SIZE', 300):
+            result = enrol_from_csv(self.group, [n.encode() + b"\n" for n in names + ['uczen1100']])
+        self.assertEqual(result, {'added': 1, 'unknown': ['nieznany1']})
+
+
+class QuizContentVersionTests(TestCase):
+    """
+    Testy licznika wersji treści quizu: podbijanie przy zapisach, blokada optymistyczna i ETag eksportu.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='versioner', password='password123')
+        self.quiz = Quiz.objects.create(title="Wersje", author=self.user)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(3)))
+        self.client.login(username='versioner', password='password123')
+        self.addCleanup(caches['default'].clear)
+
+    def _version(self):
+        self.quiz.refresh_from_db()
+        return self.quiz.content_version
+
+    def _quiz_form(self, title, version):
+        return {
+            'title': title, 'visibility': 'PRIVATE', 'time_limit': 0, 'questions_count_limit': 10,
+            'content_version': version,
+            'users-TOTAL_FORMS': '0', 'users-INITIAL_FORMS': '0', 'users-MIN_NUM_FORMS': '0', 'users-MAX_NUM_FORMS': '1000',
+            'groups-TOTAL_FORMS': '0', 'groups-INITIAL_FORMS': '0', 'groups-MIN_NUM_FORMS': '0', 'groups-MAX_NUM_FORMS': '1000',
+        }
+
+    def _question_form(self, question, text, version):
+        answers = list(question.answers.order_by('pk'))
+        data = {
+            'text': text, 'question_type': 'SINGLE', 'explanation': '', 'content_version': version,
+            'answers-TOTAL_FORMS': str(len(answers)), 'answers-INITIAL_FORMS': str(len(answers)),
+            'answers-MIN_NUM_FORMS': '2', 'answers-MAX_NUM_FORMS': '10',
+        }
+        for i, answer in enumerate(answers):
+            data.update({f'answers-{i}-id': answer.pk, f'answers-{i}-text': answer.text})
+            if answer.is_correct:
+                data[f'answers-{i}-is_correct'] = 'on'
+        return data
+
+    def test_writes_bump_version(self):
+        version = self._version()
+        self.assertGreater(version, 1)  # import pytań
+        question = self.quiz.questions.first()
+
+        self.client.post(reverse('question-edit', kwargs={'pk': question.pk}), self._question_form(question, "Zmienione", version))
+        self.assertEqual(self._version(), version + 1)
+        self.client.post(reverse('question-move', kwargs={'pk': question.pk}), {'after': self.quiz.questions.last().pk})
+        self.assertEqual(self._version(), version + 2)
+        self.quiz.save()
+        self.assertEqual(self._version(), version + 2)
+        self.assertIn(f":v{version + 2}:", self.quiz.cache_key('export-json'))
+
+    def test_stale_forms_are_rejected(self):
+        version = self._version()
+        url = reverse('quiz-edit', kwargs={'pk': self.quiz.pk})
+        self.assertRedirects(self.client.post(url, self._quiz_form("Pierwszy", version)), url)
+
+        response = self.client.post(url, self._quiz_form("Drugi", version))
+        self.assertContains(response, "zmieniony przez innego edytora")
+        self.assertEqual(Quiz.objects.get(pk=self.quiz.pk).title, "Pierwszy")
+
+        question = self.quiz.questions.first()
+        response = self.client.post(reverse('question-edit', kwargs={'pk': question.pk}), self._question_form(question, "Nieaktualne", version))
+        self.assertContains(response, "zmieniony przez innego edytora")
+        self.assertNotEqual(Question.objects.get(pk=question.pk).text, "Nieaktualne")
+
+    def test_stale_bulk_edit_is_rejected(self):
+        url = reverse('quiz-bulk-edit-api', kwargs={'pk': self.quiz.pk})
+        version = self.client.get(url).json()['content_version']
+        question = self.quiz.questions.first()
+        payload = {'questions': [{'id': question.pk, 'text': "Paczka"}], 'content_version': version}
+
+        response = self.client.post(url, json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.json()['content_version'], version + 1)
+        response = self.client.post(url, json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self._version(), version + 1)
+
+    def test_export_etag(self):
+        url = reverse('quiz-export-json', kwargs={'pk': self.quiz.pk})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.quiz.refresh_from_db()
+        self.assertEqual(etag, self.quiz.etag)
+
+        with override_settings(**CACHED_SESSION_SETTINGS):
+            client = Client()
+            client.login(username='versioner', password='password123')
+            with self.assertNumQueries(2):  # quiz, uprawnienia (sesja i użytkownik z cache)
+                self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        question = self.quiz.questions.first()
+        self.client.post(reverse('question-edit', kwargs={'pk': question.pk}), self._question_form(question, "Po zmianie", self._version()))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn("Po zmianie", response.content.decode())
+
+
+class SoftDeleteTests(TestCase):
+    """
+    Testy miękkiego usuwania quizów i grup oraz polecenia `purge_deleted`.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='deleter', password='password123')
+        self.member = User.objects.create_user(username='deleter_member', password='password123')
+        self.quiz = Quiz.objects.create(title="Do usunięcia", author=self.user)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(5)))
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(quiz=self.quiz, user=self.member, score=50, correct_count=1, total_questions=2) for _ in range(7)
+        ])
+        self.group = QuizGroup.objects.create(name="Klasa", owner=self.user)
+        self.group.members.add(self.member)
+        QuizGroupPermission.objects.create(quiz=self.quiz, group=self.group, role='VIEWER')
+        self.client.login(username='deleter', password='password123')
+
+    def _purge(self, *args):
+        out = StringIO()
+        call_command('purge_deleted', *args, stdout=out)
+        return out.getvalue()
+
+    def test_deleted_quiz_is_hidden_then_purged(self):
+        job = GenerationJob.objects.create(created_by=self.user, topic="x", count=5, quiz=self.quiz, status='DONE')
+        response = self.client.post(reverse('quiz-delete', kwargs={'pk': self.quiz.pk}))
+        self.assertRedirects(response, reverse('my-quizzes'))
+
+        self.assertFalse(Quiz.objects.filter(pk=self.quiz.pk).exists())
+        self.assertEqual(self.client.get(reverse('quiz-detail', kwargs={'pk': self.quiz.pk})).status_code, 404)
+        question = Question.objects.filter(quiz_id=self.quiz.pk).first()
+        self.assertEqual(self.client.get(reverse('question-edit', kwargs={'pk': question.pk})).status_code, 403)
+        self.assertEqual(QuizAttempt.objects.filter(quiz_id=self.quiz.pk).count(), 7)
+
+        with CaptureQueriesContext(connection) as ctx:
+            output = self._purge('--batch-size', '3')
+        batches = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('DELETE') and ' IN (' in q['sql']]
+        self.assertLessEqual(max(sql.count(',') for sql in batches), 2)  # najwyżej 3 klucze w partii
+        self.assertIn("quizzes_quizattempt - usunięto 6", output)
+        self.assertIn("Usunięte quizy: 1, grupy: 0.", output)
+
+        self.assertFalse(Quiz.all_objects.filter(pk=self.quiz.pk).exists())
+        self.assertFalse(Question.objects.filter(quiz_id=self.quiz.pk).exists())
+        self.assertFalse(Answer.objects.filter(question=question).exists())
+        self.assertFalse(QuizAttempt.objects.exists())
+        job.refresh_from_db()
+        self.assertIsNone(job.quiz_id)
+
+    def test_running_import_delays_purge(self):
+        job = ImportJob.objects.create(quiz=self.quiz, created_by=self.user, format_name='gift', status='RUNNING')
+        self.quiz.soft_delete()
+        job.refresh_from_db()
+        self.assertTrue(job.cancel_requested)
+
+        self.assertIn("Usunięte quizy: 0", self._purge())
+        ImportJob.objects.filter(pk=job.pk).update(status='CANCELLED')
+        self.assertIn("Usunięte quizy: 1", self._purge())
+
+    def test_deleted_group_revokes_access_then_purged(self):
+        self.client.login(username='deleter_member', password='password123')
+        detail = reverse('quiz-detail', kwargs={'pk': self.quiz.pk})
+        self.assertEqual(self.client.get(detail).status_code, 200)
+
+        self.client.login(username='deleter', password='password123')
+        self.client.post(reverse('group-delete', kwargs={'pk': self.group.pk}))
+        self.assertFalse(QuizGroup.objects.filter(pk=self.group.pk).exists())
+        self.assertEqual(self.group.members.through.objects.count(), 1)
+
+        self.client.login(username='deleter_member', password='password123')
+        self.assertNotEqual(self.client.get(detail).status_code, 200)
+
+        self.assertIn("Usunięte quizy: 0, grupy: 1.", self._purge())
+        self.assertFalse(QuizGroup.all_objects.exists())
+        self.assertEqual(self.group.members.through.objects.count(), 0)
+
+
+class SQLiteConnectionTests(TestCase):
+    """
+    Testy ustawień połączeń SQLite (`QUIZ_SQLITE_PRAGMAS`, sygnał `connection_created`).
+    """
+
+    def test_connection_uses_configured_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute("PRAGMA temp_store")
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    def test_file_database_switches_to_wal(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        db = sqlite3.connect(os.path.join(directory, 'quiz.sqlite3'))
+        self.addCleanup(db.close)
+        applied = apply_pragmas(db.cursor(), {'journal_mode': 'WAL', 'synchronous': 'NORMAL'})
+        self.assertEqual(applied, {'journal_mode': 'wal', 'synchronous': 1})
+
+        with self.assertRaises(ValueError):
+            apply_pragmas(db.cursor(), {'journal_mode': 'WAL; DROP TABLE x'})
+
+
+@override_settings(QUIZ_DB_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Testy kierowania odczytów do repliki (`ReplicaRouter`); repliką jest osobny plik SQLite,
+    do którego "replikacja" kopiuje bazę główną (`sqlite3` backup).
+    """
+    # Alias 'replica' jest rejestrowany dopiero w setUpClass (nie ma go w ustawieniach).
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        replica = copy.deepcopy(connections.settings['default'])
+        replica['NAME'] = os.path.join(cls.directory, 'replica.sqlite3')
+        connections.settings['replica'] = replica
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='replicated', password='password123')
+        self.quiz = Quiz.objects.create(title="Z repliki", author=self.user, visibility='PUBLIC')
+        self._replicate()
+        # Zmiana jeszcze niezreplikowana (opóźnienie repliki).
+        Quiz.objects.filter(pk=self.quiz.pk).update(title="Z bazy głównej")
+
+    def _replicate(self):
+        connections['replica'].close()
+        connections['default'].ensure_connection()
+        target = sqlite3.connect(connections.settings['replica']['NAME'])
+        connections['default'].connection.backup(target)
+        target.close()
+
+    def test_safe_requests_read_from_replica(self):
+        self.assertContains(self.client.get(reverse('home')), "Z repliki")
+        with override_settings(QUIZ_DB_REPLICAS=[]):
+            self.assertContains(self.client.get(reverse('home')), "Z bazy głównej")
+
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Quiz), 'default')  # poza żądaniem HTTP
+        self.assertFalse(router.allow_migrate('replica', 'quizzes'))
+
+    def test_write_pins_reads_to_primary(self):
+        self.client.force_login(self.user)
+        detail = reverse('quiz-detail', kwargs={'pk': self.quiz.pk})
+        self.assertContains(self.client.get(detail), "Z repliki")
+        self.assertNotIn(STICKY_COOKIE, self.client.cookies)
+
+        response = self.client.post(reverse('question-create', kwargs={'quiz_pk': self.quiz.pk}), {
+            'text': "Nowe pytanie", 'question_type': 'SINGLE', 'explanation': '',
+            'answers-TOTAL_FORMS': '2', 'answers-INITIAL_FORMS': '0', 'answers-MIN_NUM_FORMS': '2', 'answers-MAX_NUM_FORMS': '10',
+            'answers-0-text': "Tak", 'answers-0-is_correct': 'on', 'answers-1-text': "Nie",
+        })
+        self.assertEqual(response.cookies[STICKY_COOKIE]['max-age'], settings.QUIZ_DB_STICKY_SECONDS)
+        self.assertContains(self.client.get(detail), "Z bazy głównej")
+
+        del self.client.cookies[STICKY_COOKIE]
+        self.assertContains(self.client.get(detail), "Z repliki")
+
+
+@override_settings(QUIZ_ATTEMPT_SHARDS=['shard_a', 'shard_b'])
+class AttemptShardingTests(TransactionTestCase):
+    """
+    Testy podziału podejść między bazy (`quizzes.sharding`) na dwóch plikach SQLite.
+    """
+    # Aliasy baz podziału są rejestrowane dopiero w setUpClass (nie ma ich w ustawieniach).
+    databases = '__all__'
+    SHARDS = ('shard_a', 'shard_b')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        for alias in cls.SHARDS:
+            shard = copy.deepcopy(connections.settings['default'])
+            shard['NAME'] = os.path.join(cls.directory, f'{alias}.sqlite3')
+            connections.settings[alias] = shard
+        super().setUpClass()
+        for alias in cls.SHARDS:
+            call_command('migrate', 'quizzes', database=alias, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='sharded', password='password123')
+        # Quizy, dopóki podejścia nie trafiają do obu baz.
+        self.quizzes = []
+        while len({shard_for_quiz(q.pk) for q in self.quizzes}) < 2 or len(self.quizzes) < 4:
+            self.quizzes.append(Quiz.objects.create(title=f"Quiz {len(self.quizzes)}", author=self.user))
+
+    def _attempt(self, quiz, score, **kwargs):
+        return QuizAttempt(quiz=quiz, user=self.user, score=score, correct_count=1, total_questions=2, **kwargs)
+
+    def _counts(self):
+        return {alias: QuizAttempt.objects.using(alias).count() for alias in ('default', *self.SHARDS)}
+
+    def test_attempts_are_stored_in_quiz_shard(self):
+        for quiz in self.quizzes:
+            QuizAttempt.objects.create(quiz=quiz, user=self.user, score=40, correct_count=2, total_questions=5)
+        QuizAttempt.objects.bulk_create([self._attempt(quiz, 90) for quiz in self.quizzes for _ in range(2)])
+
+        for quiz in self.quizzes:
+            shard = shard_for_quiz(quiz.pk)
+            self.assertEqual(QuizAttempt.objects.using(shard).filter(quiz=quiz).count(), 3)
+            self.assertEqual(quiz.attempts.count(), 3)
+            self.assertEqual(QuizAttempt.objects.for_quiz(quiz).count(), 3)
+            self.assertEqual(quiz.attempts.first().quiz, quiz)
+        self.assertEqual(self._counts()['default'], 0)
+
+        stats = QuizAttempt.objects.aggregate_shards(
+            count=Count('pk'), avg=Avg('score'), best=Max('score'), worst=Min('score'), points=Sum('correct_count'),
+        )
+        total = 3 * len(self.quizzes)
+        self.assertEqual(stats, {
+            'count': total, 'avg': (40 + 90 + 90) / 3, 'best': 90, 'worst': 40, 'points': 4 * len(self.quizzes),
+        })
+        self.assertEqual(sum(1 for _ in QuizAttempt.objects.filter(score=90).iter_shards()), 2 * len(self.quizzes))
+        with self.assertRaises(ValueError):
+            QuizAttempt.objects.aggregate_shards(users=Count('user', distinct=True))
+
+        User.objects.create_superuser(username='shard_admin', password='password123')
+        self.client.login(username='shard_admin', password='password123')
+        self.assertEqual(self.client.get(reverse('metrics')).json()['attempts']['count'], total)
+
+    def test_rebalance_moves_rows_to_their_shard(self):
+        taken = timezone.now() - timedelta(days=30)
+        QuizAttempt.objects.using('default').bulk_create([self._attempt(quiz, 50, timestamp=taken) for quiz in self.quizzes])
+
+        out = StringIO()
+        call_command('rebalance_attempts', '--dry-run', stdout=out)
+        self.assertIn(f"Do przeniesienia podejść: {len(self.quizzes)}.", out.getvalue())
+        self.assertEqual(self._counts()['default'], len(self.quizzes))
+
+        call_command('rebalance_attempts', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(self._counts()['default'], 0)
+        for quiz in self.quizzes:
+            self.assertEqual(list(quiz.attempts.values_list('timestamp', flat=True)), [taken])
+
+    def test_deletes_reach_shards(self):
+        QuizAttempt.objects.bulk_create([self._attempt(quiz, 70) for quiz in self.quizzes for _ in range(3)])
+        first, second = self.quizzes[:2]
+
+        first.delete()
+        self.assertFalse(QuizAttempt.objects.for_quiz(first).exists())
+        second.soft_delete()
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(QuizAttempt.objects.for_quiz(second).exists())
+
+        other = User.objects.create_user(username='sharded_other', password='password123')
+        for quiz in self.quizzes[2:]:
+            Quiz.objects.filter(pk=quiz.pk).update(author=other)
+        self.user.delete()
+        self.assertEqual(QuizAttempt.objects.aggregate_shards(count=Count('pk'))['count'], 3 * (len(self.quizzes) - 2))
+        self.assertFalse(any(QuizAttempt.objects.filter(user__isnull=False).using(alias).exists() for alias in self.SHARDS))
+
+
+class AttemptArchiveTests(TestCase):
+    """
+    Testy archiwizacji starych podejść (`archive_attempts`) i odczytu archiwum.
+    """
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        override = override_settings(QUIZ_ATTEMPT_ARCHIVE_ROOT=self.archive_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='archivist', password='password123')
+        self.quiz = Quiz.objects.create(title="Archiwalny", author=self.user)
+        self.old = archive_cutoff() - timedelta(days=40)
+        self.recent = timezone.now() - timedelta(days=3)
+        QuizAttempt.objects.bulk_create(
+            [QuizAttempt(quiz=self.quiz, user=self.user, score=score, correct_count=1, total_questions=2,
+                         timestamp=self.old + timedelta(hours=score)) for score in (10, 20, 30, 40)]
+            + [QuizAttempt(quiz=self.quiz, user=self.user, score=90, correct_count=2, total_questions=2, timestamp=self.recent)]
+        )
+
+    def _archive(self, *args):
+        out = StringIO()
+        call_command('archive_attempts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_old_month_moves_to_archive_and_stays_readable(self):
+        before = quiz_attempt_stats(self.quiz)
+        self.assertIn("Miesiące do archiwizacji: 1", self._archive('--dry-run'))
+        self.assertEqual(QuizAttempt.objects.count(), 5)
+
+        output = self._archive('--batch-size', '3')
+        self.assertIn("Zarchiwizowane podejścia: 4 w 1 plikach.", output)
+        self.assertEqual(list(QuizAttempt.objects.values_list('score', flat=True)), [90])
+        part = AttemptArchive.objects.get()
+        self.assertEqual((part.row_count, part.score_min, part.score_max), (4, 10, 40))
+        self.assertTrue((archive_root() / part.path).name.endswith('.jsonl.gz'))
+
+        self.assertEqual(quiz_attempt_stats(self.quiz)['count'], 1)
+        self.assertEqual(quiz_attempt_stats(self.quiz, include_archived=True), before)
+        history = quiz_history(self.quiz, include_archived=True)
+        self.assertEqual([a.score for a in history], [90, 40, 30, 20, 10])
+        self.assertEqual(history[1].timestamp, self.old + timedelta(hours=40))
+
+        self.client.login(username='archivist', password='password123')
+        url = reverse('quiz-attempts', kwargs={'pk': self.quiz.pk})
+        self.assertEqual(len(self.client.get(url).json()['attempts']), 1)
+        data = self.client.get(url, {'archived': '1'}).json()
+        self.assertEqual(data['stats']['count'], 5)
+        self.assertEqual([a['archived'] for a in data['attempts']], [False, True, True, True, True])
+
+    def test_history_page_reads_only_needed_rows(self):
+        self._archive()
+        history = quiz_history(self.quiz, include_archived=True)
+        self.assertEqual(len(history), 5)
+        with mock.patch('quizzes.archive.read_archive', wraps=read_archive) as read:
+            self.assertEqual([a.score for a in history[:1]], [90])
+            read.assert_not_called()
+            self.assertEqual([a.score for a in history[1:3]], [40, 30])
+            read.assert_called_once()
+        self.assertEqual(history[-1].score, 10)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual([a.score for a in quiz_history(self.quiz)[:1]], [90])
+        self.assertIn('LIMIT', ctx.captured_queries[-1]['sql'])
+
+    def test_interrupted_archive_is_finished_without_duplicates(self):
+        with mock.patch('quizzes.archive._delete_archived', side_effect=RuntimeError("przerwano")):
+            with self.assertRaises(RuntimeError):
+                self._archive()
+        self.assertEqual(QuizAttempt.objects.count(), 5)
+
+        self.assertIn("Zarchiwizowane podejścia: 0 w 0 plikach.", self._archive())
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+        self.assertEqual(AttemptArchive.objects.count(), 1)
+        self.assertEqual(quiz_attempt_stats(self.quiz, include_archived=True)['count'], 5)
+
+    def test_purged_quiz_removes_archive_files(self):
+        self._archive()
+        path = archive_root() / AttemptArchive.objects.get().path
+        self.assertTrue(path.exists())
+        self.quiz.soft_delete()
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(AttemptArchive.objects.exists())
+        self.assertFalse(path.exists())
+
+
+class QuizArchiveTests(TestCase):
+    """
+    Testy archiwizacji nieużywanych quizów i ich przywracania przy otwarciu.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='dormant', password='password123')
+        self.quiz = Quiz.objects.create(title="Uśpiony", author=self.user)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(3)))
+        bank = QuestionBank.objects.create(name="Bank", owner=self.user)
+        shared = Question.objects.create(bank=bank, text="Pytanie z banku")
+        Answer.objects.create(question=shared, text="Tak", is_correct=True)
+        Answer.objects.create(question=shared, text="Nie", is_correct=False)
+        QuizBankItem.link(self.quiz, [shared])
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(2, offset=3)))
+        self.addCleanup(caches['default'].clear)
+        self.client.login(username='dormant', password='password123')
+
+    def _pool(self):
+        return [
+            (q.text, q.minhash and bytes(q.minhash), sorted((a.text, a.is_correct) for a in q.answers.all()))
+            for q in self.quiz.question_pool().prefetch_related('answers')
+        ]
+
+    def test_archived_quiz_is_rehydrated_on_open(self):
+        before = self._pool()
+        self.assertEqual(archive_quiz(self.quiz), 5)
+        self.assertEqual(archive_quiz(self.quiz), 0)
+        self.assertFalse(Question.objects.filter(quiz=self.quiz).exists())
+        self.assertFalse(Answer.objects.filter(question__quiz_id=self.quiz.pk).exists())
+        self.assertEqual(QuizArchive.objects.get(quiz=self.quiz).question_count, 5)
+        self.assertEqual([text for text, _, _ in self._pool()], ["Pytanie z banku"])
+        version = Quiz.objects.get(pk=self.quiz.pk).content_version
+
+        response = self.client.get(reverse('quiz-detail', kwargs={'pk': self.quiz.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.quiz.refresh_from_db()
+        self.assertIsNone(self.quiz.archived_at)
+        self.assertGreater(self.quiz.content_version, version)
+        self.assertFalse(QuizArchive.objects.exists())
+        self.assertEqual(self._pool(), before)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(rehydrate_quiz(self.quiz), 0)
+
+    def test_candidates_by_last_attempt_and_command(self):
+        recent = Quiz.objects.create(title="Aktywny", author=self.user)
+        persist_questions(recent, to_question_records(sample_generated_questions(2)))
+        never = Quiz.objects.create(title="Nierozwiązany", author=self.user)
+        persist_questions(never, to_question_records(sample_generated_questions(2)))
+        QuizAttempt.objects.bulk_create([
+            QuizAttempt(quiz=self.quiz, score=50, correct_count=1, total_questions=2, timestamp=timezone.now() - timedelta(days=800)),
+            QuizAttempt(quiz=recent, score=50, correct_count=1, total_questions=2, timestamp=timezone.now() - timedelta(days=800)),
+            QuizAttempt(quiz=recent, score=70, correct_count=1, total_questions=2, timestamp=timezone.now() - timedelta(days=5)),
+        ])
+        self.assertEqual(archive_candidates(), [self.quiz.pk])
+        self.assertEqual(archive_candidates(include_never_taken=True), [never.pk, self.quiz.pk])
+
+        out = StringIO()
+        call_command('archive_quizzes', '--dry-run', stdout=out)
+        self.assertIn("Kandydaci do archiwizacji: 1.", out.getvalue())
+        self.assertFalse(QuizArchive.objects.exists())
+        call_command('archive_quizzes', stdout=out)
+        self.assertIn("Zarchiwizowane quizy: 1 (pytania: 5).", out.getvalue())
+        self.assertEqual(archive_candidates(), [])
+
+    def test_clone_and_purge_of_archived_quiz(self):
+        archive_quiz(self.quiz)
+        copy = clone_quiz(self.quiz, author=self.user)
+        self.assertEqual(copy.question_pool().count(), 6)
+        self.assertEqual(Question.objects.filter(quiz=self.quiz).count(), 5)
+
+        archive_quiz(self.quiz)
+        self.quiz.soft_delete()
+        call_command('purge_deleted', stdout=StringIO())
+        self.assertFalse(Quiz.all_objects.filter(pk=self.quiz.pk).exists())
+        self.assertFalse(QuizArchive.objects.exists())
+
+
+#: Konfiguracja sprzed `accounts.auth_cache`: sesje i użytkownik odczytywane z bazy, komunikaty w sesji.
+DB_SESSION_SETTINGS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'MESSAGE_STORAGE': 'django.contrib.messages.storage.fallback.FallbackStorage',
+    'MIDDLEWARE': [
+        'django.contrib.auth.middleware.AuthenticationMiddleware'
+        if name == 'accounts.auth_cache.CachedAuthenticationMiddleware' else name
+        for name in settings.MIDDLEWARE
+    ],
+}
+
+#: Sesje `cached_db` i `accounts.auth_cache` - w testach (jeden proces) na cache 'default'
+#: zamiast współdzielonego cache z `QUIZ_SHARED_CACHE_URL`.
+CACHED_SESSION_SETTINGS = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+    'SESSION_CACHE_ALIAS': 'default',
+    'QUIZ_AUTH_USER_CACHE': 'default',
+}
+
+
+def view_query_counts(username, password, urls) -> dict:
+    """Zwraca liczbę zapytań drugiego (po rozgrzaniu cache) wyświetlenia każdego adresu przez zalogowanego użytkownika."""
+    client = Client()
+    client.login(username=username, password=password)
+    counts = {}
+    for url in urls:
+        client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(url)
+        counts[url] = len(ctx.captured_queries)
+    return counts
+
+
+@override_settings(**CACHED_SESSION_SETTINGS)
+class AuthUserCacheTests(TestCase):
+    """
+    Testy sesji w cache, cache zalogowanego użytkownika (`accounts.auth_cache`) i komunikatów w ciasteczku.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cached', password='password123')
+        self.quiz = Quiz.objects.create(title="Publiczny", author=self.user, visibility='PUBLIC')
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(3)))
+        self.addCleanup(caches['default'].clear)
+
+    def test_session_and_user_are_not_read_from_database(self):
+        urls = [reverse(name) for name in ('home', 'my-quizzes', 'group-list', 'bank-list')] + [
+            reverse(name, kwargs={'pk': self.quiz.pk}) for name in ('quiz-detail', 'quiz-edit', 'quiz-start')
+        ]
+        with override_settings(**DB_SESSION_SETTINGS):
+            before = view_query_counts('cached', 'password123', urls)
+
+        self.client.login(username='cached', password='password123')
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertFalse([q for q in ctx.captured_queries if 'django_session' in q['sql']], url)
+        after = view_query_counts('cached', 'password123', urls)
+        for url in urls:
+            self.assertEqual(before[url] - after[url], 2, url)  # sesja i użytkownik
+
+    def test_user_save_invalidates_cache(self):
+        self.client.login(username='cached', password='password123')
+        self.assertContains(self.client.get(reverse('home')), 'cached')
+
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        self.assertContains(self.client.get(reverse('home')), 'cached')  # zmiana bez sygnału - do wygaśnięcia wpisu
+        self.user.refresh_from_db()
+        self.user.save()
+        self.assertContains(self.client.get(reverse('home')), 'renamed')
+
+        self.user.set_password('changed-password-1')
+        self.user.save()
+        response = self.client.get(reverse('my-quizzes'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('my-quizzes')}", fetch_redirect_response=False)
+
+    def test_anonymous_messages_do_not_create_sessions(self):
+        private = Quiz.objects.create(title="Prywatny", author=self.user)
+        response = self.client.get(reverse('quiz-detail', kwargs={'pk': private.pk}), follow=True)
+        self.assertContains(response, "Nie masz uprawnień")
+        self.client.get(reverse('quiz-start', kwargs={'pk': self.quiz.pk}))
+        self.assertFalse(Session.objects.exists())
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, self.client.cookies)
+
+    def test_process_local_caches_are_rejected(self):
+        self.assertEqual({error.id for error in check_shared_caches()}, {'accounts.E001'})
+        self.assertEqual(len(check_shared_caches()), 2)
+        with override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db', QUIZ_AUTH_USER_CACHE=None):
+            self.assertEqual(check_shared_caches(), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db', QUIZ_AUTH_USER_CACHE=None)
+    def test_without_shared_cache_user_is_read_from_database(self):
+        self.client.login(username='cached', password='password123')
+        self.assertContains(self.client.get(reverse('home')), 'cached')
+        User.objects.filter(pk=self.user.pk).update(username='renamed')
+        self.assertContains(self.client.get(reverse('home')), 'renamed')
+        self.assertTrue(Session.objects.exists())
+
+
+class QuizCloningTests(TestCase):
+    """
+    Testy kopiowania quizów po stronie bazy danych (widok, akcja admina, polecenie).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='cloner', password='password123')
+        self.viewer = User.objects.create_user(username='cloned_viewer', password='password123')
+        self.quiz = Quiz.objects.create(title="Oryginał", author=self.user, time_limit=5, fixed_order=True)
+        persist_questions(self.quiz, to_question_records(sample_generated_questions(6)))
+        QuizUserPermission.objects.create(quiz=self.quiz, user=self.viewer, role='VIEWER')
+        self.client.login(username='cloner', password='password123')
+
+    def _snapshot(self, quiz):
+        return [
+            (q.text, q.question_type, q.rank, bytes(q.minhash), [(a.text, a.is_correct) for a in q.answers.order_by('pk')])
+            for q in quiz.questions.prefetch_related('answers')
+        ]
+
+    def test_clone_copies_questions_with_constant_queries(self):
+        small = Quiz.objects.create(title="Mały", author=self.user)
+        persist_questions(small, to_question_records(sample_generated_questions(2, offset=50)))
+
+        with CaptureQueriesContext(connection) as ctx_small:
+            clone_quiz(small)
+        with CaptureQueriesContext(connection) as ctx_large:
+            copy = clone_quiz(self.quiz, title="Klasa 2B")
+
+        self.assertEqual(len(ctx_small.captured_queries), len(ctx_large.captured_queries))
+        self.assertEqual(copy.title, "Klasa 2B")
+        self.assertEqual((copy.time_limit, copy.fixed_order, copy.author), (5, True, self.user))
+        self.assertEqual(self._snapshot(copy), self._snapshot(self.quiz))
+        self.assertFalse(copy.quizuserpermission_set.exists())
+
+        # Oryginał pozostaje nietknięty.
+        self.assertEqual(self.quiz.questions.count(), 6)
+        self.assertEqual(Answer.objects.filter(question__quiz=self.quiz).count(), 24)
+
+    def test_duplicate_view_and_permissions(self):
+        response = self.client.post(reverse('quiz-duplicate', kwargs={'pk': self.quiz.pk}), {'with_permissions': 'on'})
+        copy = Quiz.objects.exclude(pk=self.quiz.pk).get()
+        self.assertRedirects(response, reverse('quiz-edit', kwargs={'pk': copy.pk}))
+        self.assertEqual(copy.title, "Kopia: Oryginał")
+        self.assertTrue(copy.quizuserpermission_set.filter(user=self.viewer, role='VIEWER').exists())
+
+        self.client.login(username='cloned_viewer', password='password123')
+        response = self.client.post(reverse('quiz-duplicate', kwargs={'pk': self.quiz.pk}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_clone_command_and_admin_action(self):
+        out = StringIO()
+        call_command('clone_quiz', str(self.quiz.pk), '--author', 'cloned_viewer', stdout=out)
+        self.assertIn("(6 pytań)", out.getvalue())
+        self.assertEqual(Quiz.objects.get(author=self.viewer).questions.count(), 6)
+
+        User.objects.create_superuser(username='clone_admin', password='password123')
+        self.client.login(username='clone_admin', password='password123')
+        self.client.post(reverse('admin:quizzes_quiz_changelist'), {
+            'action': 'duplicate_quizzes', '_selected_action': [self.quiz.pk],
+        })
+        self.assertEqual(Quiz.objects.filter(title="Kopia: Oryginał").count(), 2)
+
+
+class QuestionBankTests(TestCase):
+    """
+    Testy banku pytań współdzielonych przez wiele quizów.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='banker', password='password123')
+        self.other = User.objects.create_user(username='bank_guest', password='password123')
+        self.bank = QuestionBank.objects.create(name="Geografia", owner=self.user)
+        self.shared = Question.objects.create(bank=self.bank, text="Stolica Francji?")
+        self.correct = Answer.objects.create(question=self.shared, text="Paryż", is_correct=True)
+        Answer.objects.create(question=self.shared, text="Lyon", is_correct=False)
+        self.quizzes = [Quiz.objects.create(title=f"Quiz {i}", author=self.user) for i in range(2)]
+        for quiz in self.quizzes:
+            persist_questions(quiz, to_question_records(sample_generated_questions(2)))
+            QuizBankItem.link(quiz, [self.shared])
+        self.addCleanup(caches['default'].clear)
+        self.client.login(username='banker', password='password123')
+
+    def test_linked_question_is_taken_and_exported(self):
+        quiz = self.quizzes[0]
+        pool = list(quiz.question_pool())
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(pool[-1], self.shared)
+
+        response = self.client.post(reverse('quiz-start', kwargs={'pk': quiz.pk}), {f'q_{self.shared.pk}': self.correct.pk})
+        self.assertEqual(response.context['total'], 3)
+        self.assertEqual(response.context['correct_count'], 1)
+
+        exported = json.loads(self.client.get(reverse('quiz-export-json', kwargs={'pk': quiz.pk})).content)
+        self.assertEqual(exported['questions'][-1]['bank_question'], self.shared.pk)
+        self.assertNotIn('bank_question', exported['questions'][0])
+
+    def test_bank_fix_propagates_to_every_quiz(self):
+        response = self.client.post(reverse('question-edit', kwargs={'pk': self.shared.pk}), {
+            'text': "Stolica Francji to?", 'explanation': '', 'question_type': 'SINGLE',
+            'answers-TOTAL_FORMS': '2', 'answers-INITIAL_FORMS': '2', 'answers-MIN_NUM_FORMS': '0', 'answers-MAX_NUM_FORMS': '1000',
+            'answers-0-id': self.correct.pk, 'answers-0-text': 'Paryż', 'answers-0-is_correct': 'on',
+            'answers-1-id': self.shared.answers.exclude(pk=self.correct.pk).get().pk, 'answers-1-text': 'Marsylia',
+        })
+        self.assertRedirects(response, reverse('bank-detail', kwargs={'pk': self.bank.pk}))
+        for quiz in self.quizzes:
+            self.assertIn("Stolica Francji to?", [q.text for q in quiz.question_pool()])
+        self.assertEqual(Question.objects.filter(text__startswith="Stolica Francji").count(), 1)
+
+        self.client.login(username='bank_guest', password='password123')
+        response = self.client.post(reverse('question-delete', kwargs={'pk': self.shared.pk}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_links_accessible_bank_questions(self):
+        payload = {'questions': [{
+            'text': "Stolica Francji?", 'question_type': 'SINGLE', 'bank_question': self.shared.pk,
+            'answers': [{'text': 'Paryż', 'is_correct': True}, {'text': 'Lyon', 'is_correct': False}],
+        }]}
+        own_quiz = Quiz.objects.create(title="Import autora", author=self.user)
+        guest_quiz = Quiz.objects.create(title="Import gościa", author=self.other)
+        persist_questions(own_quiz, [validate_question_record(payload['questions'][0], 1)])
+        persist_questions(guest_quiz, [validate_question_record(payload['questions'][0], 1)])
+
+        # Autor z dostępem do banku dostaje dołączenie, inny autor - zwykłą kopię pytania.
+        self.assertEqual(list(own_quiz.question_pool()), [self.shared])
+        self.assertFalse(own_quiz.questions.exists())
+        self.assertFalse(guest_quiz.bank_links.exists())
+        self.assertEqual(guest_quiz.questions.get().answers.count(), 2)
+
+        self.bank.is_shared = True
+        self.bank.save()
+        shared_quiz = Quiz.objects.create(title="Import po udostępnieniu", author=self.other)
+        persist_questions(shared_quiz, [validate_question_record(payload['questions'][0], 1)])
+        self.assertTrue(shared_quiz.bank_links.filter(question=self.shared).exists())
+
+    def test_move_to_bank_link_and_clone(self):
+        quiz = self.quizzes[0]
+        own = quiz.questions.first()
+        order = [q.pk for q in quiz.question_pool()]
+        self.client.post(reverse('question-to-bank', kwargs={'pk': own.pk}), {'bank': self.bank.pk})
+        own.refresh_from_db()
+        self.assertEqual((own.quiz_id, own.bank_id), (None, self.bank.pk))
+        self.assertEqual([q.pk for q in quiz.question_pool()], order)
+
+        self.client.post(reverse('bank-detail', kwargs={'pk': self.bank.pk}), {
+            'quiz': self.quizzes[1].pk, 'questions': [own.pk, self.shared.pk],
+        })
+        self.assertEqual(self.quizzes[1].bank_links.count(), 2)
+        self.assertContains(self.client.get(reverse('quiz-questions-fragment', kwargs={'pk': quiz.pk})), "Odłącz")
+        self.assertContains(self.client.get(reverse('bank-list')), "Geografia")
+
+        copy = clone_quiz(quiz)
+        self.assertEqual([q.text for q in copy.question_pool()], [q.text for q in quiz.question_pool()])
+        self.assertEqual(set(copy.bank_links.values_list('question_id', flat=True)), {own.pk, self.shared.pk})
+
+        self.client.login(username='bank_guest', password='password123')
+        self.assertEqual(self.client.get(reverse('bank-detail', kwargs={'pk': self.bank.pk})).status_code, 404)
+
+    def test_bulk_editor_lists_bank_questions_read_only(self):
+        quiz = self.quizzes[0]
+        data = self.client.get(reverse('quiz-bulk-edit-api', kwargs={'pk': quiz.pk})).json()
+        self.assertEqual([q['id'] for q in data['questions']], [q.pk for q in quiz.question_pool()])
+        self.assertEqual([q['bank'] for q in data['questions']], [None, None, self.bank.pk])
+
+        response = self.client.post(reverse('quiz-bulk-edit-api', kwargs={'pk': quiz.pk}),
+                                    json.dumps({'questions': [{'id': self.shared.pk, 'text': "Zmiana"}]}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.shared.refresh_from_db()
+        self.assertEqual(self.shared.text, "Stolica Francji?")
+
+    def test_only_quiz_author_moves_questions_to_bank(self):
+        quiz = self.quizzes[0]
+        QuizUserPermission.objects.create(quiz=quiz, user=self.other, role='EDITOR')
+        own_bank = QuestionBank.objects.create(name="Bank edytora", owner=self.other)
+        question = quiz.questions.first()
+
+        self.client.login(username='bank_guest', password='password123')
+        response = self.client.post(reverse('question-to-bank', kwargs={'pk': question.pk}), {'bank': own_bank.pk})
+        self.assertEqual(response.status_code, 403)
+        question.refresh_from_db()
+        self.assertEqual((question.quiz_id, question.bank_id), (quiz.pk, None))
+        fragment = self.client.get(reverse('quiz-questions-fragment', kwargs={'pk': quiz.pk}))
+        self.assertNotContains(fragment, reverse('question-to-bank', kwargs={'pk': question.pk}))
+
+    def test_tampered_ids_are_rejected(self):
+        url = reverse('bank-detail', kwargs={'pk': self.bank.pk})
+        self.assertEqual(self.client.post(url, {'quiz': 'x', 'questions': [self.shared.pk]}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'quiz': self.quizzes[0].pk, 'questions': ['x']}).status_code, 400)
+        question = self.quizzes[0].questions.first()
+        self.assertEqual(self.client.post(reverse('question-to-bank', kwargs={'pk': question.pk}), {'bank': 'x'}).status_code, 400)
+
 class AccountsTests(TestCase):
     """
     Testy funkcjonalności aplikacji accounts.
@@ -581,4 +2778,243 @@ class QuizAccessTests(TestCase):
         self.assertEqual(response_detail.status_code, 200)
 
         response_take = self.client.get(take_url)
-        self.assertEqual(response_take.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response_take.status_code, 200)
+
+
+def _bank_files(n):
+    """Generuje ten sam bank `n` pytań w formatach CSV, GIFT i Moodle XML (na potrzeby benchmarków)."""
+    csv_rows = ["text,correct,answer_1,answer_2,answer_3,answer_4"]
+    gift_blocks = []
+    xml_items = ['<?xml version="1.0" encoding="UTF-8"?>', '<quiz>']
+    for i in range(n):
+        csv_rows.append(f"Pytanie numer {i}?,1,Odpowiedź A{i},Odpowiedź B{i},Odpowiedź C{i},Odpowiedź D{i}")
+        gift_blocks.append(f"Pytanie numer {i}? {{=Odpowiedź A{i} ~Odpowiedź B{i} ~Odpowiedź C{i} ~Odpowiedź D{i}}}\n")
+        xml_items.append(
+            f'<question type="multichoice"><questiontext><text>Pytanie numer {i}?</text></questiontext>'
+            f'<single>true</single><answer fraction="100"><text>Odpowiedź A{i}</text></answer>'
+            f'<answer fraction="0"><text>Odpowiedź B{i}</text></answer>'
+            f'<answer fraction="0"><text>Odpowiedź C{i}</text></answer>'
+            f'<answer fraction="0"><text>Odpowiedź D{i}</text></answer></question>'
+        )
+    xml_items.append('</quiz>')
+    return {
+        'bank.csv': "\n".join(csv_rows).encode('utf-8'),
+        'bank.gift': "\n".join(gift_blocks).encode('utf-8'),
+        'bank.xml': "\n".join(xml_items).encode('utf-8'),
+    }
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+class ImportThroughputBenchmark(TestCase):
+    """
+    Benchmark przepustowości importerów na banku 100 tys. pytań (po 4 odpowiedzi).
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.ImportThroughputBenchmark``
+    """
+    QUESTIONS = 100_000
+
+    def test_import_throughput(self):
+        user = User.objects.create_user(username='bench', password='x')
+        for filename, payload in _bank_files(self.QUESTIONS).items():
+            quiz = Quiz.objects.create(title=filename, author=user)
+            importer = get_importer_for_filename(filename)
+
+            start = time.perf_counter()
+            count = persist_questions(quiz, importer.records(SimpleUploadedFile(filename, payload)))
+            elapsed = time.perf_counter() - start
+
+            self.assertEqual(count, self.QUESTIONS)
+            print(f"\n{importer.label}: {count} pytań w {elapsed:.2f} s ({count / elapsed:,.0f} pytań/s)")
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+@override_settings(
+    QUIZ_LLM_API_TOKEN='test-token',
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'generation': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stream-bench'}},
+)
+class StreamingGenerationBenchmark(TestCase):
+    """
+    Porównuje czas do pierwszego pytania w trybie strumieniowym i zwykłym
+    na lokalnym serwerze wysyłającym odpowiedź fragmentami.
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.StreamingGenerationBenchmark``
+    """
+    QUESTIONS = 10
+
+    def test_time_to_first_question(self):
+        user = User.objects.create_user(username='bench', password='x')
+        body = chat_completion_body(sample_generated_questions(self.QUESTIONS))
+        with StubChatCompletionsServer(body=body, chunk_size=8, chunk_delay=0.01) as stub, \
+                override_settings(QUIZ_LLM_API_URL=stub.url):
+            for streaming in (True, False):
+                with override_settings(QUIZ_GENERATION_STREAMING=streaming):
+                    GenerationJob.objects.create(created_by=user, topic="Benchmark", count=self.QUESTIONS, force_fresh=True)
+                    start = time.perf_counter()
+                    job = run_generation_job(claim_next_job(GenerationJob))
+                    total = time.perf_counter() - start
+
+                self.assertEqual(job.questions_done, self.QUESTIONS)
+                first = job.time_to_first_question if streaming else total
+                mode = "strumieniowo" if streaming else "bez strumienia"
+                print(f"\n{mode}: pierwsze pytanie po {first:.2f} s, całość {total:.2f} s")
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+class DuplicateIndexBenchmark(TestCase):
+    """
+    Benchmark indeksu LSH: klastry duplikatów w banku 1 mln sygnatur (w pamięci,
+    bez odczytu z bazy), w tym 1% przeformułowanych kopii.
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.DuplicateIndexBenchmark``
+    """
+    QUESTIONS = 1_000_000
+
+    def test_cluster_million_questions(self):
+        words = [hashlib.md5(str(i).encode()).hexdigest()[:7] for i in range(5000)]
+        rng = random.Random(0)
+
+        start = time.perf_counter()
+        index = LSHIndex(0.7)
+        previous = None
+        for i in range(self.QUESTIONS):
+            if i % 100 == 99:
+                parts = [previous[0].upper().rstrip('?')] + previous[1:]
+            else:
+                parts = [" ".join(rng.choices(words, k=8)) + "?"] + [" ".join(rng.choices(words, k=2)) for _ in range(4)]
+            previous = parts
+            index.add(i, minhash(parts))
+        built = time.perf_counter() - start
+
+        clusters = index.clusters()
+        elapsed = time.perf_counter() - start
+
+        self.assertGreaterEqual(len(clusters), self.QUESTIONS // 100 * 0.95)
+        print(f"\nSygnatury + indeks: {built:.1f} s, klastry ({len(clusters)}): {elapsed - built:.1f} s")
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+class QuizCloneBenchmark(TestCase):
+    """
+    Benchmark kopiowania quizu z 10 tys. pytań (po 4 odpowiedzi).
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.QuizCloneBenchmark``
+    """
+    QUESTIONS = 10_000
+
+    def test_clone_speed(self):
+        user = User.objects.create_user(username='bench_clone', password='x')
+        quiz = Quiz.objects.create(title="Bank", author=user)
+        persist_questions(quiz, to_question_records(sample_generated_questions(self.QUESTIONS)))
+
+        start = time.perf_counter()
+        copy = clone_quiz(quiz)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(Answer.objects.filter(question__quiz=copy).count(), self.QUESTIONS * 4)
+        print(f"\nKopia quizu z {self.QUESTIONS} pytań: {elapsed:.3f} s")
+        self.assertLess(elapsed, 1.0)
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+class SQLiteConcurrencyBenchmark(TestCase):
+    """
+    Benchmark odczytów SQLite w trakcie ciągłych zapisów: domyślny dziennik
+    (rollback journal) kontra ustawienia `QUIZ_SQLITE_PRAGMAS` (WAL).
+
+    Jeden wątek zapisuje wyniki podejść w krótkich transakcjach, a kilka wątków
+    (każdy z własnym połączeniem) odczytuje dane jak lista quizów.
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.SQLiteConcurrencyBenchmark``
+    """
+    DURATION = 3.0
+    READERS = 4
+
+    def _run(self, path, pragmas):
+        def connect():
+            db = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            apply_pragmas(db.cursor(), pragmas)
+            return db
+
+        setup = connect()
+        setup.execute("CREATE TABLE attempt (id INTEGER PRIMARY KEY, quiz_id INTEGER, score INTEGER)")
+        setup.executemany("INSERT INTO attempt (quiz_id, score) VALUES (?, ?)", [(i % 100, i % 101) for i in range(50_000)])
+        setup.close()
+
+        stop = time.perf_counter() + self.DURATION
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def writer():
+            db = connect()
+            while time.perf_counter() < stop:
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    db.executemany("INSERT INTO attempt (quiz_id, score) VALUES (?, ?)", [(7, 50)] * 20)
+                    db.execute("COMMIT")
+                    with lock:
+                        counts['writes'] += 1
+                except sqlite3.OperationalError:
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    with lock:
+                        counts['errors'] += 1
+            db.close()
+
+        def reader():
+            db = connect()
+            while time.perf_counter() < stop:
+                try:
+                    db.execute("SELECT quiz_id, AVG(score) FROM attempt WHERE quiz_id < 10 GROUP BY quiz_id").fetchall()
+                    with lock:
+                        counts['reads'] += 1
+                except sqlite3.OperationalError:
+                    with lock:
+                        counts['errors'] += 1
+            db.close()
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(self.READERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts
+
+    def test_reads_during_writes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        default = self._run(os.path.join(directory, 'default.sqlite3'), {})
+        tuned = self._run(os.path.join(directory, 'tuned.sqlite3'), settings.QUIZ_SQLITE_PRAGMAS)
+        for name, counts in (('domyślne', default), ('QUIZ_SQLITE_PRAGMAS', tuned)):
+            print(f"\n{name}: odczyty {counts['reads'] / self.DURATION:.0f}/s, "
+                  f"zapisy {counts['writes'] / self.DURATION:.0f}/s, błędy blokady {counts['errors']}")
+        self.assertEqual(tuned['errors'], 0)
+        self.assertGreater(tuned['reads'], default['reads'])
+
+
+@skipUnless(RUN_BENCHMARKS, "Ustaw QUIZ_BENCHMARKS=1, aby uruchomić benchmarki.")
+class SessionQueryReport(TestCase):
+    """
+    Raport zapytań na widok: sesje i użytkownik z bazy (`DB_SESSION_SETTINGS`)
+    kontra sesje `cached_db` i `accounts.auth_cache` (`CACHED_SESSION_SETTINGS`).
+
+    Uruchomienie: ``QUIZ_BENCHMARKS=1 python manage.py test quizzes.tests.SessionQueryReport``
+    """
+
+    def test_report(self):
+        user = User.objects.create_user(username='report', password='password123')
+        quiz = Quiz.objects.create(title="Raport", author=user)
+        persist_questions(quiz, to_question_records(sample_generated_questions(10)))
+        self.addCleanup(caches['default'].clear)
+        urls = {name: reverse(name) for name in ('home', 'my-quizzes', 'group-list', 'bank-list')}
+        urls.update({name: reverse(name, kwargs={'pk': quiz.pk}) for name in ('quiz-detail', 'quiz-edit', 'quiz-start', 'quiz-export-json')})
+
+        with override_settings(**DB_SESSION_SETTINGS):
+            before = view_query_counts('report', 'password123', urls.values())
+        with override_settings(**CACHED_SESSION_SETTINGS):
+            after = view_query_counts('report', 'password123', urls.values())
+        print(f"\n{'widok':<20} {'przed':>6} {'po':>6} {'usunięte':>9}")
+        for name, url in urls.items():
+            print(f"{name:<20} {before[url]:>6} {after[url]:>6} {before[url] - after[url]:>9}")
+        self.assertTrue(all(after[url] < before[url] for url in urls.values()))
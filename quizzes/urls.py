@@ -12,18 +12,42 @@ urlpatterns = [
     path('groups/create/', views.group_create_view, name='group-create'),
     path('groups/<int:pk>/edit/', views.group_edit_view, name='group-edit'),
     path('groups/<int:pk>/delete/', views.group_delete_view, name='group-delete'),
+    path('groups/<int:pk>/members/add/', views.group_members_add_view, name='group-members-add'),
+    path('groups/<int:pk>/members/remove/', views.group_members_remove_view, name='group-members-remove'),
+    path('groups/<int:pk>/members/import/', views.group_members_import_view, name='group-members-import'),
+
+    path('autocomplete/users/', views.user_autocomplete_view, name='user-autocomplete'),
+    path('autocomplete/groups/', views.group_autocomplete_view, name='group-autocomplete'),
+
+    path('banks/', views.bank_list_view, name='bank-list'),
+    path('banks/<int:pk>/', views.bank_detail_view, name='bank-detail'),
+    path('edit/<int:pk>/bank-links/<int:link_pk>/unlink/', views.quiz_bank_unlink_view, name='quiz-bank-unlink'),
+    path('question/<int:pk>/to-bank/', views.question_to_bank_view, name='question-to-bank'),
 
     path('generate/', views.quiz_generate_view, name='quiz-generate'),
+    path('generate/jobs/<int:pk>/', views.generation_job_view, name='generation-job'),
+    path('generate/jobs/<int:pk>/status/', views.generation_job_status_view, name='generation-job-status'),
     path('create/', views.quiz_create_view, name='quiz-create'),
     path('edit/<int:pk>/', views.quiz_edit_view, name='quiz-edit'),
+    path('edit/<int:pk>/questions/', views.quiz_questions_fragment_view, name='quiz-questions-fragment'),
     path('delete/<int:pk>/', views.quiz_delete_view, name='quiz-delete'),
+    path('duplicate/<int:pk>/', views.quiz_duplicate_view, name='quiz-duplicate'),
     
     path('export/<int:pk>/json/', views.quiz_export_json_view, name='quiz-export-json'),
     path('import/<int:pk>/json/', views.quiz_import_json_view, name='quiz-import-json'),
+    path('import/<int:pk>/', views.quiz_import_view, name='quiz-import'),
+    path('import-jobs/<int:pk>/', views.import_job_status_view, name='import-job-status'),
+    path('import-jobs/<int:pk>/cancel/', views.import_job_cancel_view, name='import-job-cancel'),
 
     path('quiz/<int:quiz_pk>/add-question/', views.question_create_view, name='question-create'),
+    path('edit/<int:pk>/bulk/', views.quiz_bulk_editor_view, name='quiz-bulk-editor'),
+    path('edit/<int:pk>/bulk/api/', views.quiz_bulk_edit_api_view, name='quiz-bulk-edit-api'),
     path('question/<int:pk>/edit/', views.question_edit_view, name='question-edit'),
+    path('question/<int:pk>/move/', views.question_move_view, name='question-move'),
     path('question/<int:pk>/delete/', views.question_delete_view, name='question-delete'),
 
     path('quiz/<int:pk>/start/', views.quiz_take_view, name='quiz-start'),
+    path('quiz/<int:pk>/attempts/', views.quiz_attempts_view, name='quiz-attempts'),
+
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
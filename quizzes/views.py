@@ -1,33 +1,53 @@
 # quizzes/views.py
 import json
-import requests
 import random
-import os
-from dotenv import load_dotenv
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import HttpResponse, HttpRequest
+from django.http import HttpResponse, HttpRequest, HttpResponseBadRequest, JsonResponse
+from django.conf import settings
+from django.urls import reverse
 from django.utils.text import slugify
 from django.db import transaction
 from django.core.exceptions import ValidationError, PermissionDenied
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_http_methods
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Avg, Count, F, Max, Q, Sum
+from django.db.models.functions import Lower
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
 from django.core.paginator import Paginator  # <--- Dodany import
 
-from .models import Quiz, Question, Answer, QuizAttempt, QuizGroup, QuizUserPermission, QuizGroupPermission
+from .models import (
+    Quiz, Question, QuizAttempt, QuizGroup, QuizUserPermission, QuizGroupPermission,
+    ImportJob, GenerationJob, QuestionBank, QuizBankItem, AttemptArchive,
+)
 from .forms import (
-    QuizForm, QuestionForm, AnswerFormSet, QuizGenerationForm, QuizGroupForm,
+    QuizForm, QuestionForm, AnswerFormSet, QuizGenerationForm, QuizGroupForm, QuestionBankForm,
     QuizUserPermissionFormSet, QuizGroupPermissionFormSet
 )
+from . import metrics
+from .llm import get_client
+from .generation import create_generated_quiz, get_cached_records
+from .importers import get_importer, get_importer_for_filename, supported_extensions
+from .duplicates import MODES as DUPLICATE_MODES, DuplicateFilter
+from .persistence import persist_questions, question_record
+from .bulk_edit import STALE_VERSION_ERROR, apply_bulk_edit, serialize_question
+from .cloning import clone_quiz
+from .membership import add_members, enrol_from_csv, remove_members
+from .archive import quiz_attempt_stats, quiz_history
+from .quiz_archive import rehydrate_quiz
 
 User = get_user_model()
-load_dotenv()
 
-HF_TOKEN = os.getenv("HF_TOKEN")
-HF_API_URL = "https://router.huggingface.co/v1/chat/completions"
+#: Liczba pytań na jednej stronie listy pytań w edytorze quizu.
+QUESTIONS_PAGE_SIZE = 50
+#: Maksymalna liczba podpowiedzi zwracanych przez endpointy autouzupełniania.
+AUTOCOMPLETE_LIMIT = 20
+#: Liczba członków na jednej stronie listy członków grupy.
+MEMBERS_PAGE_SIZE = 50
 
 def home_view(request: HttpRequest) -> HttpResponse:
     """
@@ -108,6 +128,51 @@ def _check_edit_permission(user, quiz):
     if not quiz.can_edit(user):
         raise PermissionDenied("Nie masz uprawnień do edycji tego quizu.")
 
+def _check_question_permission(user, question):
+    """
+    Sprawdza uprawnienia do edycji pytania quizu lub pytania z banku pytań.
+
+    Args:
+        user (User): Użytkownik próbujący edytować pytanie.
+        question (Question): Edytowane pytanie.
+
+    Raises:
+        PermissionDenied: Jeśli użytkownik nie może edytować quizu lub banku pytania.
+    """
+    if question.bank_id is not None:
+        if not question.bank.can_edit(user):
+            raise PermissionDenied("Nie masz uprawnień do edycji tego banku pytań.")
+    else:
+        _check_edit_permission(user, question.quiz)
+
+def _claim_content_version(request: HttpRequest, quiz: Quiz) -> bool:
+    """
+    Zwiększa `content_version` quizu, jeśli formularz został wczytany dla aktualnej wersji.
+
+    Blokada optymistyczna formularzy edycji: formularz odsyła ukryte pole
+    'content_version' z wersją, którą wczytał; jeśli inny edytor zapisał
+    w międzyczasie zmiany, licznik ma już inną wartość i zapis jest odrzucany.
+    Żądanie bez tego pola (np. klient API) zapisuje zmiany bez kontroli wersji.
+
+    Args:
+        request (HttpRequest): Żądanie POST formularza edycji.
+        quiz (Quiz): Edytowany quiz.
+
+    Returns:
+        bool: True, jeśli zapis może zostać wykonany (wersja została zwiększona).
+    """
+    submitted = request.POST.get('content_version')
+    if submitted is not None and not submitted.isdigit():
+        return False
+    expected = int(submitted) if submitted is not None else None
+    return bool(Quiz.bump_content_version(quiz.pk, expected=expected))
+
+def _question_owner_redirect(question):
+    """Przekierowuje do edytora quizu lub banku, do którego należy pytanie."""
+    if question.bank_id is not None:
+        return redirect('bank-detail', pk=question.bank_id)
+    return redirect('quiz-edit', pk=question.quiz_id)
+
 @login_required
 def group_list_view(request: HttpRequest) -> HttpResponse:
     """
@@ -119,7 +184,7 @@ def group_list_view(request: HttpRequest) -> HttpResponse:
     Returns:
         HttpResponse: Wyrenderowany szablon 'quizzes/group_list.html'.
     """
-    groups = QuizGroup.objects.filter(owner=request.user)
+    groups = QuizGroup.objects.filter(owner=request.user).annotate(member_count=Count('members'))
     return render(request, 'quizzes/group_list.html', {'groups': groups})
 
 @login_required
@@ -128,37 +193,35 @@ def group_create_view(request: HttpRequest) -> HttpResponse:
     Tworzy nową grupę użytkowników.
 
     Obsługuje formularz tworzenia grupy. Właściciel grupy jest ustawiany automatycznie
-    na zalogowanego użytkownika.
+    na zalogowanego użytkownika; członków dodaje się następnie na stronie edycji grupy.
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
 
     Returns:
-        HttpResponse: Wyrenderowany formularz lub przekierowanie do listy grup po sukcesie.
+        HttpResponse: Wyrenderowany formularz lub przekierowanie do edycji grupy po sukcesie.
     """
     if request.method == 'POST':
         form = QuizGroupForm(request.POST)
-        form.fields['members'].queryset = User.objects.exclude(pk=request.user.pk)
-        
         if form.is_valid():
             group = form.save(commit=False)
             group.owner = request.user
             group.save()
-            form.save_m2m()
-            messages.success(request, f"Grupa '{group.name}' została utworzona.")
-            return redirect('group-list')
+            messages.success(request, f"Grupa '{group.name}' została utworzona. Dodaj do niej członków.")
+            return redirect('group-edit', pk=group.pk)
     else:
         form = QuizGroupForm()
-        form.fields['members'].queryset = User.objects.exclude(pk=request.user.pk)
     
     return render(request, 'quizzes/group_form.html', {'form': form, 'title': 'Nowa grupa'})
 
 @login_required
 def group_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
-    Edytuje istniejącą grupę użytkowników.
+    Edytuje nazwę grupy i wyświetla stronicowaną listę jej członków.
 
-    Tylko właściciel grupy może ją edytować.
+    Tylko właściciel grupy może ją edytować. Lista członków jest stronicowana
+    i filtrowana prefiksem nazwy użytkownika (GET: 'page', 'q'); członków dodaje
+    i usuwa się osobnymi widokami, które zmieniają tylko wskazane członkostwa.
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -171,17 +234,106 @@ def group_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     
     if request.method == 'POST':
         form = QuizGroupForm(request.POST, instance=group)
-        form.fields['members'].queryset = User.objects.exclude(pk=request.user.pk)
-        
         if form.is_valid():
             form.save()
             messages.success(request, "Zaktualizowano grupę.")
-            return redirect('group-list')
+            return redirect('group-edit', pk=group.pk)
     else:
         form = QuizGroupForm(instance=group)
-        form.fields['members'].queryset = User.objects.exclude(pk=request.user.pk)
-        
-    return render(request, 'quizzes/group_form.html', {'form': form, 'title': f'Edycja grupy: {group.name}'})
+
+    query = request.GET.get('q', '').strip()
+    members = group.members.annotate(username_lower=Lower('username')).order_by('username_lower')
+    if query:
+        members = members.filter(_prefix_filter('username_lower', query.lower()))
+    page_obj = Paginator(members.only('pk', 'username', 'email'), MEMBERS_PAGE_SIZE).get_page(request.GET.get('page'))
+
+    return render(request, 'quizzes/group_form.html', {
+        'form': form,
+        'group': group,
+        'title': f'Edycja grupy: {group.name}',
+        'page_obj': page_obj,
+        'query': query,
+    })
+
+def _owned_group_and_user_ids(request: HttpRequest, pk: int):
+    group = get_object_or_404(QuizGroup, pk=pk, owner=request.user)
+    user_ids = [int(value) for value in request.POST.getlist('users') if value.isdigit()]
+    return group, user_ids
+
+def _group_members_response(request: HttpRequest, group, payload: dict, message: str) -> HttpResponse:
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse(dict(payload, count=group.members.count()))
+    messages.success(request, message)
+    # Powrót na tę samą stronę listy członków (parametry 'page' i 'q' z adresu formularza).
+    url = reverse('group-edit', kwargs={'pk': group.pk})
+    return redirect(f"{url}?{request.GET.urlencode()}" if request.GET else url)
+
+@login_required
+@require_POST
+def group_members_add_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Dodaje wybranych użytkowników do grupy (wstawia tylko nowe członkostwa).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP z listą kluczy 'users'.
+        pk (int): Klucz główny grupy.
+
+    Returns:
+        HttpResponse: JSON `{"added": ..., "count": ...}` dla żądań AJAX lub przekierowanie do edycji grupy.
+    """
+    group, user_ids = _owned_group_and_user_ids(request, pk)
+    existing = User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)
+    added = add_members(group, existing)
+    return _group_members_response(request, group, {'added': added}, f"Dodano członków: {added}.")
+
+@login_required
+@require_POST
+def group_members_remove_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Usuwa wybranych użytkowników z grupy (usuwa tylko ich członkostwa).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP z listą kluczy 'users'.
+        pk (int): Klucz główny grupy.
+
+    Returns:
+        HttpResponse: JSON `{"removed": ..., "count": ...}` dla żądań AJAX lub przekierowanie do edycji grupy.
+    """
+    group, user_ids = _owned_group_and_user_ids(request, pk)
+    removed = remove_members(group, user_ids)
+    return _group_members_response(request, group, {'removed': removed}, f"Usunięto członków: {removed}.")
+
+@login_required
+@require_POST
+def group_members_import_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Zapisuje do grupy użytkowników z pliku CSV (nazwy użytkowników w pierwszej kolumnie).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP z plikiem 'members_file'.
+        pk (int): Klucz główny grupy.
+
+    Returns:
+        HttpResponse: Przekierowanie do edycji grupy z podsumowaniem zapisu.
+    """
+    group = get_object_or_404(QuizGroup, pk=pk, owner=request.user)
+    if 'members_file' not in request.FILES:
+        messages.error(request, "Nie wybrano pliku.")
+        return redirect('group-edit', pk=group.pk)
+
+    try:
+        with transaction.atomic():
+            result = enrol_from_csv(group, request.FILES['members_file'])
+    except ValidationError as e:
+        messages.error(request, " ".join(e.messages))
+        return redirect('group-edit', pk=group.pk)
+
+    messages.success(request, f"Dodano członków z pliku: {result['added']}.")
+    if result['unknown']:
+        shown = ', '.join(result['unknown'][:10])
+        more = f" (i {len(result['unknown']) - 10} innych)" if len(result['unknown']) > 10 else ''
+        messages.warning(request, f"Nieznani użytkownicy: {shown}{more}.")
+    return redirect('group-edit', pk=group.pk)
 
 @login_required
 def group_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
@@ -189,6 +341,8 @@ def group_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
     Usuwa grupę użytkowników.
 
     Wymaga potwierdzenia metodą POST. Tylko właściciel grupy może ją usunąć.
+    Grupa jest tylko oznaczana jako usunięta (`QuizGroup.soft_delete`) - jej
+    członkostwa usuwa partiami polecenie `purge_deleted`.
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -199,7 +353,7 @@ def group_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     group = get_object_or_404(QuizGroup, pk=pk, owner=request.user)
     if request.method == 'POST':
-        group.delete()
+        group.soft_delete()
         messages.success(request, "Grupa została usunięta.")
         return redirect('group-list')
     return render(request, 'quizzes/group_confirm_delete.html', {'group': group})
@@ -209,6 +363,7 @@ def quiz_detail_view(request: HttpRequest, pk: int) -> HttpResponse:
     Wyświetla szczegóły quizu (strona startowa przed rozpoczęciem).
 
     Sprawdza uprawnienia użytkownika do podglądu quizu (autor, edytor, viewer, publiczny).
+    Zarchiwizowany quiz jest przywracany (`quizzes.quiz_archive.rehydrate_quiz`).
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -219,6 +374,7 @@ def quiz_detail_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     quiz = get_object_or_404(Quiz, pk=pk)
     if quiz.can_view(request.user):
+        rehydrate_quiz(quiz)
         return render(request, 'quizzes/quiz_detail.html', {'quiz': quiz})
     
     messages.error(request, "Nie masz uprawnień do wyświetlenia tego quizu.")
@@ -316,7 +472,12 @@ def quiz_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Edytuje istniejący quiz oraz jego ustawienia uprawnień.
 
-    Sprawdza uprawnienia edytora przed wykonaniem akcji.
+    Sprawdza uprawnienia edytora przed wykonaniem akcji. Zapis jest odrzucany,
+    jeśli quiz zmienił się od wczytania formularza (`_claim_content_version`). Lista pytań nie jest
+    renderowana razem z formularzem - strona doładowuje ją porcjami
+    z `quiz_questions_fragment_view`, więc czas otwarcia edytora nie zależy
+    od liczby pytań. Zarchiwizowany quiz jest najpierw przywracany
+    (`quizzes.quiz_archive.rehydrate_quiz`).
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -327,6 +488,7 @@ def quiz_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     quiz = get_object_or_404(Quiz, pk=pk)
     _check_edit_permission(request.user, quiz)
+    rehydrate_quiz(quiz)
     
     if request.method == 'POST':
         form = QuizForm(request.POST, instance=quiz)
@@ -335,12 +497,16 @@ def quiz_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
         
         if form.is_valid() and user_perms_formset.is_valid() and group_perms_formset.is_valid():
             with transaction.atomic():
-                form.save()
-                user_perms_formset.save()
-                group_perms_formset.save()
-                
-            messages.success(request, "Zapisano zmiany w quizie.")
-            return redirect('quiz-edit', pk=quiz.pk)
+                saved = _claim_content_version(request, quiz)
+                if saved:
+                    form.save()
+                    user_perms_formset.save()
+                    group_perms_formset.save()
+
+            if saved:
+                messages.success(request, "Zapisano zmiany w quizie.")
+                return redirect('quiz-edit', pk=quiz.pk)
+            form.add_error(None, STALE_VERSION_ERROR)
     else:
         form = QuizForm(instance=quiz)
         user_perms_formset = QuizUserPermissionFormSet(instance=quiz, prefix='users')
@@ -350,154 +516,337 @@ def quiz_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
         'quiz_form': form,
         'user_perms_formset': user_perms_formset,
         'group_perms_formset': group_perms_formset,
-        'quiz': quiz
+        'quiz': quiz,
+        'import_jobs': quiz.import_jobs.filter(status__in=ImportJob.ACTIVE_STATUSES),
+        'question_count': quiz.question_pool().count(),
+        # Po odrzuceniu nieaktualnego zapisu formularz zachowuje wczytaną wersję.
+        'content_version': request.POST.get('content_version', quiz.content_version),
+    })
+
+@login_required
+def quiz_questions_fragment_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Zwraca fragment HTML z jedną stroną listy pytań edytora quizu.
+
+    Strona zawiera pytania własne i dołączone z banku w kolejności rang, z odpowiedziami
+    pobranymi jednym zapytaniem (`prefetch_related`), więc liczba zapytań nie zależy
+    od rozmiaru strony. Fragment kończy się znacznikiem z adresem następnej strony,
+    który edytor doładowuje podczas przewijania.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (GET: 'page' oraz opcjonalny filtr 'q').
+        pk (int): Klucz główny quizu.
+
+    Returns:
+        HttpResponse: Wyrenderowany szablon 'quizzes/question_list_fragment.html'.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+    rehydrate_quiz(quiz)
+
+    query = request.GET.get('q', '').strip()
+    questions = quiz.question_pool().annotate(link=F('quiz_links__pk')).select_related('bank').prefetch_related('answers')
+    if query:
+        questions = questions.filter(text__icontains=query)
+
+    page_obj = Paginator(questions, QUESTIONS_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'quizzes/question_list_fragment.html', {
+        'quiz': quiz,
+        'page_obj': page_obj,
+        'query': query,
+        # Przeniesienie do banku oddaje pytanie właścicielowi banku, więc może to zrobić tylko autor quizu.
+        'banks': request.user.question_banks.all() if quiz.author_id == request.user.pk else [],
+    })
+
+def _prefix_filter(field: str, term: str) -> Q:
+    """
+    Zwraca warunek "LOWER(pole) zaczyna się od `term`" w postaci przedziału.
+
+    Przedział `[term, term + U+10FFFF)` na wyrażeniu `LOWER(pole)` korzysta z indeksu
+    na tym wyrażeniu (w przeciwieństwie do `LIKE 'term%'`, którego SQLite nie
+    optymalizuje dla kolumn bez kolacji NOCASE).
+
+    Args:
+        field (str): Nazwa adnotacji z `Lower(pole)`.
+        term (str): Szukany prefiks (małymi literami).
+
+    Returns:
+        Q: Warunek do użycia w `filter()`.
+    """
+    return Q(**{f'{field}__gte': term, f'{field}__lt': term + '\U0010ffff'})
+
+def _autocomplete_response(queryset, label) -> JsonResponse:
+    return JsonResponse({'results': [{'id': obj.pk, 'text': label(obj)} for obj in queryset[:AUTOCOMPLETE_LIMIT]]})
+
+@login_required
+def user_autocomplete_view(request: HttpRequest) -> JsonResponse:
+    """
+    Podpowiada użytkowników do formularza uprawnień quizu.
+
+    Szuka prefiksu nazwy użytkownika lub adresu e-mail bez rozróżniania wielkości
+    liter (indeksy na `LOWER(username)` i `LOWER(email)`) i zwraca co najwyżej
+    `AUTOCOMPLETE_LIMIT` wyników. Adresy e-mail nie są ujawniane w odpowiedzi,
+    a po e-mailu wyszukiwani są tylko użytkownicy z grup, które zapytujący
+    prowadzi lub do których należy (personel - wszyscy), więc podpowiedzi nie
+    zdradzają, czy dany adres jest zarejestrowany.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (GET: 'q' - szukany prefiks).
+
+    Returns:
+        JsonResponse: `{"results": [{"id": ..., "text": <nazwa użytkownika>}, ...]}`.
+    """
+    term = request.GET.get('q', '').strip().lower()
+    users = User.objects.filter(is_active=True).annotate(
+        username_lower=Lower('username'), email_lower=Lower('email'),
+    )
+    if term:
+        email_match = _prefix_filter('email_lower', term)
+        if not request.user.is_staff:
+            groups = QuizGroup.objects.filter(Q(owner=request.user) | Q(members=request.user)).values('pk')
+            email_match &= Q(pk__in=User.objects.filter(
+                Q(group_memberships__in=groups) | Q(owned_groups__in=groups)
+            ).values('pk'))
+        users = users.filter(_prefix_filter('username_lower', term) | email_match)
+    return _autocomplete_response(users.order_by('username_lower').only('pk', 'username'), lambda user: user.username)
+
+@login_required
+def group_autocomplete_view(request: HttpRequest) -> JsonResponse:
+    """
+    Podpowiada grupy użytkowników do formularza uprawnień quizu.
+
+    Szuka prefiksu nazwy grupy bez rozróżniania wielkości liter (indeks
+    na `LOWER(name)`) i zwraca co najwyżej `AUTOCOMPLETE_LIMIT` wyników.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (GET: 'q' - szukany prefiks).
+
+    Returns:
+        JsonResponse: `{"results": [{"id": ..., "text": <nazwa grupy>}, ...]}`.
+    """
+    term = request.GET.get('q', '').strip().lower()
+    groups = QuizGroup.objects.annotate(name_lower=Lower('name'))
+    if term:
+        groups = groups.filter(_prefix_filter('name_lower', term))
+    return _autocomplete_response(groups.order_by('name_lower').only('pk', 'name'), lambda group: group.name)
+
+@login_required
+def bank_list_view(request: HttpRequest) -> HttpResponse:
+    """
+    Wyświetla banki pytań użytkownika i banki udostępnione oraz tworzy nowy bank.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+
+    Returns:
+        HttpResponse: Wyrenderowany szablon 'quizzes/bank_list.html' lub przekierowanie do nowego banku.
+    """
+    form = QuestionBankForm(request.POST or None)
+    if request.method == 'POST' and form.is_valid():
+        bank = form.save(commit=False)
+        bank.owner = request.user
+        bank.save()
+        messages.success(request, f"Utworzono bank pytań \"{bank.name}\".")
+        return redirect('bank-detail', pk=bank.pk)
+
+    banks = QuestionBank.available_to(request.user).select_related('owner').annotate(
+        question_count=Count('questions', distinct=True),
+    )
+    return render(request, 'quizzes/bank_list.html', {'banks': banks, 'form': form})
+
+@login_required
+def bank_detail_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Wyświetla pytania banku i dołącza wybrane pytania do quizu użytkownika.
+
+    Dołączenie nie kopiuje pytania - quiz odwołuje się do niego przez `QuizBankItem`.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (POST: 'quiz' i lista 'questions').
+        pk (int): Klucz główny banku.
+
+    Returns:
+        HttpResponse: Wyrenderowany szablon 'quizzes/bank_detail.html' lub przekierowanie do quizu.
+    """
+    bank = get_object_or_404(QuestionBank.available_to(request.user), pk=pk)
+
+    if request.method == 'POST':
+        quiz_id = request.POST.get('quiz', '')
+        question_ids = request.POST.getlist('questions')
+        if not quiz_id.isdigit() or not all(qid.isdigit() for qid in question_ids):
+            return HttpResponseBadRequest("Niepoprawny quiz lub lista pytań.")
+        quiz = get_object_or_404(Quiz, pk=quiz_id)
+        _check_edit_permission(request.user, quiz)
+        questions = list(bank.questions.filter(pk__in=[int(qid) for qid in question_ids]))
+        with transaction.atomic():
+            added = QuizBankItem.link(quiz, questions)
+        messages.success(request, f"Dołączono pytania z banku: {added}.")
+        return redirect('quiz-edit', pk=quiz.pk)
+
+    return render(request, 'quizzes/bank_detail.html', {
+        'bank': bank,
+        'questions': bank.questions.prefetch_related('answers').annotate(
+            quiz_count=Count('quiz_links'),
+        ).order_by('pk'),
+        'can_edit': bank.can_edit(request.user),
+        'quizzes': Quiz.objects.filter(author=request.user).order_by('title'),
     })
 
+@login_required
+@require_POST
+def question_to_bank_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Przenosi pytanie quizu do banku pytań, zachowując je w quizie jako dołączenie.
+
+    Pytanie zachowuje klucz, odpowiedzi i pozycję w quizie; inne quizy mogą
+    od tej chwili korzystać z niego bez tworzenia kopii. Od przeniesienia pytanie
+    edytuje właściciel banku, dlatego przenosić może tylko autor quizu
+    (do własnego banku) - edytorzy quizu nie mogą przejąć jego pytań.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP z polem 'bank'.
+        pk (int): Klucz główny pytania.
+
+    Returns:
+        HttpResponse: Przekierowanie do edycji quizu.
+
+    Raises:
+        PermissionDenied: Jeśli użytkownik nie jest autorem quizu.
+    """
+    question = get_object_or_404(Question, pk=pk, quiz__isnull=False)
+    quiz = question.quiz
+    if quiz.author_id != request.user.pk:
+        raise PermissionDenied("Tylko autor quizu może przenosić jego pytania do banku.")
+    bank_id = request.POST.get('bank', '')
+    if not bank_id.isdigit():
+        return HttpResponseBadRequest("Niepoprawny bank pytań.")
+    bank = get_object_or_404(QuestionBank, pk=bank_id, owner=request.user)
+
+    with transaction.atomic():
+        QuizBankItem.objects.create(quiz=quiz, question=question, rank=question.rank)
+        question.quiz, question.bank = None, bank
+        question.save(update_fields=['quiz', 'bank'])
+        Quiz.bump_content_version(quiz.pk)
+    messages.success(request, f"Pytanie przeniesiono do banku \"{bank.name}\".")
+    return redirect('quiz-edit', pk=quiz.pk)
+
+@login_required
+@require_POST
+def quiz_bank_unlink_view(request: HttpRequest, pk: int, link_pk: int) -> HttpResponse:
+    """
+    Odłącza pytanie z banku od quizu (pytanie pozostaje w banku).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny quizu.
+        link_pk (int): Klucz główny dołączenia (`QuizBankItem`).
+
+    Returns:
+        HttpResponse: Przekierowanie do edycji quizu.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+    with transaction.atomic():
+        get_object_or_404(QuizBankItem, pk=link_pk, quiz=quiz).delete()
+        Quiz.bump_content_version(quiz.pk)
+    messages.success(request, "Odłączono pytanie z banku.")
+    return redirect('quiz-edit', pk=quiz.pk)
+
 @login_required
 def quiz_generate_view(request: HttpRequest) -> HttpResponse:
     """
-    Generuje quiz automatycznie przy użyciu sztucznej inteligencji (HuggingFace API).
+    Zleca automatyczne wygenerowanie quizu przez sztuczną inteligencję.
 
-    Wysyła zapytanie do modelu LLM (np. Llama 3) z prośbą o wygenerowanie pytań
-    w formacie JSON, parsuje odpowiedź i tworzy strukturę quizu w bazie danych.
+    Jeśli pytania dla tego samego tematu i liczby pytań są w pamięci podręcznej
+    (i użytkownik nie zaznaczył "Wygeneruj od nowa"), quiz jest tworzony od razu,
+    bez zapytania do modelu. W przeciwnym razie widok zapisuje zlecenie
+    `GenerationJob` i przekierowuje na stronę zlecenia, która odpytuje o jego stan.
+    Zapytanie do API i zapis pytań wykonuje worker (`python manage.py run_worker`).
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
 
     Returns:
-        HttpResponse: Formularz generatora lub przekierowanie do edycji wygenerowanego quizu.
+        HttpResponse: Formularz generatora lub przekierowanie do strony zlecenia.
     """
     if request.method == 'POST':
         form = QuizGenerationForm(request.POST)
         if form.is_valid():
             topic = form.cleaned_data['topic']
             count = form.cleaned_data['count']
-            
-            try:
-                if not HF_TOKEN:
-                    raise ValueError("Brak klucza API (HF_TOKEN) w pliku .env")
+            force_fresh = form.cleaned_data['force_fresh']
 
-                headers = {
-                    "Authorization": f"Bearer {HF_TOKEN}",
-                    "Content-Type": "application/json"
-                }
-                
-                system_message = (
-                    "Jesteś ekspertem tworzącym quizy edukacyjne. "
-                    "Twoim zadaniem jest generowanie pytań w formacie czystego JSON. "
-                    "Nie dodawaj żadnych wstępów, wyjaśnień ani formatowania Markdown (np. ```json). "
-                    "Zwróć TYLKO obiekt JSON."
-                )
-                
-                user_prompt = f"""
-                Stwórz quiz w języku polskim na temat: "{topic}".
-                Liczba pytań: {count}.
-                
-                Wymagana struktura JSON:
-                {{
-                    "questions": [
-                        {{
-                            "question": "Treść pytania?",
-                            "answers": ["Odp A", "Odp B", "Odp C", "Odp D"],
-                            "correct_index": 0
-                        }}
-                    ]
-                }}
-                Ważne:
-                1. "correct_index" to numer poprawnej odpowiedzi (0-3).
-                2. Wygeneruj dokładnie {count} pytań.
-                """
-
-                payload = {
-                    "model": "meta-llama/Meta-Llama-3-8B-Instruct", 
-                    "messages": [
-                        {"role": "system", "content": system_message},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "max_tokens": 2048,
-                    "stream": False,
-                    "temperature": 0.7
-                }
-
-                response = requests.post(HF_API_URL, headers=headers, json=payload)
-                
-                if response.status_code != 200:
-                    try:
-                        err_msg = response.json().get('error', response.text)
-                    except:
-                        err_msg = response.text
-                    raise Exception(f"Błąd API ({response.status_code}): {err_msg}")
-
-                result = response.json()
-                
-                if 'choices' in result and len(result['choices']) > 0:
-                    generated_text = result['choices'][0]['message']['content'].strip()
-                else:
-                    raise ValueError(f"Pusta odpowiedź od modelu: {result}")
-                
-                if "```json" in generated_text:
-                    generated_text = generated_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in generated_text:
-                    generated_text = generated_text.split("```")[1].strip()
-
-                try:
-                    data = json.loads(generated_text)
-                except json.JSONDecodeError:
-                    if generated_text.rfind('}') != -1:
-                        fixed_text = generated_text[:generated_text.rfind('}')+1] + "]}"
-                        try:
-                            data = json.loads(fixed_text)
-                        except:
-                            raise ValueError("Otrzymano niepoprawny JSON od AI.")
-                    else:
-                        raise ValueError("Otrzymano niepoprawny JSON od AI.")
-
-                questions_list = data.get('questions', [])
-
-                if not questions_list:
-                    raise ValueError("Lista pytań jest pusta.")
+            records = None if force_fresh else get_cached_records(topic, count)
+            if records:
+                quiz = create_generated_quiz(request.user, topic, records)
+                messages.success(request, f"Sukces! Wygenerowano quiz z {len(records)} pytaniami.")
+                return redirect('quiz-edit', pk=quiz.pk)
 
-                with transaction.atomic():
-                    new_quiz = Quiz.objects.create(
-                        title=f"AI Quiz: {topic}",
-                        author=request.user,
-                        visibility='PRIVATE'
-                    )
-                    
-                    for item in questions_list:
-                        q_text = item.get('question')
-                        answers = item.get('answers', [])
-                        correct_idx = item.get('correct_index', 0)
-                        
-                        if q_text and isinstance(answers, list) and len(answers) >= 2:
-                            if not isinstance(correct_idx, int) or correct_idx < 0 or correct_idx >= len(answers):
-                                correct_idx = 0
-                            
-                            q_obj = Question.objects.create(
-                                quiz=new_quiz,
-                                text=q_text,
-                                question_type=Question.QuestionType.SINGLE
-                            )
-                            
-                            for i, ans_text in enumerate(answers):
-                                Answer.objects.create(
-                                    question=q_obj,
-                                    text=str(ans_text),
-                                    is_correct=(i == correct_idx)
-                                )
-
-                messages.success(request, f"Sukces! Wygenerowano quiz z {len(questions_list)} pytaniami.")
-                return redirect('quiz-edit', pk=new_quiz.pk)
-
-            except Exception as e:
-                print(f"DEBUG ERROR: {str(e)}")
-                messages.error(request, f"Wystąpił błąd: {str(e)}")
-                
+            job = GenerationJob.objects.create(
+                created_by=request.user,
+                topic=topic,
+                count=count,
+                force_fresh=force_fresh,
+            )
+            return redirect('generation-job', pk=job.pk)
     else:
         form = QuizGenerationForm()
 
     return render(request, 'quizzes/quiz_generate.html', {'form': form})
 
+@login_required
+def generation_job_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Strona oczekiwania na wygenerowanie quizu.
+
+    Dopóki zlecenie trwa, wyświetla stan i odpytuje `generation_job_status_view`.
+    Po sukcesie przekierowuje do edycji wygenerowanego quizu, a po błędzie
+    wraca do formularza generatora z komunikatem.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny zlecenia `GenerationJob`.
+
+    Returns:
+        HttpResponse: Strona zlecenia lub przekierowanie po jego zakończeniu.
+    """
+    job = get_object_or_404(GenerationJob, pk=pk, created_by=request.user)
+
+    if job.status == GenerationJob.Status.DONE and job.quiz_id:
+        if job.error:
+            messages.warning(request, f"{job.error}. Zachowano już wygenerowane pytania.")
+        else:
+            messages.success(request, f"Sukces! Wygenerowano quiz z {job.quiz.questions.count()} pytaniami.")
+        return redirect('quiz-edit', pk=job.quiz_id)
+    if job.status == GenerationJob.Status.FAILED:
+        messages.error(request, f"Wystąpił błąd: {job.error}")
+        return redirect('quiz-generate')
+
+    return render(request, 'quizzes/generation_job.html', {'job': job})
+
+@login_required
+def generation_job_status_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Zwraca stan zlecenia generowania w formacie JSON.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny zlecenia `GenerationJob`.
+
+    Returns:
+        JsonResponse: Słownik z kluczami 'status', 'status_display', 'error', 'active',
+            'questions_done' i 'time_to_first_question' (sekundy lub null).
+    """
+    job = get_object_or_404(GenerationJob, pk=pk, created_by=request.user)
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'error': job.error,
+        'active': job.is_active,
+        'questions_done': job.questions_done,
+        'time_to_first_question': job.time_to_first_question,
+    })
+
 @login_required
 def question_create_view(request: HttpRequest, quiz_pk: int) -> HttpResponse:
     """
@@ -532,11 +881,14 @@ def question_create_view(request: HttpRequest, quiz_pk: int) -> HttpResponse:
             elif question_type == Question.QuestionType.MULTIPLE and correct_answers_count == 0:
                 question_form.add_error('question_type', 'Pytanie wielokrotnego wyboru musi mieć przynajmniej jedną poprawną odpowiedź.')
             else:
-                question = question_form.save(commit=False)
-                question.quiz = quiz
-                question.save()
-                answer_formset.instance = question
-                answer_formset.save()
+                with transaction.atomic():
+                    question = question_form.save(commit=False)
+                    question.quiz = quiz
+                    question.save()
+                    answer_formset.instance = question
+                    answer_formset.save()
+                    question.update_minhash()
+                    Quiz.bump_content_version(quiz.pk)
                 messages.success(request, "Nowe pytanie zostało dodane.")
                 return redirect('quiz-edit', pk=quiz.pk)
     else:
@@ -555,6 +907,9 @@ def question_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Edytuje istniejące pytanie i jego odpowiedzi.
 
+    Poprawka pytania z banku pytań obowiązuje we wszystkich quizach, które go używają.
+    Zapis pytania quizu jest odrzucany, jeśli quiz zmienił się od wczytania formularza.
+
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
         pk (int): Klucz główny edytowanego pytania.
@@ -563,7 +918,7 @@ def question_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
         HttpResponse: Formularz edycji pytania.
     """
     question = get_object_or_404(Question, pk=pk)
-    _check_edit_permission(request.user, question.quiz)
+    _check_question_permission(request.user, question)
     
     if request.method == 'POST':
         question_form = QuestionForm(request.POST, instance=question)
@@ -581,10 +936,19 @@ def question_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
             elif question_type == Question.QuestionType.MULTIPLE and correct_answers_count == 0:
                 question_form.add_error('question_type', 'Pytanie wielokrotnego wyboru musi mieć przynajmniej jedną poprawną odpowiedź.')
             else:
-                question_form.save()
-                answer_formset.save()
-                messages.success(request, "Pytanie zostało zaktualizowane.")
-                return redirect('quiz-edit', pk=question.quiz.pk)
+                with transaction.atomic():
+                    # Pytanie z banku nie ma jednego quizu - zmienia wersje wszystkich quizów, które go używają.
+                    saved = _claim_content_version(request, question.quiz) if question.quiz_id else True
+                    if saved:
+                        question_form.save()
+                        answer_formset.save()
+                        question.update_minhash()
+                        if question.bank_id is not None:
+                            question.bump_quiz_versions()
+                if saved:
+                    messages.success(request, "Pytanie zostało zaktualizowane.")
+                    return _question_owner_redirect(question)
+                question_form.add_error(None, STALE_VERSION_ERROR)
     else:
         question_form = QuestionForm(instance=question)
         answer_formset = AnswerFormSet(instance=question)
@@ -592,10 +956,104 @@ def question_edit_view(request: HttpRequest, pk: int) -> HttpResponse:
     context = {
         'question_form': question_form,
         'answer_formset': answer_formset,
-        'quiz': question.quiz
+        'quiz': question.quiz,
+        'bank': question.bank,
+        'content_version': request.POST.get('content_version', question.quiz.content_version if question.quiz_id else None),
     }
     return render(request, 'quizzes/question_form.html', context)
 
+@login_required
+def quiz_bulk_editor_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Wyświetla arkuszowy edytor wszystkich pytań quizu.
+
+    Strona pobiera pytania i zapisuje zmiany przez `quiz_bulk_edit_api_view`,
+    wysyłając wszystkie zmienione wiersze jednym żądaniem.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny edytowanego quizu.
+
+    Returns:
+        HttpResponse: Wyrenderowany szablon 'quizzes/quiz_bulk_editor.html'.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+    rehydrate_quiz(quiz)
+    return render(request, 'quizzes/quiz_bulk_editor.html', {
+        'quiz': quiz,
+        'question_types': Question.QuestionType.choices,
+    })
+
+@login_required
+@require_http_methods(['GET', 'POST'])
+def quiz_bulk_edit_api_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    API zbiorczej edycji pytań (JSON na wejściu i wyjściu).
+
+    GET zwraca wszystkie pytania quizu z odpowiedziami w kolejności rang, także
+    dołączone z banków (z kluczem 'bank' - edytor pokazuje je tylko do odczytu,
+    bo zmienia się je w banku). POST przyjmuje paczkę zmian (format opisany
+    w `quizzes.bulk_edit`) dotyczącą pytań własnych quizu i zapisuje ją w jednej transakcji.
+    Uprawnienia są sprawdzane raz dla całej paczki.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (dla POST treść w formacie JSON).
+        pk (int): Klucz główny edytowanego quizu.
+
+    Returns:
+        JsonResponse: Pytania quizu, wynik zapisu lub lista błędów 'errors' (status 400).
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+
+    if request.method == 'GET':
+        questions = quiz.question_pool().prefetch_related('answers')
+        return JsonResponse({
+            'questions': [serialize_question(q) for q in questions],
+            'content_version': quiz.content_version,
+        })
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'errors': ["Niepoprawny format JSON."]}, status=400)
+    try:
+        result = apply_bulk_edit(quiz, payload)
+    except ValidationError as e:
+        return JsonResponse({'errors': e.messages}, status=400)
+    return JsonResponse(result)
+
+@login_required
+@require_POST
+def question_move_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Przenosi pytanie w inne miejsce quizu (zmienia się tylko ranga przenoszonego pytania).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP z polem 'after' - kluczem pytania,
+            za którym ma się znaleźć przenoszone pytanie (puste - początek quizu).
+        pk (int): Klucz główny przenoszonego pytania.
+
+    Returns:
+        JsonResponse: Klucz i nowa ranga pytania oraz nowa wersja quizu lub błąd (status 400).
+    """
+    question = get_object_or_404(Question, pk=pk, quiz__isnull=False)
+    _check_edit_permission(request.user, question.quiz)
+
+    previous = None
+    after_id = request.POST.get('after', '')
+    if after_id:
+        if not after_id.isdigit() or int(after_id) == question.pk:
+            return JsonResponse({'error': "Niepoprawne pytanie docelowe."}, status=400)
+        previous = question.quiz.question_pool().filter(pk=after_id).first()
+        if previous is None:
+            return JsonResponse({'error': "Pytanie docelowe nie należy do tego quizu."}, status=400)
+
+    rank = question.move_after(previous)
+    version = Quiz.objects.values_list('content_version', flat=True).get(pk=question.quiz_id)
+    return JsonResponse({'id': question.pk, 'rank': rank, 'content_version': version})
+
 @login_required
 def question_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
@@ -609,12 +1067,14 @@ def question_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
         HttpResponse: Potwierdzenie usunięcia lub przekierowanie.
     """
     question = get_object_or_404(Question, pk=pk)
-    _check_edit_permission(request.user, question.quiz)
+    _check_question_permission(request.user, question)
     if request.method == 'POST':
-        quiz_pk = question.quiz.pk
-        question.delete()
+        response = _question_owner_redirect(question)
+        with transaction.atomic():
+            question.bump_quiz_versions()
+            question.delete()
         messages.success(request, "Pytanie zostało usunięte.")
-        return redirect('quiz-edit', pk=quiz_pk)
+        return response
     return render(request, 'quizzes/question_confirm_delete.html', {'question': question})
 
 @login_required
@@ -622,7 +1082,9 @@ def quiz_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Usuwa cały quiz.
 
-    Operacja dozwolona tylko dla autora quizu.
+    Operacja dozwolona tylko dla autora quizu. Quiz jest od razu ukrywany
+    (`Quiz.soft_delete`), a pytania, odpowiedzi i podejścia usuwa partiami
+    polecenie `purge_deleted`, więc usunięcie dużego quizu nie blokuje bazy.
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -634,18 +1096,43 @@ def quiz_delete_view(request: HttpRequest, pk: int) -> HttpResponse:
     # Usuwać quiz może tylko autor
     quiz = get_object_or_404(Quiz, pk=pk, author=request.user)
     if request.method == 'POST':
-        quiz.delete()
+        quiz.soft_delete()
         messages.success(request, "Quiz został usunięty.")
         return redirect('my-quizzes')
     return render(request, 'quizzes/quiz_confirm_delete.html', {'quiz': quiz})
 
+@login_required
+@require_POST
+def quiz_duplicate_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Tworzy kopię quizu (z pytaniami i odpowiedziami) należącą do zalogowanego użytkownika.
+
+    Kopiowanie odbywa się po stronie bazy danych (`quizzes.cloning.clone_quiz`),
+    więc czas nie zależy istotnie od liczby pytań. Uprawnienia są kopiowane
+    tylko po zaznaczeniu pola 'with_permissions'.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny kopiowanego quizu.
+
+    Returns:
+        HttpResponse: Przekierowanie do edycji kopii.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+    copy = clone_quiz(quiz, author=request.user, include_permissions=bool(request.POST.get('with_permissions')))
+    messages.success(request, f"Utworzono kopię quizu \"{quiz.title}\".")
+    return redirect('quiz-edit', pk=copy.pk)
+
 def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Obsługuje proces rozwiązywania quizu przez użytkownika.
 
     Metoda GET:
         Przygotowuje quiz, losuje pytania zgodnie z limitem `questions_count_limit`,
-        miesza kolejność odpowiedzi i renderuje interfejs rozwiązywania.
+        miesza kolejność odpowiedzi i renderuje interfejs rozwiązywania. W trybie
+        stałej kolejności (`Quiz.fixed_order`) pytania i odpowiedzi nie są mieszane,
+        a limit obejmuje pierwsze pytania według rang.
 
     Metoda POST:
         Odbiera odpowiedzi użytkownika, oblicza wynik, zapisuje próbę (`QuizAttempt`)
@@ -663,8 +1150,9 @@ def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
     if not _can_view_quiz(request.user, quiz):
         messages.error(request, "Nie masz uprawnień do wyświetlenia tego quizu.")
         return redirect('home')
+    rehydrate_quiz(quiz)
 
-    if quiz.questions.count() == 0:
+    if not quiz.question_pool().exists():
         messages.info(request, "Ten quiz nie ma jeszcze pytań.")
         return redirect('quiz-detail', pk=quiz.pk)
     
@@ -678,13 +1166,13 @@ def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
         if question_ids_str:
             try:
                 question_ids = [int(qid) for qid in question_ids_str.split(',') if qid.strip().isdigit()]
-                questions_to_grade = quiz.questions.filter(id__in=question_ids).prefetch_related('answers')
+                questions_to_grade = quiz.question_pool().filter(id__in=question_ids).prefetch_related('answers')
             except ValueError:
                 pass
         
         # Zabezpieczenie: jeśli lista jest pusta (błąd formularza), weź wszystkie (to powodowało błąd 50 pytań)
         if not questions_to_grade:
-            questions_to_grade = quiz.questions.prefetch_related('answers')
+            questions_to_grade = quiz.question_pool().prefetch_related('answers')
 
         total = len(questions_to_grade)
         correct_count = 0
@@ -739,9 +1227,10 @@ def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
         })
     
     else:
-        # Pobieramy wszystkie pytania
-        all_questions = list(quiz.questions.prefetch_related('answers'))
-        random.shuffle(all_questions) # Mieszamy pulę
+        # Pobieramy wszystkie pytania - własne i z banku (w kolejności rang z edytora)
+        all_questions = list(quiz.question_pool().prefetch_related('answers'))
+        if not quiz.fixed_order:
+            random.shuffle(all_questions) # Mieszamy pulę
 
         # ### ZASTOSOWANIE LIMITU ###
         limit = quiz.questions_count_limit
@@ -757,7 +1246,8 @@ def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
         questions_json = []
         for q in selected_questions:
             answers = list(q.answers.all())
-            random.shuffle(answers)
+            if not quiz.fixed_order:
+                random.shuffle(answers)
             answers_data = [{'id': a.id, 'text': a.text, 'is_correct': a.is_correct} for a in answers]
             questions_json.append({
                 'id': q.id,
@@ -779,13 +1269,58 @@ def quiz_take_view(request: HttpRequest, pk: int) -> HttpResponse:
             'selected_ids_str': selected_ids_str, # ### PRZEKAZANIE DO SZABLONU ###
         })
 
+@login_required
+def quiz_attempts_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Zwraca statystyki i historię podejść quizu (JSON, dla edytorów quizu).
+
+    Domyślnie obejmuje tylko podejścia z bazy; parametr `archived=1` dołącza
+    miesiące przeniesione do archiwum poleceniem `archive_attempts`.
+    Historia jest stronicowana (parametr `page`, 50 podejść na stronę) w bazie;
+    z archiwum odczytywane są tylko miesiące objęte żądaną stroną.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny quizu.
+
+    Returns:
+        JsonResponse: Klucze 'stats' (patrz `quiz_attempt_stats`), 'attempts', 'page' i 'num_pages'.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
+    include_archived = request.GET.get('archived') == '1'
+
+    page = Paginator(quiz_history(quiz, include_archived=include_archived), 50).get_page(request.GET.get('page'))
+    return JsonResponse({
+        'stats': quiz_attempt_stats(quiz, include_archived=include_archived),
+        'attempts': [
+            {
+                'user_id': attempt.user_id,
+                'score': attempt.score,
+                'correct_count': attempt.correct_count,
+                'total_questions': attempt.total_questions,
+                'time_over': attempt.time_over,
+                'timestamp': attempt.timestamp.isoformat(),
+                'archived': attempt.pk is None,
+            }
+            for attempt in page
+        ],
+        'page': page.number,
+        'num_pages': page.paginator.num_pages,
+    })
+
 @login_required
 def quiz_export_json_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Eksportuje quiz do pliku JSON.
 
-    Pobiera strukturę quizu (pytania, odpowiedzi) i zwraca jako plik
-    do pobrania (Content-Disposition attachment).
+    Pobiera strukturę quizu (pytania własne i z banku w kolejności rang, odpowiedzi)
+    i zwraca jako plik do pobrania (Content-Disposition attachment). Pytania z banku
+    zawierają klucz 'bank_question'.
+
+    Treść eksportu jest przechowywana w cache pod kluczem zawierającym wersję quizu
+    (`Quiz.cache_key`), a odpowiedź ma nagłówek ETag - ponowne pobranie niezmienionego
+    quizu kończy się odpowiedzią 304 bez odczytu pytań.
 
     Args:
         request (HttpRequest): Obiekt żądania HTTP.
@@ -796,31 +1331,84 @@ def quiz_export_json_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     quiz = get_object_or_404(Quiz, pk=pk)
     _check_edit_permission(request.user, quiz)
+    rehydrate_quiz(quiz)
 
-    questions_data = []
-    for q in quiz.questions.prefetch_related('answers'):
-        answers_data = [
-            {'text': ans.text, 'is_correct': ans.is_correct}
-            for ans in q.answers.all()
-        ]
-        questions_data.append({
-            'text': q.text,
-            'explanation': q.explanation,
-            'question_type': q.question_type,
-            'answers': answers_data
-        })
-    json_data = {'title': quiz.title, 'questions': questions_data}
-    response = HttpResponse(
-        json.dumps(json_data, indent=4, ensure_ascii=False),
-        content_type='application/json; charset=utf-8'
-    )
+    not_modified = get_conditional_response(request, etag=quiz.etag)
+    if not_modified is not None:
+        return not_modified
+
+    content = cache.get(quiz.cache_key('export-json'))
+    if content is None:
+        content = _export_quiz_json(quiz)
+        cache.set(quiz.cache_key('export-json'), content, settings.QUIZ_CONTENT_CACHE_TTL)
+
+    response = HttpResponse(content, content_type='application/json; charset=utf-8')
     safe_title = slugify(quiz.title) or 'quiz'
     response['Content-Disposition'] = f'attachment; filename="quiz_{quiz.pk}_{safe_title}.json"'
+    response['ETag'] = quiz.etag
     return response
 
+def _export_quiz_json(quiz: Quiz) -> str:
+    """Serializuje pytania quizu (w kolejności rang, z odpowiedziami) do formatu eksportu JSON."""
+    questions_data = []
+    for q in quiz.question_pool().prefetch_related('answers'):
+        question_data = question_record(q)
+        if q.bank_id is not None:
+            # Import do quizu autora z dostępem do banku utworzy dołączenie zamiast kopii.
+            question_data['bank_question'] = q.pk
+        questions_data.append(question_data)
+    json_data = {'title': quiz.title, 'questions': questions_data}
+    return json.dumps(json_data, indent=4, ensure_ascii=False)
+
+def _run_import(request: HttpRequest, quiz: Quiz, importer, file) -> bool:
+    """
+    Wspólna obsługa importu pytań z pliku przy użyciu wskazanego importera.
+
+    Małe pliki są importowane od razu, w jednej transakcji - błąd walidacji dowolnego
+    pytania wycofuje wszystkie zapisane wcześniej partie. Pliki większe niż
+    `QUIZ_IMPORT_INLINE_MAX_BYTES` są zapisywane jako `ImportJob` i importowane
+    w tle przez `run_worker`, dzięki czemu żądanie kończy się natychmiast.
+    Z tej samej ścieżki korzysta import w panelu admina.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (do komunikatów oraz opcji 'atomic' i 'duplicates').
+        quiz (Quiz): Quiz docelowy.
+        importer (BaseImporter): Importer wybranego formatu.
+        file (UploadedFile): Przesłany plik.
+
+    Returns:
+        bool: Czy pytania zaimportowano lub zlecono import (False przy błędzie).
+    """
+    duplicates = request.POST.get('duplicates')
+    if duplicates not in dict(DUPLICATE_MODES):
+        duplicates = settings.QUIZ_IMPORT_DUPLICATES
+
+    if file.size > settings.QUIZ_IMPORT_INLINE_MAX_BYTES:
+        ImportJob.objects.create(
+            quiz=quiz,
+            created_by=request.user,
+            file=file,
+            format_name=importer.format_name,
+            atomic=bool(request.POST.get('atomic')),
+            duplicates=duplicates,
+        )
+        messages.info(request, "Plik jest duży - import został zlecony w tle. Postęp widoczny jest poniżej.")
+        return True
+
+    try:
+        duplicate_filter = DuplicateFilter(quiz, duplicates)
+        with transaction.atomic():
+            count = persist_questions(quiz, duplicate_filter(importer.records(file)))
+        messages.success(request, f"Pomyślnie zaimportowano pytania ({count}). {duplicate_filter.summary()}".strip())
+        return True
+    except ValidationError as e:
+        messages.error(request, f"Błąd walidacji: {e.message}")
+    except Exception as e:
+        messages.error(request, f"Wystąpił nieoczekiwany błąd: {e}")
+    return False
+
 @login_required
 @require_POST
-@transaction.atomic
 def quiz_import_json_view(request: HttpRequest, pk: int) -> HttpResponse:
     """
     Importuje pytania do quizu z pliku JSON.
@@ -848,91 +1436,126 @@ def quiz_import_json_view(request: HttpRequest, pk: int) -> HttpResponse:
         messages.error(request, "Plik musi być w formacie .json.")
         return redirect('quiz-edit', pk=quiz.pk)
 
-    try:
-        try:
-            file_content = file.read().decode('utf-8')
-            data = json.loads(file_content)
-        except UnicodeDecodeError:
-            raise ValidationError("Plik ma niepoprawne kodowanie. Wymagane jest UTF-8.")
-        except json.JSONDecodeError:
-            raise ValidationError("Błąd parsowania pliku JSON. Upewnij się, że plik jest poprawny.")
+    _run_import(request, quiz, get_importer('json'), file)
+    return redirect('quiz-edit', pk=quiz.pk)
 
-        if 'questions' not in data or not isinstance(data['questions'], list):
-            raise ValidationError("Plik JSON musi zawierać klucz 'questions' z listą pytań.")
+@login_required
+@require_POST
+def quiz_import_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Importuje pytania do quizu z pliku w dowolnym obsługiwanym formacie.
 
-        questions_to_create = [] 
+    Format (JSON, CSV, GIFT, Moodle XML) jest dobierany na podstawie rozszerzenia
+    pliku z rejestru w `quizzes.importers`.
 
-        for i, q_data in enumerate(data['questions']):
-            q_num = i + 1
-            
-            if not isinstance(q_data, dict):
-                raise ValidationError(f"Pytanie {q_num}: Nie jest poprawnym obiektem JSON.")
-                
-            text = q_data.get('text')
-            if not text or not isinstance(text, str):
-                raise ValidationError(f"Pytanie {q_num}: Brak lub niepoprawny klucz 'text'.")
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP (musi zawierać plik 'import_file').
+        pk (int): Klucz główny quizu, do którego importujemy pytania.
 
-            question_type = q_data.get('question_type', Question.QuestionType.SINGLE)
-            
-            explanation = q_data.get('explanation', '')
-            answers_data = q_data.get('answers')
-            
-            if not answers_data or not isinstance(answers_data, list) or len(answers_data) < 2:
-                 raise ValidationError(f"Pytanie {q_num}: Musi zawierać listę 'answers' z co najmniej 2 odpowiedziami.")
+    Returns:
+        HttpResponse: Przekierowanie do edycji quizu z komunikatem sukcesu lub błędu.
+    """
+    quiz = get_object_or_404(Quiz, pk=pk)
+    _check_edit_permission(request.user, quiz)
 
-            validated_answers = []
-            
-            # Zliczymy poprawne odpowiedzi dla tego pytania
-            correct_count = 0 
-            
-            for j, ans_data in enumerate(answers_data):
-                ans_num = j + 1
-                if not isinstance(ans_data, dict):
-                     raise ValidationError(f"Pytanie {q_num}, Odpowiedź {ans_num}: Błędny format.")
-                
-                ans_text = ans_data.get('text')
-                is_correct = ans_data.get('is_correct', False) # Domyślnie False
-                
-                if not ans_text:
-                    continue
-                
-                if is_correct:
-                    correct_count += 1
-
-                validated_answers.append({'text': ans_text, 'is_correct': is_correct})
-
-            # --- DODANA WALIDACJA LOGICZNA ---
-            if question_type == 'SINGLE':
-                if correct_count != 1:
-                    raise ValidationError(
-                        f"Pytanie {q_num} ('{text[:30]}...'): Typ 'Jednokrotny wybór' musi mieć dokładnie 1 poprawną odpowiedź (znaleziono {correct_count})."
-                    )
-            elif question_type == 'MULTIPLE':
-                if correct_count < 1:
-                    raise ValidationError(
-                        f"Pytanie {q_num} ('{text[:30]}...'): Typ 'Wielokrotny wybór' musi mieć przynajmniej 1 poprawną odpowiedź."
-                    )
-            
-            questions_to_create.append({
-                'q_obj': Question(quiz=quiz, text=text, explanation=explanation, question_type=question_type),
-                'answers': validated_answers
-            })
-        
-        for q_batch in questions_to_create:
-            q = q_batch['q_obj']
-            q.save() 
-            
-            answers_to_save = [
-                Answer(question=q, text=ans_data['text'], is_correct=ans_data['is_correct'])
-                for ans_data in q_batch['answers']
-            ]
-            Answer.objects.bulk_create(answers_to_save)
-        
-        messages.success(request, f"Pomyślnie zaimportowano pytania.")
+    if 'import_file' not in request.FILES:
+        messages.error(request, "Nie wybrano pliku.")
+        return redirect('quiz-edit', pk=quiz.pk)
 
-    except ValidationError as e:
-        messages.error(request, f"Błąd walidacji: {e.message}")
-    except Exception as e:
-        messages.error(request, f"Wystąpił nieoczekiwany błąd: {e}")
+    file = request.FILES['import_file']
+    importer = get_importer_for_filename(file.name)
+
+    if importer is None:
+        messages.error(request, f"Nieobsługiwany format pliku. Dozwolone: {', '.join(supported_extensions())}.")
+        return redirect('quiz-edit', pk=quiz.pk)
+
+    _run_import(request, quiz, importer, file)
+    return redirect('quiz-edit', pk=quiz.pk)
+
+def _get_import_job_for_editor(request: HttpRequest, pk: int) -> ImportJob:
+    """
+    Pobiera zlecenie importu i sprawdza, czy użytkownik może edytować jego quiz.
+
+    Raises:
+        PermissionDenied: Jeśli użytkownik nie ma uprawnień do edycji quizu.
+    """
+    job = get_object_or_404(ImportJob.objects.select_related('quiz'), pk=pk)
+    _check_edit_permission(request.user, job.quiz)
+    return job
 
-    return redirect('quiz-edit', pk=quiz.pk)
\ No newline at end of file
+@login_required
+def import_job_status_view(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Zwraca stan zlecenia importu w formacie JSON (odpytywany przez stronę edycji quizu).
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny zlecenia `ImportJob`.
+
+    Returns:
+        JsonResponse: Słownik z kluczami 'status', 'status_display', 'processed',
+            'progress', 'error' i 'active'.
+    """
+    job = _get_import_job_for_editor(request, pk)
+    return JsonResponse({
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'processed': job.processed_count,
+        'progress': job.progress,
+        'error': job.error,
+        'active': job.is_active,
+    })
+
+@login_required
+@require_POST
+def import_job_cancel_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Anuluje zlecenie importu.
+
+    Oczekujące zlecenie jest anulowane od razu (przesłany plik jest usuwany),
+    a wykonywane - oznaczane flagą `cancel_requested`, którą worker sprawdza
+    przed każdą partią.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+        pk (int): Klucz główny zlecenia `ImportJob`.
+
+    Returns:
+        HttpResponse: Stan zlecenia (JSON) dla żądań AJAX lub przekierowanie do edycji quizu.
+    """
+    job = _get_import_job_for_editor(request, pk)
+    cancelled_now = ImportJob.objects.filter(pk=job.pk, status=ImportJob.Status.PENDING).update(
+        status=ImportJob.Status.CANCELLED,
+        cancel_requested=True,
+    )
+    if cancelled_now:
+        job.file.delete(save=False)
+    else:
+        ImportJob.objects.filter(pk=job.pk, status=ImportJob.Status.RUNNING).update(cancel_requested=True)
+
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return import_job_status_view(request, pk)
+
+    messages.info(request, "Zlecono anulowanie importu.")
+    return redirect('quiz-edit', pk=job.quiz.pk)
+
+@staff_member_required
+def metrics_view(request: HttpRequest) -> JsonResponse:
+    """
+    Zwraca metryki bieżącego procesu (np. opóźnienia i zużycie tokenów API modelu).
+
+    Dostępne tylko dla administratorów.
+
+    Args:
+        request (HttpRequest): Obiekt żądania HTTP.
+
+    Returns:
+        JsonResponse: Wynik `quizzes.metrics.snapshot()` uzupełniony o statystyki
+            backendów modelu językowego (klucz 'llm_backends') i podejść zebrane
+            ze wszystkich baz podziału (klucz 'attempts') oraz z archiwum (klucz 'archived_attempts').
+    """
+    attempts = QuizAttempt.objects.aggregate_shards(count=Count('pk'), avg_score=Avg('score'), last=Max('timestamp'))
+    archived = AttemptArchive.objects.aggregate(count=Sum('row_count', default=0), files=Count('pk'))
+    return JsonResponse(dict(
+        metrics.snapshot(), llm_backends=get_client().stats(), attempts=attempts, archived_attempts=archived,
+    ))